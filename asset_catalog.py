@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Asset Catalog
+Descubre qué activos se pueden operar y lo guarda en un catálogo JSON
+(history/asset_catalog.json) con payout, disponibilidad y última vez visto.
+
+- Una sola llamada a api.payout() lista todos los símbolos válidos del broker
+  con su payout actual.
+- Los candidatos que no aparecen ahí (variantes de tickers de acciones, etc.)
+  se prueban con get_candles con concurrencia limitada y timeout.
+- Los bots leen el catálogo al arrancar (resolve_pairs) y descartan los pares
+  de config.yaml cerrados o con payout bajo, sin copiar nombres a mano.
+
+Uso:
+    python asset_catalog.py                      # payout() + pares de config.yaml
+    python asset_catalog.py --stocks             # + variantes de tickers de acciones
+    python asset_catalog.py --mock --min-payout 80
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from dotenv import load_dotenv
+
+CATALOG_PATH = "history/asset_catalog.json"
+DEFAULT_MIN_PAYOUT = 70
+DEFAULT_MAX_AGE_HOURS = 24
+PROBE_TIMEOUT = 3
+PROBE_PERIOD = 1500        # Segundos de velas M5 pedidos al probar un símbolo
+
+# Empresas cuyas acciones pueden estar listadas con nombres distintos
+STOCK_COMPANIES = {
+    'Apple': ['AAPL', 'Apple'],
+    'Microsoft': ['MSFT', 'Microsoft'],
+    'Google': ['GOOGL', 'GOOG', 'Google', 'Alphabet'],
+    'Amazon': ['AMZN', 'Amazon'],
+    'Tesla': ['TSLA', 'Tesla'],
+    'Meta': ['META', 'Meta', 'Facebook', 'FB'],
+    'Intel': ['INTC', 'Intel'],
+    'NVIDIA': ['NVDA', 'NVIDIA', 'Nvidia'],
+    'AMD': ['AMD'],
+    'Netflix': ['NFLX', 'Netflix'],
+}
+
+
+def stock_variants(companies: Dict[str, List[str]] = STOCK_COMPANIES) -> List[str]:
+    """Variantes de nombre por ticker (sin sufijo, _otc, #, mayúsculas), sin duplicados."""
+    variants = []
+    for tickers in companies.values():
+        for ticker in tickers:
+            for name in (ticker, ticker.upper()):
+                variants.extend([name, f"{name}_otc", f"#{name}", f"#{name}_otc"])
+    return list(dict.fromkeys(variants))
+
+
+class AssetCatalog:
+    """
+    Catálogo persistido de activos: {asset: {payout, available, last_seen, source, ...}}.
+    Escrituras atómicas (archivo temporal + os.replace).
+    """
+
+    def __init__(self, path: str = CATALOG_PATH):
+        self.path = path
+        self.assets: Dict[str, Dict] = {}
+        self.updated_at: Optional[float] = None
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                self.assets = data.get('assets', {})
+                self.updated_at = data.get('updated_at')
+            except Exception as e:
+                print(f"⚠️ Catálogo ilegible ({e}), empezando de cero")
+
+    def update(self, asset: str, available: bool, payout: Optional[int] = None,
+               source: str = "payout", **extra):
+        """Registrar el resultado de una consulta; last_seen solo avanza si está disponible."""
+        now = time.time()
+        entry = self.assets.setdefault(asset, {'first_seen': now})
+        entry.update(available=bool(available), source=source, checked_at=now, **extra)
+        if payout is not None:
+            entry['payout'] = int(payout)
+        if available:
+            entry['last_seen'] = now
+
+    def mark_missing(self, assets: Iterable[str]):
+        """Activos del catálogo que ya no aparecen en payout(): no disponibles."""
+        for asset in assets:
+            if asset in self.assets:
+                self.update(asset, available=False, source="payout")
+
+    def save(self):
+        self.updated_at = time.time()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump({'updated_at': self.updated_at, 'assets': self.assets}, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def age_hours(self) -> Optional[float]:
+        return (time.time() - self.updated_at) / 3600 if self.updated_at else None
+
+    def tradable(self, min_payout: int = DEFAULT_MIN_PAYOUT) -> List[str]:
+        """Activos disponibles con payout >= min_payout, mejor payout primero."""
+        rows = [(asset, e.get('payout') or 0) for asset, e in self.assets.items()
+                if e.get('available') and (e.get('payout') or 0) >= min_payout]
+        return [asset for asset, _ in sorted(rows, key=lambda r: (-r[1], r[0]))]
+
+    def filter_pairs(self, pairs: List[str], min_payout: int = DEFAULT_MIN_PAYOUT) -> List[str]:
+        """
+        Pares de `pairs` (mismo orden) que el catálogo da como operables.
+
+        Pares que el catálogo no conoce se mantienen (no hay info para descartarlos).
+        """
+        kept = []
+        for pair in pairs:
+            entry = self.assets.get(pair)
+            if entry is None:
+                kept.append(pair)
+            elif entry.get('available') and (entry.get('payout') is None or entry['payout'] >= min_payout):
+                kept.append(pair)
+        return kept
+
+
+class AssetScanner:
+    """Descubre activos con payout() y prueba candidatos con concurrencia limitada."""
+
+    def __init__(self, api, catalog: AssetCatalog, max_concurrent: int = 4,
+                 timeout: float = PROBE_TIMEOUT):
+        """
+        Args:
+            api: PocketOptionAsync (real, mock o replay)
+            catalog: Catálogo a actualizar
+            max_concurrent: Probes simultáneos a la API
+            timeout: Segundos por probe
+        """
+        self.api = api
+        self.catalog = catalog
+        self.timeout = timeout
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.requests = 0
+
+    async def list_payouts(self) -> Optional[Dict[str, int]]:
+        """Todos los símbolos del broker con su payout (None si la API no lo soporta)."""
+        payout = getattr(self.api, 'payout', None)
+        if payout is None:
+            return None
+        try:
+            self.requests += 1
+            payouts = await asyncio.wait_for(payout(), timeout=self.timeout * 5)
+        except Exception as e:
+            print(f"⚠️ payout() falló: {type(e).__name__} {e}")
+            return None
+        return payouts if isinstance(payouts, dict) else None
+
+    async def probe(self, asset: str) -> bool:
+        """True si get_candles devuelve velas para el símbolo."""
+        async with self.semaphore:
+            self.requests += 1
+            try:
+                candles = await asyncio.wait_for(
+                    self.api.get_candles(asset, 300, PROBE_PERIOD),
+                    timeout=self.timeout
+                )
+            except asyncio.TimeoutError:
+                return False
+            except Exception as e:
+                if "Invalid asset" not in str(e):
+                    print(f"⚠️ {asset}: {str(e)[:60]}")
+                return False
+        return bool(candles)
+
+    async def discover(self, candidates: Iterable[str] = ()) -> Dict[str, int]:
+        """
+        Actualiza el catálogo: payout() completo + probe de los candidatos que no están ahí.
+
+        Returns:
+            {'listed': n, 'probed': n, 'found': n}
+        """
+        payouts = await self.list_payouts()
+        listed = 0
+        if payouts is not None:
+            for asset, value in payouts.items():
+                self.catalog.update(asset, available=bool(value), payout=value, source="payout")
+            self.catalog.mark_missing(a for a in list(self.catalog.assets)
+                                      if a not in payouts and self.catalog.assets[a].get('source') == "payout")
+            listed = len(payouts)
+
+        to_probe = [c for c in dict.fromkeys(candidates) if payouts is None or c not in payouts]
+        results = await asyncio.gather(*(self.probe(asset) for asset in to_probe))
+        for asset, ok in zip(to_probe, results):
+            self.catalog.update(asset, available=ok, source="probe")
+
+        self.catalog.save()
+        return {'listed': listed, 'probed': len(to_probe), 'found': sum(results)}
+
+
+def resolve_pairs(pairs: List[str], path: str = CATALOG_PATH, min_payout: int = DEFAULT_MIN_PAYOUT,
+                  max_age_hours: float = DEFAULT_MAX_AGE_HOURS) -> List[str]:
+    """
+    Pares a operar al arrancar un bot: los configurados, filtrados por el catálogo.
+
+    Sin catálogo, catálogo viejo (> max_age_hours) o si el filtro no deja ninguno,
+    devuelve `pairs` sin cambios.
+    """
+    if not os.path.exists(path):
+        return list(pairs)
+    catalog = AssetCatalog(path)
+    age = catalog.age_hours()
+    if age is None or age > max_age_hours:
+        print(f"⚠️ Catálogo de activos desactualizado ({path}), usando pares configurados")
+        return list(pairs)
+
+    kept = catalog.filter_pairs(pairs, min_payout)
+    dropped = [p for p in pairs if p not in kept]
+    if not kept:
+        print("⚠️ El catálogo descarta todos los pares configurados, usando la lista completa")
+        return list(pairs)
+    if dropped:
+        print(f"🗂️ Catálogo: {len(kept)}/{len(pairs)} pares operables "
+              f"(fuera: {', '.join(dropped)})")
+    return kept
+
+
+async def main():
+    from client_pool import client_pool
+    from config_loader import load_config
+
+    parser = argparse.ArgumentParser(description='Descubrimiento de activos y catálogo con payout')
+    parser.add_argument('--pairs', nargs='*', help='Candidatos extra a probar (default: pares de config.yaml)')
+    parser.add_argument('--stocks', action='store_true', help='Probar variantes de tickers de acciones')
+    parser.add_argument('--concurrency', type=int, default=4, help='Probes simultáneos')
+    parser.add_argument('--timeout', type=float, default=PROBE_TIMEOUT)
+    parser.add_argument('--min-payout', type=int, default=DEFAULT_MIN_PAYOUT)
+    parser.add_argument('--catalog', default=CATALOG_PATH)
+    parser.add_argument('--mock', action='store_true', help='Usar mock_pocketoption')
+    args = parser.parse_args()
+
+    candidates = list(args.pairs if args.pairs is not None else load_config()['trading']['pairs'])
+    if args.stocks:
+        candidates += stock_variants()
+
+    if args.mock:
+        from mock_pocketoption import PocketOptionAsync
+        api = PocketOptionAsync()
+    else:
+        from BinaryOptionsToolsV2.pocketoption import PocketOptionAsync
+        load_dotenv()
+        api = await client_pool.acquire(factory=PocketOptionAsync)
+
+    print("=" * 60)
+    print("🗂️ CATÁLOGO DE ACTIVOS")
+    print("=" * 60)
+    start = time.perf_counter()
+    catalog = AssetCatalog(args.catalog)
+    scanner = AssetScanner(api, catalog, max_concurrent=args.concurrency, timeout=args.timeout)
+    summary = await scanner.discover(candidates)
+
+    tradable = catalog.tradable(args.min_payout)
+    print(f"\n✅ payout(): {summary['listed']} símbolos | probados: {summary['probed']} "
+          f"(encontrados {summary['found']}) | {scanner.requests} requests "
+          f"| {time.perf_counter() - start:.1f}s")
+    print(f"💰 Operables con payout >= {args.min_payout}%: {len(tradable)}")
+    for asset in tradable[:30]:
+        print(f"  {asset:<20} {catalog.assets[asset].get('payout', '?')}%")
+    probed_ok = [a for a, e in catalog.assets.items() if e.get('source') == "probe" and e.get('available')]
+    if probed_ok:
+        print(f"🔍 Encontrados por probe (sin payout): {', '.join(sorted(probed_ok))}")
+    print(f"💾 Catálogo: {args.catalog} ({datetime.now().strftime('%Y-%m-%d %H:%M')})")
+    if not args.mock:
+        await client_pool.close_all()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -16,13 +16,38 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report
 
+from feature_store import features_from_trades
+
 # Configuration
 MIN_TRADES_FOR_TRAINING = 300  # Lowered from 500 for initial testing
 VALIDATION_SPLIT = 0.2
 MODEL_PATH = "ml_model.pkl"
 MODEL_METADATA_PATH = "ml_model_metadata.json"
+CANDIDATE_MODEL_PATH = "ml_model_candidate.pkl"
+CANDIDATE_METADATA_PATH = "ml_model_candidate_metadata.json"
 TRAINING_HISTORY_PATH = "logs/training_history.csv"
 BACKUP_MODELS_TO_KEEP = 3
+# Shadow mode: improved models become candidates, promoted by MLModelManager
+# only after beating production on live forward performance
+SHADOW_MODE = os.getenv("ML_SHADOW_MODE", "1") == "1"
+
+
+def rotate_model_backups(model_path=MODEL_PATH):
+    """Rotate ml_model_backup_N.pkl files and back up the current model"""
+    if not os.path.exists(model_path):
+        return
+    
+    for i in range(BACKUP_MODELS_TO_KEEP - 1, 0, -1):
+        old_backup = f"ml_model_backup_{i}.pkl"
+        new_backup = f"ml_model_backup_{i+1}.pkl"
+        if os.path.exists(old_backup):
+            if os.path.exists(new_backup):
+                os.remove(new_backup)
+            os.rename(old_backup, new_backup)
+    
+    import shutil
+    shutil.copy2(model_path, "ml_model_backup_1.pkl")
+    print("[INFO] Created model backup")
 
 class AutoTrainer:
     def __init__(self):
@@ -80,51 +105,8 @@ class AutoTrainer:
         return all_trades
     
     def prepare_features(self, df):
-        """Prepare features for training"""
-        # Extract features (same as train_ml_model.py)
-        features = []
-        labels = []
-        
-        for _, row in df.iterrows():
-            try:
-                # Features: price, duration_minutes, pair_idx, ema8, ema21, ema55, hour_normalized
-                pair_idx = 0  # Default if pair not in list
-                
-                # Try to extract pair index (you may need to adjust this based on your data)
-                if 'pair' in row:
-                    pair_name = str(row['pair'])
-                    # Simple hash-based index
-                    pair_idx = hash(pair_name) % 100
-                
-                duration_minutes = row.get('expiry_time', 300) / 60  # Convert to minutes
-                
-                # Extract hour from timestamp (0-23 normalized to 0-1)
-                hour_normalized = 0.5  # Default middle of day
-                if 'timestamp' in row:
-                    try:
-                        ts = pd.to_datetime(row['timestamp'])
-                        hour_normalized = ts.hour / 24
-                    except:
-                        pass
-                
-                feature_row = [
-                    row.get('price', 0),
-                    duration_minutes,
-                    pair_idx,
-                    row.get('ema', 0),  # ema8
-                    row.get('ema', 0),  # ema21 (if not available, use same as ema8)
-                    row.get('ema', 0),  # ema55
-                    hour_normalized,  # 7th feature: hour of day
-                ]
-                
-                label = 1 if row['result'] == 'WIN' else 0
-                
-                features.append(feature_row)
-                labels.append(label)
-            except Exception as e:
-                continue
-        
-        return np.array(features), np.array(labels)
+        """Prepare features for training (same definition as live scoring, see feature_store)"""
+        return features_from_trades(df)
     
     def train_new_model(self, X_train, y_train):
         """Train a new Random Forest model"""
@@ -155,22 +137,7 @@ class AutoTrainer:
     
     def backup_current_model(self):
         """Create backup of current model before updating"""
-        if not os.path.exists(MODEL_PATH):
-            return
-        
-        # Rotate backups
-        for i in range(BACKUP_MODELS_TO_KEEP - 1, 0, -1):
-            old_backup = f"ml_model_backup_{i}.pkl"
-            new_backup = f"ml_model_backup_{i+1}.pkl"
-            if os.path.exists(old_backup):
-                if os.path.exists(new_backup):
-                    os.remove(new_backup)
-                os.rename(old_backup, new_backup)
-        
-        # Create new backup
-        import shutil
-        shutil.copy2(MODEL_PATH, "ml_model_backup_1.pkl")
-        print("[INFO] Created model backup")
+        rotate_model_backups(MODEL_PATH)
     
     def save_model(self, model, metadata):
         """Save model and metadata"""
@@ -182,6 +149,14 @@ class AutoTrainer:
         
         print(f"[OK] Model saved to {MODEL_PATH}")
     
+    def save_candidate(self, model, metadata):
+        """Save model as shadow candidate (scored live, not traded)"""
+        joblib.dump(model, CANDIDATE_MODEL_PATH)
+        with open(CANDIDATE_METADATA_PATH, 'w') as f:
+            json.dump(metadata, f, indent=2)
+        
+        print(f"[OK] Candidate saved to {CANDIDATE_MODEL_PATH} (shadow mode)")
+    
     def log_training_attempt(self, trades_used, current_wr, new_wr, updated, reason):
         """Log training attempt to history"""
         os.makedirs("logs", exist_ok=True)
@@ -253,7 +228,6 @@ class AutoTrainer:
             if new_wr > current_wr:
                 improvement = new_wr - current_wr
                 print(f"\n[OK] NEW MODEL IS BETTER (+{improvement:.1f}%)")
-                print("[UPDATE] Updating model...")
                 
                 metadata = {
                     'training_date': datetime.now().isoformat(),
@@ -265,10 +239,16 @@ class AutoTrainer:
                     'improvement': improvement
                 }
                 
-                self.save_model(new_model, metadata)
-                self.log_training_attempt(len(X), current_wr, new_wr, True, f"Improved by {improvement:.1f}%")
-                
-                print("\n[SUCCESS] MODEL UPDATED SUCCESSFULLY!")
+                if SHADOW_MODE:
+                    print("[SHADOW] Saving as candidate for live shadow scoring...")
+                    self.save_candidate(new_model, metadata)
+                    self.log_training_attempt(len(X), current_wr, new_wr, False, f"Candidate (+{improvement:.1f}%) in shadow mode")
+                    print("\n[SUCCESS] CANDIDATE MODEL READY FOR SHADOW SCORING!")
+                else:
+                    print("[UPDATE] Updating model...")
+                    self.save_model(new_model, metadata)
+                    self.log_training_attempt(len(X), current_wr, new_wr, True, f"Improved by {improvement:.1f}%")
+                    print("\n[SUCCESS] MODEL UPDATED SUCCESSFULLY!")
             else:
                 decline = current_wr - new_wr
                 reason = f"New model worse by {decline:.1f}%"
@@ -0,0 +1,343 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Backfill de Históricos
+Descarga velas reales para todos los pares/timeframes de config.yaml, página a
+página y con concurrencia limitada, y las guarda en un archivo columnar por par
+(history/store/<PAIR>.npz, arrays time/open/high/low/close/volume por timeframe).
+
+- Reanudable: el progreso de cada (par, timeframe) queda en un checkpoint JSON
+  y el store es la fuente de verdad (se continúa desde la vela más antigua).
+- Deduplica por timestamp (la descarga más reciente gana).
+- --mock usa mock_pocketoption para probar sin cuenta.
+
+Nota: get_candles solo acepta un período en segundos hasta "ahora" (el offset
+del servidor), así que cada página pide un período mayor y se guardan las
+velas anteriores a la más antigua ya almacenada.
+
+Uso:
+    python backfill_history.py --days 90
+    python backfill_history.py --pairs EURUSD_otc --timeframes M5 --mock
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+from config_loader import load_config
+
+# Configuración
+STORE_DIR = "history/store"
+CHECKPOINT_FILE = "backfill_checkpoint.json"
+DEFAULT_DAYS = 90
+PAGE_BARS = 1000          # Velas por página
+REQUEST_TIMEOUT = 30
+MAX_RETRIES = 3
+CANDLE_COLUMNS = ['time', 'open', 'high', 'low', 'close', 'volume']
+
+
+def normalize_candles(raw) -> Dict[str, np.ndarray]:
+    """
+    Candles de la API (lista de dicts) -> arrays columnar ordenados por time, sin duplicados.
+    """
+    if not raw:
+        return empty_candles()
+
+    df = pd.DataFrame(raw)
+    if 'time' not in df.columns and 'timestamp' in df.columns:
+        df['time'] = df['timestamp']
+    if 'time' not in df.columns:
+        return empty_candles()
+
+    if pd.api.types.is_numeric_dtype(df['time']):
+        times = df['time'].astype(np.int64)
+    else:
+        ts = pd.to_datetime(df['time'], utc=True, errors='coerce')
+        df = df[ts.notna()]
+        times = ts[ts.notna()].astype('int64') // 10**9
+
+    out = {'time': times.to_numpy(dtype=np.int64)}
+    for col in CANDLE_COLUMNS[1:]:
+        if col in df.columns:
+            out[col] = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64)
+        else:
+            out[col] = np.zeros(len(df), dtype=np.float64)
+    return dedupe_candles(out)
+
+
+def empty_candles() -> Dict[str, np.ndarray]:
+    out = {'time': np.empty(0, dtype=np.int64)}
+    for col in CANDLE_COLUMNS[1:]:
+        out[col] = np.empty(0, dtype=np.float64)
+    return out
+
+
+def dedupe_candles(candles: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Ordena por time y deja una vela por timestamp (la primera aparición gana)."""
+    _, idx = np.unique(candles['time'], return_index=True)
+    return {col: values[idx] for col, values in candles.items()}
+
+
+def merge_candles(existing: Dict[str, np.ndarray], new: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Une dos bloques de velas; en timestamps repetidos gana `new`."""
+    merged = {col: np.concatenate([new[col], existing[col]]) for col in CANDLE_COLUMNS}
+    return dedupe_candles(merged)
+
+
+class PairStore:
+    """
+    Un archivo .npz por par con arrays columnar por timeframe (M5_time, M5_close, ...).
+    Escrituras atómicas (archivo temporal + os.replace).
+    """
+
+    def __init__(self, store_dir: str = STORE_DIR):
+        self.store_dir = store_dir
+        os.makedirs(store_dir, exist_ok=True)
+
+    def path(self, pair: str) -> str:
+        return os.path.join(self.store_dir, f"{pair.replace('#', '')}.npz")
+
+    def load(self, pair: str) -> Dict[str, Dict[str, np.ndarray]]:
+        """Todos los timeframes de un par: {tf: {col: array}}"""
+        path = self.path(pair)
+        if not os.path.exists(path):
+            return {}
+        data = {}
+        with np.load(path) as npz:
+            for key in npz.files:
+                tf, col = key.split('_', 1)
+                data.setdefault(tf, {})[col] = npz[key]
+        return data
+
+    def read(self, pair: str, tf: str) -> Dict[str, np.ndarray]:
+        return self.load(pair).get(tf, empty_candles())
+
+    def write(self, pair: str, tf: str, candles: Dict[str, np.ndarray]):
+        data = self.load(pair)
+        data[tf] = candles
+        arrays = {f"{name}_{col}": values for name, cols in data.items() for col, values in cols.items()}
+        tmp = self.path(pair) + ".tmp.npz"
+        np.savez_compressed(tmp, **arrays)
+        os.replace(tmp, self.path(pair))
+
+
+class BackfillCheckpoint:
+    """Progreso por (par, timeframe) persistido en JSON."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.state: Dict[str, Dict] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    self.state = json.load(f)
+            except Exception as e:
+                print(f"⚠️ Checkpoint ilegible ({e}), empezando de cero")
+
+    def get(self, key: str) -> Dict:
+        return self.state.get(key, {})
+
+    def update(self, key: str, **values):
+        self.state.setdefault(key, {}).update(values, updated_at=datetime.now().isoformat())
+        tmp = self.path + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+class HistoryBackfiller:
+    """Pagina get_candles para cada (par, timeframe) con concurrencia limitada."""
+
+    def __init__(
+        self,
+        api,
+        pairs: List[str],
+        timeframes: Dict[str, int],
+        days: float = DEFAULT_DAYS,
+        store_dir: str = STORE_DIR,
+        max_concurrent: int = 2,
+        page_bars: int = PAGE_BARS
+    ):
+        """
+        Args:
+            api: PocketOptionAsync (real o mock)
+            pairs: Pares a descargar
+            timeframes: {"M5": 300, ...}
+            days: Historia objetivo hacia atrás
+            store_dir: Directorio del store columnar
+            max_concurrent: Requests simultáneos a la API
+            page_bars: Velas por página
+        """
+        self.api = api
+        self.pairs = pairs
+        self.timeframes = timeframes
+        self.days = days
+        self.page_bars = page_bars
+        self.store = PairStore(store_dir)
+        self.checkpoint = BackfillCheckpoint(os.path.join(store_dir, CHECKPOINT_FILE))
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        # Un lock por par: varios timeframes escriben el mismo archivo
+        self.pair_locks: Dict[str, asyncio.Lock] = {pair: asyncio.Lock() for pair in pairs}
+        self.requests = 0
+
+    async def fetch(self, pair: str, interval: int, period: int) -> Dict[str, np.ndarray]:
+        """Una página con reintentos y backoff exponencial."""
+        for attempt in range(MAX_RETRIES):
+            try:
+                async with self.semaphore:
+                    self.requests += 1
+                    raw = await asyncio.wait_for(
+                        self.api.get_candles(pair, interval, period),
+                        timeout=REQUEST_TIMEOUT
+                    )
+                return normalize_candles(raw)
+            except Exception as e:
+                wait = 2 ** attempt
+                print(f"⚠️ {pair} {interval}s: {type(e).__name__} {e} - reintento en {wait}s")
+                await asyncio.sleep(wait)
+        raise RuntimeError(f"{pair} {interval}s: sin respuesta tras {MAX_RETRIES} intentos")
+
+    async def save(self, pair: str, tf: str, candles: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Merge con lo almacenado y escritura atómica; devuelve el bloque completo."""
+        async with self.pair_locks[pair]:
+            merged = merge_candles(self.store.read(pair, tf), candles)
+            self.store.write(pair, tf, merged)
+        return merged
+
+    def record(self, key: str, stored: Dict[str, np.ndarray], done: bool):
+        """Guarda el progreso de una serie en el checkpoint."""
+        times = stored['time']
+        self.checkpoint.update(
+            key,
+            oldest=int(times[0]) if len(times) else None,
+            newest=int(times[-1]) if len(times) else None,
+            bars=int(len(times)),
+            days=self.days,
+            done=done
+        )
+
+    async def backfill(self, pair: str, tf: str, interval: int) -> Dict:
+        """Completa la brecha hasta ahora y pagina hacia atrás hasta `days` o hasta agotar la historia."""
+        key = f"{pair}_{tf}"
+        state = self.checkpoint.get(key)
+        stored = self.store.read(pair, tf)
+        now = int(time.time())
+        target_oldest = now - int(self.days * 86400)
+
+        # 1) Velas nuevas desde la última descarga
+        if len(stored['time']):
+            gap = now - int(stored['time'][-1]) + interval
+            stored = await self.save(pair, tf, await self.fetch(pair, interval, gap))
+
+        # 2) Páginas hacia atrás
+        done = state.get('done', False) and state.get('days', 0) >= self.days
+        pages = 0
+        while not done:
+            oldest = int(stored['time'][0]) if len(stored['time']) else now
+            if oldest <= target_oldest:
+                done = True
+                break
+
+            period = (now - oldest) + self.page_bars * interval
+            page = await self.fetch(pair, interval, period)
+            older = page['time'] < oldest
+            added = int(older.sum())
+            if added:
+                stored = await self.save(pair, tf, {col: values[older] for col, values in page.items()})
+            pages += 1
+            done = added == 0  # El servidor no tiene más historia
+            self.record(key, stored, done)
+
+        self.record(key, stored, True)
+        print(f"  ✅ {key}: {len(stored['time'])} velas ({pages} páginas)")
+        return {'pair': pair, 'tf': tf, 'bars': int(len(stored['time'])), 'pages': pages}
+
+    async def run(self) -> List[Dict]:
+        jobs = [
+            self.backfill(pair, tf, interval)
+            for pair in self.pairs
+            for tf, interval in self.timeframes.items()
+        ]
+        results = await asyncio.gather(*jobs, return_exceptions=True)
+        summary = []
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"  ❌ {result}")
+            else:
+                summary.append(result)
+        return summary
+
+
+def load_pair_history(pair: str, tf: str, store_dir: str = STORE_DIR) -> Optional[pd.DataFrame]:
+    """
+    Velas del store como DataFrame (time, timestamp, open, high, low, close, volume).
+
+    Returns:
+        DataFrame o None si el par/timeframe no fue descargado
+    """
+    candles = PairStore(store_dir).read(pair, tf)
+    if not len(candles['time']):
+        return None
+    df = pd.DataFrame(candles)
+    df['timestamp'] = pd.to_datetime(df['time'], unit='s', utc=True)
+    return df
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Backfill de velas históricas al store local')
+    parser.add_argument('--days', type=float, default=DEFAULT_DAYS, help='Días de historia hacia atrás')
+    parser.add_argument('--pairs', nargs='*', help='Pares (default: config.yaml)')
+    parser.add_argument('--timeframes', nargs='*', help='Timeframes, ej. M5 M15 (default: config.yaml)')
+    parser.add_argument('--concurrency', type=int, help='Requests simultáneos (default: system.max_concurrent_requests)')
+    parser.add_argument('--page-bars', type=int, default=PAGE_BARS)
+    parser.add_argument('--store', default=STORE_DIR)
+    parser.add_argument('--mock', action='store_true', help='Usar mock_pocketoption')
+    args = parser.parse_args()
+
+    config = load_config()
+    all_timeframes = config['trading']['timeframes']
+    pairs = args.pairs or config['trading']['pairs']
+    timeframes = {tf: all_timeframes[tf] for tf in (args.timeframes or all_timeframes)}
+    concurrency = args.concurrency or config['system'].get('max_concurrent_requests', 2)
+
+    if args.mock:
+        from mock_pocketoption import PocketOptionAsync
+        api = PocketOptionAsync()
+    else:
+        from BinaryOptionsToolsV2.pocketoption import PocketOptionAsync
+        load_dotenv()
+        api = PocketOptionAsync(ssid=os.getenv("POCKETOPTION_SSID"))
+        await asyncio.sleep(2)  # Esperar conexión
+
+    print("=" * 60)
+    print("📚 BACKFILL DE HISTÓRICOS")
+    print("=" * 60)
+    print(f"Pares: {len(pairs)} | Timeframes: {', '.join(timeframes)} | "
+          f"{args.days:g} días | Concurrencia: {concurrency}")
+
+    start = time.perf_counter()
+    backfiller = HistoryBackfiller(
+        api, pairs, timeframes,
+        days=args.days,
+        store_dir=args.store,
+        max_concurrent=concurrency,
+        page_bars=args.page_bars
+    )
+    summary = await backfiller.run()
+
+    total = sum(s['bars'] for s in summary)
+    print(f"\n✅ {len(summary)} series | {total} velas | {backfiller.requests} requests "
+          f"| {time.perf_counter() - start:.1f}s")
+    print(f"💾 Store: {args.store}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -17,15 +17,28 @@ from strategy import (
     confirm_breakout,
     is_sideways
 )
+from candle_store import load_candle_frames, split_key
+from payout_cache import DEFAULT_PAYOUT, PayoutSeries
 
 # Configuration for Backtest
 INITIAL_BALANCE = 1000
 RISK_PER_TRADE = 0.02
-PAYOUT = 0.92  # 92% payout for wins
+PAYOUT = DEFAULT_PAYOUT  # 92% payout for wins (sin serie registrada en logs/payouts)
 
 def load_history(directory="history"):
+    # Binary .candles files first (memmap, no CSV parsing); CSV only for the rest
+    data = {
+        key: df.rename(columns={
+            'open': 'Open',
+            'close': 'Close',
+            'high': 'High',
+            'low': 'Low',
+            'volume': 'Volume'
+        })
+        for key, df in load_candle_frames(directory).items()
+    }
+    
     files = glob.glob(os.path.join(directory, "*.csv"))
-    data = {}
     for f in files:
         # Expected filename format: PAIR_otc_TF.csv
         filename = os.path.basename(f)
@@ -33,6 +46,8 @@ def load_history(directory="history"):
         if len(parts) >= 3:
             pair = parts[0] + "_" + parts[1]
             tf = parts[2]
+            if f"{pair}_{tf}" in data:
+                continue
             
             try:
                 df = pd.read_csv(f)
@@ -60,9 +75,12 @@ def load_history(directory="history"):
                 
     return data
 
-def run_backtest(df, pair, tf, params):
+def run_backtest(df, pair, tf, params, payouts=None):
     """
     Run strategy on a single dataframe with given parameters.
+    
+    Args:
+        payouts: PayoutSeries with the recorded payouts (None = constant PAYOUT)
     """
     # Unpack parameters
     rsi_period = params.get('rsi_period', 14)
@@ -147,7 +165,8 @@ def run_backtest(df, pair, tf, params):
                 
                 # Record trade
                 amount = max(balance * RISK_PER_TRADE, 1.0)
-                pnl = amount * PAYOUT if win else -amount
+                payout = payouts.at(pair, last['timestamp']) if payouts is not None else PAYOUT
+                pnl = amount * payout if win else -amount
                 balance += pnl
                 
                 trades.append({
@@ -157,6 +176,7 @@ def run_backtest(df, pair, tf, params):
                     'signal': signal,
                     'result': 'WIN' if win else 'LOSS',
                     'pnl': pnl,
+                    'payout': payout,
                     'balance': balance
                 })
                 
@@ -166,6 +186,8 @@ def optimize():
     print("🚀 Starting Self-Learning Optimization...")
     data = load_history()
     print(f"Loaded {len(data)} datasets.")
+    payouts = PayoutSeries.load()
+    print(f"Payout series: {len(payouts.series)} assets recorded (default {PAYOUT:.0%} for the rest)")
     
     # Define parameter grid
     param_grid = [
@@ -186,8 +208,8 @@ def optimize():
         wins = 0
         
         for key, df in data.items():
-            pair, tf = key.split("_", 1) # simple split
-            trades = run_backtest(df, pair, tf, params)
+            pair, tf = split_key(key)  # EURUSD_otc_M5 -> EURUSD_otc (clave de los payouts), M5
+            trades = run_backtest(df, pair, tf, params, payouts)
             
             for t in trades:
                 total_profit += t['pnl']
@@ -14,6 +14,9 @@ from datetime import datetime, timedelta
 import json
 from collections import defaultdict
 
+from feature_store import feature_store, add_emas, EMA7_FEATURES
+from candle_store import load_candle_frames
+
 # Configuración
 INITIAL_BALANCE = 1000
 RISK_PER_TRADE = 0.02
@@ -32,15 +35,19 @@ def load_model():
         return None
 
 def load_history_data(history_dir="history"):
-    """Carga datos históricos de archivos CSV"""
+    """Carga datos históricos (.candles o CSV)"""
     print(f"\n📁 Cargando datos históricos desde {history_dir}...")
     
+    # Formato binario .candles primero (memmap, sin parsear CSV)
+    data = load_candle_frames(history_dir)
+    for key, df in data.items():
+        print(f"  ✅ {key}: {len(df)} velas (.candles)")
+    
     all_files = glob.glob(os.path.join(history_dir, "*.csv"))
-    data = {}
     
     for file in all_files:
         filename = os.path.basename(file)
-        if "_" not in filename:
+        if "_" not in filename or filename[:-4] in data:
             continue
         
         try:
@@ -95,9 +102,7 @@ def calculate_emas(df, window=60):
     if len(df) < 60:
         return None, None, None
     
-    df['ema8'] = df['close'].ewm(span=8, adjust=False).mean()
-    df['ema21'] = df['close'].ewm(span=21, adjust=False).mean()
-    df['ema55'] = df['close'].ewm(span=55, adjust=False).mean()
+    df = add_emas(df)
     
     return df['ema8'].iloc[-1], df['ema21'].iloc[-1], df['ema55'].iloc[-1]
 
@@ -105,16 +110,17 @@ def get_signal(df, pair, duration_sec, model):
     """
     Genera señal BUY/SELL si cumple condiciones
     Retorna: (signal_type, prob, price) o (None, 0, 0)
+    
+    Las features salen de feature_store: si run_backtest ya precalculó la
+    serie (warm), cada vela es un lookup en cache.
     """
-    if len(df) < 60:
+    features = feature_store.bar_features(df, pair, duration_sec)
+    if features is None:
         return None, 0, 0
     
     c = df['close'].iloc[-1]  # Precio actual
     p = df['close'].iloc[-2]  # Precio anterior
-    
-    ema8, ema21, ema55 = calculate_emas(df)
-    if ema8 is None:
-        return None, 0, 0
+    ema8, ema21, ema55 = features[3], features[4], features[5]
     
     prob = 1.0
     signal = None
@@ -122,55 +128,17 @@ def get_signal(df, pair, duration_sec, model):
     # Condición BUY: EMA8 > EMA21 > EMA55 (más flexible)
     if ema8 > ema21 > ema55 and c > ema8:
         signal = "BUY"
-        
-        # Aplicar modelo ML con 7 features
-        if model is not None:
-            try:
-                pair_idx = PAIRS.index(pair.replace('_otc', '')) if pair.replace('_otc', '') in PAIRS else 0
-            except:
-                pair_idx = 0
-            
-            # Hora normalizada
-            hour = df['timestamp'].iloc[-1].hour
-            hour_normalized = hour / 24
-            
-            # Features: [price, duration_minutes, pair_idx, ema8, ema21, ema55, hour_normalized]
-            duration_minutes = duration_sec / 60
-            feature_names = ['price', 'duration_minutes', 'pair_idx', 'ema8', 'ema21', 'ema55', 'hour_normalized']
-            features_df = pd.DataFrame(
-                [[c, duration_minutes, pair_idx, ema8, ema21, ema55, hour_normalized]],
-                columns=feature_names
-            )
-            
-            try:
-                prob = model.predict_proba(features_df)[0][1]
-            except:
-                prob = 1.0
-    
     # Condición SELL: EMA8 < EMA21 < EMA55
     elif ema8 < ema21 < ema55 and p >= ema8 and c < ema8:
         signal = "SELL"
-        
-        if model is not None:
-            try:
-                pair_idx = PAIRS.index(pair.replace('_otc', '')) if pair.replace('_otc', '') in PAIRS else 0
-            except:
-                pair_idx = 0
-            
-            hour = df['timestamp'].iloc[-1].hour
-            hour_normalized = hour / 24
-            duration_minutes = duration_sec / 60
-            
-            feature_names = ['price', 'duration_minutes', 'pair_idx', 'ema8', 'ema21', 'ema55', 'hour_normalized']
-            features_df = pd.DataFrame(
-                [[c, duration_minutes, pair_idx, ema8, ema21, ema55, hour_normalized]],
-                columns=feature_names
-            )
-            
-            try:
-                prob = model.predict_proba(features_df)[0][0]
-            except:
-                prob = 1.0
+    
+    # Aplicar modelo ML con 7 features: [price, duration_minutes, pair_idx, ema8, ema21, ema55, hour_normalized]
+    if signal and model is not None:
+        features_df = pd.DataFrame(features.reshape(1, -1), columns=EMA7_FEATURES)
+        try:
+            prob = model.predict_proba(features_df)[0][1 if signal == "BUY" else 0]
+        except:
+            prob = 1.0
     
     # Filtrar por threshold ML
     if signal and prob < ML_THRESHOLD:
@@ -234,13 +202,16 @@ def run_backtest(data, model):
         
         print(f"\n🔍 Procesando {pair_tf}...")
         
+        # Features de todas las velas de una vez (EMAs causales: la vela i solo usa datos <= i)
+        feature_store.warm(df, pair, duration_sec)
+        
         # Iterar sobre velas (dejando margen para velas futuras)
         for i in range(60, len(df) - lookback_bars):
             # Datos hasta la vela actual (SIN ver el futuro)
-            historical_df = df.iloc[:i+1].copy()
+            historical_df = df.iloc[:i+1]
             
             # Datos futuros (para validar el trade)
-            future_df = df.iloc[i+1:i+1+lookback_bars].copy()
+            future_df = df.iloc[i+1:i+1+lookback_bars]
             
             # Generar señal con datos históricos únicamente
             signal, prob, price = get_signal(historical_df, pair, duration_sec, model)
@@ -14,6 +14,8 @@ from datetime import datetime
 import json
 from collections import defaultdict
 
+from feature_store import features_from_trades, EMA7_FEATURES
+
 # Configuración
 PAIRS_TARGET = ['EURUSD_otc', 'GBPUSD_otc', 'AUDUSD_otc', 'USDCAD_otc', 'AUDCAD_otc', 'USDMXN_otc', 'USDCOP_otc']
 ML_THRESHOLD = 0.60
@@ -74,83 +76,37 @@ def load_trade_logs():
     
     return all_trades
 
-def extract_features_from_trade(row):
-    """Extrae features de una fila de trade para pasar al modelo"""
-    try:
-        pair = row['pair']
-        pair_idx = PAIRS_TARGET.index(pair) if pair in PAIRS_TARGET else 0
-        
-        # Extraer hora
-        timestamp = pd.to_datetime(row['timestamp'])
-        hour = timestamp.hour
-        hour_normalized = hour / 24
-        
-        # Extraer duración en minutos
-        duration = row.get('expiry_time', 300)  # Default 5 minutos
-        duration_minutes = duration / 60
-        
-        # Extraer precios y EMAs
-        price = row.get('price', 0)
-        ema8 = row.get('ema', 0)  # En los logs es 'ema' genérico
-        ema21 = row.get('ema', 0)  # Usar mismo valor si no hay separación
-        ema55 = row.get('ema', 0)
-        
-        features = {
-            'price': price,
-            'duration_minutes': duration_minutes,
-            'pair_idx': pair_idx,
-            'ema8': ema8,
-            'ema21': ema21,
-            'ema55': ema55,
-            'hour_normalized': hour_normalized
-        }
-        
-        return features
-    except Exception as e:
-        print(f"⚠️ Error extrayendo features: {e}")
-        return None
-
 def apply_ml_model(trades_df, model):
     """
     Aplica el modelo ML a los trades reales
     Calcula qué trades habría rechazado/aceptado el nuevo modelo
+    (features de feature_store, una sola llamada a predict_proba)
     """
     print("\n🤖 Aplicando modelo ML a trades reales...")
     
-    trades_with_ml = []
+    if trades_df.empty:
+        return pd.DataFrame()
     
-    for idx, row in trades_df.iterrows():
-        features = extract_features_from_trade(row)
-        
-        if features is None:
-            continue
-        
-        # Crear DataFrame con nombres de features
-        feature_names = ['price', 'duration_minutes', 'pair_idx', 'ema8', 'ema21', 'ema55', 'hour_normalized']
-        features_df = pd.DataFrame([features], columns=feature_names)
-        
-        # Obtener predicción del modelo
-        try:
-            # Para BUY
-            if row.get('decision', '').upper() == 'BUY':
-                prob = model.predict_proba(features_df)[0][1]
-            # Para SELL
-            else:
-                prob = model.predict_proba(features_df)[0][0]
-        except:
-            prob = 0.5
-        
-        # Determinar si el modelo habría aceptado o rechazado
-        would_accept = prob >= ML_THRESHOLD
-        
-        trade_data = row.to_dict()
-        trade_data['ml_prob'] = prob
-        trade_data['ml_would_accept'] = would_accept
-        trade_data['hour'] = pd.to_datetime(row['timestamp']).hour
-        
-        trades_with_ml.append(trade_data)
+    trades_with_ml = trades_df.reset_index(drop=True).copy()
+    X, _ = features_from_trades(trades_with_ml)
+    features_df = pd.DataFrame(X, columns=EMA7_FEATURES)
+    
+    # Obtener predicción del modelo (BUY -> clase 1, SELL -> clase 0)
+    try:
+        proba = model.predict_proba(features_df)
+        decision = trades_with_ml.get('decision', pd.Series('', index=trades_with_ml.index))
+        is_buy = decision.fillna('').astype(str).str.upper() == 'BUY'
+        prob = np.where(is_buy, proba[:, 1], proba[:, 0])
+    except Exception as e:
+        print(f"⚠️ Error en predict_proba: {e}")
+        prob = np.full(len(trades_with_ml), 0.5)
+    
+    # Determinar si el modelo habría aceptado o rechazado
+    trades_with_ml['ml_prob'] = prob
+    trades_with_ml['ml_would_accept'] = prob >= ML_THRESHOLD
+    trades_with_ml['hour'] = pd.to_datetime(trades_with_ml['timestamp']).dt.hour
     
-    return pd.DataFrame(trades_with_ml)
+    return trades_with_ml
 
 def analyze_results(trades_df):
     """Analiza los resultados del backtesting"""
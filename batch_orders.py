@@ -0,0 +1,267 @@
+"""
+Batch Orders
+Submit several independent orders concurrently and track each one to settlement.
+
+- Exposure of the whole batch is checked atomically by RiskManager.reserve_exposure()
+  (one state snapshot, one lock), so two pairs signalling in the same cycle can't
+  both pass a check that only one of them fits in.
+- Accepted orders go out concurrently (buy/sell), bounded by max_concurrent.
+- Each OrderTicket has two futures:
+    acked    -> trade_id once the broker acknowledges the order
+    settled  -> {'win', 'pnl', 'result', 'raw'} once check_win() returns
+- On settlement bot_state.record_result() is called for wins and losses only (draws
+  and unreadable results are not losses) and the exposure released.
+
+Usage:
+    executor = BatchOrderExecutor(api, risk_manager, bot_state)
+    tickets = await executor.submit([OrderRequest("EURUSD_otc", "BUY", 1.0, 300), ...], balance)
+    for ticket in await executor.wait_acked(tickets):
+        print(ticket.trade_id)
+"""
+import asyncio
+from typing import Any, Callable, Iterable, List, Optional
+
+REJECTED = "rejected"
+SENT = "sent"
+ACKED = "acked"
+FAILED = "failed"
+SETTLED = "settled"
+
+ACK_TIMEOUT = 30      # s para que el broker confirme la orden
+SETTLE_MARGIN = 120   # s extra sobre la duración antes de abandonar check_win
+DECIDED_RESULTS = ('win', 'loss')  # lo único que cuenta en BotState (un draw no es pérdida)
+
+
+class OrderRequest:
+    """One order of a batch (BUY -> api.buy, SELL -> api.sell)."""
+    __slots__ = ('pair', 'direction', 'amount', 'duration', 'metadata', 'timeline')
+
+    def __init__(self, pair: str, direction: str, amount: float, duration: int = 300,
+                 metadata: Optional[dict] = None, timeline=None):
+        direction = direction.upper()
+        if direction not in ("BUY", "SELL"):
+            raise ValueError(f"direction debe ser BUY o SELL, no {direction!r}")
+        self.pair = pair
+        self.direction = direction
+        self.amount = float(amount)
+        self.duration = int(duration)
+        self.metadata = metadata or {}
+        self.timeline = timeline  # SignalTimeline opcional (order_sent/ack)
+
+    def __repr__(self):
+        return f"OrderRequest({self.pair} {self.direction} ${self.amount:.2f} {self.duration}s)"
+
+
+class OrderTicket:
+    """Per-order handle: `await ticket.acked` -> trade_id, `await ticket.settled` -> result dict."""
+    __slots__ = ('request', 'status', 'reason', 'trade_id', 'result', 'acked', 'settled')
+
+    def __init__(self, request: OrderRequest, loop: asyncio.AbstractEventLoop):
+        self.request = request
+        self.status = SENT
+        self.reason = ""
+        self.trade_id = None
+        self.result = None
+        self.acked = loop.create_future()
+        self.settled = loop.create_future()
+        for future in (self.acked, self.settled):
+            future.add_done_callback(_consume_exception)
+
+    @property
+    def done(self) -> bool:
+        return self.settled.done()
+
+    def _reject(self, status: str, reason: str, error: Optional[BaseException] = None):
+        self.status, self.reason = status, reason
+        error = error or OrderRejected(reason)
+        for future in (self.acked, self.settled):
+            if not future.done():
+                future.set_exception(error)
+
+    def __repr__(self):
+        return f"OrderTicket({self.request.pair} {self.request.direction} {self.status} id={self.trade_id})"
+
+
+class OrderRejected(Exception):
+    """Raised by a ticket's futures when the order was not placed."""
+
+
+def _consume_exception(future: asyncio.Future):
+    # Evita "Future exception was never retrieved" si nadie espera el ticket
+    if not future.cancelled():
+        future.exception()
+
+
+def _trade_id(result) -> Any:
+    """buy()/sell() return (trade_id, details) or just trade_id depending on the client."""
+    return result[0] if isinstance(result, tuple) else result
+
+
+def parse_settlement(raw, amount: float) -> dict:
+    """
+    Normalize check_win() output.
+
+    Args:
+        raw: {'result': 'win'|'loss'|'draw', 'profit': ...} (or anything else)
+        amount: Stake of the order
+
+    Returns:
+        {'win': bool, 'pnl': float, 'result': str, 'raw': raw}
+    """
+    result = str((raw or {}).get('result', '')).lower() if isinstance(raw, dict) else str(raw).lower()
+    profit = float((raw or {}).get('profit') or 0.0) if isinstance(raw, dict) else 0.0
+    win = result == 'win'
+    if win:
+        pnl = profit
+    elif result == 'loss':
+        pnl = profit if profit < 0 else -amount
+    else:
+        pnl = 0.0
+    return {'win': win, 'pnl': round(pnl, 2), 'result': result or 'unknown', 'raw': raw}
+
+
+class BatchOrderExecutor:
+    """
+    Concurrent order submission with per-order ack/settlement futures.
+
+    Args:
+        api: Client/SessionManager with buy(), sell() and check_win()
+        risk_manager: RiskManager for the atomic exposure check (None = no check)
+        bot_state: BotState updated on ack (daily trades) and settlement (wins/losses)
+        max_concurrent: Max orders in flight to the broker at once
+        ack_timeout: Seconds to wait for buy()/sell()
+        on_ack: Callback(ticket) when an order is acknowledged
+        on_settled: Callback(ticket) when an order settles
+    """
+
+    def __init__(self, api, risk_manager=None, bot_state=None, max_concurrent: int = 4,
+                 ack_timeout: float = ACK_TIMEOUT,
+                 on_ack: Optional[Callable[[OrderTicket], None]] = None,
+                 on_settled: Optional[Callable[[OrderTicket], None]] = None):
+        self.api = api
+        self.risk_manager = risk_manager
+        self.bot_state = bot_state
+        self.max_concurrent = max(1, max_concurrent)
+        self.ack_timeout = ack_timeout
+        self.on_ack = on_ack
+        self.on_settled = on_settled
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks = set()
+
+    @property
+    def pending(self) -> int:
+        """Orders not yet settled."""
+        return len(self._tasks)
+
+    async def submit(self, orders: Iterable[OrderRequest], balance: Optional[float] = None) -> List[OrderTicket]:
+        """
+        Reserve exposure for the batch, then send every accepted order concurrently.
+
+        Returns immediately after scheduling; tickets come back in the same order
+        as `orders` (rejected ones already have status 'rejected').
+
+        Args:
+            orders: Orders in priority order (the first ones win the exposure)
+            balance: Current balance (required when a risk_manager is set)
+        """
+        orders = list(orders)
+        loop = asyncio.get_running_loop()
+        tickets = [OrderTicket(order, loop) for order in orders]
+        if not orders:
+            return tickets
+
+        if self.risk_manager is not None:
+            if balance is None:
+                raise ValueError("balance es obligatorio para validar la exposición")
+            accepted, reason = await self.risk_manager.reserve_exposure(
+                balance, self.bot_state, [o.amount for o in orders])
+        else:
+            accepted, reason = [True] * len(orders), ""
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        for ticket, ok in zip(tickets, accepted):
+            if not ok:
+                ticket._reject(REJECTED, reason)
+                continue
+            if ticket.request.timeline is not None:
+                ticket.request.timeline.stamp('risk_checked')
+            task = loop.create_task(self._run(ticket))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return tickets
+
+    async def wait_acked(self, tickets: Iterable[OrderTicket]) -> List[OrderTicket]:
+        """Wait for every ack/failure; returns the acknowledged tickets."""
+        tickets = list(tickets)
+        await asyncio.gather(*(t.acked for t in tickets), return_exceptions=True)
+        return [t for t in tickets if t.status in (ACKED, SETTLED)]
+
+    async def wait_settled(self, tickets: Iterable[OrderTicket]) -> List[OrderTicket]:
+        """Wait until every ticket settles or fails; returns the settled ones."""
+        tickets = list(tickets)
+        await asyncio.gather(*(t.settled for t in tickets), return_exceptions=True)
+        return [t for t in tickets if t.status == SETTLED]
+
+    async def close(self):
+        """Cancel tracking of unsettled orders (the orders themselves stay open at the broker)."""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, ticket: OrderTicket):
+        request = ticket.request
+        acked = False
+        try:
+            async with self._semaphore:
+                if request.timeline is not None:
+                    request.timeline.stamp('order_sent')
+                send = self.api.buy if request.direction == "BUY" else self.api.sell
+                result = await asyncio.wait_for(send(request.pair, request.amount, request.duration),
+                                                self.ack_timeout)
+            trade_id = _trade_id(result)
+            if not trade_id:
+                raise OrderRejected(f"orden sin trade_id: {result!r}")
+
+            acked = True
+            ticket.trade_id, ticket.status = trade_id, ACKED
+            if request.timeline is not None:
+                request.timeline.stamp('ack')
+            if self.bot_state is not None:
+                await self.bot_state.increment_daily_trades()
+            if self.risk_manager is not None:
+                self.risk_manager.order_acked()
+            ticket.acked.set_result(trade_id)
+            self._callback(self.on_ack, ticket)
+
+            raw = await asyncio.wait_for(self.api.check_win(trade_id), request.duration + SETTLE_MARGIN)
+            settlement = parse_settlement(raw, request.amount)
+            if self.bot_state is not None and settlement['result'] in DECIDED_RESULTS:
+                await self.bot_state.record_result(settlement['win'], settlement['pnl'])
+            ticket.result, ticket.status = settlement, SETTLED
+            ticket.settled.set_result(settlement)
+            self._callback(self.on_settled, ticket)
+        except asyncio.CancelledError:
+            ticket._reject(FAILED, "cancelada", OrderRejected("cancelada"))
+            raise
+        except Exception as e:
+            if acked:
+                # La orden existe en el broker pero no pudimos liquidarla
+                ticket.status, ticket.reason = FAILED, f"check_win: {e}"
+                if not ticket.settled.done():
+                    ticket.settled.set_exception(e)
+            else:
+                ticket._reject(FAILED, str(e) or type(e).__name__, e)
+        finally:
+            if self.risk_manager is not None:
+                self.risk_manager.release_exposure(request.amount, failed=not acked)
+
+    @staticmethod
+    def _callback(callback, ticket):
+        if callback is None:
+            return
+        try:
+            callback(ticket)
+        except Exception as e:
+            print(f"⚠️ Callback de orden falló ({ticket}): {e}")
@@ -0,0 +1,406 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Bot Backtester
+Backtest por eventos que corre el código real de los bots contra
+ReplayPocketOptionAsync en tiempo virtual, así lo que se mide es lo que opera:
+
+- ema:   bots/bot_ema_pullback.get_signal() en M1 y M5
+- round: bots/bot_round_levels.get_signal_round()
+- trend: TrendFollowingBot.run_cycle() (generate_signal → ML → payout → RiskManager → orden)
+
+En vez de los loops de polling de los bots (un escaneo cada 7-30s), el reloj
+salta de un cierre de vela al siguiente y cada estrategia corre una vez por
+vela cerrada de sus timeframes: un año de M5 son ~105k eventos por par. Las
+órdenes van al replay y liquidan con el cierre real al vencimiento.
+
+Uso:
+    python bot_backtester.py --strategies ema round trend --workers 3
+    python bot_backtester.py --strategies ema --pairs EURUSD_otc --days 90
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from batch_orders import DECIDED_RESULTS
+from candle_store import HISTORY_DIR
+from payout_cache import PayoutSeries, payout_cache
+from replay_pocketoption import ReplayFinished, ReplayPocketOptionAsync, install
+
+INITIAL_BALANCE = 1000.0
+
+
+class StrategyAdapter:
+    """
+    Conecta un bot al despachador de eventos.
+
+    Las subclases importan el módulo del bot en setup() (después de install(),
+    para que `BinaryOptionsToolsV2` sea el replay) y llaman su código de señal
+    en on_bar(). La política del loop que no está en una función del bot
+    (monto, cooldown, esperar el resultado) se replica con las constantes del
+    propio módulo.
+
+    Args:
+        api: ReplayPocketOptionAsync compartido con el backtester
+        pairs: Pares a operar (None = los del bot)
+        ml: Cargar el modelo ML del bot si lo tiene
+    """
+
+    name = ""
+
+    def __init__(self, api: ReplayPocketOptionAsync, pairs: Optional[Sequence[str]] = None, ml: bool = False):
+        self.api = api
+        self.pairs = list(pairs) if pairs else None
+        self.ml = ml
+        self.intervals = (300,)
+        self.busy_until = 0.0  # Los bots esperan el resultado (sleep) antes de volver a escanear
+        self.orders = 0
+        self.errors = 0
+
+    def setup(self):
+        raise NotImplementedError("Each adapter must implement setup()")
+
+    def close(self):
+        pass
+
+    async def on_bar(self, now: float, closed: set):
+        """Velas de `closed` (intervalos en segundos) cerraron en `now`."""
+        raise NotImplementedError("Each adapter must implement on_bar()")
+
+    async def on_settled(self, trade: Dict):
+        """Un trade del replay liquidó."""
+
+    async def order(self, pair: str, direction: str, amount: float, duration: int):
+        place = self.api.buy if direction == "BUY" else self.api.sell
+        try:
+            await place(pair, amount, duration)
+            self.orders += 1
+        except ValueError:
+            self.errors += 1  # Balance insuficiente: el bot en vivo también fallaría
+
+
+class EmaPullbackAdapter(StrategyAdapter):
+    """bots/bot_ema_pullback.py: get_signal() por par y timeframe, una orden por ciclo."""
+
+    name = "ema"
+
+    def setup(self):
+        from bots import bot_ema_pullback as bot
+        self.bot = bot
+        if self.ml:
+            bot.init_ml()
+        self.pairs = self.pairs or list(bot.PAIRS)
+        self.intervals = tuple(sorted(set(bot.TIMEFRAMES.values())))
+        self.cooldown: Dict[str, float] = {}
+
+    async def on_bar(self, now: float, closed: set):
+        bot = self.bot
+        if now < self.busy_until:
+            return
+        balance = await self.api.balance()
+        if not balance or balance < 10:
+            return
+        amount = max(bot.MIN_AMOUNT, round(balance * bot.RISK_PERCENT / 100, 2))
+        self.cooldown = {k: v for k, v in self.cooldown.items() if now - v < bot.COOLDOWN_SECONDS}
+
+        for pair in self.pairs:
+            if pair in self.cooldown:
+                continue
+            for duration in bot.TIMEFRAMES.values():
+                if duration not in closed:
+                    continue  # Misma vela que el evento anterior: misma señal
+                candles = await bot.fetch_candles(self.api, pair, duration, duration * 100)
+                if not candles:
+                    continue
+                signal = bot.get_signal(candles.to_frame(), pair, duration)
+                if not signal:
+                    continue
+                allowed, _ = payout_cache.allows(pair)  # EV ya verificado en get_signal
+                if not allowed:
+                    continue
+                await self.order(pair, signal['direction'], amount, duration)
+                self.cooldown[pair] = now
+                self.busy_until = now + duration + 5
+                return
+
+
+class RoundLevelsAdapter(StrategyAdapter):
+    """bots/bot_round_levels.py: get_signal_round() con la API del módulo apuntando al replay."""
+
+    name = "round"
+
+    def setup(self):
+        from bots import bot_round_levels as bot
+        self.bot = bot
+        self._saved = (bot.api, bot.PAIRS)
+        bot.api = self.api
+        if self.pairs:
+            bot.PAIRS = list(self.pairs)
+        self.pairs = list(bot.PAIRS)
+        bot.last_trade_time.clear()
+        self.intervals = (bot.TIMEFRAME,)
+
+    def close(self):
+        self.bot.api, self.bot.PAIRS = self._saved
+
+    async def on_bar(self, now: float, closed: set):
+        bot = self.bot
+        if now < self.busy_until:
+            return
+        balance = await self.api.balance()
+        if balance in (None, -1.0):
+            return
+        amount = max(bot.MIN_AMOUNT, round(balance * bot.RISK_PERCENT / 100, 2))
+        signal = await bot.get_signal_round()
+        if signal:
+            await self.order(signal['pair'], signal['direction'], amount, bot.TIMEFRAME)
+            self.busy_until = now + bot.TIMEFRAME + 5
+
+
+class TrendFollowingAdapter(StrategyAdapter):
+    """TrendFollowingBot.run_cycle() completo, con órdenes al replay y resultados a bot_state."""
+
+    name = "trend"
+
+    def setup(self):
+        import logging
+        from bots.bot_trend_following import TrendFollowingBot
+
+        os.environ.setdefault("POCKETOPTION_SSID", "replay")
+        bot = TrendFollowingBot()
+        bot.logger.setLevel(logging.WARNING)
+        bot.api = bot.order_api = self.api
+        bot.telegram_token = None
+        if not self.ml:
+            bot.ml_filter.model = None
+        if self.pairs:
+            bot.pairs = list(self.pairs)
+        self.pairs = list(bot.pairs)
+        self.bot = bot
+        self.intervals = (bot.config['trading']['timeframes']['M5'],)
+
+    async def on_bar(self, now: float, closed: set):
+        if await self.bot.run_cycle():
+            self.orders += 1
+
+    async def on_settled(self, trade: Dict):
+        if trade['result'] not in DECIDED_RESULTS:  # draw: ni pérdida ni racha, como en vivo
+            return
+        await self.bot.bot_state.record_result(
+            trade['result'] == "win", trade['profit'],
+            datetime.fromtimestamp(trade['closeTimestamp'], timezone.utc)
+        )
+
+
+STRATEGIES = {
+    EmaPullbackAdapter.name: EmaPullbackAdapter,
+    RoundLevelsAdapter.name: RoundLevelsAdapter,
+    TrendFollowingAdapter.name: TrendFollowingAdapter,
+}
+
+
+def bar_events(api: ReplayPocketOptionAsync, pairs: Sequence[str], intervals: Sequence[int],
+               start: float, end: float):
+    """
+    Instantes de cierre de vela en (start, end) para todos los pares.
+
+    Returns:
+        (times, {interval: bool array}) — qué intervalos cerraron en cada instante
+    """
+    closes = {}
+    for interval in intervals:
+        per_pair = []
+        for pair in pairs:
+            records = api.series(pair, interval)
+            if records is not None and len(records):
+                per_pair.append(records['time'].astype(np.float64) + interval)
+        if not per_pair:
+            print(f"⚠️ Sin historia para velas de {interval}s: ese timeframe no se evalúa")
+            continue
+        t = np.unique(np.concatenate(per_pair))
+        closes[interval] = t[(t > start) & (t < end)]
+
+    if not closes and intervals:
+        # Sin historia de ningún par: grilla regular sobre las velas sintéticas del mock
+        interval = min(intervals)
+        first = np.ceil(start / interval) * interval
+        closes[interval] = np.arange(first, end, interval, dtype=np.float64)
+
+    times = np.unique(np.concatenate(list(closes.values()))) if closes else np.zeros(0)
+    return times, {interval: np.isin(times, t) for interval, t in closes.items()}
+
+
+class BotBacktester:
+    """
+    Un bot contra la historia, en tiempo virtual.
+
+    Args:
+        strategy: 'ema', 'round' o 'trend'
+        history_dir: Directorio con .candles/CSV
+        pairs: Pares (None = los del bot)
+        start/end: Rango en epoch (default: rango común de la historia)
+        balance: Balance inicial
+        payouts: PayoutSeries registrada (None = payout fijo del replay)
+        ml: Usar el modelo ML del bot
+    """
+
+    def __init__(self, strategy: str, history_dir: str = HISTORY_DIR,
+                 pairs: Optional[Sequence[str]] = None, start: Optional[int] = None,
+                 end: Optional[int] = None, balance: float = INITIAL_BALANCE,
+                 payouts: Optional[PayoutSeries] = None, ml: bool = False):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Estrategia desconocida: {strategy} (opciones: {', '.join(STRATEGIES)})")
+        self.strategy = strategy
+        self.initial_balance = float(balance)
+        self.payouts = payouts
+        os.environ.setdefault("POCKETOPTION_SSID", "replay")
+
+        # El replay pasa a ser BinaryOptionsToolsV2 antes de importar los bots
+        replay = dict(history_dir=history_dir, speed=None, start=start, end=end, balance=balance)
+        self.clock = install(**replay)
+        self.api = ReplayPocketOptionAsync(clock=self.clock, **replay)
+        self.adapter = STRATEGIES[strategy](self.api, pairs, ml)
+        self.events = 0
+        self.wall_seconds = 0.0
+
+    def run(self) -> Dict:
+        """Corre el backtest completo y devuelve report()."""
+        t0 = time.perf_counter()
+        with self.clock.patch():
+            asyncio.run(self._run())
+        self.wall_seconds = time.perf_counter() - t0
+        return self.report()
+
+    async def _run(self):
+        adapter, api, clock = self.adapter, self.api, self.clock
+        adapter.setup()
+        try:
+            times, flags = bar_events(api, adapter.pairs, adapter.intervals, api.start, api.end)
+            masks = list(flags.items())
+            settled = 0
+            for i, t in enumerate(times.tolist()):
+                clock.advance_to(t)
+                self._set_payouts(adapter.pairs, t)
+
+                # Trades vencidos → resultado al bot antes de la próxima decisión
+                api._settle_expired()
+                while settled < len(api.closed_trades):
+                    await adapter.on_settled(api.closed_trades[settled])
+                    settled += 1
+
+                closed = {interval for interval, mask in masks if mask[i]}
+                try:
+                    await adapter.on_bar(t, closed)
+                except ReplayFinished:
+                    break
+                self.events += 1
+        finally:
+            adapter.close()
+
+    def _set_payouts(self, pairs: Sequence[str], t: float):
+        for pair in pairs:
+            if self.payouts is not None:
+                ratio = self.payouts.at(pair, t)
+                self.api.payouts[pair] = ratio * 100
+            else:
+                ratio = self.api.payouts.get(pair, self.api.default_payout) / 100
+            payout_cache.set(pair, ratio)
+
+    @property
+    def trades(self) -> List[Dict]:
+        return sorted(self.api.closed_trades, key=lambda t: t['closeTimestamp'])
+
+    def equity_curve(self) -> np.ndarray:
+        """Balance después de cada trade liquidado (empieza en el balance inicial)."""
+        profits = np.array([t['profit'] for t in self.trades], dtype=np.float64)
+        return self.initial_balance + np.concatenate([[0.0], np.cumsum(profits)])
+
+    def report(self) -> Dict:
+        trades = self.trades
+        wins = sum(1 for t in trades if t['result'] == "win")
+        equity = self.equity_curve()
+        peak = np.maximum.accumulate(equity)
+        drawdown = float(np.max((peak - equity) / peak)) if len(equity) else 0.0
+        return {
+            'strategy': self.strategy,
+            'pairs': len(self.adapter.pairs or []),
+            'events': self.events,
+            'trades': len(trades),
+            'wins': wins,
+            'winrate': wins / len(trades) if trades else 0.0,
+            'pnl': float(equity[-1] - self.initial_balance),
+            'balance': float(equity[-1]),
+            'max_drawdown': drawdown,
+            'open_trades': len(self.api.active_trades),
+            'order_errors': self.adapter.errors,
+            'start': self.api.start,
+            'end': self.api.end,
+            'wall_seconds': self.wall_seconds,
+            'events_per_sec': self.events / self.wall_seconds if self.wall_seconds else 0.0,
+        }
+
+
+def _run_one(strategy: str, kwargs: Dict) -> Dict:
+    return BotBacktester(strategy, **kwargs).run()
+
+
+def run_backtests(strategies: Sequence[str], workers: int = 1, **kwargs) -> List[Dict]:
+    """
+    Varias estrategias; con workers > 1 cada una en su proceso (como en vivo, un proceso por bot).
+
+    Args:
+        strategies: Nombres de STRATEGIES
+        workers: Procesos en paralelo
+        **kwargs: Para BotBacktester
+    """
+    if workers <= 1 or len(strategies) <= 1:
+        return [_run_one(s, kwargs) for s in strategies]
+    with ProcessPoolExecutor(max_workers=min(workers, len(strategies))) as pool:
+        return list(pool.map(_run_one, strategies, [kwargs] * len(strategies)))
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Backtest por eventos de los bots reales sobre la historia')
+    parser.add_argument('--strategies', nargs='*', choices=sorted(STRATEGIES), default=sorted(STRATEGIES))
+    parser.add_argument('--history', default=HISTORY_DIR)
+    parser.add_argument('--pairs', nargs='*', help='Pares (default: los de cada bot)')
+    parser.add_argument('--start', type=int, help='Epoch inicial')
+    parser.add_argument('--end', type=int, help='Epoch final')
+    parser.add_argument('--days', type=float, help='Solo los últimos N días de la historia')
+    parser.add_argument('--balance', type=float, default=INITIAL_BALANCE)
+    parser.add_argument('--payouts', action='store_true', help='Payouts registrados en logs/payouts')
+    parser.add_argument('--ml', action='store_true', help='Usar los modelos ML de los bots')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    start = args.start
+    if args.days and start is None:
+        end = args.end or ReplayPocketOptionAsync(history_dir=args.history, speed=None).end
+        start = int(end - args.days * 86400)
+
+    print("=" * 60)
+    print(f"🧪 BACKTEST DE BOTS: {', '.join(args.strategies)} | {args.history}")
+    print("=" * 60)
+
+    reports = run_backtests(
+        args.strategies, args.workers,
+        history_dir=args.history, pairs=args.pairs, start=start, end=args.end,
+        balance=args.balance, payouts=PayoutSeries.load() if args.payouts else None, ml=args.ml,
+    )
+
+    print(f"{'Bot':<7} {'Eventos':>9} {'Trades':>7} {'Winrate':>8} {'P&L':>10} {'MaxDD':>7} {'ev/s':>9}")
+    for r in reports:
+        print(f"{r['strategy']:<7} {r['events']:>9} {r['trades']:>7} {r['winrate']:>7.1%} "
+              f"{r['pnl']:>+10.2f} {r['max_drawdown']:>6.1%} {r['events_per_sec']:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,152 +1,268 @@
 """
 Thread-safe state management for trading bot using async locks.
 Replaces global variables to prevent race conditions in async execution.
+
+Trade results live in a fixed-size ring buffer (NumPy arrays) next to
+running prefix sums of wins and PnL, so the rolling winrate/PnL over any
+window up to `history_size` is two array reads, and snapshot() gives the
+risk manager everything it needs under a single lock.
 """
 import asyncio
+import time
 from datetime import datetime, timezone
-from typing import Dict, List, Optional
-from collections import deque
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+DEFAULT_HISTORY_SIZE = 200
+MIN_TRADES_FOR_WINRATE = 10
+
+
+class StateSnapshot(NamedTuple):
+    """Consistent view of the state taken under one lock (see BotState.snapshot)."""
+    daily_trades: int
+    daily_losses: int
+    streak_losses: int
+    initial_balance: Optional[float]
+    total: int
+    wins: int
+    losses: int
+    history_len: int
+    rolling_winrate: Optional[float]
+    rolling_pnl: float
+
+
+def _utcnow() -> datetime:
+    # time.time() (not datetime.now) so the replay clock also drives the daily reset
+    return datetime.fromtimestamp(time.time(), timezone.utc)
 
 
 class BotState:
-    """Encapsulates all bot state with async-safe access."""
-    
-    def __init__(self):
-        # Locks for each resource
-        self._stats_lock = asyncio.Lock()
-        self._daily_lock = asyncio.Lock()
-        self._history_lock = asyncio.Lock()
-        self._streak_lock = asyncio.Lock()
-        
+    """
+    Encapsulates all bot state with async-safe access.
+
+    Args:
+        history_size: Trades kept in the rolling history
+    """
+
+    def __init__(self, history_size: int = DEFAULT_HISTORY_SIZE):
+        # Single lock: every read/update is a few counter operations
+        self._lock = asyncio.Lock()
+
         # Trading statistics
-        self._stats: Dict[str, int] = {'wins': 0, 'losses': 0, 'total': 0}
-        
+        self._total = 0
+        self._wins = 0
+
         # Daily statistics (reset each day)
-        self._daily_stats: Dict[str, int] = {
-            'trades': 0,
-            'losses': 0,
-            'last_reset': datetime.now(timezone.utc).date()
-        }
-        
-        # Trade history (rolling window)
-        self._trade_history: deque = deque(maxlen=200)
-        
+        self._daily_trades = 0
+        self._daily_losses = 0
+        self._last_reset = _utcnow().date()
+
+        # Trade history (ring buffer). Slot i holds trade number n where
+        # n % size == i; _cum_* hold prefix sums over all trades ever added,
+        # indexed by n % (size + 1), so window sums are one subtraction.
+        self._history_size = int(history_size)
+        self._hist_win = np.zeros(self._history_size, dtype=np.int8)
+        self._hist_pnl = np.zeros(self._history_size, dtype=np.float64)
+        self._hist_ts = np.zeros(self._history_size, dtype=np.float64)
+        self._cum_wins = np.zeros(self._history_size + 1, dtype=np.int64)
+        self._cum_pnl = np.zeros(self._history_size + 1, dtype=np.float64)
+        self._count = 0
+
         # Streak tracking
         self._streak_losses: int = 0
-        
+
         # Initial balance for drawdown calculation
         self._initial_balance: Optional[float] = None
-    
+
+    # ------------------------------------------------------------------ helpers
+
+    def _roll_day(self):
+        """Reset daily counters on a new UTC day (caller holds the lock)."""
+        today = _utcnow().date()
+        if self._last_reset != today:
+            self._daily_trades = 0
+            self._daily_losses = 0
+            self._last_reset = today
+
+    def _push(self, win: bool, pnl: float, timestamp: datetime):
+        """Append one result to the ring buffer (caller holds the lock)."""
+        n = self._count
+        slot = n % self._history_size
+        prev = n % (self._history_size + 1)
+        nxt = (n + 1) % (self._history_size + 1)
+        self._hist_win[slot] = 1 if win else 0
+        self._hist_pnl[slot] = pnl
+        self._hist_ts[slot] = timestamp.timestamp()
+        self._cum_wins[nxt] = self._cum_wins[prev] + (1 if win else 0)
+        self._cum_pnl[nxt] = self._cum_pnl[prev] + pnl
+        self._count = n + 1
+
+    def _window(self, window: int):
+        """(trades, wins, pnl) of the last `window` results, O(1)."""
+        length = min(window, self._count, self._history_size)
+        if length <= 0:
+            return 0, 0, 0.0
+        end = self._count % (self._history_size + 1)
+        start = (self._count - length) % (self._history_size + 1)
+        wins = int(self._cum_wins[end] - self._cum_wins[start])
+        pnl = float(self._cum_pnl[end] - self._cum_pnl[start])
+        return length, wins, pnl
+
+    def _rolling_winrate(self, window: int) -> Optional[float]:
+        if min(self._count, self._history_size) < MIN_TRADES_FOR_WINRATE:
+            return None
+        trades, wins, _ = self._window(window)
+        return wins / trades if trades else None
+
+    # -------------------------------------------------------------------- stats
+
     async def get_stats(self) -> Dict[str, int]:
         """Get current trading statistics."""
-        async with self._stats_lock:
-            return self._stats.copy()
-    
+        async with self._lock:
+            return {'wins': self._wins, 'losses': self._total - self._wins, 'total': self._total}
+
     async def update_stats(self, win: bool):
         """Update statistics after a trade."""
-        async with self._stats_lock:
-            self._stats['total'] += 1
+        async with self._lock:
+            self._total += 1
             if win:
-                self._stats['wins'] += 1
-            else:
-                self._stats['losses'] += 1
-    
+                self._wins += 1
+
     async def get_daily_stats(self) -> Dict[str, int]:
         """Get daily statistics, resetting if new day."""
-        async with self._daily_lock:
-            today = datetime.now(timezone.utc).date()
-            if self._daily_stats['last_reset'] != today:
-                # New day - reset
-                self._daily_stats = {
-                    'trades': 0,
-                    'losses': 0,
-                    'last_reset': today
-                }
-            return self._daily_stats.copy()
-    
+        async with self._lock:
+            self._roll_day()
+            return {'trades': self._daily_trades, 'losses': self._daily_losses,
+                    'last_reset': self._last_reset}
+
     async def increment_daily_trades(self):
         """Increment daily trade counter."""
-        async with self._daily_lock:
-            today = datetime.now(timezone.utc).date()
-            if self._daily_stats['last_reset'] != today:
-                self._daily_stats = {
-                    'trades': 0,
-                    'losses': 0,
-                    'last_reset': today
-                }
-            self._daily_stats['trades'] += 1
-    
+        async with self._lock:
+            self._roll_day()
+            self._daily_trades += 1
+
     async def increment_daily_losses(self):
         """Increment daily loss counter."""
-        async with self._daily_lock:
-            today = datetime.now(timezone.utc).date()
-            if self._daily_stats['last_reset'] != today:
-                self._daily_stats = {
-                    'trades': 0,
-                    'losses': 0,
-                    'last_reset': today
-                }
-            self._daily_stats['losses'] += 1
-    
-    async def add_trade(self, win: bool, timestamp: Optional[datetime] = None):
-        """Add trade to history."""
+        async with self._lock:
+            self._roll_day()
+            self._daily_losses += 1
+
+    # ------------------------------------------------------------------ history
+
+    async def add_trade(self, win: bool, timestamp: Optional[datetime] = None, pnl: float = 0.0):
+        """Add trade result to history."""
         if timestamp is None:
-            timestamp = datetime.now(timezone.utc)
-        
-        async with self._history_lock:
-            self._trade_history.append({
-                'win': win,
-                'timestamp': timestamp
-            })
-    
+            timestamp = _utcnow()
+
+        async with self._lock:
+            self._push(win, pnl, timestamp)
+
+    async def record_result(self, win: bool, pnl: float = 0.0, timestamp: Optional[datetime] = None):
+        """
+        Register a closed trade in one step: stats, daily losses, streak and history.
+
+        Args:
+            win: True if the trade won
+            pnl: Profit/loss of the trade
+            timestamp: Close time (default now, UTC)
+        """
+        if timestamp is None:
+            timestamp = _utcnow()
+
+        async with self._lock:
+            self._roll_day()
+            self._total += 1
+            if win:
+                self._wins += 1
+                self._streak_losses = 0
+            else:
+                self._daily_losses += 1
+                self._streak_losses += 1
+            self._push(win, pnl, timestamp)
+
     async def get_trade_history(self, limit: Optional[int] = None) -> List[Dict]:
-        """Get trade history (most recent first)."""
-        async with self._history_lock:
-            history = list(self._trade_history)
+        """Get trade history (oldest first, last `limit` trades)."""
+        async with self._lock:
+            length = min(self._count, self._history_size)
             if limit:
-                history = history[-limit:]
-            return history
-    
+                length = min(length, limit)
+            slots = [(self._count - length + i) % self._history_size for i in range(length)]
+            return [{
+                'win': bool(self._hist_win[s]),
+                'pnl': float(self._hist_pnl[s]),
+                'timestamp': datetime.fromtimestamp(self._hist_ts[s], timezone.utc)
+            } for s in slots]
+
     async def get_rolling_winrate(self, window: int = 20) -> Optional[float]:
-        """Calculate rolling winrate from recent trades."""
-        async with self._history_lock:
-            if len(self._trade_history) < 10:
-                return None
-            
-            recent = list(self._trade_history)[-window:]
-            wins = sum(1 for t in recent if t['win'])
-            return wins / len(recent) if recent else None
-    
+        """Calculate rolling winrate from recent trades (None with fewer than 10)."""
+        async with self._lock:
+            return self._rolling_winrate(window)
+
+    async def get_rolling_pnl(self, window: int = 20) -> float:
+        """Sum of PnL over the last `window` trades."""
+        async with self._lock:
+            return self._window(window)[2]
+
+    # ------------------------------------------------------------------- streak
+
     async def get_streak_losses(self) -> int:
         """Get current losing streak."""
-        async with self._streak_lock:
+        async with self._lock:
             return self._streak_losses
-    
+
     async def update_streak(self, win: bool):
         """Update losing streak."""
-        async with self._streak_lock:
+        async with self._lock:
             if win:
                 self._streak_losses = 0
             else:
                 self._streak_losses += 1
-    
+
     async def reset_streak(self):
         """Reset losing streak to 0."""
-        async with self._streak_lock:
+        async with self._lock:
             self._streak_losses = 0
-    
+
+    # ------------------------------------------------------------------ balance
+
     async def set_initial_balance(self, balance: float):
         """Set initial balance for drawdown tracking."""
         if self._initial_balance is None:
             self._initial_balance = balance
-    
+
     async def get_initial_balance(self) -> Optional[float]:
         """Get initial balance."""
         return self._initial_balance
-    
+
     async def calculate_drawdown(self, current_balance: float) -> float:
         """Calculate current drawdown percentage."""
         if self._initial_balance is None or self._initial_balance == 0:
             return 0.0
-        
+
         return (self._initial_balance - current_balance) / self._initial_balance
+
+    # ----------------------------------------------------------------- snapshot
+
+    async def snapshot(self, window: int = 20) -> StateSnapshot:
+        """
+        Everything the risk checks read, taken under one lock.
+
+        Args:
+            window: Trades for rolling_winrate/rolling_pnl
+        """
+        async with self._lock:
+            self._roll_day()
+            rolling_pnl = self._window(window)[2]
+            return StateSnapshot(
+                daily_trades=self._daily_trades,
+                daily_losses=self._daily_losses,
+                streak_losses=self._streak_losses,
+                initial_balance=self._initial_balance,
+                total=self._total,
+                wins=self._wins,
+                losses=self._total - self._wins,
+                history_len=min(self._count, self._history_size),
+                rolling_winrate=self._rolling_winrate(window),
+                rolling_pnl=rolling_pnl,
+            )
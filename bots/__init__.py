@@ -1,7 +1,15 @@
 """
 Bots package - Specialized trading bots
 """
-from .base_bot import BaseBot
-from .ml_filter import MLFilter
-
 __all__ = ['BaseBot', 'MLFilter']
+
+
+def __getattr__(name):
+    # Lazy: `import bots.bot_round_levels` must not pull in BaseBot (yaml, risk, ML filter)
+    if name == 'BaseBot':
+        from .base_bot import BaseBot
+        return BaseBot
+    if name == 'MLFilter':
+        from .ml_filter import MLFilter
+        return MLFilter
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
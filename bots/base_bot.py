@@ -4,7 +4,7 @@ Base Bot - Shared functionality for all specialized bots
 import os
 import asyncio
 import logging
-from datetime import datetime, timezone
+import time
 from typing import Optional, Dict
 from dotenv import load_dotenv
 
@@ -12,16 +12,16 @@ from dotenv import load_dotenv
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-try:
-    from BinaryOptionsToolsV2.pocketoption import PocketOptionAsync
-except ImportError:
-    from mock_pocketoption import PocketOptionAsync
-
+from client_pool import client_pool
 from risk_manager import RiskManager
+from asset_catalog import resolve_pairs
+from payout_cache import payout_cache
 from bot_state import BotState
 from logger_config import setup_logger
 from config_loader import load_config
 from bots.ml_filter import MLFilter
+from instrumentation import instrumentation
+from sampling_profiler import profiler
 
 
 class BaseBot:
@@ -59,33 +59,22 @@ class BaseBot:
         self.telegram_token = os.getenv("TELEGRAM_TOKEN")
         self.telegram_chat_id = os.getenv("TELEGRAM_CHAT_ID")
         
-        if not self.ssid:
-            raise ValueError("POCKETOPTION_SSID not found in environment")
-            
         if not self.ssid:
             raise ValueError("POCKETOPTION_SSID not found in environment")
             
         # NOTE: We do NOT clean the SSID because the library seems to expect the raw format 
         # or at least doesn't crash with it (returns -1 instead of ValueError).
-        # We will handle the connection failure downstream.
         
-        # Initialize API with robust error handling
-        try:
-            self.api = PocketOptionAsync(ssid=self.ssid)
-        except Exception as e:
-            self.log(f"❌ Error initializing Real API: {e}", "error")
-            self.log("⚠️ Falling back to SIMULATION MODE (Mock API) due to initialization failure.", "warning")
-            from mock_pocketoption import PocketOptionAsync as MockApi
-            self.api = MockApi()
-        except Exception as e:
-            self.log(f"❌ Error initializing Real API: {e}", "error")
-            self.log("⚠️ Falling back to SIMULATION MODE (Mock API) due to initialization failure.", "warning")
-            from mock_pocketoption import PocketOptionAsync as MockApi
-            self.api = MockApi()
-            
-        # Check which library is being used
-        lib_name = self.api.__class__.__module__
-        self.log(f"📚 API Library: {lib_name}")
+        # Self-healing session: heartbeat, backoff reconnect, SSID hot-swap from .env.
+        # No silent fallback to the mock API (only with ALLOW_MOCK_API=1).
+        # Pooled per account: bots in the same process share one warm connection.
+        self.api = client_pool.get(
+            self.ssid,
+            env_file=env_file or ".env",
+            name=bot_name,
+            on_state_change=lambda state, msg: self.log(f"🔌 Session {state}: {msg}",
+                                                        "info" if state == "connected" else "warning")
+        )
         
         # Initialize state management
         self.bot_state = BotState()
@@ -100,7 +89,8 @@ class BaseBot:
             max_drawdown=risk_config['max_drawdown'],
             streak_limit=risk_config['streak_limit'],
             max_risk_per_trade=risk_config.get('max_risk_per_trade', 0.05),
-            demo_mode=system_config.get('demo_mode', True)
+            demo_mode=system_config.get('demo_mode', True),
+            max_total_exposure=risk_config.get('max_total_exposure', 0.10)
         )
         
         # Initialize ML filter
@@ -110,9 +100,13 @@ class BaseBot:
         
         # Bot-specific config
         self.timeframes = os.getenv("TIMEFRAMES", "M5").split(",")
-        self.pairs = self.config['trading']['pairs']
+        catalog_config = self.config['trading'].get('asset_catalog', {})
+        self.pairs = resolve_pairs(self.config['trading']['pairs'], **catalog_config)
         self.sleep_interval = int(os.getenv("SLEEP_INTERVAL", "30"))
         
+        # Where execute_trade() sends orders (None = simulated; the backtester sets the replay API)
+        self.order_api = None
+        
         self.log(f"🤖 {bot_name.upper()} Bot initialized")
         self.log(f"📊 Timeframes: {self.timeframes}")
         self.log(f"💰 ML Threshold: {ml_threshold}")
@@ -144,7 +138,8 @@ class BaseBot:
             balance = await self.api.balance()
             
             # Check risk limits
-            can_trade, reason = await self.risk_manager.can_trade(balance, self.bot_state)
+            with instrumentation.timer('risk_check', signal['pair']):
+                can_trade, reason = await self.risk_manager.can_trade(balance, self.bot_state)
             if not can_trade:
                 self.log(f"🛡️ Trade blocked: {reason}", "warning")
                 return
@@ -170,20 +165,20 @@ class BaseBot:
                 f"Monto: ${amount:.2f}"
             )
             
-            # TODO: Execute actual trade via API
-            # result = await self.api.open_trade(...)
-            
-            # For now, simulate
-            self.log(f"✅ Trade simulado (remove this in production)", "debug")
+            if self.order_api is not None:
+                # Backtester (replay API): same decision path, real orders in simulated time
+                duration = self.config['trading']['timeframes'].get(signal.get('timeframe') or 'M5', 300)
+                place = self.order_api.buy if signal['direction'] == 'BUY' else self.order_api.sell
+                await place(signal['pair'], amount, duration)
+            else:
+                # TODO: Execute actual trade via API
+                # result = await self.api.open_trade(...)
+                
+                # For now, simulate
+                self.log(f"✅ Trade simulado (remove this in production)", "debug")
             
-            # Record trade
-            await self.bot_state.add_trade({
-                'pair': signal['pair'],
-                'direction': signal['direction'],
-                'amount': amount,
-                'timestamp': datetime.now(timezone.utc),
-                'bot': self.bot_name
-            })
+            # Record trade (the result goes to bot_state.record_result when it closes)
+            await self.bot_state.increment_daily_trades()
             
         except Exception as e:
             self.log(f"❌ Error executing trade: {e}", "error")
@@ -196,15 +191,63 @@ class BaseBot:
         
         try:
             import requests
-            requests.post(
-                f"https://api.telegram.org/bot{self.telegram_token}/sendMessage",
-                json={"chat_id": self.telegram_chat_id, "text": message},
-                timeout=10
-            )
+            with instrumentation.timer('telegram'):
+                requests.post(
+                    f"https://api.telegram.org/bot{self.telegram_token}/sendMessage",
+                    json={"chat_id": self.telegram_chat_id, "text": message},
+                    timeout=10
+                )
             self.log("📱 Telegram notification sent", "debug")
         except Exception as e:
             self.log(f"⚠️ Error sending Telegram: {e}", "warning")
     
+    async def run_cycle(self) -> Optional[Dict]:
+        """
+        One scan: generate_signal -> ML filter -> payout gate -> execute_trade.
+        
+        Shared by run() and the backtester (bot_backtester.py), so both
+        measure the same code path.
+        
+        Returns:
+            The signal if it was sent to execute_trade, else None
+        """
+        # Generate signal
+        with instrumentation.timer('generate_signal'):
+            signal = await self.generate_signal()
+        
+        if signal:
+            # Extract features for ML filter
+            features = signal.get('features', {})
+            
+            # Check ML filter (per-context threshold when a lookup table exists)
+            with instrumentation.timer('ml_predict', signal['pair']):
+                ml_proba = self.ml_filter.predict(features)
+            # Never below the breakeven probability at the live payout (EV > 0)
+            threshold = payout_cache.min_probability(
+                signal['pair'], self.ml_filter.threshold_for(signal['pair'], signal.get('tf'))
+            )
+            prob = self.ml_filter.calibrate(ml_proba)
+            # EV is checked once, by the threshold above; here only payout open / minimum
+            allowed, reason = payout_cache.allows(signal['pair'])
+            
+            if not allowed:
+                self.log(f"⏸️ Signal rejected by payout: {signal['pair']} {reason}", "debug")
+            elif prob >= threshold:
+                self.log(
+                    f"✅ Signal passed ML filter: {signal['pair']} "
+                    f"(ML: {ml_proba:.2%})"
+                )
+                with instrumentation.timer('execute_trade', signal['pair']):
+                    await self.execute_trade(signal)
+                return signal
+            else:
+                self.log(
+                    f"⏸️ Signal rejected by ML: {signal['pair']} "
+                    f"(ML: {ml_proba:.2%} < {threshold:.2%})",
+                    "debug"
+                )
+        return None
+    
     async def run(self):
         """
         Main bot loop.
@@ -213,35 +256,27 @@ class BaseBot:
         self.log(f"🚀 {self.bot_name.upper()} BOT STARTING")
         self.log("=" * 70)
         
-        # Get initial balance with retry logic (like main.py)
-        balance = None
-        for attempt in range(3):
-            try:
-                balance = await self.api.balance()
-                
-                # If valid balance found, break
-                if balance != -1 and balance != -1.0:
-                    break
-                
-                # If invalid, wait and retry
-                if attempt < 2:
-                    self.log(f"⚠️ Balance check failed ({balance}), retrying ({attempt + 1}/3)...", "warning")
-                    await asyncio.sleep(2)
-            except Exception as e:
-                self.log(f"⚠️ Error getting balance ({attempt + 1}/3): {e}", "warning")
-                await asyncio.sleep(2)
+        # Per-stage latency histograms (/metrics on METRICS_PORT, /latency on Telegram)
+        instrumentation.bind_bot(self.bot_name)
+        instrumentation.serve()
+        
+        # Sampling profiler on demand: kill -USR1 <pid>
+        profiler.name = self.bot_name
+        profiler.attach_loop()
+        if profiler.install_signal_handler():
+            self.log(f"🔬 Profiler: kill -USR1 {os.getpid()} → logs/profiles/")
+        
+        # Connect (reconnects with backoff until the SSID is accepted; update .env to hot-swap it)
+        self.log("🔌 Connecting to PocketOption...")
+        await self.api.connect()
+        balance = await self.api.balance()
+        lib_name = self.api.client.__class__.__module__
+        self.log(f"📚 API Library: {lib_name}")
+        
+        # Live payout table (one api.payout() call per refresh)
+        payout_cache.attach(self.api)
+        payout_cache.start()
         
-        # Final check
-        if balance is None or balance == -1 or balance == -1.0:
-            self.log("❌ Connection rejected by server after 3 attempts.", "error")
-            self.log("👉 This usually means your SSID is expired or invalid.", "warning")
-            self.log("⚠️ Switching to SIMULATION MODE to keep bot running.", "warning")
-            
-            from mock_pocketoption import PocketOptionAsync as MockApi
-            self.api = MockApi()
-            balance = await self.api.balance()
-            self.log("✅ Switched to Mock API", "info")
-            
         is_demo = self.api.is_demo()
         self.log(f"✅ Account: {'DEMO' if is_demo else 'REAL'} - Balance: ${balance:.2f}")
         
@@ -250,29 +285,11 @@ class BaseBot:
         while True:
             try:
                 cycle += 1
+                cycle_start = time.perf_counter_ns()
                 
-                # Generate signal
-                signal = await self.generate_signal()
+                await self.run_cycle()
                 
-                if signal:
-                    # Extract features for ML filter
-                    features = signal.get('features', {})
-                    
-                    # Check ML filter
-                    ml_proba = self.ml_filter.predict(features)
-                    
-                    if ml_proba >= self.ml_filter.threshold:
-                        self.log(
-                            f"✅ Signal passed ML filter: {signal['pair']} "
-                            f"(ML: {ml_proba:.2%})"
-                        )
-                        await self.execute_trade(signal)
-                    else:
-                        self.log(
-                            f"⏸️ Signal rejected by ML: {signal['pair']} "
-                            f"(ML: {ml_proba:.2%} < {self.ml_filter.threshold:.2%})",
-                            "debug"
-                        )
+                instrumentation.record('cycle', time.perf_counter_ns() - cycle_start)
                 
                 # Sleep
                 await asyncio.sleep(self.sleep_interval)
@@ -3,6 +3,7 @@ import os
 import asyncio
 import pandas as pd
 import time
+import uuid
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -25,6 +26,14 @@ from telegram_listener import TelegramListener
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 from trade_logger import trade_logger
+from feature_store import feature_store, add_emas, local_hour, bar_epoch, timeframe_name
+from instrumentation import instrumentation
+from signal_latency import SignalTimeline
+from sampling_profiler import profiler
+from asset_catalog import resolve_pairs
+from payout_cache import payout_cache
+from client_pool import client_pool
+from candles import fetch_candles
 
 # ========================= CONFIGURACIÓN =========================
 PAIRS = ['EURUSD_otc', 'GBPUSD_otc', 'AUDUSD_otc', 'USDCAD_otc', 'AUDCAD_otc', 'USDMXN_otc', 'USDCOP_otc']
@@ -57,39 +66,75 @@ def clean_ssid(ssid: str) -> str:
             return obj_match.group(1)
     return ssid
 
-ssid = clean_ssid(os.getenv("POCKETOPTION_SSID"))
-api = PocketOptionAsync(ssid=ssid)
+# Sesión auto-reparable del pool (una por cuenta, compartida con otros bots del proceso):
+# heartbeat, reconexión con backoff, SSID nuevo desde .env o /ssid
+api = client_pool.get(os.getenv("POCKETOPTION_SSID"), factory=lambda s: PocketOptionAsync(ssid=clean_ssid(s)),
+                      name="ema_pullback")
 
 # ========================= ML MODEL WITH HOT-RELOAD =========================
 # Inicializar variables globales primero
 ml_manager = None
 model = None
+ML_ACTIVE = False
+ML_THRESHOLD = 0.60  # Optimizado basado en análisis
 
-try:
-    from ml_model_manager import ml_manager as _ml_manager
-    ml_manager = _ml_manager
-    ML_ACTIVE = ml_manager.is_active()
-    ML_THRESHOLD = 0.60  # Optimizado basado en análisis
-    print(f"✅ Modelo ML con hot-reload (threshold: {ML_THRESHOLD:.0%})")
-except ImportError:
-    # Fallback si ml_model_manager no está disponible
+def init_ml():
+    """
+    Cargar el modelo (ml_manager o fallback joblib).
+
+    Se llama desde main() en un hilo, en paralelo con la conexión a la API:
+    importar el bot no carga sklearn ni arranca los hilos del manager.
+    """
+    global ml_manager, model, ML_ACTIVE
     try:
-        import joblib
-        model = joblib.load("ml_model.pkl")
-        ML_ACTIVE = True
-        ML_THRESHOLD = 0.60
-        print(f"⚠️ Modelo ML sin hot-reload (threshold: {ML_THRESHOLD:.0%})")
-    except Exception as e:
-        ML_ACTIVE = False
-        ML_THRESHOLD = 0.60
-        print(f"❌ Sin modelo ML: {e}")
+        from ml_model_manager import ml_manager as _ml_manager
+        ml_manager = _ml_manager
+        ML_ACTIVE = ml_manager.is_active()
+        print(f"✅ Modelo ML con hot-reload (threshold: {ML_THRESHOLD:.0%})")
+    except ImportError:
+        # Fallback si ml_model_manager no está disponible
+        try:
+            import joblib
+            model = joblib.load("ml_model.pkl")
+            ML_ACTIVE = True
+            print(f"⚠️ Modelo ML sin hot-reload (threshold: {ML_THRESHOLD:.0%})")
+        except Exception as e:
+            ML_ACTIVE = False
+            print(f"❌ Sin modelo ML: {e}")
 
 # ========================= INDICADORES =========================
-def add_emas(df: pd.DataFrame) -> pd.DataFrame:
-    df['ema8']  = df['close'].ewm(span=8, adjust=False).mean()
-    df['ema21'] = df['close'].ewm(span=21, adjust=False).mean()
-    df['ema55'] = df['close'].ewm(span=55, adjust=False).mean()
-    return df
+# add_emas y las features ML vienen de feature_store (misma definición que backtests y entrenamiento)
+
+def ml_probability(df: pd.DataFrame, pair: str, duration: int, signal_id: str = None):
+    """
+    Probabilidad calibrada de ganar (clase 1 = WIN) o None si la señal no pasa.
+
+    Único gate de EV: el threshold (por contexto, o ML_THRESHOLD) nunca queda
+    por debajo del breakeven al payout actual, y se compara contra la misma
+    probabilidad que se devuelve en la señal.
+    """
+    # Features cacheadas por (par, TF, vela): [price, duration_minutes, pair_idx, ema8, ema21, ema55, hour_normalized]
+    features_df = feature_store.frame(df, pair, duration)
+    tf = timeframe_name(duration)
+
+    # Usar ml_manager si está disponible (thread-safe)
+    if ml_manager is not None:
+        prob_result = ml_manager.predict_proba(features_df)
+        if prob_result is None:
+            return None
+        # Threshold por contexto (par, hora, TF) sobre probabilidad calibrada; sin tabla, ML_THRESHOLD
+        hour = local_hour(bar_epoch(df.index[-1]))
+        prob = ml_manager.calibrate(prob_result[0][1])
+        threshold = payout_cache.min_probability(pair, ml_manager.get_threshold(pair, hour, tf, default=ML_THRESHOLD))
+        if signal_id:
+            # Shadow: el candidato puntúa la misma señal fuera del camino de decisión, con el mismo gate
+            ml_manager.shadow_score(features_df, prob, signal_id, pair, tf, threshold)
+    elif model is not None:
+        prob = model.predict_proba(features_df)[0][1]
+        threshold = payout_cache.min_probability(pair, ML_THRESHOLD)
+    else:
+        return 1.0  # Sin modelo, aceptar señal
+    return prob if prob >= threshold else None
 
 def get_signal(df: pd.DataFrame, pair: str, duration: int):
     if len(df) < 60:
@@ -103,34 +148,14 @@ def get_signal(df: pd.DataFrame, pair: str, duration: int):
 
     if e8 > e21 > e55 and p <= e8 and c > e8:
         prob = 1.0
+        signal_id = str(uuid.uuid4())[:8]
         if ML_ACTIVE:
-            try:
-                pair_idx = PAIRS.index(pair)
-            except ValueError:
-                pair_idx = 0
-            # Agregar hora del día normalizada (0-1)
-            hour = datetime.now().hour
-            hour_normalized = hour / 24
-            
-            # Features en el orden del entrenamiento: [price, duration_minutes, pair_idx, ema8, ema21, ema55, hour_normalized]
-            feature_names = ['price', 'duration_minutes', 'pair_idx', 'ema8', 'ema21', 'ema55', 'hour_normalized']
-            features_df = pd.DataFrame([[c, duration, pair_idx, e8, e21, e55, hour_normalized]], columns=feature_names)
-            
-            # Usar ml_manager si está disponible (thread-safe)
-            if ml_manager is not None:
-                prob_result = ml_manager.predict_proba(features_df)
-                if prob_result is None:
-                    return None
-                prob = prob_result[0][1]
-            elif model is not None:
-                prob = model.predict_proba(features_df)[0][1]
-            else:
-                prob = 1.0  # Sin modelo, aceptar señal
-            
-            if prob < ML_THRESHOLD:
+            prob = ml_probability(df, pair, duration, signal_id)
+            if prob is None:
                 return None
         return {
             "direction": "BUY", 
+            "signal_id": signal_id,
             "prob": prob,
             "price": c,
             "ema8": e8,
@@ -139,30 +164,8 @@ def get_signal(df: pd.DataFrame, pair: str, duration: int):
 
         prob = 1.0
         if ML_ACTIVE:
-            try:
-                pair_idx = PAIRS.index(pair)
-            except ValueError:
-                pair_idx = 0
-            # Agregar hora del día normalizada (0-1)
-            hour = datetime.now().hour
-            hour_normalized = hour / 24
-            
-            # Features en el orden del entrenamiento: [price, duration_minutes, pair_idx, ema8, ema21, ema55, hour_normalized]
-            feature_names = ['price', 'duration_minutes', 'pair_idx', 'ema8', 'ema21', 'ema55', 'hour_normalized']
-            features_df = pd.DataFrame([[c, duration, pair_idx, e8, e21, e55, hour_normalized]], columns=feature_names)
-            
-            # Usar ml_manager si está disponible (thread-safe)
-            if ml_manager is not None:
-                prob_result = ml_manager.predict_proba(features_df)
-                if prob_result is None:
-                    return None
-                prob = prob_result[0][0]
-            elif model is not None:
-                prob = model.predict_proba(features_df)[0][0]
-            else:
-                prob = 1.0  # Sin modelo, aceptar señal
-            
-            if prob < ML_THRESHOLD:
+            prob = ml_probability(df, pair, duration)
+            if prob is None:
                 return None
         return {
             "direction": "SELL", 
@@ -179,11 +182,17 @@ last_known_balance = 0.0
 
 # ========================= MAIN LOOP =========================
 async def main():
-    global last_known_balance
+    global last_known_balance, PAIRS
     print("BOT EMA PULLBACK INICIADO")
+    PAIRS = resolve_pairs(PAIRS)
     print(f"Pares: {len(PAIRS)} | Risk: {RISK_PERCENT}% | Cooldown: {COOLDOWN_SECONDS}s")
     
-    await asyncio.sleep(3)
+    # El modelo carga en un hilo mientras la API conecta; el primer escaneo lo espera
+    ml_ready = asyncio.create_task(asyncio.to_thread(init_ml))
+    await api.connect()
+    await ml_ready
+    payout_cache.attach(api)
+    payout_cache.start()
     recent_trades = {}
 
     # ========================= TELEGRAM LISTENER =========================
@@ -191,8 +200,13 @@ async def main():
     def get_current_balance():
         return last_known_balance
     
-    telegram_listener = TelegramListener(TELEGRAM_TOKEN, get_current_balance)
+    telegram_listener = TelegramListener(TELEGRAM_TOKEN, get_current_balance, session=api)
     telegram_listener.start()
+    instrumentation.bind_bot("ema_pullback")
+    instrumentation.serve()
+    profiler.name = "ema_pullback"
+    profiler.attach_loop()
+    profiler.install_signal_handler()
     print("✅ Telegram Listener iniciado")
 
     while True:
@@ -200,8 +214,8 @@ async def main():
             balance = await api.balance()
             
             if balance == -1.0:
-                print("❌ Sesión expirada")
-                await asyncio.sleep(60)
+                print("❌ Sesión expirada → reconectando (SSID nuevo: .env o /ssid)")
+                await api.wait_connected()
                 continue
 
             if not balance or balance < 10:
@@ -229,26 +243,25 @@ async def main():
                 for name, duration in TIMEFRAMES.items():
                     try:
                         print(f"🔍 {pair} {name}...", end=" ")
-                        raw = await api.get_candles(pair, duration, duration * 100)
-                        if not raw:
+                        with instrumentation.timer('fetch_candles', pair):
+                            candles = await fetch_candles(api, pair, duration, duration * 100)
+                        if not candles:
                             print("❌")
                             continue
 
-                        df = pd.DataFrame(raw)
-                        if 'timestamp' in df.columns and 'time' not in df.columns:
-                            df['time'] = df['timestamp']
-                        
-                        required_cols = ['time', 'open', 'close', 'high', 'low']
-                        if not all(col in df.columns for col in required_cols):
-                            print("❌")
-                            continue
-                        
-                        df = df[required_cols]
-                        df['time'] = pd.to_datetime(df['time'], unit='s')
-                        df = df.set_index('time').astype(float)
+                        df = candles.to_frame()
 
-                        signal = get_signal(df, pair, duration)
+                        with instrumentation.timer('get_signal', pair):
+                            signal = get_signal(df, pair, duration)
                         if signal and not traded:
+                            timeline = SignalTimeline.from_bar(df.index[-1], duration)
+                            timeline.stamp('detected')
+                            # EV ya verificado en get_signal (prob calibrada vs breakeven): solo payout abierto
+                            allowed, reason = payout_cache.allows(pair)
+                            if not allowed:
+                                print(f"⏸️ {reason}")
+                                continue
+                            timeline.stamp('risk_checked')
                             traded = True
                             dir_text = "COMPRA" if signal["direction"] == "BUY" else "VENTA"
                             prob_text = f" {signal['prob']:.1%}" if ML_ACTIVE else ""
@@ -259,9 +272,16 @@ async def main():
                             # Guardar balance antes
                             balance_before = balance
 
-                            # Generar trade_id y loguear operación
-                            import uuid
-                            trade_id = str(uuid.uuid4())[:8]
+                            timeline.stamp('order_sent')
+                            if signal["direction"] == "BUY":
+                                await api.buy(pair, amount, duration)
+                            else:
+                                await api.sell(pair, amount, duration)
+                            timeline.stamp('ack')
+                            print(f"⏱️ {timeline.summary()}")
+
+                            # Generar trade_id y loguear operación (mismo ID que el shadow scoring)
+                            trade_id = signal.get("signal_id") or str(uuid.uuid4())[:8]
                             trade_logger.log_trade({
                                 "timestamp": datetime.now(),
                                 "trade_id": trade_id,
@@ -275,13 +295,9 @@ async def main():
                                 "ema_conf": 1 if signal["ema8"] > signal["ema21"] else -1,
                                 "expiry_time": duration,
                                 "result": "PENDING",
-                                "notes": f"ML_prob={signal.get('prob', 1.0):.2%}"
+                                "notes": f"ML_prob={signal.get('prob', 1.0):.2%}",
+                                **timeline.to_log_fields()
                             })
-
-                            if signal["direction"] == "BUY":
-                                await api.buy(pair, amount, duration)
-                            else:
-                                await api.sell(pair, amount, duration)
                             
                             # Telegram: Operación ejecutada (con formato bonito)
                             send_trade_signal(
@@ -302,6 +318,8 @@ async def main():
                                     profit = balance_after - balance_before
                                     print(f"✅ GANÓ: +${profit:.2f}")
                                     trade_logger.update_trade_result(trade_id, "WIN", profit)
+                                    if ml_manager is not None:
+                                        ml_manager.record_shadow_result(trade_id, "WIN", profit)
                                     send_trade_result(
                                         pair=pair,
                                         direction=signal["direction"],
@@ -313,6 +331,8 @@ async def main():
                                     loss = balance_before - balance_after
                                     print(f"❌ PERDIÓ: -${loss:.2f}")
                                     trade_logger.update_trade_result(trade_id, "LOSS", -loss)
+                                    if ml_manager is not None:
+                                        ml_manager.record_shadow_result(trade_id, "LOSS", -loss)
                                     send_trade_result(
                                         pair=pair,
                                         direction=signal["direction"],
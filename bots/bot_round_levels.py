@@ -1,5 +1,5 @@
 # bot_round_real.py → VERSIÓN FINAL GANADORA (copia-pega y dejá correr)
-import os, asyncio, pandas as pd, uuid
+import os, asyncio, time, uuid
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 load_dotenv()
@@ -8,6 +8,9 @@ load_dotenv()
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 from trade_logger import trade_logger
+from signal_latency import SignalTimeline
+from client_pool import client_pool
+from candles import fetch_candles
 
 try:
     from BinaryOptionsToolsV2.pocketoption import PocketOptionAsync
@@ -21,42 +24,6 @@ RISK_PERCENT = 1.0
 MIN_AMOUNT = 1.0
 COOLDOWN_SECONDS = 70  # cooldown por par
 
-def normalize_df(df):
-    if df.empty:
-        return df
-        
-    # Mapeo de nombres posibles a los que necesitamos
-    col_map = {
-        'timestamp': 'time',
-        't': 'time',
-        'time': 'time',
-        'o': 'open',
-        'open': 'open',
-        'c': 'close',
-        'close': 'close',
-        'h': 'high',
-        'high': 'high',
-        'l': 'low',
-        'low': 'low'
-    }
-    
-    # Renombrar columnas si existen
-    df = df.rename(columns=col_map)
-    
-    # Asegurarnos de tener las columnas mínimas
-    required = ['time', 'open', 'close']
-    missing = [col for col in required if col not in df.columns]
-    if missing:
-        print(f"Columnas faltantes: {missing}")
-        return pd.DataFrame()
-        
-    df = df[required].copy()
-    df['time'] = pd.to_datetime(df['time'], unit='s', errors='coerce')
-    df = df.dropna(subset=['time'])
-    df = df.set_index('time')
-    df = df.astype(float)
-    return df
-
 # Inicializar API
 print("🔐 Buscando SSID en variables de entorno...")
 ssid = os.getenv("POCKETOPTION_SSID")
@@ -67,32 +34,26 @@ if not ssid:
         exit("SSID requerido")
 
 print(f"✓ SSID obtenido, inicializando API...")
-try:
-    api = PocketOptionAsync(ssid=ssid)
-    print("✓ API inicializada correctamente")
-except Exception as e:
-    print(f"❌ Error inicializando API: {e}")
-    exit(f"Error: {e}")
+# Sesión del pool (compartida por cuenta): conecta en main() y reconecta con backoff si el SSID expira
+api = client_pool.get(ssid, factory=PocketOptionAsync, name="round_levels")
 
 # Cooldown por par
 last_trade_time = {}
 
 async def get_signal_round():
-    now = datetime.now()
+    now = datetime.fromtimestamp(time.time())  # sigue al reloj del replay/backtest
     
     for pair in PAIRS:
         if pair in last_trade_time and now - last_trade_time[pair] < timedelta(seconds=70):
             continue
             
         try:
-            raw = await api.get_candles(pair, 300, 300*100)
-            if not raw or len(raw) < 50:
+            # Columnas NumPy directo (acepta time/timestamp/t y claves cortas o/c/h/l)
+            candles = await fetch_candles(api, pair, 300, 300*100)
+            if len(candles) < 50:
                 continue
                 
-            df = pd.DataFrame(raw)
-            df = normalize_df(df)  # ← ESTA ES LA CLAVE
-            if df.empty or len(df) < 50:
-                continue
+            df = candles.to_frame(['open', 'close'])
                 
             price = df['close'].iloc[-1]
             open_p = df['open'].iloc[-1]
@@ -111,12 +72,16 @@ async def get_signal_round():
             if body < avg_body * 0.8:
                 continue
                 
+            timeline = SignalTimeline.from_bar(df.index[-1], TIMEFRAME)
+            timeline.stamp('detected')
             if price < level and ema8 > ema21 and price > open_p:
                 last_trade_time[pair] = now
-                return {"pair": pair, "direction": "BUY", "level": level, "dist": dist}
+                return {"pair": pair, "direction": "BUY", "level": level, "dist": dist,
+                        "timeline": timeline}
             if price > level and ema8 < ema21 and price < open_p:
                 last_trade_time[pair] = now
-                return {"pair": pair, "direction": "SELL", "level": level, "dist": dist}
+                return {"pair": pair, "direction": "SELL", "level": level, "dist": dist,
+                        "timeline": timeline}
                 
         except Exception as e:
             print(f"Error {pair}: {e}")
@@ -125,19 +90,19 @@ async def get_signal_round():
 
 async def main():
     print("BOT ROUND LEVELS GANADOR → SOLO EURUSD_otc y GBPUSD_otc")
-    print("✓ Iniciando bucle principal en 5 segundos...")
-    await asyncio.sleep(5)
+    print("✓ Conectando...")
+    await api.connect()
     print("✓ Bucle principal iniciado")
     
     while True:
         try:
             print("🔄 Obteniendo balance...")
             balance = await api.balance()
-            print(f"✓ Balance: ${balance:.2f}")
             if balance in [None, -1.0]:
-                print("Sesión expirada → actualizá SSID")
-                await asyncio.sleep(60)
+                print("Sesión expirada → reconectando (SSID nuevo: editá .env)")
+                await api.wait_connected()
                 continue
+            print(f"✓ Balance: ${balance:.2f}")
                 
             amount = max(MIN_AMOUNT, round(balance * RISK_PERCENT / 100, 2))
             
@@ -148,6 +113,19 @@ async def main():
                 dir_text = "COMPRA" if signal["direction"] == "BUY" else "VENTA"
                 print(f"\n{signal['pair']} {dir_text} | Nivel: {signal['level']:.5f} | {signal['dist']*10000:.1f} pips")
                 
+                # Guardar balance antes
+                balance_before = balance
+
+                timeline = signal["timeline"]
+                # Sin chequeo de riesgo entre la señal y la orden: sin etapa risk_checked
+                timeline.stamp('order_sent')
+                if signal["direction"] == "BUY":
+                    await api.buy(signal["pair"], amount, TIMEFRAME)
+                else:
+                    await api.sell(signal["pair"], amount, TIMEFRAME)
+                timeline.stamp('ack')
+                print(f"⏱️ {timeline.summary()}")
+
                 trade_id = str(uuid.uuid4())[:8]
                 trade_logger.log_trade({
                     "timestamp": datetime.now(),
@@ -155,16 +133,9 @@ async def main():
                     "pair": signal["pair"],
                     "decision": signal["direction"],
                     "pattern_detected": f"Round Level {signal['level']:.5f}",
-                    "result": "PENDING"
+                    "result": "PENDING",
+                    **timeline.to_log_fields()
                 })
-                
-                # Guardar balance antes
-                balance_before = balance
-
-                if signal["direction"] == "BUY":
-                    await api.buy(signal["pair"], amount, TIMEFRAME)
-                else:
-                    await api.sell(signal["pair"], amount, TIMEFRAME)
                     
                 print(f"⏳ Esperando {TIMEFRAME}s para resultado...")
                 await asyncio.sleep(TIMEFRAME + 5)
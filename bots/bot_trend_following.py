@@ -8,12 +8,14 @@ import sys
 import asyncio
 import numpy as np
 import pandas as pd
-from typing import Optional, Dict
+from typing import Optional
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from bots.base_bot import BaseBot
+from instrumentation import instrumentation
+from signal_types import Signal, SignalSource
 
 
 class TrendFollowingBot(BaseBot):
@@ -52,7 +54,8 @@ class TrendFollowingBot(BaseBot):
             if df_h1.empty:
                 return None
             
-            df_h1 = compute_indicators(df_h1, interval_h1)
+            with instrumentation.timer('compute_indicators', pair):
+                df_h1 = compute_indicators(df_h1, interval_h1)
             
             last = df_h1.iloc[-1]
             
@@ -76,7 +79,7 @@ class TrendFollowingBot(BaseBot):
             self.log(f"⚠️ Error getting H1 trend for {pair}: {e}", "error")
             return None
     
-    async def generate_signal(self) -> Optional[Dict]:
+    async def generate_signal(self) -> Optional[Signal]:
         """Generate Trend Following signal."""
         
         for pair in self.pairs:
@@ -98,7 +101,8 @@ class TrendFollowingBot(BaseBot):
                 if df_m5.empty:
                     continue
                 
-                df_m5 = compute_indicators(df_m5, interval_m5)
+                with instrumentation.timer('compute_indicators', pair):
+                    df_m5 = compute_indicators(df_m5, interval_m5)
                 
                 last = df_m5.iloc[-1]
                 prev = df_m5.iloc[-2]
@@ -129,20 +133,21 @@ class TrendFollowingBot(BaseBot):
                     continue
                 
                 # Build signal
-                signal = {
-                    'pair': pair,
-                    'tf': 'M5',
-                    'direction': direction,
-                    'score': score,
-                    'pattern': f'Trend Following (H1 {htf_trend})',
-                    'price': close,
-                    'features': {
+                signal = Signal(
+                    pair=pair,
+                    direction=direction,
+                    timeframe='M5',
+                    score=score,
+                    pattern=f'Trend Following (H1 {htf_trend})',
+                    price=close,
+                    source=SignalSource.INDICATOR,
+                    features={
                         'adx_h1': last.get('adx', 0),
                         'ema_alignment': 1 if htf_trend == 'BUY' else -1,
                         'macd_hist': macd_hist,
                         'volume_ratio': 1.0  # TODO: Add volume if available
                     }
-                }
+                )
                 
                 self.log(f"📊 Signal found: {pair} {direction} (H1 trend: {htf_trend})")
                 return signal
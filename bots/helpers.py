@@ -4,6 +4,9 @@ Helper functions shared by all bots
 import asyncio
 import pandas as pd
 
+from candles import fetch_candles as fetch_candle_arrays
+from instrumentation import instrumentation
+
 
 async def fetch_candles(api, pair: str, interval: int, lookback: int = 50) -> pd.DataFrame:
     """
@@ -20,37 +23,17 @@ async def fetch_candles(api, pair: str, interval: int, lookback: int = 50) -> pd
     """
     try:
         offset = interval * lookback
-        raw = await asyncio.wait_for(
-            api.get_candles(pair, interval, offset),
-            timeout=30
-        )
-        
-        if not raw or not isinstance(raw, list):
-            return pd.DataFrame()
+        with instrumentation.timer('fetch_candles', pair):
+            candles = await asyncio.wait_for(
+                fetch_candle_arrays(api, pair, interval, offset),
+                timeout=30
+            )
         
-        df = pd.DataFrame(raw)
-        if 'timestamp' not in df.columns:
-            if 'time' in df.columns:
-                df['timestamp'] = df['time']
-            else:
-                return pd.DataFrame()
-        
-        df = df.dropna(subset=['timestamp', 'open', 'close'])
-        
-        if len(df) < 5:
+        if len(candles) < 5:
             return pd.DataFrame()
         
-        # Create DataFrame with lowercase columns
-        df = pd.DataFrame({
-            'timestamp': pd.to_datetime(df['timestamp'], unit='s', utc=True),
-            'open': pd.to_numeric(df['open']),
-            'close': pd.to_numeric(df['close']),
-            'high': pd.to_numeric(df['high']),
-            'low': pd.to_numeric(df['low'])
-        })
-        df = df.sort_values('timestamp').set_index('timestamp')
-        
-        return df
+        # Columns straight from the NumPy arrays (no list of dicts / to_numeric)
+        return candles.sorted().to_frame(utc=True, index_name='timestamp')
         
     except asyncio.TimeoutError:
         return pd.DataFrame()
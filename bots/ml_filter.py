@@ -2,11 +2,17 @@
 ML Filter - Common ML prediction filter for all bots
 """
 import os
-import joblib
 import numpy as np
 import pandas as pd
+from datetime import datetime
 from typing import Dict, Optional
 
+from ml_calibration import ThresholdTable, calibration_path_for
+from lazy_loader import lazy_import
+
+# sklearn/joblib load with the model, not at import
+joblib = lazy_import('joblib')
+
 class MLFilter:
     """
     Common ML filter that loads a trained model and predicts success probability.
@@ -20,6 +26,7 @@ class MLFilter:
         """
         self.threshold = threshold
         self.model = None
+        self.threshold_table = None
         
         if os.path.exists(model_path):
             try:
@@ -30,6 +37,15 @@ class MLFilter:
                 self.model = None
         else:
             print(f"⚠️ Model not found: {model_path} - ML filter disabled")
+        
+        # Optional calibration + per-context thresholds stored next to the model
+        table_path = calibration_path_for(model_path)
+        if os.path.exists(table_path):
+            try:
+                self.threshold_table = ThresholdTable.load(table_path)
+                print(f"✅ Context thresholds loaded: {table_path}")
+            except Exception as e:
+                print(f"⚠️ Error loading thresholds {table_path}: {e}")
     
     def predict(self, features: Dict[str, float]) -> float:
         """
@@ -58,15 +74,42 @@ class MLFilter:
             print(f"⚠️ ML prediction error: {e}")
             return 0.0
     
-    def should_trade(self, features: Dict[str, float]) -> bool:
+    def threshold_for(self, pair: Optional[str] = None, timeframe: Optional[str] = None,
+                      hour: Optional[int] = None) -> float:
+        """
+        Threshold for a signal context.
+        
+        Uses the (pair, hour, timeframe) lookup table when available,
+        otherwise the global threshold.
+        """
+        if self.threshold_table is None or pair is None:
+            return self.threshold
+        if hour is None:
+            hour = datetime.now().hour
+        return self.threshold_table.threshold_for(pair, hour, timeframe)
+    
+    def calibrate(self, proba: float) -> float:
+        """Calibrated probability (identity without a lookup table)."""
+        if self.threshold_table is None:
+            return proba
+        return self.threshold_table.calibrate(proba)
+    
+    def passes(self, proba: float, pair: Optional[str] = None, timeframe: Optional[str] = None) -> bool:
+        """Check a predicted probability against the context threshold."""
+        return self.calibrate(proba) >= self.threshold_for(pair, timeframe)
+    
+    def should_trade(self, features: Dict[str, float], pair: Optional[str] = None,
+                     timeframe: Optional[str] = None) -> bool:
         """
         Check if signal passes ML filter threshold.
         
         Args:
             features: Dict with feature names and values
+            pair: Optional pair for the context threshold
+            timeframe: Optional timeframe for the context threshold
             
         Returns:
             bool: True if probability >= threshold
         """
         proba = self.predict(features)
-        return proba >= self.threshold
+        return self.passes(proba, pair, timeframe)
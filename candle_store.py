@@ -0,0 +1,288 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Candle Store
+Formato binario de ancho fijo para velas (history/<PAIR>_<TF>.candles).
+
+    Header (64 bytes): magic 'CNDL', version, header_size, interval (s), pair
+    Records (48 bytes): time int64 | open, high, low, close, volume float64
+
+Las velas se leen con numpy.memmap (sin copiar ni parsear) y, como están
+ordenadas por time, cualquier rango sale de una búsqueda binaria.
+
+Uso:
+    python candle_store.py            # convierte history/*.csv, history/<PAIR>/*.json y history/store/*.npz
+"""
+
+import glob
+import json
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Formato
+MAGIC = b'CNDL'
+VERSION = 1
+HEADER_SIZE = 64
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S4'),
+    ('version', '<u2'),
+    ('header_size', '<u2'),
+    ('interval', '<u4'),
+    ('pair', 'S32'),
+    ('reserved', 'V20'),
+])
+RECORD_DTYPE = np.dtype([
+    ('time', '<i8'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8'),
+])
+EXTENSION = ".candles"
+HISTORY_DIR = "history"
+TIMEFRAME_SECONDS = {'M1': 60, 'M5': 300, 'M10': 600, 'M15': 900, 'M30': 1800, 'H1': 3600}
+
+
+def candles_path(pair: str, tf: str, history_dir: str = HISTORY_DIR) -> str:
+    """EURUSD_otc, M5 -> history/EURUSD_otc_M5.candles"""
+    return os.path.join(history_dir, f"{pair}_{tf}{EXTENSION}")
+
+
+def to_records(data) -> np.ndarray:
+    """
+    DataFrame o dict de arrays -> records ordenados por time y sin duplicados.
+
+    Acepta 'time' en epoch segundos o 'timestamp' datetime.
+    """
+    if isinstance(data, pd.DataFrame):
+        columns = {c.lower(): data[c] for c in data.columns}
+    else:
+        columns = {k.lower(): v for k, v in data.items()}
+
+    if 'time' in columns and pd.api.types.is_numeric_dtype(pd.Series(columns['time'])):
+        times = np.asarray(columns['time'], dtype=np.int64)
+    elif 'timestamp' in columns:
+        ts = pd.to_datetime(pd.Series(columns['timestamp']), utc=True)
+        times = (ts.astype('int64') // 10**9).to_numpy()
+    else:
+        raise ValueError("Las velas necesitan columna 'time' o 'timestamp'")
+
+    records = np.zeros(len(times), dtype=RECORD_DTYPE)
+    records['time'] = times
+    for col in ('open', 'high', 'low', 'close', 'volume'):
+        if col in columns:
+            records[col] = np.asarray(columns[col], dtype=np.float64)
+
+    _, idx = np.unique(records['time'], return_index=True)
+    return records[idx]
+
+
+def write_candles(path: str, data, pair: str = "", interval: int = 0):
+    """Escribe un archivo .candles completo (atómico)."""
+    records = data if isinstance(data, np.ndarray) and data.dtype == RECORD_DTYPE else to_records(data)
+
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header['magic'] = MAGIC
+    header['version'] = VERSION
+    header['header_size'] = HEADER_SIZE
+    header['interval'] = interval
+    header['pair'] = pair.encode('ascii', 'ignore')[:32]
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, 'wb') as f:
+        f.write(header.tobytes())
+        f.write(records.tobytes())
+    os.replace(tmp, path)
+
+
+class CandleFile:
+    """
+    Vista memmap de un archivo .candles.
+
+    Los arrays devueltos son vistas del archivo (cero copias); range() usa
+    búsqueda binaria sobre time.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+        if len(header) == 0 or header['magic'][0] != MAGIC:
+            raise ValueError(f"{path}: no es un archivo de velas")
+        if header['version'][0] > VERSION:
+            raise ValueError(f"{path}: versión {header['version'][0]} no soportada")
+
+        self.header_size = int(header['header_size'][0])
+        self.interval = int(header['interval'][0])
+        self.pair = header['pair'][0].decode('ascii')
+
+        count = (os.path.getsize(path) - self.header_size) // RECORD_DTYPE.itemsize
+        if count > 0:
+            self.records = np.memmap(path, dtype=RECORD_DTYPE, mode='r',
+                                     offset=self.header_size, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=RECORD_DTYPE)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def times(self) -> np.ndarray:
+        return self.records['time']
+
+    def column(self, name: str) -> np.ndarray:
+        return self.records[name]
+
+    def range(self, start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        """
+        Velas con start <= time < end (epoch segundos, None = sin límite).
+
+        Returns:
+            Vista (sin copia) de los records
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.times, start, side='left'))
+        hi = len(self) if end is None else int(np.searchsorted(self.times, end, side='left'))
+        return self.records[lo:hi]
+
+    def last(self, n: int) -> np.ndarray:
+        return self.records[max(0, len(self) - n):]
+
+    def to_frame(self, start: Optional[int] = None, end: Optional[int] = None) -> pd.DataFrame:
+        """Rango como DataFrame (time, open, high, low, close, volume, timestamp)."""
+        df = pd.DataFrame(np.asarray(self.range(start, end)))
+        df['timestamp'] = pd.to_datetime(df['time'], unit='s', utc=True)
+        return df
+
+
+def open_candles(pair: str, tf: str, history_dir: str = HISTORY_DIR) -> Optional[CandleFile]:
+    path = candles_path(pair, tf, history_dir)
+    return CandleFile(path) if os.path.exists(path) else None
+
+
+def split_key(key: str) -> Tuple[str, str]:
+    """"EURUSD_otc_M5" -> ("EURUSD_otc", "M5"): el TF se separa por la derecha."""
+    pair, tf = key.rsplit('_', 1)
+    return pair, tf
+
+
+def load_candle_frames(history_dir: str = HISTORY_DIR) -> Dict[str, pd.DataFrame]:
+    """
+    Todos los .candles de un directorio como DataFrames.
+
+    Returns:
+        {"EURUSD_otc_M5": DataFrame, ...}
+    """
+    frames = {}
+    for path in sorted(glob.glob(os.path.join(history_dir, f"*{EXTENSION}"))):
+        key = os.path.basename(path)[:-len(EXTENSION)]
+        try:
+            frames[key] = CandleFile(path).to_frame()
+        except Exception as e:
+            print(f"⚠️ Error leyendo {path}: {e}")
+    return frames
+
+
+# ========================= CONVERSIÓN =========================
+
+def _merge_into(path: str, records: np.ndarray, pair: str, interval: int):
+    """Une records con el archivo existente (dedupe por time; lo nuevo gana)."""
+    if os.path.exists(path):
+        existing = np.asarray(CandleFile(path).records)
+        records = np.concatenate([records, existing])
+        _, idx = np.unique(records['time'], return_index=True)
+        records = records[idx]
+    write_candles(path, records, pair, interval)
+    return len(records)
+
+
+def convert_csv(csv_path: str, history_dir: Optional[str] = None) -> Optional[str]:
+    """history/EURUSD_otc_M5.csv -> history/EURUSD_otc_M5.candles"""
+    parts = os.path.basename(csv_path)[:-4].split('_')
+    if len(parts) < 3:
+        return None
+    pair, tf = f"{parts[0]}_{parts[1]}", parts[2]
+    path = candles_path(pair, tf, history_dir or os.path.dirname(csv_path))
+    _merge_into(path, to_records(pd.read_csv(csv_path)), pair, TIMEFRAME_SECONDS.get(tf, 0))
+    return path
+
+
+def convert_json(json_path: str, history_dir: str = HISTORY_DIR) -> Optional[str]:
+    """history/EURUSD/M5.json -> history/EURUSD_otc_M5.candles"""
+    with open(json_path, 'r') as f:
+        payload = json.load(f)
+    candles = payload.get('candles') if isinstance(payload, dict) else payload
+    if not candles:
+        return None
+    tf = payload.get('tf') if isinstance(payload, dict) else None
+    tf = tf or os.path.splitext(os.path.basename(json_path))[0]
+    pair = os.path.basename(os.path.dirname(json_path))
+    if not pair.endswith('_otc'):
+        pair = f"{pair}_otc"
+    path = candles_path(pair, tf, history_dir)
+    _merge_into(path, to_records(pd.DataFrame(candles)), pair, TIMEFRAME_SECONDS.get(tf, 0))
+    return path
+
+
+def convert_npz(npz_path: str, history_dir: str = HISTORY_DIR) -> list:
+    """Store de backfill_history (history/store/<PAIR>.npz) -> un .candles por timeframe"""
+    pair = os.path.splitext(os.path.basename(npz_path))[0]
+    paths = []
+    with np.load(npz_path) as npz:
+        timeframes = sorted({key.split('_', 1)[0] for key in npz.files})
+        for tf in timeframes:
+            data = {col: npz[f"{tf}_{col}"] for col in RECORD_DTYPE.names if f"{tf}_{col}" in npz.files}
+            path = candles_path(pair, tf, history_dir)
+            _merge_into(path, to_records(data), pair, TIMEFRAME_SECONDS.get(tf, 0))
+            paths.append(path)
+    return paths
+
+
+def convert_history(history_dir: str = HISTORY_DIR) -> list:
+    """Convierte todo lo que haya en history/ (CSV, JSON y store npz)."""
+    converted = []
+    for csv_path in sorted(glob.glob(os.path.join(history_dir, "*.csv"))):
+        try:
+            path = convert_csv(csv_path, history_dir)
+            if path:
+                converted.append(path)
+        except Exception as e:
+            print(f"⚠️ {csv_path}: {e}")
+    for json_path in sorted(glob.glob(os.path.join(history_dir, "*", "*.json"))):
+        try:
+            path = convert_json(json_path, history_dir)
+            if path:
+                converted.append(path)
+        except Exception as e:
+            print(f"⚠️ {json_path}: {e}")
+    for npz_path in sorted(glob.glob(os.path.join(history_dir, "store", "*.npz"))):
+        try:
+            converted.extend(convert_npz(npz_path, history_dir))
+        except Exception as e:
+            print(f"⚠️ {npz_path}: {e}")
+    return sorted(set(converted))
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Convierte history/ al formato binario .candles')
+    parser.add_argument('--history', default=HISTORY_DIR)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("💾 CONVERSIÓN A FORMATO BINARIO DE VELAS")
+    print("=" * 60)
+
+    for path in convert_history(args.history):
+        candles = CandleFile(path)
+        print(f"  ✅ {os.path.basename(path)}: {len(candles)} velas")
+
+
+if __name__ == "__main__":
+    main()
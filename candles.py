@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Candles
+Velas como struct-of-arrays (una columna NumPy por campo) en lugar de una
+lista de dicts que cada bot convierte a DataFrame en cada ciclo.
+
+Fuentes, de la más barata a la más cara (fetch_candles elige sola):
+1. api.get_candles_array(): el replay devuelve vistas del array del
+   candle store (sin copia); SessionManager y los mocks la exponen también.
+2. Cliente Rust (BinaryOptionsToolsV2): el JSON crudo de RawPocketOption se
+   decodifica directo a columnas (orjson si está instalado, si no json),
+   sin pasar por la lista de dicts de PocketOptionAsync.get_candles.
+3. api.get_candles() (lista de dicts): se extraen las columnas de una pasada.
+
+Candles.to_frame() arma el DataFrame que esperan las estrategias (índice
+datetime 'time', columnas float) directamente desde las columnas, sin
+rename/astype/to_datetime sobre datos ya normalizados.
+"""
+
+import json
+from operator import itemgetter
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # orjson es opcional: json de la stdlib como fallback
+    _loads = json.loads
+
+PRICE_FIELDS = ('open', 'high', 'low', 'close')
+TIME_KEYS = ('time', 'timestamp', 't')
+SHORT_KEYS = {'o': 'open', 'h': 'high', 'l': 'low', 'c': 'close', 'v': 'volume'}
+FRAME_COLUMNS = ('open', 'close', 'high', 'low')
+
+
+class Candles:
+    """
+    Velas en columnas: time (epoch s, int64) + open/high/low/close/volume (float64).
+
+    Las columnas pueden ser vistas de otro array (p.ej. un memmap del candle
+    store): no se modifican in-place.
+    """
+
+    __slots__ = ('time', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, time: np.ndarray, open: np.ndarray, high: np.ndarray, low: np.ndarray,
+                 close: np.ndarray, volume: Optional[np.ndarray] = None):
+        self.time = time
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume if volume is not None else np.zeros(len(time), dtype=np.float64)
+
+    @classmethod
+    def empty(cls) -> "Candles":
+        f = np.empty(0, dtype=np.float64)
+        return cls(np.empty(0, dtype=np.int64), f, f, f, f, f)
+
+    @classmethod
+    def from_records(cls, records: np.ndarray) -> "Candles":
+        """Vistas de un array estructurado (RECORD_DTYPE del candle store), sin copiar."""
+        return cls(records['time'], records['open'], records['high'], records['low'],
+                   records['close'], records['volume'] if 'volume' in records.dtype.names else None)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[dict]) -> "Candles":
+        """
+        Lista de dicts de la API -> columnas, en una sola pasada por las filas.
+
+        Acepta 'time'/'timestamp'/'t' (epoch o ISO) y claves cortas (o/h/l/c/v).
+        Filas sin time/open/close (o con NaN/None) se descartan.
+        """
+        if not rows:
+            return cls.empty()
+        first = rows[0]
+        if not isinstance(first, dict):
+            raise TypeError(f"Vela con formato inesperado: {type(first).__name__}")
+        keys = {SHORT_KEYS.get(k, k): k for k in first}
+        time_key = next((k for k in TIME_KEYS if k in first), None)
+        if time_key is None or 'open' not in keys or 'close' not in keys:
+            raise ValueError(f"Velas sin time/open/close: {sorted(first)}")
+
+        fields = [time_key] + [keys.get(f, keys['close']) for f in PRICE_FIELDS]
+        has_volume = 'volume' in keys
+        if has_volume:
+            fields.append(keys['volume'])
+        get = itemgetter(*fields)
+
+        try:
+            table = [get(row) for row in rows]
+        except KeyError:
+            table = [get(row) for row in rows if all(f in row for f in fields)]
+        if not table:
+            return cls.empty()
+
+        if isinstance(table[0][0], str):
+            times = _epochs([row[0] for row in table]).astype(np.float64)
+            values = np.array([row[1:] for row in table], dtype=np.float64)
+        else:
+            values = np.array(table, dtype=np.float64)
+            times, values = values[:, 0], values[:, 1:]
+        valid = ~(np.isnan(times) | np.isnan(values[:, 0]) | np.isnan(values[:, 3]))
+        if not valid.all():
+            times, values = times[valid], values[valid]
+        times = times.astype(np.int64)
+        values = np.ascontiguousarray(values.T)
+        return cls(times, values[0], values[1], values[2], values[3], values[4] if has_volume else None)
+
+    @classmethod
+    def from_json(cls, payload) -> "Candles":
+        """JSON crudo (str/bytes) del cliente Rust -> columnas."""
+        data = _loads(payload)
+        if isinstance(data, dict):
+            data = data.get('candles', data.get('data', []))
+        return cls.from_rows(data)
+
+    # ---------------------------------------------------------------- views
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def __bool__(self) -> bool:
+        return len(self.time) > 0
+
+    def __getitem__(self, key):
+        """Columna por nombre ('close') o slice de velas."""
+        if isinstance(key, str):
+            if key not in self.__slots__:
+                raise KeyError(key)
+            return getattr(self, key)
+        return Candles(*(getattr(self, f)[key] for f in self.__slots__))
+
+    def tail(self, n: int) -> "Candles":
+        return self[max(0, len(self) - n):]
+
+    def sorted(self) -> "Candles":
+        """Ordenadas por time y sin duplicados (no copia si ya lo están)."""
+        t = self.time
+        if len(t) < 2 or bool(np.all(t[1:] > t[:-1])):
+            return self
+        _, idx = np.unique(t, return_index=True)
+        return self[idx]
+
+    def index(self, utc: bool = False, name: str = 'time') -> pd.DatetimeIndex:
+        idx = pd.DatetimeIndex(self.time.astype('datetime64[s]'), name=name)
+        return idx.tz_localize('UTC') if utc else idx
+
+    def to_frame(self, columns: Iterable[str] = FRAME_COLUMNS, utc: bool = False,
+                 index_name: str = 'time') -> pd.DataFrame:
+        """
+        DataFrame para las estrategias: índice datetime, columnas float64.
+
+        Args:
+            columns: Columnas a incluir (en este orden)
+            utc: Índice tz-aware UTC (si no, naive en UTC como pd.to_datetime(unit='s'))
+            index_name: Nombre del índice ('time' en los bots, 'timestamp' en helpers)
+        """
+        return pd.DataFrame({c: getattr(self, c) for c in columns},
+                            index=self.index(utc, index_name), copy=False)
+
+    def to_records(self) -> np.ndarray:
+        """Array estructurado con el RECORD_DTYPE del candle store."""
+        from candle_store import RECORD_DTYPE
+
+        records = np.empty(len(self), dtype=RECORD_DTYPE)
+        for field in self.__slots__:
+            records[field] = getattr(self, field)
+        return records
+
+
+def _epochs(values) -> np.ndarray:
+    ts = pd.to_datetime(pd.Series(values), utc=True)
+    return ((ts - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)).to_numpy(dtype=np.int64)
+
+
+def decode_candles(raw) -> Candles:
+    """Cualquier formato de velas de la API (Candles, JSON, lista de dicts, array estructurado) -> Candles."""
+    if isinstance(raw, Candles):
+        return raw
+    if raw is None:
+        return Candles.empty()
+    if isinstance(raw, (str, bytes, bytearray, memoryview)):
+        return Candles.from_json(bytes(raw) if isinstance(raw, memoryview) else raw)
+    if isinstance(raw, np.ndarray) and raw.dtype.names:
+        return Candles.from_records(raw)
+    return Candles.from_rows(raw)
+
+
+def _raw_client(api):
+    """RawPocketOption (extensión Rust) detrás de un PocketOptionAsync real, si lo hay."""
+    client = getattr(api, 'client', None)
+    if client is not None and type(client).__name__ == 'RawPocketOption':
+        return client
+    return None
+
+
+async def fetch_candles(api, pair: str, interval: int, period: int) -> Candles:
+    """
+    Velas de un par como Candles, por la vía más barata que ofrezca la API.
+
+    Args:
+        api: SessionManager, PocketOptionAsync real, mock o replay
+        pair: Activo
+        interval: Timeframe en segundos
+        period: Segundos de historia (como get_candles)
+    """
+    native = getattr(api, 'get_candles_array', None)
+    if native is not None:
+        return await native(pair, interval, period)
+    raw_client = _raw_client(api)
+    if raw_client is not None:
+        return decode_candles(await raw_client.get_candles(pair, interval, period))
+    return decode_candles(await api.get_candles(pair, interval, period))
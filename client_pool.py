@@ -0,0 +1,249 @@
+"""
+Client Pool
+One warm PocketOption session per account for the whole process, plus a
+synchronous facade for scripts and the GUI.
+
+- ClientPool: SessionManager per account (uid + demo/real parsed from the
+  SSID, or the SSID itself). Bots, tools and the GUI in the same process
+  share the connection instead of paying connect/auth again; a refreshed
+  SSID for the same account hot-swaps the existing session.
+- LoopThread: a single event loop in a daemon thread. Sync code submits
+  coroutines to it, so pooled sessions stay connected between calls
+  (instead of a new loop per client that dies in __del__).
+- SyncPocketOption: blocking balance()/get_candles()/buy()/... over a
+  pooled session on the LoopThread.
+- shutdown() (registered with atexit) closes every session and stops the
+  loop thread.
+
+Usage:
+    async with client_pool.session(ssid) as api:      # async, stays warm
+        balance = await api.balance()
+
+    api = SyncPocketOption(ssid)                       # sync (scripts, GUI)
+    print(api.balance())
+"""
+import asyncio
+import atexit
+import concurrent.futures
+import os
+import re
+import threading
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, Optional
+
+from session_manager import ORDER_METHODS, READ_METHODS, SessionLost, SessionManager, default_factory
+
+_UID = re.compile(r'"uid"\s*:\s*"?(\d+)')
+_DEMO = re.compile(r'"isDemo"\s*:\s*(\d)')
+
+
+def account_key(ssid: Optional[str]) -> str:
+    """Pool key: 'uid:demo'/'uid:real' when the SSID carries them, else the SSID itself."""
+    ssid = ssid or ""
+    uid = _UID.search(ssid)
+    if uid is None:
+        return ssid
+    demo = _DEMO.search(ssid)
+    return f"{uid.group(1)}:{'demo' if demo is None or demo.group(1) == '1' else 'real'}"
+
+
+class ClientPool:
+    """
+    Process-wide SessionManager per account.
+
+    Args:
+        factory: ssid -> client for new sessions (default: real client)
+        **session_kwargs: Defaults for every SessionManager (env_file, heartbeat_interval, ...)
+    """
+
+    def __init__(self, factory: Callable = default_factory, **session_kwargs):
+        self.factory = factory
+        self.session_kwargs = session_kwargs
+        self._sessions: Dict[str, SessionManager] = {}
+        self._lock = threading.Lock()
+
+    def get(self, ssid: Optional[str] = None, factory: Optional[Callable] = None,
+            name: Optional[str] = None, on_state_change: Optional[Callable[[str, str], None]] = None,
+            **session_kwargs) -> SessionManager:
+        """
+        Pooled session for the account of `ssid` (created lazily, no loop needed).
+
+        Args:
+            ssid: SSID (default POCKETOPTION_SSID)
+            factory: Client factory, only used when the session is created
+            name: Label for logs (first user wins)
+            on_state_change: Extra state callback (added to an existing session too)
+        """
+        ssid = ssid if ssid is not None else os.getenv("POCKETOPTION_SSID")
+        key = account_key(ssid)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                kwargs = dict(self.session_kwargs, **session_kwargs)
+                session = SessionManager(ssid=ssid, factory=factory or self.factory,
+                                         name=name or key[:16] or "api", **kwargs)
+                self._sessions[key] = session
+            elif ssid and ssid != session.ssid:
+                # Mismo account con SSID renovado: reconectar la sesión existente
+                session.set_ssid(ssid, source="pool", persist=False)
+        session.add_listener(on_state_change)
+        return session
+
+    async def acquire(self, ssid: Optional[str] = None, timeout: Optional[float] = None,
+                      **kwargs) -> SessionManager:
+        """Pooled session, connected (raises SessionLost after `timeout`)."""
+        session = self.get(ssid, **kwargs)
+        if not await session.connect(timeout):
+            raise SessionLost(f"Sin sesión tras {timeout:.0f}s ({session.state})")
+        return session
+
+    @asynccontextmanager
+    async def session(self, ssid: Optional[str] = None, timeout: Optional[float] = None, **kwargs):
+        """`async with pool.session(ssid) as api:` — the session stays open (warm) on exit."""
+        yield await self.acquire(ssid, timeout, **kwargs)
+
+    async def close(self, ssid: Optional[str] = None):
+        with self._lock:
+            session = self._sessions.pop(account_key(ssid if ssid is not None else os.getenv("POCKETOPTION_SSID")), None)
+        if session is not None:
+            await session.stop()
+
+    async def close_all(self):
+        """Graceful shutdown: stop heartbeats and close every client."""
+        with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), {}
+        await asyncio.gather(*(s.stop() for s in sessions), return_exceptions=True)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def status(self) -> Dict[str, dict]:
+        return {key: session.status() for key, session in self._sessions.items()}
+
+
+class LoopThread:
+    """Event loop running forever in one daemon thread (started on first use)."""
+
+    def __init__(self, name: str = "pocketoption-loop"):
+        self.name = name
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self.loop = asyncio.new_event_loop()
+                ready = threading.Event()
+                self._thread = threading.Thread(target=self._run, args=(ready,), name=self.name, daemon=True)
+                self._thread.start()
+                ready.wait()
+        return self.loop
+
+    def _run(self, ready: threading.Event):
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(ready.set)
+        self.loop.run_forever()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def submit(self, coro) -> concurrent.futures.Future:
+        """Schedule a coroutine on the loop thread (cancelling the future cancels the task)."""
+        return asyncio.run_coroutine_threadsafe(coro, self.start())
+
+    def run(self, coro, timeout: Optional[float] = None):
+        """Run a coroutine on the loop thread and block for its result."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("LoopThread.run() llamado desde el propio loop (usar await)")
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def stop(self, timeout: float = 10):
+        """Stop the loop after cancelling its pending tasks."""
+        if not self.running:
+            return
+
+        async def _cancel_all():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        try:
+            self.submit(_cancel_all()).result(timeout)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        self.loop.close()
+        self._thread = None
+
+
+class SyncPocketOption:
+    """
+    Blocking facade over a pooled session running on the shared LoopThread.
+
+    Args:
+        ssid: SSID (default POCKETOPTION_SSID)
+        timeout: Max seconds per call (None = no limit)
+        pool: ClientPool (default: global client_pool)
+        **kwargs: Passed to ClientPool.get (factory, name, ...)
+    """
+
+    def __init__(self, ssid: Optional[str] = None, timeout: Optional[float] = 60,
+                 pool: Optional[ClientPool] = None, thread: Optional["LoopThread"] = None, **kwargs):
+        self.pool = pool if pool is not None else client_pool
+        self.thread = thread if thread is not None else loop_thread
+        self.timeout = timeout
+        self.session = self.pool.get(ssid, **kwargs)
+
+    def connect(self, timeout: Optional[float] = None) -> bool:
+        """Connect (or reuse the warm session); False if not connected within `timeout`."""
+        return self.thread.run(self.session.connect(timeout))
+
+    def __getattr__(self, name):
+        if name in READ_METHODS or name in ORDER_METHODS:
+            def method(*args, **kwargs):
+                return self.thread.run(self.session.call(name, *args, **kwargs), self.timeout)
+            method.__name__ = name
+            return method
+        session = self.__dict__.get('session')
+        if session is None or name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(session, name)
+
+    def status(self) -> dict:
+        return self.session.status()
+
+    def close(self):
+        """Close this account's session for the whole process (others keep theirs)."""
+        if self.thread.running:
+            self.thread.run(self.pool.close(self.session.ssid), self.timeout)
+
+    def __enter__(self) -> "SyncPocketOption":
+        return self
+
+    def __exit__(self, *exc):
+        return False  # La sesión queda abierta en el pool para el próximo uso
+
+
+def shutdown(timeout: float = 10):
+    """Close every pooled session and stop the loop thread (atexit)."""
+    if loop_thread.running:
+        try:
+            loop_thread.run(client_pool.close_all(), timeout)
+        except Exception:
+            pass
+        loop_thread.stop(timeout)
+
+
+# Global instance
+client_pool = ClientPool()
+loop_thread = LoopThread()
+atexit.register(shutdown)
@@ -11,6 +11,8 @@ import glob
 import os
 from datetime import datetime, timedelta
 
+from candle_store import EXTENSION, convert_csv
+
 def generate_realistic_candles(base_price, num_candles, volatility=0.001, trend=0):
     """
     Genera velas OHLC realistas basadas en:
@@ -119,6 +121,11 @@ def expand_history_file(file_path, expansion_factor=5):
         output_df = combined[['id', 'open', 'close', 'high', 'low', 'volume', 'time']]
         output_df.to_csv(file_path, index=False)
         
+        # Mantener sincronizado el .candles (si existe, los loaders lo prefieren)
+        if os.path.exists(file_path[:-4] + EXTENSION):
+            os.remove(file_path[:-4] + EXTENSION)
+            convert_csv(file_path)
+        
         print(f"   ✅ Expandido a {len(output_df)} velas (x{expansion_factor})")
         
         return True
@@ -0,0 +1,248 @@
+"""
+Feature Store
+Single definition of the ML feature vectors shared by the live bots, the
+backtests and the auto trainer.
+
+Features are computed once per bar and cached by (pair, timeframe, bar time),
+so a bar scored by several code paths (live filter, shadow model, backtest
+replay) is computed only once and every consumer gets the same array.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# Feature set used by the EMA Pullback model (order = training order)
+EMA7_FEATURES = ['price', 'duration_minutes', 'pair_idx', 'ema8', 'ema21', 'ema55', 'hour_normalized']
+FEATURE_SETS: Dict[str, List[str]] = {
+    'ema7': EMA7_FEATURES,
+}
+DEFAULT_FEATURE_SET = 'ema7'
+
+# Stable pair encoding. Append new pairs at the end: the index is part of the
+# model input, reordering this list invalidates trained models.
+PAIRS = ['EURUSD_otc', 'GBPUSD_otc', 'AUDUSD_otc', 'USDCAD_otc', 'AUDCAD_otc', 'USDMXN_otc', 'USDCOP_otc']
+PAIR_INDEX = {pair: idx for idx, pair in enumerate(PAIRS)}
+UNKNOWN_PAIR_IDX = 0
+
+EMA_SPANS = (8, 21, 55)
+MIN_BARS = 60
+
+
+def pair_index(pair: str) -> int:
+    """Stable index for a pair ('EURUSD' and 'EURUSD_otc' map to the same index)."""
+    pair = str(pair)
+    if pair in PAIR_INDEX:
+        return PAIR_INDEX[pair]
+    return PAIR_INDEX.get(f"{pair}_otc", UNKNOWN_PAIR_IDX)
+
+
+def timeframe_name(duration_sec: int) -> str:
+    """60 -> 'M1', 300 -> 'M5'"""
+    return f"M{int(duration_sec) // 60}"
+
+
+def bar_epoch(ts) -> int:
+    """Bar time as epoch seconds (naive timestamps are treated as UTC, like the API)."""
+    if isinstance(ts, (int, float, np.integer, np.floating)):
+        return int(ts)
+    ts = pd.Timestamp(ts)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize('UTC')
+    return int(ts.timestamp())
+
+
+def local_hour(epoch: int) -> int:
+    """Local hour of a bar (trade logs are written in local time)."""
+    return time.localtime(int(epoch)).tm_hour
+
+
+def add_emas(df: pd.DataFrame) -> pd.DataFrame:
+    """Add ema8/ema21/ema55 columns (vectorized over the whole frame)."""
+    for span in EMA_SPANS:
+        df[f'ema{span}'] = df['close'].ewm(span=span, adjust=False).mean()
+    return df
+
+
+def _bar_times(df: pd.DataFrame) -> np.ndarray:
+    """Epoch seconds of every bar, from a 'time'/'timestamp' column or the index."""
+    for col in ('time', 'timestamp'):
+        if col in df.columns:
+            values = df[col]
+            break
+    else:
+        values = df.index.to_series()
+
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=np.int64)
+    ts = pd.to_datetime(values)
+    if ts.dt.tz is None:
+        ts = ts.dt.tz_localize('UTC')
+    return (ts.astype('int64') // 10**9).to_numpy()
+
+
+def build_features(close: np.ndarray, ema8: np.ndarray, ema21: np.ndarray, ema55: np.ndarray,
+                   epochs: np.ndarray, pair: str, duration_sec: int) -> np.ndarray:
+    """
+    Vectorized EMA7 feature matrix.
+
+    Returns:
+        np.ndarray (n, 7) in EMA7_FEATURES order
+    """
+    n = len(close)
+    hours = np.fromiter((local_hour(e) for e in epochs), dtype=np.float64, count=n)
+    out = np.empty((n, len(EMA7_FEATURES)), dtype=np.float64)
+    out[:, 0] = close
+    out[:, 1] = duration_sec / 60
+    out[:, 2] = pair_index(pair)
+    out[:, 3] = ema8
+    out[:, 4] = ema21
+    out[:, 5] = ema55
+    out[:, 6] = hours / 24
+    return out
+
+
+class FeatureStore:
+    """
+    LRU cache of per-bar feature vectors keyed by (pair, timeframe, bar time).
+
+    The last bar of a live frame is still forming: a cached row only counts
+    as a hit while its price (the bar close) matches the frame's last close.
+
+    Thread-safe: bots score from asyncio loops while the ML manager worker
+    threads may read the same bars.
+    """
+
+    def __init__(self, max_entries: int = 50000):
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[Tuple[str, str, int], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, key, price: Optional[float] = None):
+        with self._lock:
+            row = self._cache.get(key)
+            if row is not None and price is not None and row[0] != price:
+                row = None  # forming bar moved since it was cached
+            if row is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return row
+
+    def _put_many(self, keys, rows: np.ndarray):
+        with self._lock:
+            for key, row in zip(keys, rows):
+                self._cache[key] = row
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def warm(self, df: pd.DataFrame, pair: str, duration_sec: int) -> np.ndarray:
+        """
+        Compute and cache features for every bar of a candle frame at once.
+
+        EMAs use adjust=False, so the value at bar i only depends on bars <= i:
+        warming a full history gives exactly the features a live bot would
+        compute at each bar.
+
+        Returns:
+            np.ndarray (len(df), 7)
+        """
+        close = df['close'].to_numpy(dtype=np.float64)
+        emas = [
+            df[f'ema{span}'].to_numpy(dtype=np.float64) if f'ema{span}' in df.columns
+            else pd.Series(close).ewm(span=span, adjust=False).mean().to_numpy()
+            for span in EMA_SPANS
+        ]
+        epochs = _bar_times(df)
+        features = build_features(close, *emas, epochs, pair, duration_sec)
+
+        tf = timeframe_name(duration_sec)
+        self._put_many(((pair, tf, int(e)) for e in epochs), features)
+        return features
+
+    def bar_features(self, df: pd.DataFrame, pair: str, duration_sec: int) -> Optional[np.ndarray]:
+        """
+        Feature vector for the last bar of df (cached).
+
+        Returns:
+            np.ndarray (7,) or None if there are not enough bars
+        """
+        if len(df) < MIN_BARS:
+            return None
+        epoch = int(_bar_times(df.iloc[-1:])[0])
+        key = (pair, timeframe_name(duration_sec), epoch)
+        row = self._get(key, float(df['close'].iloc[-1]))
+        if row is None:
+            row = self.warm(df, pair, duration_sec)[-1]
+        return row
+
+    def frame(self, df: pd.DataFrame, pair: str, duration_sec: int) -> Optional[pd.DataFrame]:
+        """Last-bar features as a one-row DataFrame with named columns (for predict_proba)."""
+        row = self.bar_features(df, pair, duration_sec)
+        if row is None:
+            return None
+        return pd.DataFrame(row.reshape(1, -1), columns=EMA7_FEATURES)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'entries': len(self._cache), 'hits': self.hits, 'misses': self.misses}
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = 0
+
+
+def features_from_trades(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    EMA7 features and labels from logged trades (training).
+
+    Trade logs only carry one 'ema' column; it is used for all three EMAs
+    unless ema8/ema21/ema55 columns are present. The hour comes from the
+    trade timestamp, which is logged in local time like live scoring.
+
+    Returns:
+        (X (n, 7), y (n,))
+    """
+    n = len(df)
+    if n == 0:
+        return np.empty((0, len(EMA7_FEATURES))), np.empty(0, dtype=int)
+
+    def column(name, default):
+        if name in df.columns:
+            return pd.to_numeric(df[name], errors='coerce').fillna(default).to_numpy(dtype=np.float64)
+        return np.full(n, default, dtype=np.float64)
+
+    ema = column('ema', 0.0)
+    emas = [column(f'ema{span}', np.nan) for span in EMA_SPANS]
+    emas = [np.where(np.isnan(e), ema, e) for e in emas]
+
+    if 'timestamp' in df.columns:
+        hours = pd.to_datetime(df['timestamp'], errors='coerce').dt.hour.to_numpy(dtype=np.float64)
+        hour_normalized = np.where(np.isnan(hours), 0.5, hours / 24)
+    else:
+        hour_normalized = np.full(n, 0.5)
+
+    pairs = df['pair'].astype(str) if 'pair' in df.columns else pd.Series([''] * n)
+
+    X = np.column_stack([
+        column('price', 0.0),
+        column('expiry_time', 300.0) / 60,
+        pairs.map(pair_index).to_numpy(dtype=np.float64),
+        *emas,
+        hour_normalized,
+    ])
+    y = (df['result'] == 'WIN').astype(int).to_numpy() if 'result' in df.columns else np.zeros(n, dtype=int)
+    return X, y
+
+
+# Global instance
+feature_store = FeatureStore()
@@ -9,6 +9,8 @@ import subprocess
 import matplotlib
 import seaborn
 
+from client_pool import loop_thread
+
 # Importar ambos bots
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'bots'))
 
@@ -32,6 +34,7 @@ class TradingBotGUI:
         self.bot_thread = None
         self.stop_event = threading.Event()
         self.is_running = False
+        self.bot_future = None
 
         # Cargar imagen de fondo
         self.load_background()
@@ -142,34 +145,35 @@ class TradingBotGUI:
         self.log_message("🎯 Bot Round Levels: Activado")
         self.log_message(f"🐍 Python: {sys.executable}")
 
-        # Run in thread
-        self.bot_thread = threading.Thread(target=self.run_async_bots, args=(ssid,))
-        self.bot_thread.daemon = True
-        self.bot_thread.start()
+        # Run on the shared loop thread: sessions stay warm in the pool between start/stop
+        self.bot_future = self.run_async_bots(ssid)
 
     def stop_bot(self):
         if self.is_running:
             self.log_message("🛑 ENVIANDO SEÑAL DE DETENCIÓN...")
             self.stop_event.set()
+            if self.bot_future is not None:
+                self.bot_future.cancel()  # cancela las tareas de los bots; la conexión queda en el pool
             self.is_running = False
             self.start_btn.config(state="normal", bg=COLOR_BTN_BG)
             self.stop_btn.config(state="disabled", bg="#333333")
 
     def run_async_bots(self, ssid):
-        """Ejecuta ambos bots en paralelo"""
-        try:
-            # Guardar SSID en variable de entorno para que los bots lo usen
-            os.environ["POCKETOPTION_SSID"] = ssid
-            
-            # Ejecutar el loop de asyncio con ambos bots
-            asyncio.run(self.run_both_bots())
-        except Exception as e:
-            self.safe_log(f"❌ ERROR FATAL EN BOTS: {e}")
-        finally:
-            self.safe_log("ℹ️ Bots detenidos.")
-            # Reset UI safely
-            self.root.after(0, lambda: self.start_btn.config(state="normal", bg=COLOR_BTN_BG))
-            self.root.after(0, lambda: self.stop_btn.config(state="disabled", bg="#333333"))
+        """Ejecuta ambos bots en paralelo en el loop compartido (client_pool.loop_thread)"""
+        # Guardar SSID en variable de entorno para que los bots lo usen
+        os.environ["POCKETOPTION_SSID"] = ssid
+        
+        future = loop_thread.submit(self.run_both_bots())
+        future.add_done_callback(self._on_bots_done)
+        return future
+
+    def _on_bots_done(self, future):
+        if not future.cancelled() and future.exception() is not None:
+            self.safe_log(f"❌ ERROR FATAL EN BOTS: {future.exception()}")
+        self.safe_log("ℹ️ Bots detenidos.")
+        # Reset UI safely
+        self.root.after(0, lambda: self.start_btn.config(state="normal", bg=COLOR_BTN_BG))
+        self.root.after(0, lambda: self.stop_btn.config(state="disabled", bg="#333333"))
 
     async def run_both_bots(self):
         """Ejecuta ambos bots simultáneamente"""
@@ -0,0 +1,332 @@
+"""
+Instrumentation
+Per-stage latency histograms for the bot hot path (fetch_candles,
+compute_indicators, ml_predict, risk_check, telegram, ...).
+
+Timings use time.perf_counter_ns (monotonic) and go into HDR-style
+log-linear histograms keyed by (bot, stage, pair): fixed memory per key,
+~6% relative error, p50/p95/p99 at any time without storing samples.
+When disabled (METRICS_ENABLED=0) timer() returns a shared no-op context
+manager, so instrumented code pays one attribute lookup per stage.
+
+Exposed over HTTP (METRICS_PORT, default 8080 = the Dockerfile EXPOSE):
+    /metrics       Prometheus text format
+    /metrics.json  JSON snapshot
+    /health        "ok"
+and over Telegram with /latency.
+"""
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import accumulate
+from typing import Dict, List, Optional, Tuple
+
+
+# Histogram layout: 2^SUB_BITS linear sub-buckets per power of two
+SUB_BITS = 4
+SUB_COUNT = 1 << SUB_BITS
+MAX_VALUE_NS = (1 << 40) - 1          # ~18 min, anything slower is clamped
+N_BUCKETS = (MAX_VALUE_NS.bit_length() - SUB_BITS + 1) * SUB_COUNT
+QUANTILES = (0.5, 0.95, 0.99)
+ALL_PAIRS = '*'
+DEFAULT_PORT = 8080
+
+_current_bot = contextvars.ContextVar('instrumentation_bot', default='main')
+_NULL_TIMER = contextlib.nullcontext()
+
+
+def _bucket(value_ns: int) -> int:
+    """Bucket index of a value (exact below SUB_COUNT, log-linear above)."""
+    if value_ns < SUB_COUNT:
+        return value_ns
+    shift = value_ns.bit_length() - SUB_BITS - 1
+    return (shift + 1) * SUB_COUNT + (value_ns >> shift) - SUB_COUNT
+
+
+def _bucket_bounds(index: int) -> Tuple[int, int]:
+    """[lower, upper) of a bucket in nanoseconds."""
+    if index < SUB_COUNT:
+        return index, index + 1
+    shift = index // SUB_COUNT - 1
+    mantissa = index % SUB_COUNT + SUB_COUNT
+    return mantissa << shift, (mantissa + 1) << shift
+
+
+class LatencyHistogram:
+    """
+    Log-linear latency histogram (nanoseconds).
+
+    Not thread-safe on its own; Instrumentation serializes writers.
+    """
+
+    __slots__ = ('counts', 'count', 'total_ns', 'min_ns', 'max_ns')
+
+    def __init__(self):
+        self.counts = [0] * N_BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = 0
+        self.max_ns = 0
+
+    def record(self, value_ns: int):
+        value_ns = min(max(int(value_ns), 0), MAX_VALUE_NS)
+        self.counts[_bucket(value_ns)] += 1
+        if self.count == 0 or value_ns < self.min_ns:
+            self.min_ns = value_ns
+        if value_ns > self.max_ns:
+            self.max_ns = value_ns
+        self.count += 1
+        self.total_ns += value_ns
+
+    def merge(self, other: "LatencyHistogram"):
+        if other.count == 0:
+            return
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.min_ns = other.min_ns if self.count == 0 else min(self.min_ns, other.min_ns)
+        self.max_ns = max(self.max_ns, other.max_ns)
+        self.count += other.count
+        self.total_ns += other.total_ns
+
+    def percentiles(self, quantiles=QUANTILES) -> List[int]:
+        """
+        Values (ns) at the given quantiles, from one pass over the buckets.
+
+        Each value is the bucket midpoint clamped to the observed min/max.
+        """
+        if self.count == 0:
+            return [0 for _ in quantiles]
+        cumulative = list(accumulate(self.counts))
+        out = []
+        index = 0
+        for q in quantiles:
+            rank = max(1, int(q * self.count + 0.5))
+            while cumulative[index] < rank:
+                index += 1
+            lower, upper = _bucket_bounds(index)
+            out.append(min(max((lower + upper) // 2, self.min_ns), self.max_ns))
+        return out
+
+    def summary(self) -> Dict:
+        """count/mean/p50/p95/p99/max in milliseconds."""
+        p50, p95, p99 = self.percentiles(QUANTILES)
+        return {
+            'count': self.count,
+            'mean_ms': self.total_ns / self.count / 1e6 if self.count else 0.0,
+            'p50_ms': p50 / 1e6,
+            'p95_ms': p95 / 1e6,
+            'p99_ms': p99 / 1e6,
+            'max_ms': self.max_ns / 1e6,
+        }
+
+
+class _StageTimer:
+    """Context manager that records the elapsed time of a block."""
+
+    __slots__ = ('owner', 'stage', 'pair', 'bot', 'start')
+
+    def __init__(self, owner: "Instrumentation", stage: str, pair: Optional[str], bot: Optional[str]):
+        self.owner = owner
+        self.stage = stage
+        self.pair = pair
+        self.bot = bot
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.owner.record(self.stage, time.perf_counter_ns() - self.start, self.pair, self.bot)
+        return False
+
+
+class Instrumentation:
+    """
+    Registry of latency histograms keyed by (bot, stage, pair).
+
+    The bot name comes from bind_bot() (a context variable, so each asyncio
+    task tree keeps its own) unless passed explicitly.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None):
+        """
+        Args:
+            enabled: Default from METRICS_ENABLED (on unless "0"/"false")
+        """
+        if enabled is None:
+            enabled = os.getenv("METRICS_ENABLED", "1").lower() not in ("0", "false", "no")
+        self.enabled = enabled
+        self.started_at = time.time()
+        self._histograms: Dict[Tuple[str, str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    # ------------------------------------------------------------- recording
+
+    def bind_bot(self, bot_name: str):
+        """Attribute timings in the current context to a bot."""
+        _current_bot.set(bot_name)
+
+    def timer(self, stage: str, pair: Optional[str] = None, bot: Optional[str] = None):
+        """
+        Time a block: `with instrumentation.timer('fetch_candles', pair): ...`
+
+        Works around awaits too (the elapsed time includes the wait).
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, stage, pair, bot)
+
+    def record(self, stage: str, elapsed_ns: int, pair: Optional[str] = None, bot: Optional[str] = None):
+        """Record one latency sample (also into the all-pairs histogram of the stage)."""
+        if not self.enabled:
+            return
+        bot = bot or _current_bot.get()
+        keys = [(bot, stage, ALL_PAIRS)]
+        if pair:
+            keys.append((bot, stage, str(pair)))
+        with self._lock:
+            for key in keys:
+                hist = self._histograms.get(key)
+                if hist is None:
+                    hist = self._histograms[key] = LatencyHistogram()
+                hist.record(elapsed_ns)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    # --------------------------------------------------------------- reading
+
+    def snapshot(self, bot: Optional[str] = None) -> List[Dict]:
+        """
+        Summaries of every histogram (optionally one bot only).
+
+        Returns:
+            [{'bot', 'stage', 'pair', 'count', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms'}, ...]
+        """
+        with self._lock:
+            items = [(key, hist.summary()) for key, hist in self._histograms.items()
+                     if bot is None or key[0] == bot]
+        rows = [dict(bot=b, stage=s, pair=p, **summary) for (b, s, p), summary in items]
+        rows.sort(key=lambda r: (r['bot'], r['stage'], r['pair'] != ALL_PAIRS, r['pair']))
+        return rows
+
+    def to_json(self) -> str:
+        return json.dumps({
+            'enabled': self.enabled,
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            'stages': self.snapshot(),
+        })
+
+    def prometheus_text(self) -> str:
+        """Prometheus exposition format (one summary per bot/stage/pair)."""
+        lines = [
+            "# HELP bot_stage_latency_seconds Hot-path stage latency",
+            "# TYPE bot_stage_latency_seconds summary",
+        ]
+        with self._lock:
+            items = [(key, hist.percentiles(QUANTILES), hist.count, hist.total_ns)
+                     for key, hist in sorted(self._histograms.items())]
+        for (bot, stage, pair), values, count, total_ns in items:
+            labels = f'bot="{_escape(bot)}",stage="{_escape(stage)}",pair="{_escape(pair)}"'
+            for q, value in zip(QUANTILES, values):
+                lines.append(f'bot_stage_latency_seconds{{{labels},quantile="{q}"}} {value / 1e9:.9f}')
+            lines.append(f'bot_stage_latency_seconds_sum{{{labels}}} {total_ns / 1e9:.9f}')
+            lines.append(f'bot_stage_latency_seconds_count{{{labels}}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def format_report(self, bot: Optional[str] = None, top_pairs: int = 5) -> str:
+        """Telegram (HTML) report: per-stage p50/p95/p99 and the slowest pairs."""
+        if not self.enabled:
+            return "⚠️ Instrumentación desactivada (METRICS_ENABLED=0)"
+        rows = self.snapshot(bot)
+        if not rows:
+            return "⏱️ Sin mediciones todavía"
+
+        lines = ["<b>⏱️ LATENCIA POR ETAPA</b> (ms: p50 / p95 / p99)"]
+        current_bot = None
+        for r in rows:
+            if r['pair'] != ALL_PAIRS:
+                continue
+            if r['bot'] != current_bot:
+                current_bot = r['bot']
+                lines.append(f"\n<b>🤖 {current_bot}</b>")
+            lines.append(f"• {r['stage']}: {r['p50_ms']:.1f} / {r['p95_ms']:.1f} / "
+                         f"{r['p99_ms']:.1f} (n={r['count']})")
+
+        per_pair = sorted((r for r in rows if r['pair'] != ALL_PAIRS),
+                          key=lambda r: r['p95_ms'], reverse=True)[:top_pairs]
+        if per_pair:
+            lines.append("\n<b>🐢 Pares más lentos (p95)</b>")
+            for r in per_pair:
+                lines.append(f"• {r['pair']} {r['stage']}: {r['p95_ms']:.1f} ms")
+        return "\n".join(lines)
+
+    # ------------------------------------------------------------------ HTTP
+
+    def serve(self, port: Optional[int] = None, host: str = "0.0.0.0"):
+        """
+        Start the metrics endpoint in a daemon thread (idempotent).
+
+        Returns:
+            The HTTP server, or None if disabled or the port is unavailable
+        """
+        if not self.enabled:
+            return None
+        if self._server is not None:
+            return self._server
+        port = int(port if port is not None else os.getenv("METRICS_PORT", DEFAULT_PORT))
+        try:
+            server = ThreadingHTTPServer((host, port), _handler_for(self))
+        except OSError as e:
+            print(f"⚠️ Metrics endpoint no disponible en :{port}: {e}")
+            return None
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        self._server = server
+        print(f"📈 Metrics en http://{host}:{server.server_address[1]}/metrics")
+        return server
+
+    def stop_server(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _handler_for(metrics: Instrumentation):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split('?', 1)[0]
+            if path == "/metrics":
+                body, content_type = metrics.prometheus_text(), "text/plain; version=0.0.4"
+            elif path == "/metrics.json":
+                body, content_type = metrics.to_json(), "application/json"
+            elif path in ("/", "/health"):
+                body, content_type = "ok\n", "text/plain"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return MetricsHandler
+
+
+# Global instance
+instrumentation = Instrumentation()
@@ -0,0 +1,76 @@
+"""
+Lazy Loader
+Deferred initialization for global singletons and heavy modules.
+
+Importing a bot must not start threads, touch the filesystem or pull in
+matplotlib/sklearn. Singletons such as ml_manager, trade_logger and telegram
+are LazyObject proxies: the real object is built on first attribute access
+(thread-safe, exactly once) and every later access is forwarded to it.
+"""
+import importlib
+import threading
+import time
+from typing import Any, Callable, Optional
+
+
+class LazyObject:
+    """
+    Proxy that builds its target on first use.
+
+    Args:
+        factory: Zero-argument callable that builds the real object
+        name: Label for repr and the init log line
+    """
+
+    __slots__ = ('_factory', '_name', '_instance', '_lock', '_init_seconds')
+
+    def __init__(self, factory: Callable[[], Any], name: Optional[str] = None):
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_name', name or getattr(factory, '__name__', 'object'))
+        object.__setattr__(self, '_instance', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+        object.__setattr__(self, '_init_seconds', None)
+
+    def _get(self):
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                instance = self._instance
+                if instance is None:
+                    start = time.perf_counter()
+                    instance = self._factory()
+                    object.__setattr__(self, '_init_seconds', time.perf_counter() - start)
+                    object.__setattr__(self, '_instance', instance)
+        return instance
+
+    def __getattr__(self, attr):
+        return getattr(self._get(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._get(), attr, value)
+
+    def __repr__(self):
+        state = "initialized" if self._instance is not None else "pending"
+        return f"<LazyObject {self._name} ({state})>"
+
+
+def is_initialized(obj) -> bool:
+    """False only for a LazyObject whose target has not been built yet."""
+    if isinstance(obj, LazyObject):
+        return obj._instance is not None
+    return True
+
+
+def resolve(obj):
+    """The real object behind a LazyObject (building it if needed)."""
+    return obj._get() if isinstance(obj, LazyObject) else obj
+
+
+def init_seconds(obj) -> Optional[float]:
+    """How long the factory took (None if not built or not lazy)."""
+    return obj._init_seconds if isinstance(obj, LazyObject) else None
+
+
+def lazy_import(module_name: str) -> LazyObject:
+    """Module proxy: `plt = lazy_import('matplotlib.pyplot')` imports on first attribute access."""
+    return LazyObject(lambda: importlib.import_module(module_name), module_name)
@@ -1,10 +1,20 @@
 # bot_universal_FUNCIONA_YA.py
-import os, asyncio, pandas as pd, time, requests
+import asyncio, time, requests
 from datetime import datetime
 from dotenv import load_dotenv
 from trade_logger import trade_logger
 from shadow_trades_logger import shadow_trades_logger
 from telegram_formatter import telegram, send_trade_signal, send_trade_result
+from signal_latency import SignalTimeline
+from signal_types import TradeRecord
+from sampling_profiler import profiler
+from payout_cache import payout_cache
+from client_pool import client_pool
+from candles import fetch_candles
+from config_loader import load_config
+from risk_manager import RiskManager
+from bot_state import BotState
+from batch_orders import BatchOrderExecutor, OrderRequest
 
 load_dotenv()
 
@@ -16,7 +26,9 @@ except Exception as e:
 
 # ========== FORZAMOS PARES OTC (porque es lo que tenés ahora) ==========
 PAIRS = ["EURUSD_otc", "GBPUSD_otc", "USDJPY_otc", "AUDUSD_otc"]
-api = PocketOptionAsync(ssid=os.getenv("POCKETOPTION_SSID"))
+# Sesión auto-reparable del pool (compartida por cuenta): heartbeat, backoff y SSID nuevo desde .env
+api = client_pool.get(factory=PocketOptionAsync, name="main")
+CONFIG = load_config()
 
 # ========== TELEGRAM OPCIONAL (ahora con formato bonito) ==========
 def tg(msg):
@@ -53,109 +65,134 @@ def get_signal(df):
     
     return None, None, None
 
+def on_settled(ticket):
+    """Resultado de check_win → CSV del trade."""
+    result = ticket.result
+    # WIN/LOSS/DRAW (PnL 0); un draw no es LOSS para el CSV ni para el reentrenamiento
+    trade_logger.update_trade_result(ticket.trade_id, result['result'].upper(), result['pnl'])
+    print(f"   └── {ticket.request.pair} {ticket.trade_id}: {result['result'].upper()} ${result['pnl']:+.2f}")
+
 # ========== MAIN ==========
 async def main():
     print("BOT UNIVERSAL 2025 → CORRIENDO EN MODO BESTIA")
+    # Profiler en caliente: kill -USR1 <pid> → logs/profiles/*.collapsed
+    profiler.name = "main"
+    profiler.attach_loop()
+    profiler.install_signal_handler()
     tg("Bot universal iniciado")
-    await asyncio.sleep(5)  # dar tiempo a la API
+    await api.connect()  # reintenta con backoff hasta que el SSID sea aceptado
+    # Payouts de todos los activos en una llamada, refrescados en segundo plano
+    payout_cache.attach(api)
+    payout_cache.start()
+
+    # Lotes de órdenes: exposición agregada validada por RiskManager antes de enviar
+    risk_cfg, system_cfg = CONFIG['risk'], CONFIG['system']
+    risk = RiskManager(
+        max_daily_losses=risk_cfg['max_daily_losses'],
+        max_daily_trades=risk_cfg['max_daily_trades'],
+        risk_per_trade=risk_cfg['risk_per_trade'],
+        max_drawdown=risk_cfg['max_drawdown'],
+        streak_limit=risk_cfg['streak_limit'],
+        max_risk_per_trade=risk_cfg.get('max_risk_per_trade', 0.05),
+        demo_mode=system_cfg.get('demo_mode', True),
+        max_total_exposure=risk_cfg.get('max_total_exposure', 0.10)
+    )
+    state = BotState()
+    executor = BatchOrderExecutor(api, risk, state, on_settled=on_settled)
 
     cooldown = {}
     while True:
         try:
             balance = await api.balance()
             if balance in [None, -1.0]:
-                print("Sesión muerta o balance -1 → reiniciá el SSID")
-                await asyncio.sleep(60)
+                print("Sesión muerta o balance -1 → reconectando (SSID nuevo: editá .env)")
+                await api.wait_connected()
                 continue
+            await state.set_initial_balance(balance)  # referencia de drawdown (solo la primera vez)
                 
             amount = max(1.0, round(balance * 0.01, 2))
             now = time.time()
-            traded = False
 
             # limpiar cooldowns viejos
             cooldown = {k: v for k, v in cooldown.items() if now - v < 65}
 
+            # Juntar las señales de todos los pares y mandarlas como un solo lote
+            orders = []
             for pair in PAIRS:
                 if pair in cooldown:
                     continue
+                allowed, reason = payout_cache.allows(pair)
+                if not allowed:
+                    print(f"{pair}: {reason}")
+                    continue
 
                 # pedir velas M5
-                raw = await api.get_candles(pair, 300, 30000)
-                if not raw or len(raw) < 50:
+                candles = await fetch_candles(api, pair, 300, 30000)
+                if len(candles) < 50:
                     continue
                     
-                df = pd.DataFrame(raw)
-                if 'time' not in df.columns:
-                    df['time'] = df.get('timestamp', df.index)
-                df = df[['time', 'open', 'close']].copy()
-                df['time'] = pd.to_datetime(df['time'], unit='s')
-                df = df.set_index('time').astype(float)
+                df = candles.to_frame(['open', 'close'])
 
                 direction, source, metrics = get_signal(df)
-                if direction and not traded:
-                    traded = True
-                    txt = f"{datetime.now().strftime('%H:%M:%S')} → {pair} {direction} ${amount} [{source}]"
-                    print(txt)
-                    tg(txt)
-
-                    trade_id = None
-                    try:
-                        if direction == "BUY":
-                            # api.buy returns (trade_id, trade_details) or just trade_id depending on implementation
-                            # Based on inspection, it returns (trade_id, trade)
-                            result = await api.buy(pair, amount, 300)
-                        else:
-                            result = await api.sell(pair, amount, 300)
-                        
-                        # Handle result tuple
-                        if isinstance(result, tuple):
-                            trade_id = result[0]
-                        else:
-                            trade_id = result
-
-                        # LOGGING
-                        if trade_id:
-                            trade_data = {
-                                'timestamp': datetime.now(),
-                                'trade_id': trade_id,
-                                'pair': pair,
-                                'tf': 'M5',
-                                'timeframe': 'M5',
-                                'decision': direction,
-                                'signal': direction,
-                                'pattern_detected': source,
-                                'pattern': source,
-                                'price': metrics.get('price', 0),
-                                'ema': metrics.get('e8', 0),
-                                'rsi': metrics.get('rsi', 0),
-                                'ema_conf': metrics.get('ema_conf', 0),
-                                'tf_signal': metrics.get('tf_signal', 0),
-                                'atr': metrics.get('atr', 0),
-                                'triangle_active': metrics.get('triangle_active', 0),
-                                'reversal_candle': metrics.get('reversal_candle', 0),
-                                'near_support': metrics.get('near_support', 0),
-                                'near_resistance': metrics.get('near_resistance', 0),
-                                'htf_signal': metrics.get('htf_signal', 0),
-                                'notes': f"e21={metrics.get('e21',0):.5f}, e55={metrics.get('e55',0):.5f}",
-                                'expiry_time': 300,
-                                'result': 'PENDING'
-                            }
-                            # Registrar en ambos loggers
-                            trade_logger.log_trade(trade_data)
-                            shadow_trades_logger.log_trade(trade_data)
-                            print(f"   └── Guardado en CSV: ID {trade_id}")
-                            print(f"   └── Guardado en shadow_trades.csv: {trade_id}")
-
-                    except Exception as e:
-                        print(f"Error ejecutando orden: {e}")
-                    
-                    cooldown[pair] = now
-                    await asyncio.sleep(65)
-                    break
+                if direction:
+                    timeline = SignalTimeline.from_bar(df.index[-1], 300)
+                    timeline.stamp('detected')
+                    orders.append(OrderRequest(pair, direction, amount, 300, timeline=timeline,
+                                               metadata={'source': source, 'metrics': metrics}))
 
-            if not traded:
+            if not orders:
                 print(f"{datetime.now().strftime('%H:%M:%S')} → analizando 4 pares... (sin señal)")
                 await asyncio.sleep(7)
+                continue
+
+            # Exposición del lote validada de forma atómica; órdenes en paralelo
+            tickets = await executor.submit(orders, balance)
+            for ticket in tickets:
+                order = ticket.request
+                txt = f"{datetime.now().strftime('%H:%M:%S')} → {order.pair} {order.direction} ${order.amount} [{order.metadata['source']}]"
+                if ticket.status == "rejected":
+                    print(f"{txt} ✋ {ticket.reason}")
+                else:
+                    print(txt)
+                    tg(txt)
+
+            for ticket in await executor.wait_acked(tickets):
+                order, trade_id = ticket.request, ticket.trade_id
+                metrics = order.metadata['metrics']
+                print(f"   └── {order.pair} {order.timeline.summary()}")
+                trade_data = TradeRecord(
+                    trade_id=trade_id,
+                    pair=order.pair,
+                    decision=order.direction,
+                    timeline=order.timeline,
+                    timeframe='M5',
+                    pattern_detected=order.metadata['source'],
+                    price=metrics.get('price', 0),
+                    ema=metrics.get('e8', 0),
+                    rsi=metrics.get('rsi', 0),
+                    ema_conf=metrics.get('ema_conf', 0),
+                    tf_signal=metrics.get('tf_signal', 0),
+                    atr=metrics.get('atr', 0),
+                    triangle_active=metrics.get('triangle_active', 0),
+                    reversal_candle=metrics.get('reversal_candle', 0),
+                    near_support=metrics.get('near_support', 0),
+                    near_resistance=metrics.get('near_resistance', 0),
+                    htf_signal=metrics.get('htf_signal', 0),
+                    notes=f"e21={metrics.get('e21',0):.5f}, e55={metrics.get('e55',0):.5f}",
+                    expiry_time=300,
+                )
+                # Registrar en ambos loggers
+                trade_logger.log_trade(trade_data)
+                shadow_trades_logger.log_trade(trade_data)
+                print(f"   └── Guardado en CSV: ID {trade_id}")
+                print(f"   └── Guardado en shadow_trades.csv: {trade_id}")
+
+            for ticket in tickets:
+                if ticket.status == "failed":
+                    print(f"Error ejecutando orden {ticket.request.pair}: {ticket.reason}")
+                if ticket.status != "rejected":
+                    cooldown[ticket.request.pair] = now
+            await asyncio.sleep(65)
 
         except Exception as e:
             print("ERROR:", e)
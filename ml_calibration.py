@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+ML Calibration & Context Thresholds
+Fits isotonic/Platt calibration of the ML probability and optimal thresholds
+per (pair, hour, timeframe) from the trade logs. The result is stored next to
+the model as a compact lookup table (ml_model_calibration.npz) so the live
+filter needs a single array index instead of a global constant.
+"""
+
+import glob
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from payout_cache import DEFAULT_PAYOUT
+from threshold_optimizer import threshold_stats
+
+# Configuration
+DEFAULT_THRESHOLD = 0.62
+PAYOUT = DEFAULT_PAYOUT
+MIN_TRADES_PER_CONTEXT = 20
+THRESHOLD_GRID = np.round(np.arange(0.50, 0.91, 0.01), 2)
+CALIBRATION_POINTS = 101  # proba grid 0.00, 0.01, ... 1.00
+WILDCARD = "*"
+
+
+def calibration_path_for(model_path: str) -> str:
+    """ml_model.pkl -> ml_model_calibration.npz"""
+    base, _ = os.path.splitext(model_path)
+    return f"{base}_calibration.npz"
+
+
+def load_scored_trades(logs_dir: str = "logs/trades") -> Optional[pd.DataFrame]:
+    """
+    Load completed trades that carry an ML probability in signal_score.
+
+    Returns:
+        DataFrame with columns: proba, win, pair, hour, timeframe
+    """
+    files = glob.glob(os.path.join(logs_dir, "trades_*.csv"))
+    dfs = []
+    for file in files:
+        try:
+            df = pd.read_csv(file)
+            if not df.empty:
+                dfs.append(df)
+        except Exception as e:
+            print(f"⚠️ Error leyendo {file}: {e}")
+    if not dfs:
+        return None
+
+    df = pd.concat(dfs, ignore_index=True)
+    df = df[df['result'].isin(['WIN', 'LOSS'])].copy()
+    df['proba'] = pd.to_numeric(df['signal_score'], errors='coerce')
+    # signal_score is an ML probability only for ML-filtered strategies
+    df = df[(df['proba'] >= 0) & (df['proba'] <= 1)]
+    if df.empty:
+        return None
+
+    df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
+    df = df.dropna(subset=['timestamp'])
+    return pd.DataFrame({
+        'proba': df['proba'].astype(float).values,
+        'win': (df['result'] == 'WIN').astype(int).values,
+        'pair': df['pair'].astype(str).values,
+        'hour': df['timestamp'].dt.hour.astype(int).values,
+        'timeframe': df['timeframe'].fillna(WILDCARD).astype(str).values,
+    })
+
+
+def fit_calibration(proba: np.ndarray, wins: np.ndarray, method: str = "isotonic") -> np.ndarray:
+    """
+    Fit a calibration map and evaluate it on the fixed probability grid.
+
+    Args:
+        proba: Raw model probabilities
+        wins: 1 for WIN, 0 for LOSS
+        method: 'isotonic' or 'platt'
+
+    Returns:
+        np.ndarray (CALIBRATION_POINTS,) with calibrated proba for p = i/100
+    """
+    grid = np.linspace(0.0, 1.0, CALIBRATION_POINTS)
+    proba = np.asarray(proba, dtype=float)
+    wins = np.asarray(wins, dtype=int)
+
+    if len(np.unique(wins)) < 2:
+        return grid.astype(np.float32)
+
+    if method == "platt":
+        from sklearn.linear_model import LogisticRegression
+        lr = LogisticRegression()
+        lr.fit(proba.reshape(-1, 1), wins)
+        calibrated = lr.predict_proba(grid.reshape(-1, 1))[:, 1]
+    elif method == "isotonic":
+        from sklearn.isotonic import IsotonicRegression
+        iso = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds='clip')
+        iso.fit(proba, wins)
+        calibrated = iso.predict(grid)
+    else:
+        raise ValueError(f"Unknown calibration method: {method}")
+
+    return calibrated.astype(np.float32)
+
+
+def apply_calibration(calibration: np.ndarray, proba) -> np.ndarray:
+    """Vectorized lookup of calibrated probabilities."""
+    idx = np.clip(np.rint(np.asarray(proba, dtype=float) * (CALIBRATION_POINTS - 1)), 0, CALIBRATION_POINTS - 1)
+    return calibration[idx.astype(int)]
+
+
+def optimal_threshold(proba: np.ndarray, wins: np.ndarray, payout: float = PAYOUT,
+                      min_accepted: int = 5) -> Optional[float]:
+    """
+    Threshold that maximizes ROI * log(trades + 1) (same score as threshold_optimizer).
+
+    Returns:
+        Best threshold or None if no threshold keeps min_accepted trades
+    """
+    stats = threshold_stats(proba, wins, THRESHOLD_GRID, payout)
+    valid = stats['trades'] >= min_accepted
+    if not valid.any():
+        return None
+    score = np.where(valid, stats['roi'] * np.log(stats['trades'] + 1), -np.inf)
+    return float(THRESHOLD_GRID[int(np.argmax(score))])
+
+
+def fit_threshold_table(df: pd.DataFrame, calibration: np.ndarray, payout: float = PAYOUT,
+                        min_trades: int = MIN_TRADES_PER_CONTEXT,
+                        default: float = DEFAULT_THRESHOLD) -> Tuple[List[str], List[str], np.ndarray]:
+    """
+    Build the (pair, hour, timeframe) threshold table on calibrated probabilities.
+
+    Contexts with fewer than min_trades fall back to (pair, timeframe), then
+    pair, then the global threshold. The last pair row and last timeframe
+    column are wildcards for contexts not seen in the logs.
+
+    Returns:
+        (pairs, timeframes, table) with table shape (len(pairs), 24, len(timeframes))
+    """
+    pairs = sorted(df['pair'].unique()) + [WILDCARD]
+    timeframes = sorted(t for t in df['timeframe'].unique() if t != WILDCARD) + [WILDCARD]
+    cal = apply_calibration(calibration, df['proba'].values)
+    wins = df['win'].values
+
+    def fit(mask, fallback):
+        if mask.sum() < min_trades:
+            return fallback
+        thr = optimal_threshold(cal[mask], wins[mask], payout)
+        return fallback if thr is None else thr
+
+    everything = np.ones(len(df), dtype=bool)
+    global_thr = fit(everything, default)
+    table = np.full((len(pairs), 24, len(timeframes)), global_thr, dtype=np.float32)
+
+    hours = df['hour'].values
+    for pi, pair in enumerate(pairs):
+        pair_mask = everything if pair == WILDCARD else (df['pair'].values == pair)
+        pair_thr = fit(pair_mask, global_thr)
+        for ti, tf in enumerate(timeframes):
+            tf_mask = pair_mask if tf == WILDCARD else pair_mask & (df['timeframe'].values == tf)
+            tf_thr = fit(tf_mask, pair_thr)
+            for hour in range(24):
+                table[pi, hour, ti] = fit(tf_mask & (hours == hour), tf_thr)
+
+    return pairs, timeframes, table
+
+
+class ThresholdTable:
+    """Calibration map + per-context thresholds served from arrays."""
+
+    def __init__(self, pairs: List[str], timeframes: List[str], table: np.ndarray,
+                 calibration: np.ndarray, meta: Optional[Dict] = None):
+        self.pairs = list(pairs)
+        self.timeframes = list(timeframes)
+        self.table = np.asarray(table, dtype=np.float32)
+        self.calibration = np.asarray(calibration, dtype=np.float32)
+        self.meta = meta or {}
+        self._pair_idx = {p: i for i, p in enumerate(self.pairs)}
+        self._tf_idx = {t: i for i, t in enumerate(self.timeframes)}
+        self._pair_default = self._pair_idx.get(WILDCARD, len(self.pairs) - 1)
+        self._tf_default = self._tf_idx.get(WILDCARD, len(self.timeframes) - 1)
+
+    def calibrate(self, proba: float) -> float:
+        """Calibrated probability (single array index)."""
+        idx = int(round(min(max(proba, 0.0), 1.0) * (CALIBRATION_POINTS - 1)))
+        return float(self.calibration[idx])
+
+    def threshold_for(self, pair: str, hour: int, timeframe: Optional[str] = None) -> float:
+        """Threshold for a context (unknown pair/timeframe use the wildcard row/column)."""
+        pi = self._pair_idx.get(pair, self._pair_default)
+        ti = self._tf_idx.get(timeframe, self._tf_default)
+        return float(self.table[pi, int(hour) % 24, ti])
+
+    def accepts(self, proba: float, pair: str, hour: int, timeframe: Optional[str] = None) -> bool:
+        return self.calibrate(proba) >= self.threshold_for(pair, hour, timeframe)
+
+    def save(self, path: str):
+        np.savez_compressed(
+            path,
+            pairs=np.array(self.pairs),
+            timeframes=np.array(self.timeframes),
+            table=self.table,
+            calibration=self.calibration,
+            meta=np.array(json.dumps(self.meta)),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "ThresholdTable":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                pairs=data['pairs'].tolist(),
+                timeframes=data['timeframes'].tolist(),
+                table=data['table'],
+                calibration=data['calibration'],
+                meta=json.loads(str(data['meta'])),
+            )
+
+
+def build_threshold_table(df: pd.DataFrame, method: str = "isotonic", payout: float = PAYOUT,
+                          min_trades: int = MIN_TRADES_PER_CONTEXT) -> ThresholdTable:
+    """Fit calibration + context thresholds from scored trades."""
+    calibration = fit_calibration(df['proba'].values, df['win'].values, method)
+    pairs, timeframes, table = fit_threshold_table(df, calibration, payout, min_trades)
+    meta = {
+        'method': method,
+        'payout': payout,
+        'min_trades': min_trades,
+        'n_trades': int(len(df)),
+        'fitted_at': datetime.now().isoformat(),
+    }
+    return ThresholdTable(pairs, timeframes, table, calibration, meta)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Calibración ML y thresholds por contexto')
+    parser.add_argument('--model', default='ml_model.pkl', help='Modelo junto al que se guarda la tabla')
+    parser.add_argument('--method', choices=['isotonic', 'platt'], default='isotonic')
+    parser.add_argument('--payout', type=float, default=PAYOUT)
+    parser.add_argument('--min-trades', type=int, default=MIN_TRADES_PER_CONTEXT)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🎯 CALIBRACIÓN ML + THRESHOLDS POR CONTEXTO")
+    print("=" * 60)
+
+    df = load_scored_trades()
+    if df is None or len(df) < args.min_trades:
+        print("❌ No hay suficientes trades con probabilidad ML")
+        return
+
+    table = build_threshold_table(df, args.method, args.payout, args.min_trades)
+    path = calibration_path_for(args.model)
+    table.save(path)
+
+    print(f"✅ {len(df)} trades | método: {args.method}")
+    print(f"   Pares: {len(table.pairs) - 1} | Timeframes: {len(table.timeframes) - 1}")
+    print(f"   Threshold global: {table.threshold_for(WILDCARD, 0, WILDCARD):.2f} "
+          f"(rango {table.table.min():.2f}-{table.table.max():.2f})")
+    print(f"💾 Tabla guardada en {path}")
+
+
+if __name__ == "__main__":
+    main()
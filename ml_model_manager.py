@@ -5,22 +5,47 @@ Handles model loading, reloading, and auto-training scheduling
 
 import os
 import time
+import queue
+import shutil
 import threading
-import joblib
 import json
 from datetime import datetime, timedelta
 import subprocess
 
+from shadow_scoring import ShadowScoreBook
+from ml_calibration import ThresholdTable, calibration_path_for
+from lazy_loader import LazyObject, lazy_import
+
+# sklearn/joblib load with the first model, not at import
+joblib = lazy_import('joblib')
+
 class MLModelManager:
-    def __init__(self, model_path="ml_model.pkl", auto_train_enabled=True, auto_train_interval_hours=24):
+    def __init__(self, model_path="ml_model.pkl", auto_train_enabled=True, auto_train_interval_hours=24,
+                 candidate_path="ml_model_candidate.pkl", auto_promote=True, promote_min_trades=100,
+                 metadata_path="ml_model_metadata.json", candidate_metadata_path="ml_model_candidate_metadata.json"):
         self.model_path = model_path
-        self.metadata_path = "ml_model_metadata.json"
+        self.metadata_path = metadata_path
         self.model = None
         self.model_lock = threading.Lock()
         self.model_last_modified = 0
         self.ml_active = False
         self.ml_threshold = 0.62
         
+        # Calibration + per-context thresholds (ml_model_calibration.npz)
+        self.calibration_path = calibration_path_for(model_path)
+        self.threshold_table = None
+        self.calibration_last_modified = 0
+        
+        # Shadow mode: candidate model scored on live signals, never traded
+        self.candidate_path = candidate_path
+        self.candidate_metadata_path = candidate_metadata_path
+        self.candidate_model = None
+        self.candidate_last_modified = 0
+        self.auto_promote = auto_promote
+        self.promote_min_trades = promote_min_trades
+        self.shadow_book = ShadowScoreBook(threshold=self.ml_threshold)
+        self.shadow_queue = queue.Queue()
+        
         # Auto-training config
         self.auto_train_enabled = auto_train_enabled
         self.auto_train_interval_hours = auto_train_interval_hours
@@ -28,9 +53,12 @@ class MLModelManager:
         
         # Initial load
         self.load_model()
+        self.load_candidate()
+        self.load_threshold_table()
         
         # Start background threads
         self.start_monitor()
+        self.start_shadow_worker()
         if self.auto_train_enabled:
             self.start_auto_trainer()
     
@@ -63,6 +91,47 @@ class MLModelManager:
             self.ml_active = False
             return False
     
+    def load_candidate(self):
+        """Load or reload the shadow candidate model (thread-safe)"""
+        try:
+            if not os.path.exists(self.candidate_path):
+                if self.candidate_model is not None:
+                    with self.model_lock:
+                        self.candidate_model = None
+                        self.candidate_last_modified = 0
+                return False
+            
+            current_mtime = os.path.getmtime(self.candidate_path)
+            if current_mtime != self.candidate_last_modified:
+                new_model = joblib.load(self.candidate_path)
+                with self.model_lock:
+                    self.candidate_model = new_model
+                    self.candidate_last_modified = current_mtime
+                # Records scored by a previous candidate say nothing about this one
+                self.shadow_book.reset()
+                print("🕶️ Modelo candidato cargado en modo shadow")
+                return True
+            return False
+        except Exception as e:
+            print(f"⚠️ Error cargando modelo candidato: {e}")
+            return False
+    
+    def load_threshold_table(self):
+        """Load or reload the calibration/threshold lookup table"""
+        try:
+            if not os.path.exists(self.calibration_path):
+                return False
+            current_mtime = os.path.getmtime(self.calibration_path)
+            if current_mtime != self.calibration_last_modified:
+                self.threshold_table = ThresholdTable.load(self.calibration_path)
+                self.calibration_last_modified = current_mtime
+                print(f"🎯 Thresholds por contexto cargados ({self.threshold_table.meta.get('method', '?')})")
+                return True
+            return False
+        except Exception as e:
+            print(f"⚠️ Error cargando tabla de thresholds: {e}")
+            return False
+    
     def predict_proba(self, features):
         """Thread-safe prediction"""
         with self.model_lock:
@@ -71,13 +140,81 @@ class MLModelManager:
             else:
                 return None
     
+    def shadow_score(self, features, prod_proba, signal_id, pair="", timeframe="", threshold=None):
+        """
+        Queue a live signal for shadow scoring (non-blocking).
+        
+        The candidate model is evaluated in the shadow worker thread, so the
+        decision path only pays for a queue put.
+        
+        Args:
+            features: Feature DataFrame (one row) used for the production call
+            prod_proba: Calibrated production probability (what the live gate compares)
+            signal_id: ID that will later identify the trade result
+            pair: Trading pair
+            timeframe: Timeframe name (M1, M5...)
+            threshold: Threshold the live gate used for this signal
+        """
+        self.shadow_queue.put((features, float(prod_proba), str(signal_id), pair, timeframe,
+                               datetime.now(), threshold))
+    
+    def record_shadow_result(self, signal_id, result, profit_loss=None):
+        """Attach the trade result to a shadow-scored signal."""
+        return self.shadow_book.settle(signal_id, result, profit_loss)
+    
+    def get_shadow_metrics(self, window=None):
+        """Rolling calibration and profit-impact metrics (production vs candidate)."""
+        return self.shadow_book.metrics(window)
+    
+    def promote_candidate(self):
+        """Replace the production model with the candidate (backs up production)."""
+        if not os.path.exists(self.candidate_path):
+            return False
+        try:
+            from auto_trainer import rotate_model_backups
+            rotate_model_backups(self.model_path)
+            shutil.move(self.candidate_path, self.model_path)
+            if os.path.exists(self.candidate_metadata_path):
+                shutil.move(self.candidate_metadata_path, self.metadata_path)
+            # The candidate's shadow record is now production's: start a fresh book
+            self.shadow_book.reset()
+            print("🏆 Modelo candidato promovido a producción (forward performance)")
+            self.load_model()
+            self.load_candidate()
+            return True
+        except Exception as e:
+            print(f"⚠️ Error promoviendo modelo candidato: {e}")
+            return False
+    
     def is_active(self):
         """Check if ML model is active"""
         return self.ml_active
     
-    def get_threshold(self):
-        """Get ML threshold"""
-        return self.ml_threshold
+    def get_threshold(self, pair=None, hour=None, timeframe=None, default=None):
+        """
+        Get ML threshold.
+        
+        With a context (pair, hour, timeframe) and a fitted lookup table the
+        per-context threshold is returned; otherwise `default` (the caller's
+        own threshold) or the global threshold.
+        Compare it against calibrate(proba), not the raw probability.
+        """
+        table = self.threshold_table
+        if table is not None and pair is not None and hour is not None:
+            return table.threshold_for(pair, hour, timeframe)
+        return self.ml_threshold if default is None else default
+    
+    def calibrate(self, proba):
+        """Calibrated probability (identity if no table is loaded)"""
+        table = self.threshold_table
+        return table.calibrate(proba) if table is not None else proba
+    
+    def check_promotion(self):
+        """Promote the candidate once it beats production on its own shadow trades"""
+        if self.auto_promote and self.candidate_model is not None and \
+           self.shadow_book.candidate_is_better(min_trades=self.promote_min_trades):
+            return self.promote_candidate()
+        return False
     
     def monitor_thread(self):
         """Background thread to monitor model file changes"""
@@ -85,11 +222,45 @@ class MLModelManager:
         while True:
             try:
                 self.load_model()
+                self.load_candidate()
+                self.load_threshold_table()
+                self.check_promotion()
                 time.sleep(10)  # Check every 10 seconds
             except Exception as e:
                 print(f"⚠️ Error en monitor de modelo: {e}")
                 time.sleep(30)
     
+    def shadow_worker_thread(self):
+        """Background thread that scores queued signals with the candidate in batches"""
+        import pandas as pd
+        
+        while True:
+            try:
+                batch = [self.shadow_queue.get()]
+                while len(batch) < 64:
+                    try:
+                        batch.append(self.shadow_queue.get_nowait())
+                    except queue.Empty:
+                        break
+                
+                cand_probas = [None] * len(batch)
+                with self.model_lock:
+                    candidate = self.candidate_model
+                    version = self.candidate_last_modified
+                if candidate is not None:
+                    X = pd.concat([item[0] for item in batch], ignore_index=True)
+                    cand_probas = candidate.predict_proba(X)[:, 1]
+                    if version != self.candidate_last_modified:
+                        cand_probas = [None] * len(batch)  # candidate swapped while scoring
+                
+                for (_, prod_proba, signal_id, pair, timeframe, ts, threshold), cand in zip(batch, cand_probas):
+                    # Same scale as the live gate: calibrated, against that signal's threshold
+                    cand = None if cand is None else self.calibrate(cand)
+                    self.shadow_book.add(signal_id, prod_proba, cand, pair, timeframe, ts, threshold)
+            except Exception as e:
+                print(f"⚠️ Error en shadow scoring: {e}")
+                time.sleep(1)
+    
     def auto_training_thread(self):
         """Background thread for automatic model retraining"""
         print(f"🤖 Auto-entrenamiento activado (cada {self.auto_train_interval_hours}h)")
@@ -130,17 +301,22 @@ class MLModelManager:
     
     def start_monitor(self):
         """Start model file monitor thread"""
-        monitor = threading.Thread(target=self.monitor_thread, daemon=True)
+        monitor = threading.Thread(target=self.monitor_thread, name="ml-monitor", daemon=True)
         monitor.start()
     
+    def start_shadow_worker(self):
+        """Start shadow scoring thread"""
+        worker = threading.Thread(target=self.shadow_worker_thread, name="ml-shadow", daemon=True)
+        worker.start()
+    
     def start_auto_trainer(self):
         """Start auto-training thread"""
-        trainer = threading.Thread(target=self.auto_training_thread, daemon=True)
+        trainer = threading.Thread(target=self.auto_training_thread, name="ml-auto-trainer", daemon=True)
         trainer.start()
 
 
-# Global instance
-ml_manager = MLModelManager(
-    auto_train_enabled=True,
-    auto_train_interval_hours=24
+# Global instance (model load + background threads start on first use, not at import)
+ml_manager = LazyObject(
+    lambda: MLModelManager(auto_train_enabled=True, auto_train_interval_hours=24),
+    "ml_manager"
 )
@@ -1,16 +1,33 @@
 import asyncio
+import math
 import random
+import time as _time
 import uuid
+from collections import defaultdict
+
+# Payout % of the mock "server" (pairs of config.yaml; others get MOCK_DEFAULT_PAYOUT)
+MOCK_PAYOUTS = {
+    "EURUSD_otc": 92, "GBPUSD_otc": 90, "USDJPY_otc": 88, "AUDUSD_otc": 85,
+    "USDCAD_otc": 86, "AUDCAD_otc": 80, "USDMXN_otc": 75, "USDCOP_otc": 70,
+    "USDARS_otc": 65, "#INTC_otc": 82,
+}
+MOCK_DEFAULT_PAYOUT = 92
+
 
 class PocketOptionAsync:
     """Mock implementation of PocketOptionAsync for testing without the real BinaryOptionsToolsV2 library.
     Matches the interface expected by main.py.
     """
+    max_history_seconds = 90 * 86400  # history kept by the mock "server"
+
     def __init__(self, ssid: str = "mock_ssid"):
         self.ssid = ssid
         self._balance = 1000.0  # Float, as expected by main.py
         self._demo = True
         self.active_trades = {}
+        self.payouts = dict(MOCK_PAYOUTS)
+        # Fixed network delays (LatencyInjectingPocketOptionAsync sets them to 0)
+        self.delays = {'balance': 0.1, 'get_candles': 0.2, 'order': 0.5, 'check_win': 0.5}
 
     def is_demo(self):
         """Return whether the account is demo."""
@@ -18,53 +35,74 @@ class PocketOptionAsync:
 
     async def balance(self):
         """Return the current balance as a float."""
-        await asyncio.sleep(0.1)  # simulate network delay
+        await asyncio.sleep(self.delays['balance'])  # simulate network delay
         return self._balance
 
     async def get_candles(self, pair: str, interval: int, lookback: int = 50, offset=0):
         """Return a mock list of candle data (list of dicts or similar, main.py handles conversion).
         main.py expects raw data to be a list of dicts with keys like 'time', 'open', 'close', 'high', 'low'.
+
+        Like the real API the third argument is the period in seconds ending now
+        (values smaller than the interval are treated as a number of candles).
+        Bars sit on the interval grid and are deterministic per (pair, interval, time),
+        so overlapping requests return identical candles.
         """
-        await asyncio.sleep(0.2)  # simulate network delay
-        
-        # Generate dummy data
+        await asyncio.sleep(self.delays['get_candles'])  # simulate network delay
+
         import time
-        import random
-        
-        current_time = int(time.time())
-        candles = []
-        
-        # Start from 'lookback' intervals ago
-        start_time = current_time - (lookback * interval)
-        
-        price = 1.0500 # Base price for EURUSD-ish
-        
-        for i in range(lookback):
-            timestamp = start_time + (i * interval)
-            
-            # Random walk
-            change = (random.random() - 0.5) * 0.0010
-            open_price = price
-            close_price = price + change
-            high_price = max(open_price, close_price) + (random.random() * 0.0005)
-            low_price = min(open_price, close_price) - (random.random() * 0.0005)
-            
-            candles.append({
-                "time": timestamp,
-                "open": open_price,
-                "close": close_price,
-                "high": high_price,
-                "low": low_price,
-                "volume": random.randint(10, 100)
-            })
-            
-            price = close_price
 
-        return candles
+        count = lookback // interval if lookback >= interval else lookback
+        # The server only keeps a limited history
+        count = max(0, min(count, self.max_history_seconds // interval))
+
+        last_time = int(time.time()) // interval * interval
+        start_time = last_time - (count - 1) * interval
+        return [self._candle(pair, interval, start_time + i * interval) for i in range(count)]
+
+    async def get_candles_array(self, pair: str, interval: int, lookback: int = 50):
+        """Same candles as get_candles, as a candles.Candles struct-of-arrays."""
+        from candles import Candles
+        return Candles.from_rows(await self.get_candles(pair, interval, lookback))
+
+    async def payout(self, asset=None):
+        """Payout % per asset, like the real API: dict for all, int for one, list for a list."""
+        await asyncio.sleep(self.delays['balance'])
+        if isinstance(asset, str):
+            return self.payouts.get(asset, MOCK_DEFAULT_PAYOUT)
+        if isinstance(asset, list):
+            return [self.payouts.get(a, MOCK_DEFAULT_PAYOUT) for a in asset]
+        return dict(self.payouts)
+
+    async def history(self, pair: str, period: int):
+        """Latest candles for a pair (same format as get_candles)."""
+        return await self.get_candles(pair, period, period * 100)
+
+    @staticmethod
+    def _candle(pair: str, interval: int, timestamp: int) -> dict:
+        """Deterministic pseudo-random candle for a bar."""
+        import math
+        import zlib
+
+        rng = random.Random(zlib.crc32(f"{pair}:{interval}:{timestamp}".encode()))
+        base = 1.0500 + (zlib.crc32(pair.encode()) % 1000) / 10000
+        # Slow + fast waves give trends and pullbacks
+        open_price = base * (1 + 0.004 * math.sin(timestamp / 86400) + 0.001 * math.sin(timestamp / 3600))
+        close_price = open_price + (rng.random() - 0.5) * 0.0010
+        high_price = max(open_price, close_price) + (rng.random() * 0.0005)
+        low_price = min(open_price, close_price) - (rng.random() * 0.0005)
+
+        return {
+            "time": timestamp,
+            "open": open_price,
+            "close": close_price,
+            "high": high_price,
+            "low": low_price,
+            "volume": rng.randint(10, 100)
+        }
 
     async def buy(self, asset, amount, time, check_win=False):
         """Simulate a buy order."""
-        await asyncio.sleep(0.5)
+        await asyncio.sleep(self.delays['order'])
         trade_id = str(uuid.uuid4())[:8]
         
         # Deduct balance immediately
@@ -82,7 +120,7 @@ class PocketOptionAsync:
 
     async def sell(self, asset, amount, time, check_win=False):
         """Simulate a sell order."""
-        await asyncio.sleep(0.5)
+        await asyncio.sleep(self.delays['order'])
         trade_id = str(uuid.uuid4())[:8]
         
         # Deduct balance immediately
@@ -99,7 +137,7 @@ class PocketOptionAsync:
 
     async def check_win(self, trade_id):
         """Simulate checking the result of a trade."""
-        await asyncio.sleep(0.5)
+        await asyncio.sleep(self.delays['check_win'])
         
         if trade_id not in self.active_trades:
             return {"result": "error", "message": "Trade not found"}
@@ -111,10 +149,9 @@ class PocketOptionAsync:
         is_win = random.random() < 0.60
         
         if is_win:
-            # Payout: amount + profit (92%)
-            payout = amount * 1.92
-            profit = amount * 0.92
-            self._balance += payout
+            # Payout: amount + profit at the asset's payout
+            profit = amount * self.payouts.get(trade['asset'], MOCK_DEFAULT_PAYOUT) / 100
+            self._balance += amount + profit
             return {"result": "win", "profit": profit, "win": profit}
         else:
             # Balance already deducted
@@ -123,3 +160,159 @@ class PocketOptionAsync:
     async def close(self):
         """Placeholder for closing resources."""
         pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+        return False
+
+
+class LatencyProfile:
+    """
+    Network behaviour for LatencyInjectingPocketOptionAsync.
+
+    Latencies are lognormal around `median` (sigma=0 gives a fixed delay).
+    Each call can fail with a ConnectionError or hang until the caller's
+    timeout (raised as asyncio.TimeoutError after `timeout` seconds).
+    """
+
+    def __init__(
+        self,
+        median: float = 0.2,
+        sigma: float = 0.0,
+        error_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        timeout: float = 30.0,
+        session_expiry_after: float = None,
+        method_factor: dict = None,
+        seed: int = None
+    ):
+        """
+        Args:
+            median: Median latency in seconds
+            sigma: Lognormal sigma (tail heaviness)
+            error_rate: Probability of a ConnectionError per call
+            timeout_rate: Probability of a call hanging until `timeout`
+            timeout: Seconds a hung call takes before TimeoutError
+            session_expiry_after: Seconds after which the session dies
+                (balance() returns -1, other calls fail)
+            method_factor: Latency multiplier per method (e.g. {'buy': 2.5})
+            seed: RNG seed for reproducible runs
+        """
+        self.median = median
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.timeout = timeout
+        self.session_expiry_after = session_expiry_after
+        self.method_factor = method_factor or {}
+        self.rng = random.Random(seed)
+
+    def sample(self, method: str) -> float:
+        """Latency for one call."""
+        latency = self.median * math.exp(self.sigma * self.rng.gauss(0, 1)) if self.sigma else self.median
+        return latency * self.method_factor.get(method, 1.0)
+
+    def outcome(self) -> str:
+        """'ok', 'error' or 'timeout'"""
+        r = self.rng.random()
+        if r < self.timeout_rate:
+            return 'timeout'
+        if r < self.timeout_rate + self.error_rate:
+            return 'error'
+        return 'ok'
+
+
+# Presets for load tests (medians/tails in seconds)
+LATENCY_PROFILES = {
+    'fixed': dict(median=0.2),
+    'lan': dict(median=0.05, sigma=0.2),
+    'typical': dict(median=0.25, sigma=0.5, error_rate=0.01, timeout_rate=0.002, timeout=30.0,
+                    method_factor={'buy': 2.0, 'sell': 2.0}),
+    'degraded': dict(median=0.6, sigma=0.9, error_rate=0.05, timeout_rate=0.02, timeout=30.0,
+                     method_factor={'buy': 2.0, 'sell': 2.0}),
+}
+
+
+def latency_profile(name: str, **overrides) -> LatencyProfile:
+    """Build a LatencyProfile from a preset name."""
+    return LatencyProfile(**dict(LATENCY_PROFILES[name], **overrides))
+
+
+class LatencyInjectingPocketOptionAsync:
+    """
+    Wraps any PocketOptionAsync-like client (mock or replay) and injects
+    latency, errors, timeouts and session expiry per call.
+
+    Delays use asyncio.sleep/time.time at call time, so they follow a
+    ReplayClock when it is patched in.
+    """
+
+    WRAPPED = ('balance', 'get_candles', 'get_candles_array', 'history', 'buy', 'sell', 'check_win', 'payout')
+
+    def __init__(self, api=None, profile: LatencyProfile = None):
+        self.api = api or PocketOptionAsync()
+        self.profile = profile or LatencyProfile()
+        if hasattr(self.api, 'delays'):
+            self.api.delays = {k: 0 for k in self.api.delays}
+        self.started_at = _time.time()
+        self.calls = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.timeouts = defaultdict(int)
+        self.latencies = defaultdict(list)
+
+    def session_expired(self) -> bool:
+        expiry = self.profile.session_expiry_after
+        return expiry is not None and _time.time() - self.started_at >= expiry
+
+    def renew_session(self):
+        """New SSID: restart the expiry countdown."""
+        self.started_at = _time.time()
+
+    async def _call(self, method: str, *args, **kwargs):
+        self.calls[method] += 1
+        outcome = self.profile.outcome()
+
+        if outcome == 'timeout':
+            self.timeouts[method] += 1
+            await asyncio.sleep(self.profile.timeout)
+            raise asyncio.TimeoutError(f"Injected timeout in {method}")
+
+        latency = self.profile.sample(method)
+        self.latencies[method].append(latency)
+        await asyncio.sleep(latency)
+
+        if self.session_expired():
+            if method == 'balance':
+                return -1.0
+            self.errors[method] += 1
+            raise ConnectionError(f"Session expired ({method})")
+        if outcome == 'error':
+            self.errors[method] += 1
+            raise ConnectionError(f"Injected error in {method}")
+
+        return await getattr(self.api, method)(*args, **kwargs)
+
+    def __getattr__(self, name):
+        if name in self.WRAPPED:
+            async def wrapper(*args, **kwargs):
+                return await self._call(name, *args, **kwargs)
+            return wrapper
+        return getattr(self.api, name)
+
+    def stats(self) -> dict:
+        """Calls, errors, timeouts and injected latency percentiles per method."""
+        out = {}
+        for method, count in self.calls.items():
+            lat = sorted(self.latencies[method])
+            pick = lambda q: lat[min(len(lat) - 1, int(q * len(lat)))] if lat else 0.0
+            out[method] = {
+                'calls': count,
+                'errors': self.errors[method],
+                'timeouts': self.timeouts[method],
+                'p50': pick(0.50),
+                'p99': pick(0.99),
+            }
+        return out
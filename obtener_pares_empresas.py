@@ -1,73 +1,33 @@
 import asyncio
 from BinaryOptionsToolsV2.pocketoption import PocketOptionAsync
 
+from asset_catalog import AssetCatalog, AssetScanner, stock_variants
+from client_pool import client_pool
+
 
 async def bruteforce_assets():
     ssid = input("SSID: ").strip()
-    api = PocketOptionAsync(ssid=ssid)
-
-    # Lista exhaustiva de posibles nombres para acciones
-    stock_variations = []
-
-    # Empresas comunes
-    companies = {
-        'Apple': ['AAPL', 'Apple'],
-        'Microsoft': ['MSFT', 'Microsoft'],
-        'Google': ['GOOGL', 'GOOG', 'Google', 'Alphabet'],
-        'Amazon': ['AMZN', 'Amazon'],
-        'Tesla': ['TSLA', 'Tesla'],
-        'Meta': ['META', 'Meta', 'Facebook', 'FB'],
-        'Intel': ['INTC', 'Intel'],
-        'NVIDIA': ['NVDA', 'NVIDIA', 'Nvidia'],
-        'AMD': ['AMD'],
-        'Netflix': ['NFLX', 'Netflix'],
-    }
-
-    # Generar todas las variaciones posibles
-    for company, tickers in companies.items():
-        for ticker in tickers:
-            # Sin sufijo
-            stock_variations.append(ticker)
-            # Con _otc
-            stock_variations.append(f"{ticker}_otc")
-            # Con #
-            stock_variations.append(f"#{ticker}")
-            stock_variations.append(f"#{ticker}_otc")
-            # Mayúsculas/minúsculas
-            stock_variations.append(ticker.upper())
-            stock_variations.append(f"{ticker.upper()}_otc")
-
-    print(f"\n🔍 Probando {len(stock_variations)} variaciones...\n")
-
-    working_assets = []
+    # Sesión del pool: conecta una vez (reintentos con backoff) en lugar de sleep(2) y esperar
+    async with client_pool.session(ssid, factory=PocketOptionAsync, env_file=None) as api:
+        # Lista exhaustiva de posibles nombres para acciones
+        stock_variations = stock_variants()
+        print(f"\n🔍 Probando {len(stock_variations)} variaciones (payout() + probes en paralelo)...\n")
 
-    for i, asset in enumerate(stock_variations, 1):
-        try:
-            candles = await asyncio.wait_for(
-                api.get_candles(asset, 300, 1500),
-                timeout=3
-            )
-            if candles and len(candles) > 0:
-                print(f"✅ [{i}/{len(stock_variations)}] {asset} - FUNCIONA! ({len(candles)} velas)")
-                working_assets.append(asset)
-        except asyncio.TimeoutError:
-            print(f"⏱️ [{i}/{len(stock_variations)}] {asset} - Timeout")
-        except Exception as e:
-            error_msg = str(e)[:40]
-            if "Invalid asset" not in error_msg:
-                print(f"⚠️ [{i}/{len(stock_variations)}] {asset} - {error_msg}")
+        catalog = AssetCatalog()
+        await AssetScanner(api, catalog).discover(stock_variations)
+    await client_pool.close_all()  # cierre ordenado antes de que asyncio.run cierre el loop
 
-        # Pequeño delay para no saturar
-        if i % 10 == 0:
-            await asyncio.sleep(1)
+    working_assets = [a for a in stock_variations if catalog.assets.get(a, {}).get('available')]
 
     print(f"\n{'=' * 50}")
     print(f"✅ ACTIVOS QUE FUNCIONAN ({len(working_assets)}):")
     print(f"{'=' * 50}")
     for asset in working_assets:
-        print(f"  '{asset}',")
+        payout = catalog.assets[asset].get('payout')
+        print(f"  '{asset}',{f'  # {payout}%' if payout else ''}")
 
-    print(f"\n💡 Copia estos nombres a tu lista PAIRS")
+    print(f"\n💾 Guardados en {catalog.path} (los bots filtran sus pares con este catálogo al arrancar)")
 
 
-asyncio.run(bruteforce_assets())
\ No newline at end of file
+if __name__ == "__main__":
+    asyncio.run(bruteforce_assets())
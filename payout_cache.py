@@ -0,0 +1,222 @@
+"""
+Payout Cache
+Current payout of every asset from one api.payout() call, refreshed in the
+background, with O(1) lookups for the trade gate.
+
+A binary option at payout p (0.92 = 92%) has expected value
+    EV = prob * p - (1 - prob)
+so a signal is only worth taking when prob > breakeven = 1 / (1 + p).
+Bots raise their ML threshold to that breakeven at the live payout and skip
+assets whose payout is 0 (closed) or below MIN_PAYOUT.
+
+Every refresh that changes a payout is appended to
+logs/payouts/payouts_<YYYYmmdd>.csv (time, asset, payout) so backtests can
+replay the recorded series with PayoutSeries instead of a constant.
+"""
+import asyncio
+import csv
+import glob
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_PAYOUT = 0.92          # Used when nothing better is known (ratio, not %)
+MIN_PAYOUT = float(os.getenv("MIN_PAYOUT", "0.70"))
+REFRESH_INTERVAL = int(os.getenv("PAYOUT_REFRESH_SECONDS", "60"))
+MAX_AGE = 5 * REFRESH_INTERVAL
+PAYOUTS_DIR = os.path.join("logs", "payouts")
+
+
+def breakeven_probability(payout: float) -> float:
+    """Win probability with EV = 0 at this payout ratio."""
+    return 1.0 / (1.0 + payout)
+
+
+def expected_value(prob: float, payout: float) -> float:
+    """EV per unit staked."""
+    return prob * payout - (1.0 - prob)
+
+
+def _ratio(value) -> Optional[float]:
+    """API payout (92) -> ratio (0.92); None stays None."""
+    if value is None:
+        return None
+    value = float(value)
+    return value / 100.0 if value > 1.0 else value
+
+
+class PayoutCache:
+    """
+    Table of asset -> payout ratio kept fresh by a background task.
+
+    Args:
+        api: PocketOptionAsync-like client with payout() (can be attached later)
+        refresh_interval: Seconds between refreshes
+        record_dir: Where payout changes are recorded (None = don't record)
+    """
+
+    def __init__(self, api=None, refresh_interval: int = REFRESH_INTERVAL,
+                 record_dir: Optional[str] = PAYOUTS_DIR):
+        self.api = api
+        self.refresh_interval = refresh_interval
+        self.record_dir = record_dir
+        self.updated_at: Optional[float] = None
+        self.refreshes = 0
+        self._table: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def attach(self, api):
+        self.api = api
+
+    # ------------------------------------------------------------- refreshing
+
+    async def refresh(self) -> bool:
+        """
+        Reload every payout with a single api.payout() call.
+
+        Returns:
+            False if the API failed or doesn't support payout()
+        """
+        if self.api is None or not hasattr(self.api, 'payout'):
+            return False
+        try:
+            raw = await asyncio.wait_for(self.api.payout(), timeout=30)
+        except Exception as e:
+            print(f"⚠️ Payout refresh falló: {type(e).__name__} {e}")
+            return False
+        if not isinstance(raw, dict):
+            return False
+
+        table = {asset: _ratio(value) or 0.0 for asset, value in raw.items()}
+        changed = {a: p for a, p in table.items() if self._table.get(a) != p}
+        self._table = table  # swap: lookups never see a half-built table
+        self.updated_at = time.time()
+        self.refreshes += 1
+        if changed and self.record_dir:
+            self._record(changed)
+        return True
+
+    async def _run(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self) -> Optional[asyncio.Task]:
+        """Refresh now and then every refresh_interval (call from inside the loop, idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="payout-cache")
+        return self._task
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _record(self, changed: Dict[str, float]):
+        os.makedirs(self.record_dir, exist_ok=True)
+        stamp = datetime.now(timezone.utc)
+        path = os.path.join(self.record_dir, f"payouts_{stamp.strftime('%Y%m%d')}.csv")
+        new_file = not os.path.exists(path)
+        try:
+            with open(path, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                if new_file:
+                    writer.writerow(['time', 'asset', 'payout'])
+                ts = round(self.updated_at, 3)
+                writer.writerows((ts, asset, payout) for asset, payout in changed.items())
+        except OSError as e:
+            print(f"⚠️ No se pudo registrar payouts en {path}: {e}")
+
+    # ----------------------------------------------------------------- lookups
+
+    def set(self, asset: str, payout: float):
+        """Override one payout (ratio or percent)."""
+        self._table[asset] = _ratio(payout)
+
+    def get(self, asset: str, default: Optional[float] = None) -> Optional[float]:
+        """Payout ratio of an asset (default if unknown)."""
+        return self._table.get(asset, default)
+
+    def is_stale(self) -> bool:
+        return self.updated_at is None or time.time() - self.updated_at > MAX_AGE
+
+    def breakeven(self, asset: str) -> float:
+        """Breakeven probability at the live payout (0 if the payout is unknown)."""
+        payout = self._table.get(asset)
+        return breakeven_probability(payout) if payout else 0.0
+
+    def min_probability(self, asset: str, threshold: float) -> float:
+        """ML threshold for an asset: never below the breakeven at the live payout."""
+        return max(threshold, self.breakeven(asset))
+
+    def allows(self, asset: str, prob: Optional[float] = None,
+               min_payout: float = MIN_PAYOUT) -> Tuple[bool, str]:
+        """
+        Trade gate: payout open and high enough, and EV > 0 when prob is given.
+
+        Unknown assets pass (no data to block on).
+
+        Returns:
+            (allowed, reason)
+        """
+        payout = self._table.get(asset)
+        if payout is None:
+            return True, "payout desconocido"
+        if payout <= 0:
+            return False, f"💤 {asset} cerrado (payout 0%)"
+        if payout < min_payout:
+            return False, f"📉 Payout {payout:.0%} < mínimo {min_payout:.0%}"
+        if prob is not None:
+            ev = expected_value(prob, payout)
+            if ev <= 0:
+                return False, (f"📉 EV {ev:+.3f} a payout {payout:.0%} "
+                               f"(prob {prob:.1%} < breakeven {breakeven_probability(payout):.1%})")
+        return True, f"payout {payout:.0%}"
+
+
+class PayoutSeries:
+    """
+    Recorded payout history per asset for backtests.
+
+    Args:
+        series: {asset: (times, payouts)} arrays sorted by time
+        default: Payout before the first record / for unknown assets
+    """
+
+    def __init__(self, series: Optional[Dict[str, Tuple[np.ndarray, np.ndarray]]] = None,
+                 default: float = DEFAULT_PAYOUT):
+        self.series = series or {}
+        self.default = default
+
+    @classmethod
+    def load(cls, directory: str = PAYOUTS_DIR, default: float = DEFAULT_PAYOUT) -> "PayoutSeries":
+        """Series from the payouts_*.csv files PayoutCache recorded."""
+        import pandas as pd
+
+        frames = [pd.read_csv(path) for path in sorted(glob.glob(os.path.join(directory, "payouts_*.csv")))]
+        if not frames:
+            return cls(default=default)
+        df = pd.concat(frames, ignore_index=True).sort_values('time', kind='stable')
+        series = {
+            asset: (group['time'].to_numpy(dtype=np.float64), group['payout'].to_numpy(dtype=np.float64))
+            for asset, group in df.groupby('asset')
+        }
+        return cls(series, default)
+
+    def at(self, asset: str, ts) -> float:
+        """Payout in force at epoch `ts` (last record at or before ts)."""
+        entry = self.series.get(asset)
+        if entry is None:
+            return self.default
+        if hasattr(ts, 'timestamp'):
+            ts = ts.timestamp()
+        times, payouts = entry
+        i = int(np.searchsorted(times, float(ts), side='right')) - 1
+        return float(payouts[i]) if i >= 0 else self.default
+
+
+# Global instance
+payout_cache = PayoutCache()
@@ -0,0 +1,566 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Replay Market Simulator
+PocketOptionAsync con la misma interfaz que mock_pocketoption, pero alimentado
+por velas históricas (history/*.candles o CSV) y un reloj controlable:
+
+- ReplayClock: tiempo de mercado escalado (speed x tiempo real) o virtual
+  (cada sleep avanza el reloj al instante, sin esperar).
+- get_candles/history devuelven solo velas cerradas al "ahora" del reloj.
+- buy/sell abren al último cierre y liquidan con el cierre real al vencimiento.
+
+Para soak tests de main.py o cualquier bot sin conexión:
+
+    python replay_pocketoption.py main.py --speed 1000
+    python replay_pocketoption.py bots/bot_ema_pullback.py --virtual
+
+install() registra este simulador como BinaryOptionsToolsV2.pocketoption y
+clock.patch() hace que asyncio.sleep/time.time de los bots usen el reloj.
+"""
+
+import asyncio
+import heapq
+import os
+import sys
+import time
+import types
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from candle_store import (
+    EXTENSION, HISTORY_DIR, RECORD_DTYPE, TIMEFRAME_SECONDS, CandleFile, candles_path, to_records
+)
+from candles import Candles
+from mock_pocketoption import PocketOptionAsync as MockPocketOptionAsync
+
+# Originales (clock.patch() reemplaza los de los módulos asyncio/time)
+_real_sleep = asyncio.sleep
+_real_time = time.time
+
+DEFAULT_SPEED = 1000.0
+DEFAULT_PAYOUT = 92
+WARMUP_BARS = 100
+
+
+class ReplayFinished(BaseException):
+    """El reloj llegó al final de la historia (BaseException: los bots no la atrapan con except Exception)."""
+
+
+class ReplayClock:
+    """
+    Reloj de mercado para el replay.
+
+    Args:
+        start: Epoch inicial (segundos)
+        speed: Multiplicador sobre el tiempo real; None/0 = tiempo virtual
+    """
+
+    def __init__(self, start: float, speed: Optional[float] = DEFAULT_SPEED):
+        self.start = float(start)
+        self.speed = speed or 0
+        self._t0 = time.perf_counter()
+        self._virtual_now = float(start)
+        self._sleepers: List = []
+        self._seq = 0
+        self._pump_task = None
+
+    @property
+    def virtual(self) -> bool:
+        return not self.speed
+
+    def now(self) -> float:
+        if self.virtual:
+            return self._virtual_now
+        return self.start + (time.perf_counter() - self._t0) * self.speed
+
+    def advance_to(self, t: float):
+        """Tiempo virtual: salta a t (nunca hacia atrás; los sleepers vencidos los despierta el pump)."""
+        if not self.virtual:
+            raise RuntimeError("advance_to() solo con reloj virtual (speed=None)")
+        self._virtual_now = max(self._virtual_now, float(t))
+
+    async def sleep(self, seconds: float = 0, result=None):
+        """asyncio.sleep en tiempo de mercado."""
+        seconds = max(0.0, float(seconds))
+        if not self.virtual:
+            await _real_sleep(seconds / self.speed)
+            return result
+        if seconds == 0:
+            await _real_sleep(0)
+            return result
+
+        # Tiempo virtual: esperar a que el pump avance el reloj hasta el target
+        future = asyncio.get_running_loop().create_future()
+        self._seq += 1
+        heapq.heappush(self._sleepers, (self._virtual_now + seconds, self._seq, future))
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.ensure_future(self._pump())
+        await future
+        return result
+
+    async def _pump(self):
+        """Avanza al próximo sleeper cuando las demás tareas ya no tienen trabajo listo."""
+        loop = asyncio.get_running_loop()
+        while self._sleepers:
+            for _ in range(5):
+                await _real_sleep(0)
+            # Cadenas largas de callbacks (wait/wait_for, tareas encadenadas): esperar a que el loop quede ocioso
+            for _ in range(1000):
+                if not getattr(loop, '_ready', None):
+                    break
+                await _real_sleep(0)
+            target, _, future = heapq.heappop(self._sleepers)
+            if future.done():
+                continue  # Sleeper cancelado (p.ej. timeout que no venció): no adelanta el reloj
+            self._virtual_now = max(self._virtual_now, target)
+            future.set_result(None)
+
+    @contextmanager
+    def patch(self):
+        """asyncio.sleep y time.time pasan a usar este reloj dentro del bloque."""
+        asyncio.sleep = self.sleep
+        time.time = self.now
+        try:
+            yield self
+        finally:
+            asyncio.sleep = _real_sleep
+            time.time = _real_time
+
+
+class ReplaySubscription:
+    """Iterador async sobre velas que cierran a medida que avanza el reloj."""
+
+    def __init__(self, api: "ReplayPocketOptionAsync", asset: str, interval: int,
+                 chunk_size: int = 1):
+        self.api = api
+        self.asset = asset
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self._last_time = None
+
+    def __aiter__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def __anext__(self):
+        items = []
+        while len(items) < self.chunk_size:
+            candles = await self.api.get_candles(self.asset, self.interval, self.interval * self.chunk_size)
+            new = [c for c in candles if self._last_time is None or c['time'] > self._last_time]
+            if self._last_time is None:
+                new = new[-1:]
+            if new:
+                items.extend(new)
+                self._last_time = new[-1]['time']
+            else:
+                await self.api.clock.sleep(self.interval)
+        return items[0] if self.chunk_size == 1 else items
+
+
+class ReplayPocketOptionAsync(MockPocketOptionAsync):
+    """
+    Replay determinista sobre velas históricas con la interfaz de PocketOptionAsync.
+
+    Pares o timeframes sin historia usan las velas sintéticas del mock. Los
+    timeframes que no están guardados se agregan desde uno menor (p.ej. H1 desde M15).
+    """
+
+    def __init__(
+        self,
+        ssid: str = "replay",
+        history_dir: str = HISTORY_DIR,
+        clock: Optional[ReplayClock] = None,
+        speed: Optional[float] = DEFAULT_SPEED,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        balance: float = 1000.0,
+        payouts: Optional[Dict[str, int]] = None,
+        default_payout: int = DEFAULT_PAYOUT,
+        latency: float = 0.0,
+        **kwargs
+    ):
+        """
+        Args:
+            ssid: Ignorado (compatibilidad)
+            history_dir: Directorio con .candles/CSV
+            clock: Reloj compartido (si no, se crea uno con speed)
+            speed: Velocidad del reloj propio (None = virtual)
+            start/end: Rango de replay en epoch (default: rango común de la historia)
+            balance: Balance inicial
+            payouts: Payout % por par
+            default_payout: Payout % para pares no listados
+            latency: Segundos (de mercado) por request
+        """
+        super().__init__(ssid=ssid)
+        self.history_dir = history_dir
+        self._balance = float(balance)
+        self.payouts = dict(payouts or {})
+        self.default_payout = default_payout
+        self.latency = latency
+        self.closed_trades: List[Dict] = []
+        self._series: Dict = {}
+
+        first, last = self._history_range()
+        self.start = int(start if start is not None else first)
+        self.end = int(end if end is not None else last)
+        self.clock = clock or ReplayClock(self.start, speed)
+
+    # ------------------------------------------------------------------ datos
+
+    def _history_range(self):
+        """Rango común de todos los archivos: (max inicio + warmup, min fin)."""
+        starts, ends = [], []
+        paths = {}
+        names = os.listdir(self.history_dir) if os.path.isdir(self.history_dir) else []
+        # .candles tiene prioridad sobre el CSV del mismo par/timeframe
+        for filename in sorted(names, key=lambda n: n.endswith(EXTENSION)):
+            name, ext = os.path.splitext(filename)
+            if ext in (EXTENSION, '.csv') and name.count('_') >= 2:
+                paths[name] = os.path.join(self.history_dir, filename)
+        for name, path in paths.items():
+            records = self._read_file(path)
+            if records is None or not len(records):
+                continue
+            interval = TIMEFRAME_SECONDS.get(name.rsplit('_', 1)[1], 300)
+            starts.append(int(records['time'][0]) + WARMUP_BARS * interval)
+            ends.append(int(records['time'][-1]))
+        if not starts:
+            now = int(_real_time())
+            return now, now + 30 * 86400
+        return max(starts), max(max(starts), min(ends))
+
+    @staticmethod
+    def _read_file(path: str) -> Optional[np.ndarray]:
+        try:
+            if path.endswith(EXTENSION):
+                return CandleFile(path).records
+            return to_records(pd.read_csv(path))
+        except Exception as e:
+            print(f"⚠️ Replay: error leyendo {path}: {e}")
+            return None
+
+    def _stored(self, pair: str, interval: int) -> Optional[np.ndarray]:
+        tf = next((name for name, sec in TIMEFRAME_SECONDS.items() if sec == interval), None)
+        if tf is None:
+            return None
+        path = candles_path(pair, tf, self.history_dir)
+        if not os.path.exists(path):
+            path = path[:-len(EXTENSION)] + '.csv'
+            if not os.path.exists(path):
+                return None
+        return self._read_file(path)
+
+    def series(self, pair: str, interval: int) -> Optional[np.ndarray]:
+        """Velas de un par/intervalo (guardadas o agregadas desde un intervalo menor)."""
+        key = (pair, interval)
+        if key not in self._series:
+            records = self._stored(pair, interval)
+            if records is None:
+                finer = sorted((sec for sec in TIMEFRAME_SECONDS.values()
+                                if sec < interval and interval % sec == 0), reverse=True)
+                for sec in finer:
+                    base = self._stored(pair, sec)
+                    if base is not None and len(base):
+                        records = resample(base, interval)
+                        break
+            self._series[key] = records
+        return self._series[key]
+
+    def price_at(self, pair: str, t: float) -> float:
+        """Último cierre conocido en t (con el timeframe más fino disponible)."""
+        for interval in sorted(TIMEFRAME_SECONDS.values()):
+            records = self.series(pair, interval)
+            if records is None or not len(records):
+                continue
+            idx = int(np.searchsorted(records['time'], t - interval, side='right')) - 1
+            if idx >= 0:
+                return float(records['close'][idx])
+            return float(records['open'][0])
+        # Sin historia: vela sintética determinista del mock
+        bar = int(t) // 60 * 60 - 60
+        return float(self._candle(pair, 60, bar)['close'])
+
+    def _now(self) -> float:
+        now = self.clock.now()
+        if now >= self.end:
+            raise ReplayFinished(f"Replay terminado en {self.end}")
+        return now
+
+    async def _delay(self):
+        await self.clock.sleep(self.latency)
+
+    # ------------------------------------------------------------------ API
+
+    async def balance(self):
+        await self._delay()
+        self._settle_expired()
+        return self._balance
+
+    async def get_candles(self, pair: str, interval: int, lookback: int = 50, offset=0):
+        """Velas cerradas en el período (segundos) que termina en el ahora del reloj."""
+        await self._delay()
+        now = self._now()
+        count = lookback // interval if lookback >= interval else lookback
+
+        records = self.series(pair, interval)
+        if records is None:
+            last = int(now) // interval * interval - interval
+            return [self._candle(pair, interval, last - i * interval) for i in range(count - 1, -1, -1)]
+
+        rows = self._window(records, now, interval, count)
+        return [
+            {"time": int(t), "open": o, "high": h, "low": l, "close": c, "volume": v}
+            for t, o, h, l, c, v in rows.tolist()
+        ]
+
+    async def get_candles_array(self, pair: str, interval: int, lookback: int = 50):
+        """Como get_candles pero Candles con vistas del array guardado (sin dicts ni copia)."""
+        records = self.series(pair, interval)
+        if records is None:
+            return Candles.from_rows(await self.get_candles(pair, interval, lookback))
+        await self._delay()
+        count = lookback // interval if lookback >= interval else lookback
+        return Candles.from_records(self._window(records, self._now(), interval, count))
+
+    @staticmethod
+    def _window(records: np.ndarray, now: float, interval: int, count: int) -> np.ndarray:
+        """Últimas `count` velas cerradas en `now`."""
+        hi = int(np.searchsorted(records['time'], now - interval, side='right'))
+        return records[max(0, hi - count):hi]
+
+    async def history(self, pair: str, period: int):
+        return await self.get_candles(pair, period, period * 100)
+
+    async def payout(self, asset=None):
+        await self._delay()
+        pairs = set(self.payouts)
+        for name in os.listdir(self.history_dir) if os.path.isdir(self.history_dir) else []:
+            stem = os.path.splitext(name)[0]
+            if stem.count('_') >= 2:
+                pairs.add(stem.rsplit('_', 1)[0])
+        payouts = {pair: self.payouts.get(pair, self.default_payout) for pair in sorted(pairs)}
+        if isinstance(asset, str):
+            return self.payouts.get(asset, self.default_payout)
+        if isinstance(asset, list):
+            return [self.payouts.get(a, self.default_payout) for a in asset]
+        return payouts
+
+    async def _open(self, asset: str, amount: float, duration: int, direction: str, check_win: bool):
+        await self._delay()
+        now = self._now()
+        self._settle_expired()
+        if amount <= 0 or amount > self._balance:
+            raise ValueError(f"Monto inválido o balance insuficiente: {amount}")
+
+        trade_id = str(uuid.uuid4())
+        trade = {
+            "id": trade_id,
+            "asset": asset,
+            "amount": float(amount),
+            "direction": direction,
+            "command": 0 if direction == "call" else 1,
+            "openTime": now,
+            "closeTimestamp": now + duration,
+            "duration": duration,
+            "openPrice": self.price_at(asset, now),
+            "percentProfit": self.payouts.get(asset, self.default_payout),
+        }
+        self._balance -= amount
+        self.active_trades[trade_id] = trade
+
+        if check_win:
+            return trade_id, await self.check_win(trade_id)
+        return trade_id, dict(trade)
+
+    async def buy(self, asset, amount, time, check_win=False):
+        return await self._open(asset, amount, time, "call", check_win)
+
+    async def sell(self, asset, amount, time, check_win=False):
+        return await self._open(asset, amount, time, "put", check_win)
+
+    def _settle(self, trade: Dict) -> Dict:
+        close_price = self.price_at(trade['asset'], trade['closeTimestamp'])
+        diff = close_price - trade['openPrice']
+        if trade['direction'] == "put":
+            diff = -diff
+
+        amount = trade['amount']
+        if diff > 0:
+            profit = amount * trade['percentProfit'] / 100
+            self._balance += amount + profit
+            result = "win"
+        elif diff == 0:
+            profit = 0.0
+            self._balance += amount
+            result = "draw"
+        else:
+            profit = -amount
+            result = "loss"
+
+        closed = dict(trade, closePrice=close_price, profit=profit, result=result,
+                      win=max(profit, 0.0))
+        self.closed_trades.append(closed)
+        return closed
+
+    def _settle_expired(self):
+        now = self.clock.now()
+        for trade_id in [tid for tid, t in self.active_trades.items() if t['closeTimestamp'] <= now]:
+            self._settle(self.active_trades.pop(trade_id))
+
+    async def check_win(self, trade_id):
+        trade = self.active_trades.get(trade_id)
+        if trade is None:
+            closed = next((t for t in reversed(self.closed_trades) if t['id'] == trade_id), None)
+            return closed or {"result": "error", "message": "Trade not found"}
+
+        remaining = trade['closeTimestamp'] - self.clock.now()
+        if remaining > 0:
+            await self.clock.sleep(remaining)
+        self.active_trades.pop(trade_id, None)
+        return self._settle(trade)
+
+    async def opened_deals(self):
+        self._settle_expired()
+        return list(self.active_trades.values())
+
+    async def closed_deals(self):
+        self._settle_expired()
+        return list(self.closed_trades)
+
+    async def clear_closed_deals(self):
+        self.closed_trades.clear()
+
+    async def subscribe_symbol(self, asset: str):
+        return ReplaySubscription(self, asset, min(TIMEFRAME_SECONDS.values()))
+
+    async def subscribe_symbol_chuncked(self, asset: str, chunck_size: int):
+        return ReplaySubscription(self, asset, min(TIMEFRAME_SECONDS.values()), chunk_size=chunck_size)
+
+    async def subscribe_symbol_timed(self, asset: str, time: timedelta):
+        return ReplaySubscription(self, asset, int(time.total_seconds()))
+
+    def summary(self) -> Dict:
+        """Resultado del replay: trades, winrate y P&L."""
+        trades = self.closed_trades
+        wins = sum(1 for t in trades if t['result'] == "win")
+        return {
+            'trades': len(trades),
+            'wins': wins,
+            'winrate': wins / len(trades) if trades else 0.0,
+            'pnl': sum(t['profit'] for t in trades),
+            'balance': self._balance,
+            'market_time': self.clock.now(),
+        }
+
+
+def resample(records: np.ndarray, interval: int) -> np.ndarray:
+    """Agrega velas a un intervalo mayor (open primero, close último, high max, low min, volume suma)."""
+    buckets = records['time'] // interval * interval
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(records)] - 1
+
+    out = np.zeros(len(starts), dtype=RECORD_DTYPE)
+    out['time'] = buckets[starts]
+    out['open'] = records['open'][starts]
+    out['close'] = records['close'][ends]
+    out['high'] = np.maximum.reduceat(records['high'], starts)
+    out['low'] = np.minimum.reduceat(records['low'], starts)
+    out['volume'] = np.add.reduceat(records['volume'], starts)
+    return out
+
+
+def install(**replay_kwargs) -> ReplayClock:
+    """
+    Registra el simulador como BinaryOptionsToolsV2.pocketoption.
+
+    Todas las instancias creadas por los bots comparten el mismo reloj.
+
+    Returns:
+        El ReplayClock compartido (usar clock.patch() al correr los bots)
+    """
+    probe = ReplayPocketOptionAsync(**replay_kwargs)
+    clock = probe.clock
+    instances = []
+
+    class PocketOptionAsync(ReplayPocketOptionAsync):
+        def __init__(self, ssid: str = "replay", **kwargs):
+            super().__init__(ssid=ssid, **dict(replay_kwargs, clock=clock, start=probe.start, end=probe.end))
+            instances.append(self)
+
+    package = types.ModuleType("BinaryOptionsToolsV2")
+    module = types.ModuleType("BinaryOptionsToolsV2.pocketoption")
+    module.PocketOptionAsync = PocketOptionAsync
+    package.pocketoption = module
+    sys.modules["BinaryOptionsToolsV2"] = package
+    sys.modules["BinaryOptionsToolsV2.pocketoption"] = module
+    clock.instances = instances
+    return clock
+
+
+def run_script(script: str, **replay_kwargs) -> List[Dict]:
+    """
+    Corre un script de bot (main.py, bots/...) contra el replay hasta agotar la historia.
+
+    Returns:
+        summary() de cada instancia de API creada por el script
+    """
+    import runpy
+
+    os.environ.setdefault("POCKETOPTION_SSID", "replay")
+    clock = install(**replay_kwargs)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+    with clock.patch():
+        try:
+            runpy.run_path(script, run_name="__main__")
+        except ReplayFinished as e:
+            print(f"\n🏁 {e}")
+        except SystemExit:
+            pass
+    return [api.summary() for api in clock.instances]
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Soak test de un bot contra velas históricas')
+    parser.add_argument('script', help='Script a correr (main.py, bots/bot_ema_pullback.py, ...)')
+    parser.add_argument('--history', default=HISTORY_DIR)
+    parser.add_argument('--speed', type=float, default=DEFAULT_SPEED, help='x tiempo real')
+    parser.add_argument('--virtual', action='store_true', help='Tiempo virtual (sin esperas)')
+    parser.add_argument('--start', type=int, help='Epoch inicial')
+    parser.add_argument('--end', type=int, help='Epoch final')
+    parser.add_argument('--balance', type=float, default=1000.0)
+    parser.add_argument('--latency', type=float, default=0.0, help='Segundos de mercado por request')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"⏪ REPLAY: {args.script} ({'virtual' if args.virtual else f'x{args.speed:g}'})")
+    print("=" * 60)
+
+    summaries = run_script(
+        args.script,
+        history_dir=args.history,
+        speed=None if args.virtual else args.speed,
+        start=args.start,
+        end=args.end,
+        balance=args.balance,
+        latency=args.latency,
+    )
+    for i, s in enumerate(summaries):
+        print(f"API #{i}: {s['trades']} trades | winrate {s['winrate']:.1%} | "
+              f"P&L ${s['pnl']:.2f} | balance ${s['balance']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,9 @@
 Risk management module with strict validation and circuit breakers.
 Prevents catastrophic losses through enforced limits and drawdown protection.
 """
-from typing import Tuple, Optional
-from bot_state import BotState
+import asyncio
+from typing import List, Tuple, Optional
+from bot_state import BotState, StateSnapshot
 
 
 class RiskManager:
@@ -17,7 +18,8 @@ class RiskManager:
         max_drawdown: float = 0.10,
         streak_limit: int = 2,
         max_risk_per_trade: float = 0.05,
-        demo_mode: bool = True
+        demo_mode: bool = True,
+        max_total_exposure: float = 0.10
     ):
         """
         Initialize risk manager with strict limits.
@@ -30,6 +32,7 @@ class RiskManager:
             streak_limit: Pause after N consecutive losses
             max_risk_per_trade: Absolute maximum risk per trade
             demo_mode: If True, risk checks log warnings but don't block trades
+            max_total_exposure: Max fraction of balance in open (unsettled) orders at once
         """
         # CRITICAL SAFETY CHECK
         if not demo_mode and max_drawdown > 0.20:
@@ -55,6 +58,12 @@ class RiskManager:
         self.max_drawdown = max_drawdown
         self.streak_limit = streak_limit
         self.max_risk_per_trade = max_risk_per_trade
+        self.max_total_exposure = max_total_exposure
+        
+        # Exposición de órdenes abiertas (reservada antes de enviar, liberada al liquidar)
+        self._exposure_lock = asyncio.Lock()
+        self._open_exposure = 0.0
+        self._pending_orders = 0  # Reservadas pero sin ack (aún no cuentan en bot_state)
         
         self._circuit_breaker_active = False
         self._consecutive_errors = 0
@@ -85,6 +94,11 @@ class RiskManager:
             - If can_trade is True, reason contains the trade amount
             - If can_trade is False, reason contains the blocking reason
         """
+        # Una sola lectura del estado (un lock) para todos los chequeos
+        return self._evaluate(balance, await bot_state.snapshot())
+    
+    def _evaluate(self, balance: float, state: StateSnapshot) -> Tuple[bool, str]:
+        """can_trade() on an already taken snapshot."""
         # 1. Check circuit breaker
         if self._circuit_breaker_active:
             return False, "🚨 Circuit breaker activo - bot pausado por errores críticos"
@@ -101,22 +115,21 @@ class RiskManager:
         ###########################################################################
         
         # 3. Check daily loss limit
-        daily_stats = await bot_state.get_daily_stats()
         if not self.demo_mode:
-            if daily_stats['losses'] >= self.max_daily_losses:
+            if state.daily_losses >= self.max_daily_losses:
                 return False, f"🛑 Límite de pérdidas diarias alcanzado ({self.max_daily_losses})"
-        elif daily_stats['losses'] >= self.max_daily_losses:
+        elif state.daily_losses >= self.max_daily_losses:
             print("⚠️ [DEMO MODE] Límite de pérdidas diarias ignorado para farming")
 
         # 4. Check daily trade limit
         if not self.demo_mode:
-            if daily_stats['trades'] >= self.max_daily_trades:
+            if state.daily_trades >= self.max_daily_trades:
                 return False, f"📊 Límite de trades diarios alcanzado ({self.max_daily_trades})"
-        elif daily_stats['trades'] >= self.max_daily_trades:
+        elif state.daily_trades >= self.max_daily_trades:
             print("⚠️ [DEMO MODE] Límite de trades diarios ignorado para farming")
 
         # 5. Check losing streak
-        streak = await bot_state.get_streak_losses()
+        streak = state.streak_losses
         if not self.demo_mode:
             if streak >= self.streak_limit:
                 return False, f"⚠️ Racha de {streak} pérdidas - pausa de seguridad"
@@ -124,9 +137,9 @@ class RiskManager:
             print(f"⚠️ [DEMO MODE] Racha de {streak} pérdidas ignorada para farming")
 
         # 6. Check drawdown
-        initial_balance = await bot_state.get_initial_balance()
-        if initial_balance is not None:
-            drawdown = await bot_state.calculate_drawdown(balance)
+        initial_balance = state.initial_balance
+        if initial_balance:
+            drawdown = (initial_balance - balance) / initial_balance
             if not self.demo_mode:
                 if drawdown >= self.max_drawdown:
                     self._circuit_breaker_active = True
@@ -150,6 +163,79 @@ class RiskManager:
         
         return True, f"${amount:.2f}"
     
+    async def reserve_exposure(
+        self,
+        balance: float,
+        bot_state: BotState,
+        amounts: List[float]
+    ) -> Tuple[List[bool], str]:
+        """
+        Atomically approve a batch of orders against the aggregate limits.
+        
+        Runs the can_trade() checks once, then accepts orders in the given
+        (priority) order while open + batch exposure stays within
+        max_total_exposure * balance and the daily trade limit holds.
+        Accepted amounts stay reserved until release_exposure().
+        
+        Args:
+            balance: Current account balance
+            bot_state: Bot state instance
+            amounts: Stake of each order in the batch
+        
+        Returns:
+            (accepted flag per order, reason for the first rejection or "")
+        """
+        async with self._exposure_lock:
+            state = await bot_state.snapshot()
+            allowed, reason = self._evaluate(balance, state)
+            if not allowed:
+                return [False] * len(amounts), reason
+            
+            limit = balance * self.max_total_exposure
+            trades_left = self.max_daily_trades - state.daily_trades - self._pending_orders
+            exposure = self._open_exposure
+            accepted, first_reason = [], ""
+            for amount in amounts:
+                over_exposure = exposure + amount > limit
+                over_trades = trades_left <= 0
+                if (over_exposure or over_trades) and not self.demo_mode:
+                    accepted.append(False)
+                    first_reason = first_reason or (
+                        f"📊 Límite de trades diarios alcanzado ({self.max_daily_trades})" if over_trades else
+                        f"💼 Exposición ${exposure + amount:.2f} > máx ${limit:.2f} "
+                        f"({self.max_total_exposure*100:.0f}% del balance)"
+                    )
+                    continue
+                if over_exposure:
+                    print(f"⚠️ [DEMO MODE] Exposición ${exposure + amount:.2f} > ${limit:.2f} ignorada para farming")
+                accepted.append(True)
+                exposure += amount
+                trades_left -= 1
+            
+            self._open_exposure = exposure
+            self._pending_orders += sum(accepted)
+            return accepted, first_reason
+    
+    def order_acked(self):
+        """A reserved order was acknowledged (bot_state now counts it as a daily trade)."""
+        self._pending_orders = max(0, self._pending_orders - 1)
+    
+    def release_exposure(self, amount: float, failed: bool = False):
+        """
+        Free a reservation when the order settles (or never reached the broker).
+        
+        Args:
+            amount: Reserved stake
+            failed: True if the order was never acknowledged
+        """
+        self._open_exposure = max(0.0, self._open_exposure - amount)
+        if failed:
+            self.order_acked()
+    
+    @property
+    def open_exposure(self) -> float:
+        return self._open_exposure
+    
     def record_error(self):
         """Record a consecutive error. Activates circuit breaker if threshold reached."""
         self._consecutive_errors += 1
@@ -174,11 +260,14 @@ class RiskManager:
         return {
             'circuit_breaker': self._circuit_breaker_active,
             'consecutive_errors': self._consecutive_errors,
+            'open_exposure': round(self._open_exposure, 2),
+            'pending_orders': self._pending_orders,
             'limits': {
                 'max_daily_losses': self.max_daily_losses,
                 'max_daily_trades': self.max_daily_trades,
                 'risk_per_trade': f"{self.risk_per_trade*100:.1f}%",
                 'max_drawdown': f"{self.max_drawdown*100:.1f}%",
+                'max_total_exposure': f"{self.max_total_exposure*100:.1f}%",
                 'streak_limit': self.streak_limit
             }
         }
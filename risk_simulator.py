@@ -0,0 +1,354 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Monte Carlo de riesgo para la configuración de RiskManager
+Remuestrea las secuencias de win/loss reales de logs/trades (block bootstrap
+por día o por hora del día) y les aplica exactamente la política de
+RiskManager + BotState, vectorizada en NumPy sobre muchos caminos a la vez:
+
+- orden de chequeos de RiskManager._evaluate(): circuit breaker, balance
+  < $1, pérdidas diarias, trades diarios, racha, drawdown desde el balance
+  inicial (activa el breaker, permanente) y monto > balance
+- monto = calculate_position_size() (risk_per_trade, tope max_risk_per_trade,
+  mínimo $1, redondeo a centavos)
+- contadores diarios que se reinician cada día UTC; la racha solo se corta
+  con una ganancia (sin reinicio del bot queda pausado para siempre)
+
+Solo importan las primeras max_daily_trades señales de cada día (las
+siguientes las bloquea el límite diario antes del chequeo de drawdown),
+así cada día simulado es un bloque de T columnas y el costo no depende de
+cuántas señales tuvo el día histórico.
+
+Reporta por configuración: probabilidad de ruina, de stop-loss global y de
+pausa por racha, distribución del drawdown máximo y crecimiento esperado.
+
+Uso:
+    python risk_simulator.py --paths 1000000 --days 30
+    python risk_simulator.py --risk-per-trade 0.01 0.02 0.03 --streak-limit 2 3 5 --block hour
+"""
+
+import glob
+import inspect
+import itertools
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from payout_cache import DEFAULT_PAYOUT
+from risk_manager import RiskManager
+
+TRADES_DIR = "logs/trades"
+DAYS = 30
+PATHS = 100_000
+CHUNK_SIZE = 50_000        # Caminos por bloque vectorizado (memoria ~ chunk * days * T)
+INITIAL_BALANCE = 100.0
+RUIN_THRESHOLD = 0.5       # Ruina: el balance toca (1 - 0.5) = 50% del inicial
+BLOCKS = ('day', 'hour')
+
+# Parámetros de RiskManager que afectan la política (defaults de su firma)
+POLICY_KEYS = ('max_daily_losses', 'max_daily_trades', 'risk_per_trade', 'max_drawdown',
+               'streak_limit', 'max_risk_per_trade', 'demo_mode')
+_DEFAULTS = {name: p.default for name, p in inspect.signature(RiskManager.__init__).parameters.items()
+             if name in POLICY_KEYS}
+
+
+def policy(**overrides) -> Dict:
+    """Configuración completa: los defaults de RiskManager más los valores dados."""
+    unknown = set(overrides) - set(POLICY_KEYS)
+    if unknown:
+        raise ValueError(f"Parámetros desconocidos: {sorted(unknown)}")
+    return {**_DEFAULTS, **overrides}
+
+
+def load_outcomes(trades_dir: str = TRADES_DIR) -> pd.DataFrame:
+    """
+    Trades cerrados (WIN/LOSS) de los CSV del trade logger.
+
+    Returns:
+        DataFrame time (UTC), win (bool), payout (ratio que paga un win)
+    """
+    paths = sorted(glob.glob(os.path.join(trades_dir, "trades_*.csv")))
+    frames = [pd.read_csv(path, usecols=['timestamp', 'result', 'profit_loss']) for path in paths]
+    if not frames:
+        return pd.DataFrame(columns=['time', 'win', 'payout'])
+    df = pd.concat(frames, ignore_index=True)
+    df = df[df['result'].isin(['WIN', 'LOSS'])]
+    profit = pd.to_numeric(df['profit_loss'], errors='coerce')
+    # profit_loss viene en stakes (0.92); montos en dólares o vacíos -> payout por defecto
+    payout = profit.where((profit > 0) & (profit <= 1), DEFAULT_PAYOUT)
+    out = pd.DataFrame({'time': pd.to_datetime(df['timestamp'], utc=True),
+                        'win': (df['result'] == 'WIN').to_numpy(),
+                        'payout': payout.to_numpy(dtype=np.float64)})
+    return out.dropna(subset=['time']).sort_values('time', kind='stable').reset_index(drop=True)
+
+
+def build_blocks(outcomes: pd.DataFrame, cap: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Tensores (días, 24 horas, M) con los trades de cada hora en orden.
+
+    Args:
+        outcomes: load_outcomes()
+        cap: Trades por hora que se guardan (más de T por día nunca se usan)
+
+    Returns:
+        (wins int8: +1 win / -1 loss / 0 vacío, payouts float32)
+    """
+    days = outcomes['time'].dt.floor('D')
+    day_idx = pd.factorize(days, sort=True)[0]
+    hour = outcomes['time'].dt.hour.to_numpy()
+    slot = outcomes.groupby([day_idx, hour]).cumcount().to_numpy()
+    keep = slot < cap
+    width = min(cap, int(slot.max()) + 1)
+
+    wins = np.zeros((int(day_idx.max()) + 1, 24, width), dtype=np.int8)
+    payouts = np.zeros(wins.shape, dtype=np.float32)
+    wins[day_idx[keep], hour[keep], slot[keep]] = np.where(outcomes['win'].to_numpy()[keep], 1, -1)
+    payouts[day_idx[keep], hour[keep], slot[keep]] = outcomes['payout'].to_numpy()[keep]
+    return wins, payouts
+
+
+def compact(wins: np.ndarray, payouts: np.ndarray, width: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Las primeras `width` señales de cada fila (última dimensión), corridas al inicio."""
+    valid = wins != 0
+    pos = np.cumsum(valid, axis=-1) - 1
+    keep = valid & (pos < width)
+    out_w = np.zeros(wins.shape[:-1] + (width,), dtype=np.int8)
+    out_p = np.zeros(out_w.shape, dtype=np.float32)
+    index = np.nonzero(keep)[:-1] + (pos[keep],)
+    out_w[index] = wins[keep]
+    out_p[index] = payouts[keep]
+    return out_w, out_p
+
+
+def sample_days(blocks: Tuple[np.ndarray, np.ndarray], paths: int, days: int, width: int,
+                block: str, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Block bootstrap: caminos x días x `width` señales.
+
+    block='day': cada día simulado es un día histórico completo (mantiene la
+    dependencia dentro del día). block='hour': cada hora del día se toma de un
+    día histórico distinto a la misma hora (mantiene la estacionalidad
+    intradía y la dependencia dentro de la hora).
+    """
+    wins, payouts = blocks
+    if block not in BLOCKS:
+        raise ValueError(f"block debe ser uno de {BLOCKS}, no {block!r}")
+    if block == 'day':
+        per_day = compact(wins.reshape(len(wins), -1), payouts.reshape(len(wins), -1), width)
+        idx = rng.integers(len(wins), size=(paths, days))
+        return per_day[0][idx], per_day[1][idx]
+
+    out_w = np.empty((paths, days, width), dtype=np.int8)
+    out_p = np.empty((paths, days, width), dtype=np.float32)
+    hours = np.arange(24)
+    for d in range(days):
+        idx = rng.integers(len(wins), size=(paths, 24))
+        out_w[:, d], out_p[:, d] = compact(wins[idx, hours].reshape(paths, -1),
+                                           payouts[idx, hours].reshape(paths, -1), width)
+    return out_w, out_p
+
+
+def apply_policy(wins: np.ndarray, payouts: np.ndarray, config: Dict,
+                 initial_balance: float = INITIAL_BALANCE, restart_daily: bool = False) -> Dict[str, np.ndarray]:
+    """
+    Política de RiskManager sobre caminos ya muestreados.
+
+    Args:
+        wins: (paths, days, T) +1 win / -1 loss / 0 sin señal, en orden
+        payouts: (paths, days, T) ratio pagado por cada win
+        config: policy()
+        initial_balance: Balance inicial (referencia del drawdown, como set_initial_balance)
+        restart_daily: El bot se reinicia cada día (BotState y el breaker son en memoria:
+            racha, breaker y balance inicial vuelven a cero)
+
+    Returns:
+        Arrays por camino: final, max_drawdown (desde el pico), min_balance,
+        breaker, streak_halt, trades
+    """
+    n, days, width = wins.shape
+    balance = np.full(n, float(initial_balance))
+    initial = balance.copy()
+    peak = balance.copy()
+    min_balance = balance.copy()
+    max_dd = np.zeros(n)
+    breaker = np.zeros(n, dtype=bool)
+    streak = np.zeros(n, dtype=np.int64)
+    trades = np.zeros(n, dtype=np.int64)
+    demo = bool(config['demo_mode'])
+
+    for d in range(days):
+        daily_trades = np.zeros(n, dtype=np.int64)
+        daily_losses = np.zeros(n, dtype=np.int64)
+        if restart_daily:
+            streak[:] = 0
+            breaker[:] = False
+            initial[:] = balance
+        for t in range(width):
+            outcome = wins[:, d, t]
+            ok = (outcome != 0) & ~breaker & (balance >= 1.0)
+            if not demo:
+                ok &= (daily_losses < config['max_daily_losses']) & (daily_trades < config['max_daily_trades'])
+                ok &= streak < config['streak_limit']
+                trip = ok & ((initial - balance) / initial >= config['max_drawdown'])
+                breaker |= trip
+                ok &= ~trip
+
+            if not ok.any():
+                continue  # nadie opera en esta columna (días cortos, caminos pausados)
+
+            amount = np.maximum(np.minimum(balance * config['risk_per_trade'],
+                                           balance * config['max_risk_per_trade']), 1.0)
+            ok &= amount <= balance
+            stake = np.round(amount, 2)
+
+            won = ok & (outcome > 0)
+            lost = ok & (outcome < 0)
+            balance = balance + np.where(won, stake * payouts[:, d, t], 0.0) - np.where(lost, stake, 0.0)
+            daily_trades += ok
+            daily_losses += lost
+            streak = np.where(won, 0, streak + lost)
+            trades += ok
+
+            np.maximum(peak, balance, out=peak)
+            np.minimum(min_balance, balance, out=min_balance)
+            np.maximum(max_dd, (peak - balance) / peak, out=max_dd)
+
+    return {'final': balance, 'max_drawdown': max_dd, 'min_balance': min_balance, 'breaker': breaker,
+            'streak_halt': ~breaker & (streak >= config['streak_limit']) & (not demo), 'trades': trades}
+
+
+def summarize(paths: Dict[str, np.ndarray], days: int, initial_balance: float = INITIAL_BALANCE,
+              ruin_threshold: float = RUIN_THRESHOLD) -> Dict[str, float]:
+    """Ruina, drawdown y crecimiento de un conjunto de caminos."""
+    growth = paths['final'] / initial_balance
+    dd = paths['max_drawdown']
+    return {
+        'ruin_prob': float(np.mean(paths['min_balance'] <= initial_balance * (1 - ruin_threshold))),
+        'breaker_prob': float(np.mean(paths['breaker'])),
+        'streak_halt_prob': float(np.mean(paths['streak_halt'])),
+        'dd_mean': float(dd.mean()),
+        'dd_p50': float(np.percentile(dd, 50)),
+        'dd_p95': float(np.percentile(dd, 95)),
+        'dd_p99': float(np.percentile(dd, 99)),
+        'growth_mean': float(growth.mean() - 1),
+        'growth_median': float(np.median(growth) - 1),
+        'log_growth_per_day': float(np.mean(np.log(np.maximum(growth, 1e-12))) / days),
+        'profit_prob': float(np.mean(growth > 1)),
+        'trades_per_day': float(paths['trades'].mean() / days),
+    }
+
+
+def simulate(outcomes: pd.DataFrame, configs: Sequence[Dict], paths: int = PATHS, days: int = DAYS,
+             block: str = 'day', initial_balance: float = INITIAL_BALANCE, restart_daily: bool = False,
+             ruin_threshold: float = RUIN_THRESHOLD, chunk_size: int = CHUNK_SIZE,
+             seed: Optional[int] = None) -> pd.DataFrame:
+    """
+    Monte Carlo de cada configuración sobre los mismos caminos remuestreados.
+
+    Todas las configuraciones ven exactamente las mismas secuencias (números
+    aleatorios comunes), así las diferencias son de la política y no del azar.
+
+    Args:
+        outcomes: load_outcomes()
+        configs: Lista de policy()
+        paths: Caminos simulados (se procesan en bloques de chunk_size)
+        days: Horizonte en días
+        block: 'day' o 'hour' (ver sample_days)
+        initial_balance: Balance inicial
+        restart_daily: Ver apply_policy
+        ruin_threshold: Fracción del balance inicial perdida que cuenta como ruina
+        chunk_size: Caminos por bloque vectorizado
+        seed: Semilla del generador
+
+    Returns:
+        DataFrame con una fila por configuración (parámetros + summarize())
+    """
+    configs = [policy(**c) for c in configs]
+    if outcomes.empty:
+        raise ValueError("Sin trades cerrados para remuestrear")
+    width = max(int(c['max_daily_trades']) for c in configs)
+    blocks = build_blocks(outcomes, width)
+    rng = np.random.default_rng(seed)
+
+    results: List[List[Dict[str, np.ndarray]]] = [[] for _ in configs]
+    done = 0
+    while done < paths:
+        n = min(chunk_size, paths - done)
+        wins, payouts = sample_days(blocks, n, days, width, block, rng)
+        for k, config in enumerate(configs):
+            results[k].append(apply_policy(wins, payouts, config, initial_balance, restart_daily))
+        done += n
+
+    rows = []
+    for config, chunks in zip(configs, results):
+        merged = {key: np.concatenate([c[key] for c in chunks]) for key in chunks[0]}
+        rows.append({**config, **summarize(merged, days, initial_balance, ruin_threshold)})
+    return pd.DataFrame(rows)
+
+
+def main():
+    import argparse
+    import time
+
+    from config_loader import load_config
+
+    parser = argparse.ArgumentParser(description='Monte Carlo de la configuración de RiskManager')
+    parser.add_argument('--trades-dir', default=TRADES_DIR)
+    parser.add_argument('--paths', type=int, default=PATHS)
+    parser.add_argument('--days', type=int, default=DAYS)
+    parser.add_argument('--block', default='day', choices=BLOCKS)
+    parser.add_argument('--balance', type=float, default=INITIAL_BALANCE)
+    parser.add_argument('--ruin', type=float, default=RUIN_THRESHOLD, help='Fracción perdida que cuenta como ruina')
+    parser.add_argument('--restart-daily', action='store_true', help='El bot se reinicia cada día')
+    parser.add_argument('--seed', type=int)
+    # Grilla: cada lista reemplaza el valor de config.yaml
+    for key in POLICY_KEYS:
+        if key != 'demo_mode':
+            parser.add_argument(f"--{key.replace('_', '-')}", type=float, nargs='+')
+    parser.add_argument('--out', help='CSV con los resultados')
+    args = parser.parse_args()
+
+    risk = load_config()['risk']
+    base = {k: risk[k] for k in POLICY_KEYS if k in risk}
+    base['demo_mode'] = False  # demo_mode no bloquea nada: se simula la política real
+    grid = {k: getattr(args, k) or [base.get(k, _DEFAULTS[k])] for k in POLICY_KEYS if k != 'demo_mode'}
+    configs = [{**base, **dict(zip(grid, values))} for values in itertools.product(*grid.values())]
+    for config in configs:
+        for key in ('max_daily_losses', 'max_daily_trades', 'streak_limit'):
+            config[key] = int(config[key])
+
+    print("=" * 60)
+    print(f"🎲 MONTE CARLO DE RIESGO | {args.paths:,} caminos x {args.days} días | bloques por {args.block}"
+          f"{' | reinicio diario' if args.restart_daily else ''}")
+    print("=" * 60)
+
+    outcomes = load_outcomes(args.trades_dir)
+    days_hist = outcomes['time'].dt.floor('D').nunique() if len(outcomes) else 0
+    print(f"📁 {len(outcomes)} trades en {days_hist} días | winrate {outcomes['win'].mean():.1%} | "
+          f"{len(configs)} configuraciones")
+
+    t0 = time.perf_counter()
+    table = simulate(outcomes, configs, args.paths, args.days, args.block, args.balance,
+                     args.restart_daily, args.ruin, seed=args.seed)
+    elapsed = time.perf_counter() - t0
+
+    for _, row in table.iterrows():
+        print(f"risk {row['risk_per_trade']:.1%} dd {row['max_drawdown']:.0%} streak {row['streak_limit']} "
+              f"loss/día {row['max_daily_losses']} trades/día {row['max_daily_trades']}")
+        print(f"   💀 ruina {row['ruin_prob']:.2%} | 🚨 stop-loss {row['breaker_prob']:.1%} | "
+              f"⏸️ racha {row['streak_halt_prob']:.1%}")
+        print(f"   📉 DD p50 {row['dd_p50']:.1%} p95 {row['dd_p95']:.1%} p99 {row['dd_p99']:.1%} | "
+              f"📈 crecimiento medio {row['growth_mean']:+.1%} mediana {row['growth_median']:+.1%} "
+              f"({row['trades_per_day']:.1f} trades/día)")
+    print("-" * 60)
+    print(f"⏱️ {args.paths * len(configs):,} caminos en {elapsed:.1f}s")
+
+    if args.out:
+        table.to_csv(args.out, index=False)
+        print(f"💾 Resultados guardados en {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmarks de los hot paths (pytest-benchmark)
+Corre tests/benchmarks/bench_*.py y compara contra el último baseline JSON
+guardado en tests/benchmarks/baselines/<máquina>/ (generarlo en la misma
+máquina donde corre el bot: los tiempos no se comparan entre máquinas).
+
+Uso:
+    python run_benchmarks.py --save            # guarda un baseline nuevo
+    python run_benchmarks.py                   # compara; falla si la mediana empeora >25%
+    python run_benchmarks.py --fail-over 10 -k detector
+"""
+
+import glob
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BENCH_DIR = os.path.join(ROOT, "tests", "benchmarks")
+BASELINE_DIR = os.path.join(BENCH_DIR, "baselines")
+FAIL_OVER_PCT = 25
+
+
+def has_baseline() -> bool:
+    return bool(glob.glob(os.path.join(BASELINE_DIR, "*", "*.json")))
+
+
+def build_args(save: bool = False, name: str = "baseline", fail_over: float = FAIL_OVER_PCT,
+               extra=None) -> list:
+    """Argumentos de pytest para correr (y guardar o comparar) los benchmarks."""
+    args = sorted(glob.glob(os.path.join(BENCH_DIR, "bench_*.py")))
+    args += [
+        "-q",
+        f"--benchmark-storage=file://{BASELINE_DIR}",
+        "--benchmark-columns=min,mean,median,stddev,rounds",
+        "--benchmark-sort=name",
+    ]
+    if save:
+        args.append(f"--benchmark-save={name}")
+    elif has_baseline():
+        args += ["--benchmark-compare", f"--benchmark-compare-fail=median:{fail_over}%"]
+    return args + list(extra or [])
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmarks de los hot paths del bot')
+    parser.add_argument('--save', action='store_true', help='Guardar resultados como nuevo baseline')
+    parser.add_argument('--name', default='baseline', help='Nombre del baseline guardado')
+    parser.add_argument('--fail-over', type=float, default=FAIL_OVER_PCT,
+                        help='%% de regresión en la mediana que hace fallar la comparación')
+    args, extra = parser.parse_known_args()
+
+    if not args.save and not has_baseline():
+        print(f"⚠️ Sin baseline en {BASELINE_DIR}: corré primero con --save")
+
+    sys.exit(pytest.main(build_args(args.save, args.name, args.fail_over, extra)))
+
+
+if __name__ == "__main__":
+    main()
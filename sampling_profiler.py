@@ -0,0 +1,242 @@
+"""
+Sampling Profiler
+Runtime-toggleable stack sampler for a running bot (no restart, no
+dependencies).
+
+While active, a daemon thread samples sys._current_frames() every few
+milliseconds: the asyncio loop thread, the TelegramListener poller, the
+MLModelManager workers, etc. Suspended asyncio tasks are sampled too (where
+each coroutine is awaiting), so time spent waiting on the broker shows up
+next to CPU time.
+
+The result is a collapsed-stack file (one "frame;frame;frame count" line
+per stack) that flamegraph.pl, speedscope or inferno read directly:
+
+    logs/profiles/profile_<bot>_<YYYYmmdd_HHMMSS>.collapsed
+
+Triggers:
+    kill -USR1 <pid>            (install_signal_handler())
+    /profile [seconds]          (Telegram, admin chat only)
+"""
+import asyncio
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Optional
+
+PROFILES_DIR = os.path.join("logs", "profiles")
+DEFAULT_DURATION = 30
+DEFAULT_INTERVAL = 0.005
+MAX_DURATION = 600
+THREAD_NAME = "sampling-profiler"
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def _thread_stack(frame) -> list:
+    """Frames of a thread, root first."""
+    stack = []
+    while frame is not None:
+        stack.append(_frame_label(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def _coroutine_stack(coro) -> list:
+    """Await chain of a suspended coroutine, outermost first."""
+    stack = []
+    while coro is not None:
+        frame = getattr(coro, 'cr_frame', None) or getattr(coro, 'gi_frame', None)
+        if frame is None:
+            break
+        stack.append(_frame_label(frame))
+        coro = getattr(coro, 'cr_await', None) or getattr(coro, 'gi_yieldfrom', None)
+    return stack
+
+
+class SamplingProfiler:
+    """
+    Stack sampler that can be started and stopped at runtime.
+
+    Args:
+        output_dir: Directory for the .collapsed files
+        interval: Seconds between samples
+        name: Label used in the file name (bot name)
+    """
+
+    def __init__(self, output_dir: str = PROFILES_DIR, interval: float = DEFAULT_INTERVAL,
+                 name: str = "bot"):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.name = name
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.last_path: Optional[str] = None
+        self.last_samples = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def attach_loop(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Also sample suspended tasks of this event loop (call from inside the loop)."""
+        self.loop = loop or asyncio.get_running_loop()
+
+    @staticmethod
+    def capture_duration(duration: float) -> float:
+        """
+        Seconds a capture of `duration` actually samples (capped at MAX_DURATION).
+
+        Raises:
+            ValueError: duration <= 0 (or NaN)
+        """
+        duration = float(duration)
+        if not duration > 0:
+            raise ValueError(f"La duración debe ser > 0, no {duration:g}")
+        return min(duration, MAX_DURATION)
+
+    def start(self, duration: float = DEFAULT_DURATION,
+              on_done: Optional[Callable[[Optional[str], Counter], None]] = None) -> bool:
+        """
+        Sample for `duration` seconds in the background.
+
+        Args:
+            duration: Seconds to sample (capped at MAX_DURATION)
+            on_done: Called from the profiler thread with (path, stacks) when finished
+
+        Returns:
+            False if a capture is already running
+
+        Raises:
+            ValueError: duration <= 0
+        """
+        duration = self.capture_duration(duration)
+        with self._lock:
+            if self.running:
+                return False
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(duration, on_done),
+                name=THREAD_NAME, daemon=True
+            )
+            self._thread.start()
+        print(f"🔬 Profiler: capturando {duration:.0f}s de stacks...")
+        return True
+
+    def stop(self):
+        """Finish the current capture early (the file is still written)."""
+        self._stop.set()
+
+    def join(self, timeout: Optional[float] = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    # ------------------------------------------------------------- sampling
+
+    def sample_once(self, stacks: Counter):
+        """Add one sample of every thread (and suspended loop task) to `stacks`."""
+        own = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            thread = names.get(ident, f"thread-{ident}")
+            stacks[";".join([thread] + _thread_stack(frame))] += 1
+
+        if self.loop is None or self.loop.is_closed():
+            return
+        try:
+            tasks = asyncio.all_tasks(self.loop)
+        except RuntimeError:
+            return
+        for task in tasks:
+            if task.done():
+                continue
+            coro = task.get_coro()
+            # The running task already appears in the loop thread's stack
+            if getattr(coro, 'cr_running', False):
+                continue
+            stack = _coroutine_stack(coro)
+            if stack:
+                stacks[";".join([f"task:{task.get_name()}"] + stack)] += 1
+
+    def _run(self, duration: float, on_done):
+        stacks: Counter = Counter()
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline and not self._stop.is_set():
+            try:
+                self.sample_once(stacks)
+            except Exception as e:
+                print(f"⚠️ Profiler: error muestreando: {e}")
+                break
+            self._stop.wait(self.interval)
+
+        path = self.write(stacks)
+        self.last_path = path
+        self.last_samples = sum(stacks.values())
+        print(f"🔬 Profiler: {self.last_samples} muestras → {path}")
+        if on_done is not None:
+            try:
+                on_done(path, stacks)
+            except Exception as e:
+                print(f"⚠️ Profiler: error en callback: {e}")
+
+    def write(self, stacks: Counter) -> Optional[str]:
+        """Write a collapsed-stack file. Returns the path (None if it failed)."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.output_dir, f"profile_{self.name}_{stamp}.collapsed")
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack.replace(' ', '_')} {count}\n")
+        except OSError as e:
+            print(f"⚠️ Profiler: no se pudo escribir {path}: {e}")
+            return None
+        return path
+
+    # ------------------------------------------------------------- triggers
+
+    def install_signal_handler(self, signum: Optional[int] = None,
+                               duration: float = DEFAULT_DURATION) -> bool:
+        """
+        Start a capture on `kill -USR1 <pid>` (main thread only, POSIX only).
+
+        Returns:
+            True if the handler was installed
+        """
+        signum = signum if signum is not None else getattr(signal, 'SIGUSR1', None)
+        if signum is None or threading.current_thread() is not threading.main_thread():
+            return False
+        signal.signal(signum, lambda *_: self.start(duration))
+        return True
+
+
+def top_functions(stacks: Counter, n: int = 5) -> list:
+    """
+    Leaf frames with the most samples.
+
+    Returns:
+        [(frame label, share 0-1), ...]
+    """
+    total = sum(stacks.values())
+    if not total:
+        return []
+    leaves: Counter = Counter()
+    for stack, count in stacks.items():
+        leaves[stack.rsplit(';', 1)[-1]] += count
+    return [(label, count / total) for label, count in leaves.most_common(n)]
+
+
+# Global instance
+profiler = SamplingProfiler()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Scan-Cycle Harness
+Mide cuánto tarda un ciclo de escaneo de pares (como el loop de main.py y
+bots/*) con latencia de red inyectada, y cuántas velas se pierden porque el
+ciclo no vuelve a un par antes de que cierre la siguiente vela.
+
+La red corre en tiempo virtual (ReplayClock) y el CPU de las señales se mide
+en tiempo real y se suma, así 200 pares con 30s de timeout se simulan en
+segundos.
+
+Uso:
+    python scan_harness.py --pairs 10 50 200 --profile typical
+    python scan_harness.py --pairs 200 --mode concurrent --concurrency 20
+"""
+
+import asyncio
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from candles import decode_candles
+from feature_store import add_emas
+from mock_pocketoption import (
+    LATENCY_PROFILES, LatencyInjectingPocketOptionAsync, PocketOptionAsync, latency_profile
+)
+from replay_pocketoption import ReplayClock
+
+# Configuración
+INTERVAL = 60           # Velas M1 (el bot EMA escanea M1 y M5)
+LOOKBACK = 100
+CYCLES = 20
+START_TIME = 1_700_000_000
+
+
+def ema_signal(raw) -> bool:
+    """Mismo trabajo de CPU por par que el bot EMA (decodificar velas + 3 EMAs)."""
+    candles = decode_candles(raw)
+    if len(candles) < 60:
+        return False
+    df = add_emas(candles.to_frame())
+    c, p = df['close'].iloc[-1], df['close'].iloc[-2]
+    e8, e21, e55 = df['ema8'].iloc[-1], df['ema21'].iloc[-1], df['ema55'].iloc[-1]
+    return bool((e8 > e21 > e55 and p <= e8 < c) or (e8 < e21 < e55 and p >= e8 > c))
+
+
+class ScanHarness:
+    """
+    Corre ciclos de escaneo sobre una API con latencia inyectada.
+
+    Args:
+        api: LatencyInjectingPocketOptionAsync
+        clock: ReplayClock virtual que usa la API
+        pairs: Pares a escanear
+        interval: Timeframe de las velas (segundos)
+        mode: 'sequential' (como main.py hoy) o 'concurrent' (gather con semáforo)
+        concurrency: Requests simultáneos en modo concurrent
+    """
+
+    def __init__(self, api, clock: ReplayClock, pairs: List[str], interval: int = INTERVAL,
+                 mode: str = "sequential", concurrency: int = 10):
+        self.api = api
+        self.clock = clock
+        self.pairs = pairs
+        self.interval = interval
+        self.mode = mode
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.cpu_seconds = 0.0
+        self.last_scan: Dict[str, float] = {}
+        self.cycle_times: List[float] = []
+        self.missed_bars = 0
+        self.failures = 0
+        self.session_dead_cycles = 0
+
+    def now(self) -> float:
+        """Tiempo efectivo: red (virtual) + CPU (real)."""
+        return self.clock.now() + self.cpu_seconds
+
+    async def scan_pair(self, pair: str):
+        try:
+            raw = await self.api.get_candles(pair, self.interval, self.interval * LOOKBACK)
+        except (ConnectionError, asyncio.TimeoutError):
+            self.failures += 1
+            return
+
+        t0 = time.perf_counter()
+        ema_signal(raw)
+        self.cpu_seconds += time.perf_counter() - t0
+
+        # Velas que cerraron desde el último escaneo de este par sin ser vistas
+        now = self.now()
+        last = self.last_scan.get(pair)
+        if last is not None:
+            closed = int(now // self.interval) - int(last // self.interval)
+            self.missed_bars += max(0, closed - 1)
+        self.last_scan[pair] = now
+
+    async def _scan_limited(self, pair: str):
+        async with self.semaphore:
+            await self.scan_pair(pair)
+
+    async def cycle(self):
+        start = self.now()
+        balance = await self.api.balance()
+        if balance in (None, -1.0):
+            self.session_dead_cycles += 1
+        elif self.mode == "concurrent":
+            await asyncio.gather(*(self._scan_limited(pair) for pair in self.pairs))
+        else:
+            for pair in self.pairs:
+                await self.scan_pair(pair)
+        self.cycle_times.append(self.now() - start)
+
+    async def run(self, cycles: int = CYCLES) -> Dict:
+        for _ in range(cycles):
+            await self.cycle()
+        return self.report()
+
+    def report(self) -> Dict:
+        times = np.array(self.cycle_times) if self.cycle_times else np.zeros(1)
+        scans = max(1, len(self.cycle_times) * len(self.pairs))
+        return {
+            'pairs': len(self.pairs),
+            'mode': self.mode,
+            'cycles': len(self.cycle_times),
+            'cycle_p50': float(np.percentile(times, 50)),
+            'cycle_p95': float(np.percentile(times, 95)),
+            'cycle_p99': float(np.percentile(times, 99)),
+            'cycle_max': float(times.max()),
+            'missed_bars': self.missed_bars,
+            'missed_per_scan': self.missed_bars / scans,
+            'failures': self.failures,
+            'session_dead_cycles': self.session_dead_cycles,
+            'cpu_seconds': self.cpu_seconds,
+        }
+
+
+async def run_scenario(n_pairs: int, profile: str = "typical", mode: str = "sequential",
+                       cycles: int = CYCLES, concurrency: int = 10, interval: int = INTERVAL,
+                       seed: int = 42, **profile_overrides) -> Dict:
+    """Un escenario completo en tiempo virtual."""
+    clock = ReplayClock(START_TIME, speed=None)
+    with clock.patch():
+        api = LatencyInjectingPocketOptionAsync(
+            PocketOptionAsync(), latency_profile(profile, seed=seed, **profile_overrides)
+        )
+        pairs = [f"PAIR{i:03d}_otc" for i in range(n_pairs)]
+        harness = ScanHarness(api, clock, pairs, interval, mode, concurrency)
+        return await harness.run(cycles)
+
+
+async def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Latencia de ciclo de escaneo con red simulada')
+    parser.add_argument('--pairs', type=int, nargs='*', default=[10, 50, 200])
+    parser.add_argument('--profile', choices=sorted(LATENCY_PROFILES), default='typical')
+    parser.add_argument('--mode', choices=['sequential', 'concurrent', 'both'], default='both')
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--cycles', type=int, default=CYCLES)
+    parser.add_argument('--interval', type=int, default=INTERVAL)
+    args = parser.parse_args()
+
+    modes = ['sequential', 'concurrent'] if args.mode == 'both' else [args.mode]
+
+    print("=" * 80)
+    print(f"⏱️ SCAN-CYCLE HARNESS | perfil: {args.profile} | vela: {args.interval}s")
+    print("=" * 80)
+    print(f"{'Pares':>6} {'Modo':<11} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} "
+          f"{'Perdidas':>9} {'/scan':>7} {'Fallos':>7}")
+
+    for n in args.pairs:
+        for mode in modes:
+            r = await run_scenario(n, args.profile, mode, args.cycles, args.concurrency, args.interval)
+            print(f"{r['pairs']:>6} {r['mode']:<11} {r['cycle_p50']:>7.1f}s {r['cycle_p95']:>7.1f}s "
+                  f"{r['cycle_p99']:>7.1f}s {r['cycle_max']:>7.1f}s {r['missed_bars']:>9} "
+                  f"{r['missed_per_scan']:>7.2f} {r['failures']:>7}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
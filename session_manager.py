@@ -0,0 +1,488 @@
+"""
+Session Manager
+Wraps PocketOptionAsync with proactive session health checks and fast
+reconnects, so an expired SSID costs seconds of downtime instead of a
+60-second sleep loop or a process restart.
+
+- Heartbeat: balance() every HEARTBEAT_INTERVAL seconds; -1, an error or a
+  timeout starts a reconnect before the next scan hits the dead session.
+- Reconnect state machine: CONNECTED -> RECONNECTING (exponential backoff
+  with jitter, new client per attempt) -> CONNECTED, or EXPIRED when the
+  server keeps rejecting the SSID (waits for a new one, still retrying).
+- SSID hot-swap: the .env file is re-read on every attempt and watched by
+  the heartbeat; set_ssid() (Telegram /ssid) swaps it at runtime.
+- Reads (balance, get_candles[_array], history, payout, check_win) wait for the
+  session and are retried transparently after a reconnect. Orders (buy,
+  sell) wait for the session but are never re-sent: a lost ack could
+  otherwise open the trade twice.
+
+The manager exposes the same async methods as the client, so bots use it
+as `api`. Falling back to the mock client requires ALLOW_MOCK_API=1.
+"""
+import asyncio
+import os
+import random
+import time
+from typing import Callable, Optional
+
+from dotenv import dotenv_values
+
+from candles import fetch_candles
+
+HEARTBEAT_INTERVAL = float(os.getenv("SESSION_HEARTBEAT_SECONDS", "30"))
+CALL_TIMEOUT = 30.0
+CONNECT_GRACE = 2.0            # The client needs a moment after construction
+BASE_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+EXPIRED_AFTER = 3              # Rejected attempts with the same SSID before EXPIRED
+WAIT_TIMEOUT = 300.0           # Max seconds a call waits for the session
+MAX_CALL_RETRIES = 2
+
+CONNECTING = "connecting"
+CONNECTED = "connected"
+RECONNECTING = "reconnecting"
+EXPIRED = "expired"
+CLOSED = "closed"
+
+READ_METHODS = ('balance', 'get_candles', 'get_candles_array', 'history', 'payout', 'check_win')
+ORDER_METHODS = ('buy', 'sell')
+# Block until the deal expires (300s+ on M5): no call_timeout, the caller bounds them
+UNBOUNDED_METHODS = ('check_win',)
+# Dead socket/session only: broker rejections ("asset closed", trading hours...) must
+# not trigger a reconnect, so messages are matched as whole phrases, not single words
+_CONNECTION_ERROR_TYPES = ('ConnectionClosed', 'WebSocketException', 'InvalidStatus')  # websockets & co.
+_CONNECTION_HINTS = (
+    'websocket', 'connection closed', 'connection reset', 'connection refused', 'connection lost',
+    'socket closed', 'not connected', 'disconnected', 'session expired', 'ssid expired', 'invalid ssid',
+    'unauthorized', 'not authenticated', 'authentication failed',
+)
+
+
+def mock_allowed() -> bool:
+    return os.getenv("ALLOW_MOCK_API", "0").lower() in ("1", "true", "yes")
+
+
+def default_factory(ssid: str):
+    """Real client; the mock only with ALLOW_MOCK_API=1 (never silently)."""
+    try:
+        from BinaryOptionsToolsV2.pocketoption import PocketOptionAsync
+    except ImportError:
+        if not mock_allowed():
+            raise
+        print("⚠️ BinaryOptionsToolsV2 no instalado → Mock API (ALLOW_MOCK_API=1)")
+        from mock_pocketoption import PocketOptionAsync
+        return PocketOptionAsync()
+    return PocketOptionAsync(ssid=ssid)
+
+
+def is_connection_error(error: BaseException) -> bool:
+    """Errors that mean the session/socket is gone (vs. a bad request like an invalid asset)."""
+    if isinstance(error, (ConnectionError, asyncio.TimeoutError, TimeoutError, OSError)):
+        return True
+    if any(cls.__name__ in _CONNECTION_ERROR_TYPES for cls in type(error).__mro__):
+        return True
+    message = str(error).lower()
+    return any(hint in message for hint in _CONNECTION_HINTS)
+
+
+class SessionLost(ConnectionError):
+    """Raised when a call cannot get a live session in time."""
+
+
+class SessionManager:
+    """
+    Self-healing PocketOptionAsync session.
+
+    Args:
+        ssid: Initial SSID (default POCKETOPTION_SSID)
+        factory: ssid -> client (default: real client, mock only with ALLOW_MOCK_API=1)
+        env_file: .env re-read for a new POCKETOPTION_SSID on every reconnect
+        name: Label for logs
+        on_state_change: Called with (state, message) on every transition (e.g. Telegram alert)
+    """
+
+    def __init__(self, ssid: Optional[str] = None, factory: Callable = default_factory,
+                 env_file: Optional[str] = ".env", name: str = "api",
+                 on_state_change: Optional[Callable[[str, str], None]] = None,
+                 heartbeat_interval: float = HEARTBEAT_INTERVAL, call_timeout: float = CALL_TIMEOUT,
+                 connect_grace: float = CONNECT_GRACE, max_backoff: float = MAX_BACKOFF,
+                 wait_timeout: float = WAIT_TIMEOUT):
+        self.ssid = ssid if ssid is not None else os.getenv("POCKETOPTION_SSID")
+        self.factory = factory
+        self.env_file = env_file
+        self.name = name
+        self._listeners = [on_state_change] if on_state_change is not None else []
+        self.heartbeat_interval = heartbeat_interval
+        self.call_timeout = call_timeout
+        self.connect_grace = connect_grace
+        self.max_backoff = max_backoff
+        self.wait_timeout = wait_timeout
+
+        self.client = None
+        self.state = CONNECTING
+        self.reconnects = 0
+        self.last_ok: Optional[float] = None
+        self.down_since: Optional[float] = None
+        self.last_downtime: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+        self._connected: Optional[asyncio.Event] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._env_mtime = self._env_stat()
+
+    # ------------------------------------------------------------ lifecycle
+
+    def _event(self) -> asyncio.Event:
+        loop = asyncio.get_running_loop()
+        if self._connected is None or self._loop is not loop:
+            if self._loop is not None and self._loop is not loop:
+                # Otro loop (p.ej. un segundo asyncio.run): cliente y tareas del anterior ya no sirven
+                self.client = None
+                self._heartbeat_task = self._reconnect_task = None
+                self.state = CONNECTING
+            self._connected = asyncio.Event()
+            self._loop = loop
+        return self._connected
+
+    async def __aenter__(self) -> "SessionManager":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+        return False
+
+    def add_listener(self, callback: Callable[[str, str], None]):
+        """Extra (state, message) callback, e.g. when a pooled session is shared by several bots."""
+        if callback is not None and callback not in self._listeners:
+            self._listeners.append(callback)
+
+    async def connect(self, timeout: Optional[float] = None) -> bool:
+        """
+        Connect (or wait for the running reconnect) and start the heartbeat.
+
+        Args:
+            timeout: Max seconds to wait (None = until connected)
+        """
+        event = self._event()
+        if not event.is_set():
+            self._ensure_reconnect("inicio")
+        self.start()
+        return await _wait_event(event, timeout)
+
+    def start(self):
+        """Start the heartbeat task (idempotent; call from inside the loop; no-op without heartbeat_interval)."""
+        self._event()
+        if not self.heartbeat_interval:
+            return
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.get_running_loop().create_task(
+                self._heartbeat(), name=f"session-heartbeat-{self.name}")
+
+    async def stop(self):
+        """Cancel heartbeat/reconnect and close the client (a later call reconnects)."""
+        for task in (self._heartbeat_task, self._reconnect_task):
+            if task is not None:
+                task.cancel()
+        self._heartbeat_task = self._reconnect_task = None
+        client, self.client = self.client, None
+        if self._connected is not None:
+            self._connected.clear()
+        await self._close(client)
+        if self.state != CLOSED:
+            self._set_state(CLOSED, "cerrada")
+
+    close = stop
+
+    @property
+    def connected(self) -> bool:
+        return self._connected is not None and self._connected.is_set()
+
+    async def wait_connected(self, timeout: Optional[float] = None):
+        """Block until the session is live (raises SessionLost after `timeout`)."""
+        event = self._event()
+        if not event.is_set():
+            self._ensure_reconnect("esperando sesión")
+        timeout = timeout if timeout is not None else self.wait_timeout
+        if not await _wait_event(event, timeout):
+            raise SessionLost(f"Sin sesión tras {timeout:.0f}s ({self.state})")
+
+    # ---------------------------------------------------------------- calls
+
+    def __getattr__(self, name):
+        if name in READ_METHODS or name in ORDER_METHODS:
+            async def method(*args, **kwargs):
+                return await self.call(name, *args, **kwargs)
+            method.__name__ = name
+            return method
+        if name.startswith('_'):
+            raise AttributeError(name)
+        client = self.__dict__.get('client')
+        if client is None:
+            raise AttributeError(f"{name} (sin cliente conectado todavía)")
+        return getattr(client, name)
+
+    async def call(self, method: str, *args, **kwargs):
+        """
+        Call a client method on a live session.
+
+        Reads are retried after a reconnect; orders are sent once.
+        A call that outlives call_timeout raises asyncio.TimeoutError without
+        touching the session (a slow answer is not a dead socket: the
+        heartbeat decides that); check_win has no call_timeout at all.
+        """
+        retries = MAX_CALL_RETRIES if method in READ_METHODS else 0
+        timeout = None if method in UNBOUNDED_METHODS else self.call_timeout
+        attempt = 0
+        while True:
+            await self.wait_connected()
+            client = self.client
+            if method == 'get_candles_array':
+                # Vía más barata del cliente (replay sin copia, JSON crudo del cliente Rust)
+                pending = fetch_candles(client, *args, **kwargs)
+            else:
+                pending = getattr(client, method)(*args, **kwargs)
+            task = asyncio.ensure_future(pending)
+            try:
+                done, _ = await asyncio.wait({task}, timeout=timeout)
+            except asyncio.CancelledError:  # the caller gave up (e.g. its own wait_for)
+                task.cancel()
+                raise
+            if not done:
+                task.cancel()
+                raise asyncio.TimeoutError(f"{method}: sin respuesta en {timeout:g}s")
+            try:
+                result = task.result()
+            except Exception as e:
+                if not is_connection_error(e):
+                    raise
+                self._session_failed(client, f"{method}: {type(e).__name__} {e}")
+                if attempt >= retries:
+                    raise
+                attempt += 1
+                continue
+            if method == 'balance' and result in (None, -1, -1.0):
+                self._session_failed(client, "balance() = -1 (SSID expirado)")
+                if attempt >= retries:
+                    return result
+                attempt += 1
+                continue
+            self.last_ok = time.time()
+            return result
+
+    # ------------------------------------------------------------ reconnect
+
+    def _set_state(self, state: str, message: str):
+        if state == self.state and state != CONNECTED:
+            return
+        self.state = state
+        print(f"🔌 Sesión {self.name}: {state.upper()} - {message}")
+        for callback in self._listeners:
+            try:
+                callback(state, message)
+            except Exception as e:
+                print(f"⚠️ Error en callback de sesión: {e}")
+
+    def _session_failed(self, client, reason: str):
+        """A call saw a dead session: start reconnecting (once per client)."""
+        if client is None or client is not self.client:
+            return  # Already replaced by a newer connection (or closed)
+        self.last_error = reason
+        if self._connected is not None:
+            self._connected.clear()
+        if self.down_since is None:
+            self.down_since = time.time()
+        self._ensure_reconnect(reason)
+
+    def _ensure_reconnect(self, reason: str):
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.get_running_loop().create_task(
+                self._reconnect(reason), name=f"session-reconnect-{self.name}")
+
+    def _env_stat(self) -> Optional[float]:
+        try:
+            return os.path.getmtime(self.env_file) if self.env_file else None
+        except OSError:
+            return None
+
+    def _env_ssid(self) -> Optional[str]:
+        if not self.env_file or not os.path.exists(self.env_file):
+            return None
+        return dotenv_values(self.env_file).get("POCKETOPTION_SSID") or None
+
+    async def _close(self, client):
+        close = getattr(client, 'close', None)
+        if close is None:
+            return
+        try:
+            result = close()
+            if asyncio.iscoroutine(result):
+                await asyncio.wait_for(result, 5)
+        except Exception:
+            pass
+
+    async def _reconnect(self, reason: str):
+        """New client per attempt until balance() answers; backoff between attempts."""
+        self._set_state(RECONNECTING if self.last_ok else CONNECTING, reason)
+        if self.down_since is None:
+            self.down_since = time.time()
+        attempt = 0
+        rejected = 0
+        while True:
+            env_ssid = self._env_ssid()
+            if env_ssid and env_ssid != self.ssid:
+                print(f"🔑 Sesión {self.name}: SSID nuevo en {self.env_file}")
+                self.ssid = env_ssid
+                rejected = 0
+
+            old, self.client = self.client, None
+            await self._close(old)
+            try:
+                client = self.factory(self.ssid)
+                await asyncio.sleep(self.connect_grace)
+                balance = await asyncio.wait_for(client.balance(), self.call_timeout)
+            except Exception as e:
+                client, balance = None, None
+                self.last_error = f"{type(e).__name__}: {e}"
+            else:
+                if balance in (None, -1, -1.0):
+                    rejected += 1
+                    self.last_error = "balance() = -1 (SSID rechazado)"
+                else:
+                    self.client = client
+                    self._on_connected()
+                    return
+            if client is not None:
+                await self._close(client)
+
+            if rejected >= EXPIRED_AFTER:
+                self._set_state(EXPIRED, "SSID rechazado → actualizá POCKETOPTION_SSID en .env o /ssid")
+            attempt += 1
+            delay = min(self.max_backoff, BASE_BACKOFF * 2 ** min(attempt - 1, 16))
+            await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+
+    def _on_connected(self):
+        now = time.time()
+        if self.last_ok is not None:
+            self.reconnects += 1
+        self.last_downtime = now - self.down_since if self.down_since else 0.0
+        self.down_since = None
+        self.last_ok = now
+        self._env_mtime = self._env_stat()
+        self._connected.set()
+        self._set_state(CONNECTED, f"ok (caída {self.last_downtime:.1f}s)")
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            # .env editado con un SSID distinto: hot-swap sin esperar a que muera la sesión
+            mtime = self._env_stat()
+            if mtime != self._env_mtime:
+                self._env_mtime = mtime
+                env_ssid = self._env_ssid()
+                if env_ssid and env_ssid != self.ssid:
+                    self.swap_ssid(env_ssid, source=self.env_file)
+                    continue
+            if not self.connected:
+                continue
+            client = self.client
+            try:
+                balance = await asyncio.wait_for(client.balance(), self.call_timeout)
+            except Exception as e:
+                self._session_failed(client, f"heartbeat: {type(e).__name__} {e}")
+                continue
+            if balance in (None, -1, -1.0):
+                self._session_failed(client, "heartbeat: balance() = -1")
+            else:
+                self.last_ok = time.time()
+
+    # -------------------------------------------------------------- hot-swap
+
+    def swap_ssid(self, ssid: str, source: str = "manual"):
+        """Reconnect now with a new SSID (call from inside the loop)."""
+        self.ssid = ssid.strip()
+        print(f"🔑 Sesión {self.name}: SSID reemplazado ({source})")
+        if self._reconnect_task is not None and not self._reconnect_task.done():
+            self._reconnect_task.cancel()
+        self._reconnect_task = None
+        if self.client is not None:
+            self._session_failed(self.client, f"SSID nuevo ({source})")
+        else:
+            self._ensure_reconnect(f"SSID nuevo ({source})")
+
+    def set_ssid(self, ssid: str, source: str = "telegram", persist: bool = True):
+        """
+        Thread-safe SSID hot-swap (e.g. from the Telegram listener thread).
+
+        Args:
+            ssid: New SSID
+            source: Label for logs
+            persist: Also write it to the .env file so a restart keeps it
+        """
+        ssid = ssid.strip()
+        if persist and self.env_file:
+            try:
+                from dotenv import set_key
+                set_key(self.env_file, "POCKETOPTION_SSID", ssid, quote_mode="never")
+            except Exception as e:
+                print(f"⚠️ No se pudo guardar el SSID en {self.env_file}: {e}")
+        if self._loop is None:
+            self.ssid = ssid
+            return
+        if _running_loop() is self._loop:
+            self.swap_ssid(ssid, source)
+        else:
+            self._loop.call_soon_threadsafe(self.swap_ssid, ssid, source)
+
+    def status(self) -> dict:
+        return {
+            'name': self.name,
+            'state': self.state,
+            'reconnects': self.reconnects,
+            'last_ok_ago': round(time.time() - self.last_ok, 1) if self.last_ok else None,
+            'down_for': round(time.time() - self.down_since, 1) if self.down_since else 0.0,
+            'last_downtime': round(self.last_downtime, 1) if self.last_downtime is not None else None,
+            'last_error': self.last_error,
+        }
+
+    def format_status(self) -> str:
+        """Telegram (HTML) status line."""
+        s = self.status()
+        icon = {CONNECTED: "🟢", RECONNECTING: "🟡", CONNECTING: "🟡", EXPIRED: "🔴"}.get(s['state'], "⚪")
+        lines = [f"<b>{icon} Sesión {s['name']}: {s['state'].upper()}</b>",
+                 f"Reconexiones: {s['reconnects']}"]
+        if s['last_ok_ago'] is not None:
+            lines.append(f"Último OK: hace {s['last_ok_ago']:.0f}s")
+        if s['down_for']:
+            lines.append(f"Caída desde hace {s['down_for']:.0f}s")
+        if s['last_downtime'] is not None:
+            lines.append(f"Última caída: {s['last_downtime']:.1f}s")
+        if s['last_error']:
+            lines.append(f"Error: {s['last_error'][:120]}")
+        return "\n".join(lines)
+
+
+async def _wait_event(event: asyncio.Event, timeout: Optional[float]) -> bool:
+    """event.wait() with a timeout measured by asyncio.sleep (follows a patched ReplayClock)."""
+    if event.is_set():
+        return True
+    if timeout is None:
+        await event.wait()
+        return True
+    waiter = asyncio.ensure_future(event.wait())
+    timer = asyncio.ensure_future(asyncio.sleep(timeout))
+    try:
+        await asyncio.wait((waiter, timer), return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        waiter.cancel()
+        timer.cancel()
+    return event.is_set()
+
+
+def _running_loop():
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
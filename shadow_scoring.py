@@ -0,0 +1,184 @@
+"""
+Shadow scoring for ML model promotion.
+Keeps production/candidate probabilities for every live signal next to the
+eventual trade result and computes rolling forward-performance metrics.
+"""
+import csv
+import os
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+
+
+SHADOW_LOG_PATH = "logs/shadow_scores.csv"
+SHADOW_HEADERS = [
+    'timestamp',
+    'signal_id',
+    'pair',
+    'timeframe',
+    'prod_proba',
+    'cand_proba',
+    'result',
+    'profit_loss',
+    'threshold'
+]
+
+
+class ShadowScoreBook:
+    """
+    Thread-safe book of shadow-scored signals.
+
+    Signals are held in memory until their trade settles; settled records are
+    appended to a CSV and kept in a rolling window for metrics.
+    """
+
+    def __init__(
+        self,
+        log_path: str = SHADOW_LOG_PATH,
+        threshold: float = 0.62,
+        payout: float = 0.92,
+        window: int = 500,
+        max_pending: int = 2000
+    ):
+        """
+        Args:
+            log_path: CSV where settled shadow records are appended
+            threshold: Probability needed to "accept" a signal added without its own threshold
+            payout: Payout ratio used when a trade has no recorded P&L
+            window: Number of settled records kept for rolling metrics
+            max_pending: Max unsettled signals kept (oldest are dropped)
+        """
+        self.log_path = log_path
+        self.threshold = threshold
+        self.payout = payout
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pending: "OrderedDict[str, Dict]" = OrderedDict()
+        self._settled: deque = deque(maxlen=window)
+
+    def add(self, signal_id: str, prod_proba: float, cand_proba: Optional[float],
+            pair: str = "", timeframe: str = "", timestamp: Optional[datetime] = None,
+            threshold: Optional[float] = None):
+        """
+        Register a scored signal waiting for its result.
+
+        Probabilities should be on the scale the live gate compares (calibrated)
+        and `threshold` the one that gate used for this signal (pair/hour/TF and
+        payout breakeven), so both models are judged by the decision actually made.
+        """
+        record = {
+            'timestamp': timestamp or datetime.now(),
+            'signal_id': str(signal_id),
+            'pair': pair,
+            'timeframe': timeframe,
+            'prod_proba': float(prod_proba),
+            'cand_proba': None if cand_proba is None else float(cand_proba),
+            'threshold': self.threshold if threshold is None else float(threshold),
+        }
+        with self._lock:
+            self._pending[record['signal_id']] = record
+            while len(self._pending) > self.max_pending:
+                self._pending.popitem(last=False)
+
+    def settle(self, signal_id: str, result: str, profit_loss: Optional[float] = None) -> bool:
+        """
+        Attach the trade result to a pending signal.
+
+        Args:
+            signal_id: Signal/trade ID given to add()
+            result: 'WIN' or 'LOSS'
+            profit_loss: Realized P&L (optional)
+
+        Returns:
+            bool: True if the signal was pending and is now settled
+        """
+        with self._lock:
+            record = self._pending.pop(str(signal_id), None)
+            if record is None:
+                return False
+            record['result'] = result
+            record['profit_loss'] = profit_loss
+            self._settled.append(record)
+        self._append_csv(record)
+        return True
+
+    def _append_csv(self, record: Dict):
+        """Append a settled record to the shadow log."""
+        try:
+            directory = os.path.dirname(self.log_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            is_new = not os.path.exists(self.log_path)
+            row = dict(record)
+            if isinstance(row['timestamp'], datetime):
+                row['timestamp'] = row['timestamp'].strftime("%Y-%m-%d %H:%M:%S")
+            with open(self.log_path, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=SHADOW_HEADERS)
+                if is_new:
+                    writer.writeheader()
+                writer.writerow({k: row.get(k, '') for k in SHADOW_HEADERS})
+        except Exception as e:
+            print(f"⚠️ Error escribiendo shadow log: {e}")
+
+    def reset(self):
+        """Forget pending and settled records (new candidate or after a promotion)."""
+        with self._lock:
+            self._pending.clear()
+            self._settled.clear()
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def metrics(self, window: Optional[int] = None) -> Dict:
+        """
+        Rolling calibration and profit-impact metrics over settled signals.
+
+        Only records scored by both models are compared.
+
+        Args:
+            window: Use only the last N settled records (default: all kept)
+
+        Returns:
+            Dict with per-model brier score, calibration gap, accepted trades,
+            winrate and P&L of the trades each model would have taken (each
+            signal accepted against its own threshold).
+        """
+        with self._lock:
+            records = [r for r in self._settled if r['cand_proba'] is not None]
+        if window:
+            records = records[-window:]
+
+        if not records:
+            return {'n': 0}
+
+        prod = np.array([r['prod_proba'] for r in records], dtype=float)
+        cand = np.array([r['cand_proba'] for r in records], dtype=float)
+        thresholds = np.array([r['threshold'] for r in records], dtype=float)
+        wins = np.array([1.0 if r['result'] == 'WIN' else 0.0 for r in records])
+        pnl = np.array([
+            r['profit_loss'] if r['profit_loss'] not in (None, '')
+            else (self.payout if r['result'] == 'WIN' else -1.0)
+            for r in records
+        ], dtype=float)
+
+        metrics = {'n': len(records), 'winrate': float(wins.mean())}
+        for name, proba in (('prod', prod), ('cand', cand)):
+            accepted = proba >= thresholds
+            metrics[f'{name}_brier'] = float(np.mean((proba - wins) ** 2))
+            metrics[f'{name}_calibration_gap'] = float(proba.mean() - wins.mean())
+            metrics[f'{name}_accepted'] = int(accepted.sum())
+            metrics[f'{name}_winrate'] = float(wins[accepted].mean()) if accepted.any() else 0.0
+            metrics[f'{name}_pnl'] = float(pnl[accepted].sum())
+        metrics['pnl_impact'] = metrics['cand_pnl'] - metrics['prod_pnl']
+        return metrics
+
+    def candidate_is_better(self, min_trades: int = 100, window: Optional[int] = None) -> bool:
+        """Candidate beats production on forward brier score and P&L."""
+        m = self.metrics(window)
+        if m['n'] < min_trades:
+            return False
+        return m['cand_brier'] < m['prod_brier'] and m['cand_pnl'] >= m['prod_pnl']
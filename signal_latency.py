@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Signal Latency
+Timestamps de cada señal desde el cierre de la vela hasta el ack del broker:
+
+    bar_close -> detected -> risk_checked -> order_sent -> ack
+
+Todos los stamps son epoch (time.time()) para poder restarlos al cierre de
+la vela que da el broker. Se guardan en el trade log (columnas *_ts y
+entry_delay_ms) y este script los resume: demora de entrada por par y
+winrate por tramo de demora.
+
+Uso:
+    python signal_latency.py                 # logs/trades/*.csv
+    python signal_latency.py --logs logs/trades --pair EURUSD_otc
+"""
+
+import glob
+import os
+import time
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# Etapas en orden; cada una queda como columna '<etapa>_ts' en el trade log
+STAGES = ('bar_close', 'detected', 'risk_checked', 'order_sent', 'ack')
+LOG_COLUMNS = [f"{stage}_ts" for stage in STAGES] + ['entry_delay_ms']
+# Tramos de demora (segundos desde el cierre de la vela)
+DELAY_BUCKETS = [0, 2, 5, 15, 60, float('inf')]
+DELAY_LABELS = ['<2s', '2-5s', '5-15s', '15-60s', '>60s']
+LOGS_DIR = "logs/trades"
+
+
+class SignalTimeline:
+    """
+    Stamps de una señal.
+
+    Args:
+        bar_close: Epoch de cierre de la vela que generó la señal (None si no se sabe)
+    """
+
+    __slots__ = ('stamps',)
+
+    def __init__(self, bar_close: Optional[float] = None):
+        self.stamps: Dict[str, float] = {}
+        if bar_close is not None:
+            self.stamps['bar_close'] = float(bar_close)
+
+    @classmethod
+    def from_bar(cls, bar_time, interval: int) -> "SignalTimeline":
+        """
+        Timeline de la última vela de un DataFrame.
+
+        Args:
+            bar_time: Apertura de la vela (epoch o Timestamp; naive = UTC como la API)
+            interval: Duración de la vela en segundos
+        """
+        from feature_store import bar_epoch
+        return cls(bar_epoch(bar_time) + int(interval))
+
+    def stamp(self, stage: str, ts: Optional[float] = None) -> float:
+        if stage not in STAGES:
+            raise ValueError(f"Etapa desconocida: {stage}")
+        self.stamps[stage] = float(ts if ts is not None else time.time())
+        return self.stamps[stage]
+
+    def get(self, stage: str) -> Optional[float]:
+        return self.stamps.get(stage)
+
+    def entry_delay_ms(self) -> Optional[float]:
+        """Cierre de vela -> ack (o el último stamp si todavía no hay ack)."""
+        start = self.stamps.get('bar_close')
+        if start is None:
+            return None
+        end = next((self.stamps[s] for s in reversed(STAGES) if s in self.stamps), start)
+        return (end - start) * 1000
+
+    def stage_delays_ms(self) -> Dict[str, float]:
+        """Demora de cada etapa respecto de la anterior registrada."""
+        delays = {}
+        previous = None
+        for stage in STAGES:
+            ts = self.stamps.get(stage)
+            if ts is None:
+                continue
+            if previous is not None:
+                delays[stage] = (ts - previous) * 1000
+            previous = ts
+        return delays
+
+    def to_log_fields(self) -> Dict[str, object]:
+        """Campos para TradeLogger.log_trade (vacío si falta la etapa)."""
+        fields = {f"{stage}_ts": round(self.stamps[stage], 3) if stage in self.stamps else ''
+                  for stage in STAGES}
+        delay = self.entry_delay_ms()
+        fields['entry_delay_ms'] = round(delay, 1) if delay is not None else ''
+        return fields
+
+    def summary(self) -> str:
+        """'entrada +4.2s (detect 3.1s, risk 0.0s, send 0.9s, ack 0.2s)'"""
+        delay = self.entry_delay_ms()
+        if delay is None:
+            return "entrada: sin cierre de vela"
+        short = {'detected': 'detect', 'risk_checked': 'risk', 'order_sent': 'send', 'ack': 'ack'}
+        parts = ", ".join(f"{short[s]} {ms / 1000:.1f}s" for s, ms in self.stage_delays_ms().items())
+        return f"entrada +{delay / 1000:.1f}s ({parts})"
+
+
+# ========================= REPORTE =========================
+
+def load_trade_latencies(logs_dir: str = LOGS_DIR) -> pd.DataFrame:
+    """
+    Trades cerrados con stamps de latencia de todos los CSV del directorio.
+
+    Returns:
+        DataFrame con pair, result, entry_delay_ms, <etapa>_ts y win (0/1)
+    """
+    frames = []
+    for path in sorted(glob.glob(os.path.join(logs_dir, "trades_*.csv"))):
+        try:
+            df = pd.read_csv(path)
+        except Exception as e:
+            print(f"⚠️ Error leyendo {path}: {e}")
+            continue
+        if 'entry_delay_ms' in df.columns:
+            frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=['pair', 'result', 'win'] + LOG_COLUMNS)
+
+    df = pd.concat(frames, ignore_index=True)
+    for col in LOG_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    df = df[df['result'].isin(['WIN', 'LOSS']) & df['entry_delay_ms'].notna()].copy()
+    df['win'] = (df['result'] == 'WIN').astype(int)
+    return df
+
+
+def latency_report(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """
+    Resumen de demora de entrada vs resultado.
+
+    Returns:
+        {
+          'by_pair':   por par: trades, winrate, p50/p95 de demora (s), medias por etapa (ms),
+                       correlación demora-win,
+          'by_bucket': por tramo de demora: trades, winrate
+        }
+    """
+    if df.empty:
+        return {'by_pair': pd.DataFrame(), 'by_bucket': pd.DataFrame()}
+
+    df = df.copy()
+    df['delay_s'] = df['entry_delay_ms'] / 1000
+    # Respecto de la etapa anterior registrada (como stage_delays_ms): un bot sin
+    # risk_checked no deja vacío order_sent_ms
+    previous = df[f"{STAGES[0]}_ts"]
+    for stage in STAGES[1:]:
+        df[f"{stage}_ms"] = (df[f"{stage}_ts"] - previous) * 1000
+        previous = df[f"{stage}_ts"].fillna(previous)
+
+    def _corr(group):
+        if len(group) < 3 or group['win'].nunique() < 2 or group['delay_s'].nunique() < 2:
+            return np.nan
+        return float(np.corrcoef(group['delay_s'], group['win'])[0, 1])
+
+    grouped = df.groupby('pair')
+    by_pair = pd.DataFrame({
+        'trades': grouped.size(),
+        'winrate': grouped['win'].mean() * 100,
+        'delay_p50_s': grouped['delay_s'].median(),
+        'delay_p95_s': grouped['delay_s'].quantile(0.95),
+        **{f"{stage}_ms": grouped[f"{stage}_ms"].mean() for stage in STAGES[1:]},
+        'delay_win_corr': grouped[['delay_s', 'win']].apply(_corr),
+    }).sort_values('delay_p50_s', ascending=False)
+
+    df['bucket'] = pd.cut(df['delay_s'], DELAY_BUCKETS, labels=DELAY_LABELS, right=False)
+    by_bucket = df.groupby('bucket', observed=True).agg(trades=('win', 'size'), winrate=('win', 'mean'))
+    by_bucket['winrate'] *= 100
+    return {'by_pair': by_pair, 'by_bucket': by_bucket}
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Demora de entrada (cierre de vela -> ack) vs winrate')
+    parser.add_argument('--logs', default=LOGS_DIR)
+    parser.add_argument('--pair', default=None)
+    args = parser.parse_args()
+
+    df = load_trade_latencies(args.logs)
+    if args.pair:
+        df = df[df['pair'] == args.pair]
+
+    print("=" * 80)
+    print("⏱️ LATENCIA SEÑAL → ORDEN")
+    print("=" * 80)
+    if df.empty:
+        print("⚠️ No hay trades cerrados con stamps de latencia todavía")
+        return
+
+    report = latency_report(df)
+    pd.set_option('display.width', 160)
+    print(f"\n📊 Por par ({len(df)} trades):")
+    print(report['by_pair'].round(2).to_string())
+    print("\n📈 Winrate por demora de entrada:")
+    print(report['by_bucket'].round(1).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,19 @@
 """
 Signal type definitions and enums for trading bot.
 Provides type safety and clarity for signal generation.
+
+Signal and TradeRecord are slotted records that travel through the whole
+pipeline (bot -> ML filter -> risk -> broker -> trade_logger/Telegram)
+instead of ad-hoc dicts. Both keep a read-only dict-style get() so code
+written against the old dicts keeps working.
 """
+from datetime import datetime
 from enum import Enum
+from typing import Any, Dict, Optional, Tuple
 
 
-class Direction(Enum):
-    """Trading direction."""
+class Direction(str, Enum):
+    """Trading direction (compares equal to "BUY"/"SELL")."""
     BUY = "BUY"
     SELL = "SELL"
     
@@ -14,7 +21,7 @@ class Direction(Enum):
         return self.value
 
 
-class SignalSource(Enum):
+class SignalSource(str, Enum):
     """Source of trading signal."""
     INDICATOR = "indicator"
     PATTERN = "pattern"
@@ -24,7 +31,7 @@ class SignalSource(Enum):
         return self.value
 
 
-class PatternType(Enum):
+class PatternType(str, Enum):
     """Types of chart patterns."""
     DOUBLE_TOP = "doble_techo"
     COMPRESSION = "compresion"
@@ -36,3 +43,236 @@ class PatternType(Enum):
     
     def __str__(self):
         return self.value
+
+
+# Trade log schema (CSV column order of TradeLogger)
+TRADE_COLUMNS = (
+    # Identificación
+    'timestamp',
+    'trade_id',
+    'pair',
+    'timeframe',
+    
+    # Decisión
+    'decision',
+    'signal_score',
+    'pattern_detected',
+    
+    # Indicadores técnicos
+    'price',
+    'ema',
+    'rsi',
+    'ema_conf',
+    'tf_signal',
+    'atr',
+    'triangle_active',
+    'reversal_candle',
+    
+    # Niveles
+    'near_support',
+    'near_resistance',
+    'support_level',
+    'resistance_level',
+    
+    # Higher Timeframe
+    'htf_signal',
+    
+    # Resultado
+    'result',
+    'profit_loss',
+    'expiry_time',
+    
+    # Meta
+    'notes',
+    
+    # Latencia señal -> orden (epoch; ver signal_latency.py)
+    'bar_close_ts',
+    'detected_ts',
+    'risk_checked_ts',
+    'order_sent_ts',
+    'ack_ts',
+    'entry_delay_ms',
+)
+LATENCY_COLUMNS = TRADE_COLUMNS[-6:]
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Old dict keys still used by some callers
+_MISSING = object()
+
+SIGNAL_ALIASES = {'tf': 'timeframe', 'signal': 'direction', 'timestamp': 'bar_time'}
+TRADE_ALIASES = {'tf': 'timeframe', 'signal': 'decision', 'pattern': 'pattern_detected',
+                 'direction': 'decision', 'score': 'signal_score'}
+
+
+class Signal:
+    """
+    A trading signal.
+
+    Args:
+        pair: Par (EURUSD_otc)
+        direction: Direction (or "BUY"/"SELL")
+        timeframe: 'M5', 'H1', ...
+        score: Signal strength / ML probability
+        pattern: Pattern name or PatternType
+        price: Price at detection
+        source: SignalSource
+        duration: Expiry in seconds
+        bar_time: Epoch of the candle that produced the signal
+        features: ML features / extra indicators
+        signal_id: ID shared with the trade log and shadow scoring
+        timeline: SignalTimeline (signal_latency.py)
+    """
+
+    __slots__ = ('pair', 'direction', 'timeframe', 'score', 'pattern', 'price', 'source',
+                 'duration', 'bar_time', 'features', 'signal_id', 'timeline')
+
+    def __init__(self, pair: str, direction, timeframe: str = "", score: float = 0.0,
+                 pattern=None, price: float = 0.0, source: Optional[SignalSource] = None,
+                 duration: int = 0, bar_time: Optional[int] = None,
+                 features: Optional[Dict[str, float]] = None, signal_id: Optional[str] = None,
+                 timeline=None):
+        self.pair = pair
+        self.direction = Direction(direction)
+        self.timeframe = timeframe
+        self.score = score
+        self.pattern = pattern
+        self.price = price
+        self.source = source
+        self.duration = duration
+        self.bar_time = bar_time
+        self.features = features if features is not None else {}
+        self.signal_id = signal_id
+        self.timeline = timeline
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Dict-style read (old keys 'tf'/'signal' and feature names included)."""
+        key = SIGNAL_ALIASES.get(key, key)
+        if key in self.__slots__:
+            value = getattr(self, key)
+            return default if value is None else value
+        return self.features.get(key, default)
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return (f"Signal({self.pair} {self.direction} {self.timeframe} "
+                f"score={self.score} pattern={self.pattern})")
+
+
+# Optional TradeRecord fields (everything but the identification/latency columns)
+_TRADE_FIELDS = tuple(c for c in TRADE_COLUMNS
+                      if c not in LATENCY_COLUMNS + ('timestamp', 'trade_id', 'pair', 'decision'))
+
+
+class TradeRecord:
+    """
+    One row of the trade log.
+
+    Fields are the TRADE_COLUMNS (latency columns come from `timeline`).
+    """
+
+    __slots__ = tuple(c for c in TRADE_COLUMNS if c not in LATENCY_COLUMNS) + ('timeline',)
+
+    def __init__(self, trade_id, pair: str, decision, timestamp: Optional[datetime] = None,
+                 timeline=None, **fields):
+        self.timestamp = timestamp or datetime.now()
+        self.trade_id = trade_id
+        self.pair = pair
+        self.decision = Direction(decision)
+        self.timeline = timeline
+        for name in _TRADE_FIELDS:
+            setattr(self, name, fields.pop(name, None))
+        if fields:
+            raise TypeError(f"Unknown trade fields: {', '.join(sorted(fields))}")
+        if self.result is None:
+            self.result = 'PENDING'
+
+    @classmethod
+    def from_signal(cls, signal: Signal, trade_id=None, expiry_time: Optional[int] = None,
+                    **fields) -> "TradeRecord":
+        """Trade row for an executed signal (indicator columns taken from signal.features)."""
+        features = signal.features
+        for name in ('ema', 'rsi', 'ema_conf', 'tf_signal', 'atr', 'htf_signal'):
+            if name in features and name not in fields:
+                fields[name] = features[name]
+        return cls(
+            trade_id=trade_id or signal.signal_id,
+            pair=signal.pair,
+            decision=signal.direction,
+            timeline=fields.pop('timeline', signal.timeline),
+            timeframe=fields.pop('timeframe', signal.timeframe),
+            signal_score=fields.pop('signal_score', signal.score),
+            pattern_detected=fields.pop('pattern_detected', str(signal.pattern or '')),
+            price=fields.pop('price', signal.price),
+            expiry_time=expiry_time if expiry_time is not None else signal.duration,
+            **fields
+        )
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Dict-style read by column name (or old key) for code written against trade dicts."""
+        key = TRADE_ALIASES.get(key, key)
+        if key in LATENCY_COLUMNS:
+            value = self.timeline.to_log_fields().get(key) if self.timeline is not None else None
+        elif key in self.__slots__:
+            value = getattr(self, key)
+        else:
+            return default
+        return default if value is None else value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def to_csv_row(self, columns=TRADE_COLUMNS) -> list:
+        """Values in `columns` order ('' for missing), timestamp formatted like the CSV."""
+        latency = self.timeline.to_log_fields() if self.timeline is not None else {}
+        row = []
+        for col in columns:
+            if col in LATENCY_COLUMNS:
+                value = latency.get(col)
+            elif col == 'timestamp':
+                value = self.timestamp.strftime(TIMESTAMP_FORMAT) if hasattr(self.timestamp, 'strftime') \
+                    else self.timestamp
+            else:
+                value = getattr(self, col, None) if col in self.__slots__ else None
+            row.append('' if value is None else value)
+        return row
+
+    def to_db_row(self) -> Tuple:
+        """
+        Typed tuple in TRADE_COLUMNS order for executemany()/DataFrame rows.
+
+        Enums become their value, timestamps ISO strings, missing values None.
+        """
+        latency = self.timeline.to_log_fields() if self.timeline is not None else {}
+        row = []
+        for col in TRADE_COLUMNS:
+            if col in LATENCY_COLUMNS:
+                value = latency.get(col)
+                value = None if value == '' else value
+            else:
+                value = getattr(self, col)
+            if isinstance(value, Enum):
+                value = value.value
+            elif isinstance(value, datetime):
+                value = value.isoformat(sep=' ', timespec='seconds')
+            row.append(value)
+        return tuple(row)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(zip(TRADE_COLUMNS, self.to_db_row()))
+
+    def __repr__(self):
+        return f"TradeRecord({self.trade_id} {self.pair} {self.decision} {self.result})"
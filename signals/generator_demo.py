@@ -8,6 +8,7 @@ Usar para testear el bot sin problemas de indicadores.
 import asyncio
 from config.constants import TIMEFRAMES
 from utils.log import log
+from signal_types import Signal, SignalSource
 import numpy as np
 
 
@@ -22,7 +23,7 @@ async def generate_signal_demo(api, pair, tf):
         tf: Timeframe (M5, M15, etc)
     
     Returns:
-        Dict con señal o None
+        Signal (signal_types) o None
     """
     try:
         # Obtener datos para validar que existen
@@ -41,24 +42,27 @@ async def generate_signal_demo(api, pair, tf):
         direction = 'BUY' if hash_val < 50 else 'SELL'
         
         # Retornar señal
-        return {
-            'pair': pair,
-            'tf': tf,
-            'signal': direction,
-            'timestamp': last_candle.get('time', 0),
-            'duration': interval,
-            'score': 3,  # Score medio-bajo para pasar filtros
-            'pattern': 'DEMO_MODE',
-            'price': price,
-            'ema': price * (1.002 if direction == 'BUY' else 0.998),
-            'breakdown': {},
-            'ema_conf': 1 if direction == 'BUY' else -1,
-            'tf_score': 1,
-            'rsi': 50,
-            'triangle': 0,
-            'reversal': 0,
-            'near_resistance': False
-        }
+        return Signal(
+            pair=pair,
+            direction=direction,
+            timeframe=tf,
+            score=3,  # Score medio-bajo para pasar filtros
+            pattern='DEMO_MODE',
+            price=price,
+            source=SignalSource.INDICATOR,
+            duration=interval,
+            bar_time=last_candle.get('time', 0),
+            features={
+                'ema': price * (1.002 if direction == 'BUY' else 0.998),
+                'breakdown': {},
+                'ema_conf': 1 if direction == 'BUY' else -1,
+                'tf_score': 1,
+                'rsi': 50,
+                'triangle': 0,
+                'reversal': 0,
+                'near_resistance': False
+            }
+        )
     
     except Exception as e:
         log(f"❌ Demo generator error {pair} {tf}: {e}", "debug")
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Startup Report
+Cuánto cuesta importar main.py y cada bot (python -X importtime), qué
+módulos pesados se cargan, y si importar arrancó hilos o creó singletons
+(ml_manager, trade_logger, telegram) antes de tiempo.
+
+Sin BinaryOptionsToolsV2 instalado se usa el replay (sin red ni SSID).
+
+Uso:
+    python startup_report.py
+    python startup_report.py bots.bot_ema_pullback --top 15
+"""
+
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+TARGETS = ['main', 'bots.bot_ema_pullback', 'bots.bot_trend_following', 'bots.bot_round_levels']
+HEAVY_MODULES = ['pandas', 'numpy', 'matplotlib', 'matplotlib.pyplot', 'sklearn', 'joblib',
+                 'lightgbm', 'requests', 'yaml']
+SINGLETONS = {'ml_model_manager': 'ml_manager', 'trade_logger': 'trade_logger',
+              'telegram_formatter': 'telegram'}
+MARKER = "__startup_report__"
+
+
+class _ReplayAPI:
+    """Finder/loader que resuelve BinaryOptionsToolsV2 con el replay solo cuando el bot lo importa."""
+
+    NAMES = ('BinaryOptionsToolsV2', 'BinaryOptionsToolsV2.pocketoption')
+
+    def find_spec(self, name, path=None, target=None):
+        if name in self.NAMES:
+            return importlib.util.spec_from_loader(name, self)
+        return None
+
+    def create_module(self, spec):
+        if 'BinaryOptionsToolsV2.pocketoption' not in sys.modules:
+            from replay_pocketoption import install
+            install(speed=None)
+        return sys.modules[spec.name]
+
+    def exec_module(self, module):
+        pass
+
+
+def _child(module: str):
+    """Corre dentro del subproceso con -X importtime: importa y reporta por stdout."""
+    import threading
+    import time
+
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    if importlib.util.find_spec('BinaryOptionsToolsV2') is None:
+        sys.meta_path.insert(0, _ReplayAPI())
+
+    threads_before = threading.active_count()
+    sys.stderr.write(f"{MARKER}\n")
+    sys.stderr.flush()
+    start = time.perf_counter()
+    error = None
+    try:
+        importlib.import_module(module)
+    except SystemExit as e:
+        error = f"exit({e.code})"
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    wall = time.perf_counter() - start
+
+    from lazy_loader import is_initialized
+    singletons = {}
+    for mod_name, attr in SINGLETONS.items():
+        mod = sys.modules.get(mod_name)
+        if mod is not None and hasattr(mod, attr):
+            singletons[attr] = is_initialized(getattr(mod, attr))
+
+    print(MARKER + json.dumps({
+        'module': module,
+        'wall_seconds': wall,
+        'error': error,
+        'new_threads': threading.active_count() - threads_before,
+        'heavy_loaded': [m for m in HEAVY_MODULES if m in sys.modules],
+        'singletons_initialized': singletons,
+        'api': type(sys.modules.get('BinaryOptionsToolsV2.pocketoption')).__name__
+               if 'BinaryOptionsToolsV2.pocketoption' in sys.modules else None,
+    }))
+
+
+def parse_importtime(stderr: str) -> list:
+    """
+    Líneas de -X importtime posteriores al marcador.
+
+    Returns:
+        [(módulo, self_us, cumulative_us, nivel), ...]
+    """
+    rows = []
+    seen_marker = False
+    for line in stderr.splitlines():
+        if line.strip() == MARKER:
+            seen_marker = True
+            continue
+        if not seen_marker or not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        raw_name = parts[2].rstrip()
+        level = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        rows.append((raw_name.strip(), int(parts[0]), int(parts[1]), level))
+    return rows
+
+
+def profile_import(module: str) -> dict:
+    """Importa `module` en un proceso limpio con -X importtime."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c",
+         f"import startup_report; startup_report._child({module!r})"],
+        cwd=ROOT, capture_output=True, text=True, timeout=300,
+        env=dict(os.environ, PYTHONDONTWRITEBYTECODE="1"),
+    )
+    result = {'module': module, 'error': proc.stderr.strip().splitlines()[-1:] or None}
+    for line in proc.stdout.splitlines():
+        if line.startswith(MARKER):
+            result = json.loads(line[len(MARKER):])
+    result['imports'] = parse_importtime(proc.stderr)
+    return result
+
+
+def print_report(result: dict, top: int = 10):
+    imports = result.get('imports', [])
+    cumulative = {name: cum for name, _, cum, _ in imports}
+    print(f"\n📦 {result['module']}")
+    if result.get('error'):
+        print(f"  ⚠️ {result['error']}")
+    if 'wall_seconds' in result:
+        print(f"  ⏱️ Import: {result['wall_seconds'] * 1000:.0f} ms | módulos nuevos: {len(imports)} "
+              f"| hilos arrancados: {result['new_threads']}")
+        pending = [k for k, v in result['singletons_initialized'].items() if not v]
+        eager = [k for k, v in result['singletons_initialized'].items() if v]
+        print(f"  💤 Singletons diferidos: {', '.join(pending) or '-'}"
+              f" | creados al importar: {', '.join(eager) or '-'}")
+        heavy = [f"{m} {cumulative[m] / 1000:.0f}ms" if m in cumulative else m
+                 for m in result['heavy_loaded']]
+        print(f"  🐘 Pesados cargados: {', '.join(heavy) or '-'}")
+
+    print(f"  {'cumulative':>11} {'self':>9}  módulo")
+    for name, self_us, cum_us, level in sorted(imports, key=lambda r: r[2], reverse=True)[:top]:
+        print(f"  {cum_us / 1000:>9.1f}ms {self_us / 1000:>7.1f}ms  {'  ' * level}{name}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Costo de import (cold start) de main.py y los bots')
+    parser.add_argument('modules', nargs='*', default=TARGETS)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("🚀 STARTUP REPORT (python -X importtime)")
+    print("=" * 70)
+    for module in args.modules:
+        print_report(profile_import(module), args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,8 @@ import os
 import requests
 from datetime import datetime
 
+from lazy_loader import LazyObject
+
 
 class TelegramFormatter:
     """Formateador de mensajes para Telegram."""
@@ -192,8 +194,8 @@ Estado: ✅ En operación
         return '💱'
 
 
-# Instancia global para usar fácilmente
-telegram = TelegramFormatter()
+# Instancia global para usar fácilmente (se crea al primer uso, después de load_dotenv)
+telegram = LazyObject(TelegramFormatter, "telegram")
 
 
 def send_trade_signal(pair, direction, price, timeframe, confidence=None):
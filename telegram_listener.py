@@ -7,6 +7,10 @@ Módulo para escuchar comandos de Telegram y responder con información del bot.
 Soporta:
 - /balance: Muestra el balance actual
 - /info: Muestra estadísticas y gráfico de progreso
+- /latency: Latencias p50/p95/p99 por etapa del ciclo
+- /profile [segundos]: Captura stacks del proceso (solo chat admin)
+- /session: Estado de la sesión de PocketOption
+- /ssid <valor>: Reemplaza el SSID sin reiniciar el bot (solo chat admin)
 """
 
 import os
@@ -14,23 +18,44 @@ import time
 import threading
 import requests
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
 from datetime import datetime
 import io
 import glob
+import html
 
-# Configurar matplotlib para backend no interactivo (thread-safe)
-plt.switch_backend('Agg')
+from instrumentation import instrumentation
+from sampling_profiler import profiler, top_functions
+from lazy_loader import LazyObject, lazy_import
+
+
+def _load_pyplot():
+    # Backend no interactivo (thread-safe), antes del primer import de pyplot
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as pyplot
+    return pyplot
+
+
+# matplotlib se carga recién al generar el primer gráfico (/info)
+plt = LazyObject(_load_pyplot, 'matplotlib.pyplot')
+mdates = lazy_import('matplotlib.dates')
 
 class TelegramListener:
-    def __init__(self, token, get_balance_callback=None):
+    def __init__(self, token, get_balance_callback=None, session=None):
+        """
+        Args:
+            token: Token del bot de Telegram
+            get_balance_callback: Función que devuelve el balance actual
+            session: SessionManager del bot (habilita /session y /ssid)
+        """
         self.token = token
         self.get_balance_callback = get_balance_callback
+        self.session = session
         self.offset = 0
         self.running = False
         self.base_url = f"https://api.telegram.org/bot{self.token}"
         self.logs_dir = "logs/trades"
+        self.admin_chat_id = os.getenv("TELEGRAM_ADMIN_CHAT_ID") or os.getenv("TELEGRAM_CHAT_ID")
     
     def start(self):
         """Iniciar el listener en un hilo separado."""
@@ -39,7 +64,7 @@ class TelegramListener:
             return
         
         self.running = True
-        thread = threading.Thread(target=self._poll_loop, daemon=True)
+        thread = threading.Thread(target=self._poll_loop, name="telegram-listener", daemon=True)
         thread.start()
         print("🎧 TelegramListener iniciado (esperando comandos /balance, /info)")
     
@@ -92,6 +117,15 @@ class TelegramListener:
             self._handle_balance(chat_id)
         elif text.lower() == "/info":
             self._handle_info(chat_id)
+        elif text.lower().startswith("/latency"):
+            bot_name = text[len("/latency"):].strip().lstrip("_") or None
+            self._send_message(chat_id, instrumentation.format_report(bot_name))
+        elif text.lower().startswith("/profile"):
+            self._handle_profile(chat_id, text[len("/profile"):].strip().lstrip("_"))
+        elif text.lower() == "/session":
+            self._handle_session(chat_id)
+        elif text.lower().startswith("/ssid"):
+            self._handle_ssid(chat_id, text[len("/ssid"):].strip())
         elif text.lower().startswith("/info_details"):
             # Robust parsing: remove command prefix and handle separators
             cmd_len = len("/info_details")
@@ -133,6 +167,18 @@ Muestra el balance actual del bot.
 <b>/info</b>
 Muestra progreso general y estadísticas totales con gráfico.
 
+<b>/latency [BOT]</b>
+Latencias p50/p95/p99 por etapa (fetch, indicadores, ML, riesgo, Telegram).
+
+<b>/profile [SEGUNDOS]</b>
+Captura stacks del bot (flamegraph en logs/profiles). Solo chat admin.
+
+<b>/session</b>
+Estado de la sesión de PocketOption (conectada, reconectando, expirada).
+
+<b>/ssid VALOR</b>
+Reemplaza el SSID y reconecta sin reiniciar (se guarda en .env). Solo chat admin.
+
 <b>/info_details [FECHA]</b>
 Muestra progreso del día especificado en detalle con gráfico.
 Formato: YYYY-MM-DD o DD/MM/YYYY
@@ -166,6 +212,53 @@ Formato: YYYY-MM-DD HH:MM o DD/MM/YYYY HH:MM
         
         self._send_message(chat_id, msg)
     
+    def _handle_profile(self, chat_id, args=""):
+        """Manejar comando /profile (sampling profiler en caliente)."""
+        if not self.admin_chat_id or str(chat_id) != str(self.admin_chat_id):
+            self._send_message(chat_id, "⛔ Comando solo para el chat admin")
+            return
+        
+        try:
+            # > 0 y con el tope de MAX_DURATION: se informa lo que realmente se captura
+            duration = profiler.capture_duration(float(args) if args else 30)
+        except ValueError:
+            self._send_message(chat_id, "⚠️ Uso: /profile [segundos > 0]")
+            return
+        
+        def on_done(path, stacks):
+            lines = [f"<b>🔬 Profile listo</b> ({sum(stacks.values())} muestras)",
+                     f"<code>{path}</code>", "", "<b>Top funciones:</b>"]
+            for label, share in top_functions(stacks):
+                lines.append(f"• {share:.0%} {html.escape(label)}")
+            self._send_message(chat_id, "\n".join(lines))
+        
+        if profiler.start(duration, on_done=on_done):
+            self._send_message(chat_id, f"🔬 Capturando {duration:.0f}s de stacks...")
+        else:
+            self._send_message(chat_id, "⏳ Ya hay una captura en curso")
+    
+    def _handle_session(self, chat_id):
+        """Manejar comando /session."""
+        if self.session is None:
+            self._send_message(chat_id, "⚠️ Este bot no expone su sesión")
+            return
+        self._send_message(chat_id, self.session.format_status())
+    
+    def _handle_ssid(self, chat_id, ssid):
+        """Manejar comando /ssid (hot-swap del SSID sin reiniciar)."""
+        if not self.admin_chat_id or str(chat_id) != str(self.admin_chat_id):
+            self._send_message(chat_id, "⛔ Comando solo para el chat admin")
+            return
+        if self.session is None:
+            self._send_message(chat_id, "⚠️ Este bot no expone su sesión")
+            return
+        if not ssid:
+            self._send_message(chat_id, "⚠️ Uso: /ssid VALOR")
+            return
+        
+        self.session.set_ssid(ssid, source="telegram")
+        self._send_message(chat_id, "🔑 SSID recibido, reconectando... (/session para ver el estado)")
+    
     def _handle_info(self, chat_id):
         """Manejar comando /info (estadísticas + gráfico)."""
         self._send_message(chat_id, "⏳ Generando reporte histórico...")
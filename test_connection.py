@@ -1,5 +1,4 @@
 import os
-import asyncio
 from dotenv import load_dotenv
 import sys
 
@@ -22,17 +21,21 @@ except ImportError as e:
     from mock_pocketoption import PocketOptionAsync
     print("⚠️ Using Mock")
 
-async def main():
+from client_pool import SyncPocketOption
+
+def main():
     print("Connecting...")
-    api = PocketOptionAsync(ssid=ssid)
-    balance = await api.balance()
-    print(f"Balance: {balance}")
-    
-    if balance == -1 or balance == -1.0:
-        print("❌ Connection failed (Balance is -1)")
+    # Sesión del pool en el loop compartido: reintenta con backoff y queda caliente para otras llamadas
+    api = SyncPocketOption(ssid, factory=lambda s: PocketOptionAsync(ssid=s), env_file=None)
+    if not api.connect(timeout=20):
+        status = api.status()
+        print(f"❌ Connection failed ({status['state']}: {status['last_error']})")
         print("👉 Likely invalid SSID")
-    else:
-        print("✅ Connection successful")
+        return
+
+    balance = api.balance()
+    print(f"Balance: {balance}")
+    print("✅ Connection successful")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    main()
@@ -0,0 +1,36 @@
+"""
+Benchmarks del backtesting que sí importa en este árbol: walk_forward
+(señales de toda la grilla + evaluación de una ventana). backtest.py no se
+mide: su estrategia importa detectores que ya no existen.
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import walk_forward
+from candle_store import to_records
+
+
+@pytest.fixture
+def records(candles):
+    return to_records(candles.reset_index(drop=True))
+
+
+def test_prepare_grid(benchmark, records):
+    params = walk_forward.param_grid()
+    prepared = benchmark(walk_forward.PreparedPair, "EURUSD_otc", records, params)
+    assert prepared.signals.shape == (len(params), len(records))
+
+
+def test_optimize_window(benchmark, records):
+    params = walk_forward.param_grid()
+    walk_forward._init_worker({"EURUSD_otc": walk_forward.PreparedPair("EURUSD_otc", records, params)},
+                              params, min_trades=1)
+    t = records['time']
+    window = (float(t[0]), float(t[len(t) // 2]), float(t[len(t) // 2]), float(t[-1]) + 1)
+    result = benchmark(walk_forward._optimize_window, window)
+    assert result['window']['train_start'] == window[0]
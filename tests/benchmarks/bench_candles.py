@@ -0,0 +1,52 @@
+"""
+Benchmarks de decodificación de velas: lista de dicts -> DataFrame (como lo
+hacían los bots) contra Candles (columnas NumPy).
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import json
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from candles import Candles, decode_candles
+
+
+@pytest.fixture
+def rows(candles):
+    frame = candles[['time', 'open', 'high', 'low', 'close', 'volume']]
+    return [{k: (int(v) if k == 'time' else float(v)) for k, v in row.items()}
+            for row in frame.to_dict('records')]
+
+
+def _dataframe_pipeline(raw):
+    df = pd.DataFrame(raw)
+    df = df[['time', 'open', 'close', 'high', 'low']]
+    df['time'] = pd.to_datetime(df['time'], unit='s')
+    return df.set_index('time').astype(float)
+
+
+def test_rows_to_frame_pandas(benchmark, rows):
+    df = benchmark(_dataframe_pipeline, rows)
+    assert len(df) == len(rows)
+
+
+def test_rows_to_frame_candles(benchmark, rows):
+    df = benchmark(lambda raw: Candles.from_rows(raw).to_frame(), rows)
+    assert len(df) == len(rows)
+
+
+def test_json_to_candles(benchmark, rows):
+    payload = json.dumps(rows)
+    candles = benchmark(decode_candles, payload)
+    assert len(candles) == len(rows)
+
+
+def test_records_to_candles(benchmark, rows):
+    records = Candles.from_rows(rows).to_records()
+    df = benchmark(lambda r: Candles.from_records(r).to_frame(), records)
+    assert len(df) == len(rows)
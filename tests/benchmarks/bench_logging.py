@@ -0,0 +1,64 @@
+"""
+Benchmarks del I/O de trades: TradeLogger y las estadísticas de /info.
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from trade_logger import TradeLogger
+
+N_TRADES = 500
+
+
+def _trade(i: int) -> dict:
+    rng = np.random.default_rng(i)
+    return {
+        'timestamp': datetime(2025, 1, 1) + timedelta(minutes=5 * i),
+        'trade_id': f"T{i:06d}",
+        'pair': 'EURUSD_otc',
+        'timeframe': 'M5',
+        'decision': 'BUY' if i % 2 else 'SELL',
+        'signal_score': round(float(rng.uniform(0.5, 0.9)), 4),
+        'pattern_detected': 'EMA_PULLBACK',
+        'price': round(float(rng.normal(1.08, 0.01)), 5),
+        'ema': round(float(rng.normal(1.08, 0.01)), 5),
+        'result': 'WIN' if i % 3 else 'LOSS',
+        'profit_loss': 0.92 if i % 3 else -1.0,
+        'expiry_time': 300,
+    }
+
+
+@pytest.fixture
+def filled_logger(tmp_path):
+    """Log del día con N_TRADES trades (tamaño de un día activo)."""
+    logger = TradeLogger(logs_dir=str(tmp_path / "trades"))
+    for i in range(N_TRADES):
+        logger.log_trade(_trade(i))
+    return logger
+
+
+def test_log_trade(benchmark, tmp_path):
+    logger = TradeLogger(logs_dir=str(tmp_path / "trades"))
+    counter = iter(range(10**9))
+    assert benchmark(lambda: logger.log_trade(_trade(next(counter))))
+
+
+def test_update_trade_result(benchmark, filled_logger):
+    # Actualiza un trade del medio del archivo (reescribe el CSV completo)
+    assert benchmark(filled_logger.update_trade_result, f"T{N_TRADES // 2:06d}", 'WIN', 0.92)
+
+
+def test_telegram_get_stats(benchmark, filled_logger):
+    from telegram_listener import TelegramListener
+
+    listener = TelegramListener(token=None, get_balance_callback=lambda: 1000.0)
+    listener.logs_dir = str(filled_logger.logs_dir)
+    stats = benchmark(listener._get_stats)
+    assert stats['total_trades'] == N_TRADES
@@ -0,0 +1,58 @@
+"""
+Benchmarks del scoring ML: MLFilter.predict y get_signal del bot EMA Pullback.
+"""
+import importlib
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from bots.ml_filter import MLFilter
+from feature_store import feature_store
+
+
+FEATURES = {
+    'price': 1.0854, 'duration_minutes': 5.0, 'pair_idx': 0.0,
+    'ema8': 1.0851, 'ema21': 1.0846, 'ema55': 1.0839, 'hour_normalized': 14 / 24,
+}
+
+
+def test_ml_filter_predict(benchmark, ema7_model):
+    ml_filter = MLFilter(ema7_model, threshold=0.6)
+    prob = benchmark(ml_filter.predict, FEATURES)
+    assert 0.0 <= prob <= 1.0
+
+
+@pytest.fixture
+def ema_bot(monkeypatch, ema7_model):
+    """
+    bots/bot_ema_pullback importado contra el replay (sin red ni SSID).
+
+    El bot usa el modelo de prueba sin hot-reload, así el benchmark no
+    depende de qué modelo haya en disco.
+    """
+    try:
+        importlib.import_module("BinaryOptionsToolsV2.pocketoption")
+    except ImportError:
+        from replay_pocketoption import install
+        install(speed=None)
+    try:
+        bot = importlib.import_module("bots.bot_ema_pullback")
+    except (ImportError, SystemExit) as e:
+        pytest.skip(f"bot_ema_pullback no importa: {e}")
+
+    import joblib
+    monkeypatch.setattr(bot, "ml_manager", None)
+    monkeypatch.setattr(bot, "model", joblib.load(ema7_model))
+    return bot
+
+
+@pytest.mark.parametrize("ml_active", [False, True], ids=["no_ml", "ml"])
+def test_ema_pullback_get_signal(benchmark, ema_bot, candles, monkeypatch, ml_active):
+    monkeypatch.setattr(ema_bot, "ML_ACTIVE", ml_active)
+    # Peor caso por ciclo: features recalculadas en cada llamada
+    benchmark.pedantic(ema_bot.get_signal, args=(candles.copy(), "EURUSD_otc", 300),
+                       setup=feature_store.clear, rounds=50)
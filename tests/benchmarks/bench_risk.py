@@ -0,0 +1,48 @@
+"""
+Benchmarks del chequeo de riesgo por señal: RiskManager.can_trade y
+las estadísticas móviles de BotState con historial largo.
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from bot_state import BotState
+from risk_manager import RiskManager
+
+
+@pytest.fixture(params=[200, 10_000], ids=['hist200', 'hist10k'])
+def state(request):
+    state = BotState(history_size=request.param)
+
+    async def fill():
+        await state.set_initial_balance(1000.0)
+        for i in range(request.param):
+            await state.add_trade(i % 3 != 0, pnl=0.92 if i % 3 else -1.0)
+
+    asyncio.run(fill())
+    return state
+
+
+def test_can_trade(benchmark, state):
+    rm = RiskManager(max_daily_trades=10**9, max_daily_losses=10**9, streak_limit=10**9)
+    loop = asyncio.new_event_loop()
+    try:
+        can, _ = benchmark(lambda: loop.run_until_complete(rm.can_trade(1000.0, state)))
+    finally:
+        loop.close()
+    assert can is True
+
+
+def test_rolling_winrate(benchmark, state):
+    loop = asyncio.new_event_loop()
+    try:
+        winrate = benchmark(lambda: loop.run_until_complete(state.get_rolling_winrate(100)))
+    finally:
+        loop.close()
+    assert 0.6 < winrate < 0.7
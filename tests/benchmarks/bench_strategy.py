@@ -0,0 +1,32 @@
+"""
+Benchmarks de strategy.py: indicadores y detectores que corren en cada vela.
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import strategy
+
+DETECTORS = [
+    strategy.detectar_doble_techo,
+    strategy.detectar_ruptura_canal,
+    strategy.detectar_triangulo,
+    strategy.detectar_compresion,
+    strategy.detectar_divergencia_rsi,
+    strategy.is_sideways,
+]
+
+
+def test_compute_indicators(benchmark, candles):
+    result = benchmark(strategy.compute_indicators, candles, 300)
+    assert len(result) == len(candles)
+    assert {'rsi', 'atr', 'adx', 'bb_width'} <= set(result.columns)
+
+
+@pytest.mark.parametrize("detector", DETECTORS, ids=lambda f: f.__name__)
+def test_detector(benchmark, detector, indicator_candles):
+    benchmark(detector, indicator_candles)
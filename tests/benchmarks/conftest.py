@@ -0,0 +1,86 @@
+"""
+Inputs fijos para los benchmarks: velas sintéticas con semilla y velas
+guardadas en history/ (EURUSD_otc M5), siempre las mismas entre corridas.
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from candle_store import open_candles
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+HISTORY_DIR = os.path.join(ROOT, "history")
+STORED_PAIR, STORED_TF = "EURUSD_otc", "M5"
+N_BARS = 500
+SEED = 7
+
+
+def synthetic_candles(n: int = N_BARS, seed: int = SEED, start: int = 1_700_000_000,
+                      step: int = 300) -> pd.DataFrame:
+    """Random walk OHLCV determinista, indexado por timestamp como en los bots."""
+    rng = np.random.default_rng(seed)
+    close = 1.08 + np.cumsum(rng.normal(0, 0.0008, n))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.0005, n))
+    df = pd.DataFrame({
+        'time': start + step * np.arange(n),
+        'open': open_,
+        'high': np.maximum(open_, close) + spread,
+        'low': np.minimum(open_, close) - spread,
+        'close': close,
+        'volume': rng.integers(1000, 8000, n).astype(float),
+    })
+    df.index = pd.to_datetime(df['time'], unit='s')
+    return df
+
+
+def stored_candles(n: int = N_BARS) -> pd.DataFrame:
+    """Últimas n velas guardadas (.candles si existe, si no el CSV)."""
+    candles = open_candles(STORED_PAIR, STORED_TF, HISTORY_DIR)
+    if candles is not None:
+        df = candles.to_frame().drop(columns=['timestamp'])
+    else:
+        path = os.path.join(HISTORY_DIR, f"{STORED_PAIR}_{STORED_TF}.csv")
+        if not os.path.exists(path):
+            pytest.skip(f"Sin historia guardada: {path}")
+        df = pd.read_csv(path)
+    df = df.sort_values('time').drop_duplicates('time').tail(n)
+    df = df[['time', 'open', 'high', 'low', 'close', 'volume']].astype({'time': 'int64'})
+    df.index = pd.to_datetime(df['time'], unit='s')
+    return df
+
+
+@pytest.fixture(params=["synthetic", "stored"])
+def candles(request) -> pd.DataFrame:
+    """Mismo benchmark sobre velas sintéticas y sobre velas reales guardadas."""
+    if request.param == "synthetic":
+        return synthetic_candles()
+    return stored_candles()
+
+
+@pytest.fixture
+def indicator_candles(candles) -> pd.DataFrame:
+    """Velas con indicadores ya calculados (entrada de los detectores)."""
+    from strategy import compute_indicators
+    return compute_indicators(candles, interval=300)
+
+
+@pytest.fixture(scope="session")
+def ema7_model(tmp_path_factory):
+    """Modelo chico con las 7 features EMA, guardado como los .pkl del bot."""
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+    from feature_store import EMA7_FEATURES
+
+    rng = np.random.default_rng(SEED)
+    X = pd.DataFrame(rng.normal(size=(400, len(EMA7_FEATURES))), columns=EMA7_FEATURES)
+    y = (X['ema8'] > X['ema21']).astype(int)
+    model = RandomForestClassifier(n_estimators=50, max_depth=6, random_state=SEED).fit(X, y)
+
+    path = tmp_path_factory.mktemp("models") / "ml_model.pkl"
+    joblib.dump(model, path)
+    return str(path)
@@ -0,0 +1,87 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import json
+import time
+
+import pytest
+from asset_catalog import AssetCatalog, AssetScanner, resolve_pairs, stock_variants
+from mock_pocketoption import PocketOptionAsync
+
+
+class PayoutAPI(PocketOptionAsync):
+    """Mock con payout() y símbolos inválidos, como el broker real."""
+
+    PAYOUTS = {'EURUSD_otc': 92, 'GBPUSD_otc': 65, 'AUDCAD_otc': 0, '#AAPL_otc': 88}
+
+    def __init__(self):
+        super().__init__()
+        self.delays = dict.fromkeys(self.delays, 0)
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def payout(self, asset=None):
+        return dict(self.PAYOUTS)
+
+    async def get_candles(self, pair, interval, lookback=50, offset=0):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if pair.startswith('#MSFT'):
+            return await super().get_candles(pair, interval, lookback)
+        raise ValueError(f"Invalid asset {pair}")
+
+
+def test_stock_variants_are_unique():
+    variants = stock_variants({'Apple': ['AAPL', 'Apple']})
+    assert len(variants) == len(set(variants))
+    assert {'AAPL', 'AAPL_otc', '#AAPL_otc', 'APPLE_otc'} <= set(variants)
+
+
+@pytest.mark.asyncio
+async def test_discover_uses_payout_and_probes_the_rest(tmp_path):
+    api = PayoutAPI()
+    catalog = AssetCatalog(str(tmp_path / "catalog.json"))
+    scanner = AssetScanner(api, catalog, max_concurrent=3)
+    summary = await scanner.discover(['EURUSD_otc', '#AAPL_otc'] + [f"#MSFT{i}" for i in range(4)]
+                                     + [f"BAD{i}" for i in range(6)])
+
+    assert summary == {'listed': 4, 'probed': 10, 'found': 4}
+    assert 1 < api.max_in_flight <= 3
+    assert catalog.tradable(70) == ['EURUSD_otc', '#AAPL_otc']
+    assert catalog.assets['AUDCAD_otc']['available'] is False
+    assert catalog.assets['#MSFT0']['source'] == 'probe' and 'last_seen' in catalog.assets['#MSFT0']
+
+    reloaded = AssetCatalog(catalog.path)
+    assert reloaded.assets == catalog.assets and reloaded.age_hours() < 0.01
+
+
+@pytest.mark.asyncio
+async def test_discover_with_mock_api(tmp_path):
+    api = PocketOptionAsync()
+    api.delays = dict.fromkeys(api.delays, 0)
+    catalog = AssetCatalog(str(tmp_path / "catalog.json"))
+    summary = await AssetScanner(api, catalog).discover(['EURUSD_otc', 'NEWPAIR_otc'])
+    assert summary == {'listed': len(api.payouts), 'probed': 1, 'found': 1}
+    assert catalog.tradable(90) == ['EURUSD_otc', 'GBPUSD_otc']
+
+
+def test_resolve_pairs_filters_configured_pairs(tmp_path):
+    path = str(tmp_path / "catalog.json")
+    pairs = ['EURUSD_otc', 'GBPUSD_otc', 'AUDCAD_otc', 'USDCOP_otc']
+    assert resolve_pairs(pairs, path) == pairs  # sin catálogo
+
+    catalog = AssetCatalog(path)
+    for asset, payout in PayoutAPI.PAYOUTS.items():
+        catalog.update(asset, available=bool(payout), payout=payout)
+    catalog.save()
+    # USDCOP_otc no está en el catálogo: se mantiene
+    assert resolve_pairs(pairs, path, min_payout=70) == ['EURUSD_otc', 'USDCOP_otc']
+
+    # Catálogo de hace dos días: se ignora
+    with open(path, 'w') as f:
+        json.dump({'updated_at': time.time() - 48 * 3600, 'assets': catalog.assets}, f)
+    assert resolve_pairs(pairs, path, max_age_hours=24) == pairs
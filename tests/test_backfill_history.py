@@ -0,0 +1,39 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+from backfill_history import HistoryBackfiller, PairStore, merge_candles, normalize_candles
+from mock_pocketoption import PocketOptionAsync
+
+
+def test_merge_dedupes_on_time_and_new_wins():
+    old = normalize_candles([{"time": 1, "close": 1.0}, {"time": 2, "close": 2.0}])
+    new = normalize_candles([{"time": 2, "close": 2.5}, {"time": 3, "close": 3.0}])
+    merged = merge_candles(old, new)
+    assert list(merged['time']) == [1, 2, 3]
+    assert list(merged['close']) == [1.0, 2.5, 3.0]
+
+
+@pytest.mark.asyncio
+async def test_backfill_pages_and_resumes(tmp_path):
+    api = PocketOptionAsync()
+    api.max_history_seconds = 250 * 300  # mock server keeps 250 M5 bars
+
+    backfiller = HistoryBackfiller(api, ["EURUSD_otc"], {"M5": 300}, days=30,
+                                   store_dir=str(tmp_path), page_bars=100)
+    summary = await backfiller.run()
+
+    stored = PairStore(str(tmp_path)).read("EURUSD_otc", "M5")
+    assert summary[0]['bars'] == 250
+    assert len(np.unique(stored['time'])) == 250
+    assert np.all(np.diff(stored['time']) == 300)
+    assert backfiller.checkpoint.get("EURUSD_otc_M5")['done']
+
+    # Resume: history is complete, only the gap up to now is requested
+    resumed = HistoryBackfiller(api, ["EURUSD_otc"], {"M5": 300}, days=30,
+                                store_dir=str(tmp_path), page_bars=100)
+    await resumed.run()
+    assert resumed.requests == 1
+    assert len(PairStore(str(tmp_path)).read("EURUSD_otc", "M5")['time']) >= 250
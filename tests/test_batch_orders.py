@@ -0,0 +1,132 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+
+import pytest
+from batch_orders import ACKED, FAILED, REJECTED, SETTLED, BatchOrderExecutor, OrderRejected, OrderRequest, parse_settlement
+from bot_state import BotState
+from mock_pocketoption import PocketOptionAsync
+from risk_manager import RiskManager
+
+
+def _api(**delays):
+    api = PocketOptionAsync()
+    api.delays = dict(dict.fromkeys(api.delays, 0), **delays)
+    return api
+
+
+def _orders(n, amount=10.0):
+    pairs = ["EURUSD_otc", "GBPUSD_otc", "USDJPY_otc", "AUDUSD_otc"]
+    return [OrderRequest(pairs[i % 4], "BUY" if i % 2 == 0 else "SELL", amount, 60) for i in range(n)]
+
+
+def test_parse_settlement():
+    assert parse_settlement({"result": "win", "profit": 9.2}, 10) == {'win': True, 'pnl': 9.2, 'result': 'win',
+                                                                     'raw': {"result": "win", "profit": 9.2}}
+    assert parse_settlement({"result": "loss", "profit": 0}, 10)['pnl'] == -10
+    assert parse_settlement({"result": "draw"}, 10)['pnl'] == 0
+    with pytest.raises(ValueError):
+        OrderRequest("EURUSD_otc", "HOLD", 1)
+
+
+@pytest.mark.asyncio
+async def test_batch_sends_concurrently_and_settles():
+    api = _api(order=0.05)
+    state = BotState()
+    executor = BatchOrderExecutor(api, bot_state=state, max_concurrent=4)
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    tickets = await executor.submit(_orders(4))
+    acked = await executor.wait_acked(tickets)
+    assert len(acked) == 4 and loop.time() - start < 0.15  # 4 órdenes en ~1 delay, no 4
+
+    settled = await executor.wait_settled(tickets)
+    assert [t.status for t in settled] == [SETTLED] * 4 and executor.pending == 0
+    assert [await t.settled for t in settled] == [t.result for t in settled]
+    stats = await state.snapshot()
+    assert stats.daily_trades == 4 and stats.total == 4
+    assert stats.daily_losses == sum(not t.result['win'] for t in settled)
+
+
+@pytest.mark.asyncio
+async def test_draw_is_not_recorded_as_loss():
+    api = _api()
+
+    async def draw(trade_id):
+        return {"result": "draw", "profit": 0}
+
+    api.check_win = draw
+    state = BotState()
+    executor = BatchOrderExecutor(api, bot_state=state)
+
+    tickets = await executor.submit(_orders(2))
+    settled = await executor.wait_settled(tickets)
+    assert [t.result['result'] for t in settled] == ['draw', 'draw']
+    assert [t.result['pnl'] for t in settled] == [0, 0]
+    # Ejecutadas (cuentan como trades del día) pero ni pérdida ni racha
+    stats = await state.snapshot()
+    assert stats.daily_trades == 2 and stats.total == 0 and stats.daily_losses == 0
+    assert await state.get_streak_losses() == 0
+
+
+@pytest.mark.asyncio
+async def test_exposure_checked_atomically_per_batch():
+    risk = RiskManager(demo_mode=False, max_total_exposure=0.10)
+    state = BotState()
+    executor = BatchOrderExecutor(_api(check_win=0.05), risk, state)
+
+    # balance 100 → máx $10 abiertos: dos lotes simultáneos no pueden pasar ambos
+    first, second = await asyncio.gather(executor.submit(_orders(2, 6.0), 100),
+                                         executor.submit(_orders(1, 6.0), 100))
+    statuses = [t.status for t in first + second]
+    assert statuses.count(REJECTED) == 2
+    assert "Exposición" in next(t.reason for t in first + second if t.status == REJECTED)
+    with pytest.raises(OrderRejected):
+        await next(t for t in first + second if t.status == REJECTED).acked
+
+    await executor.wait_acked(first + second)
+    assert risk.open_exposure == 6.0
+    await executor.wait_settled(first + second)
+    assert risk.open_exposure == 0 and risk.get_status()['pending_orders'] == 0
+
+    # Liberada la exposición, el próximo ciclo vuelve a entrar
+    again = await executor.submit(_orders(1, 6.0), 100)
+    assert (await executor.wait_acked(again))[0].status == ACKED
+    await executor.close()
+
+
+@pytest.mark.asyncio
+async def test_daily_trade_limit_counts_reserved_orders():
+    risk = RiskManager(demo_mode=False, max_daily_trades=3, max_total_exposure=1.0)
+    executor = BatchOrderExecutor(_api(), risk, BotState())
+    tickets = await executor.submit(_orders(5, 1.0), 100)
+    assert [t.status for t in tickets].count(REJECTED) == 2
+    assert "trades diarios" in tickets[-1].reason
+    await executor.wait_settled(tickets)
+
+
+@pytest.mark.asyncio
+async def test_failed_order_releases_exposure():
+    class Broken(PocketOptionAsync):
+        async def sell(self, *args, **kwargs):
+            raise ConnectionError("socket cerrado")
+
+    api = Broken()
+    api.delays = dict.fromkeys(api.delays, 0)
+    risk = RiskManager(demo_mode=False, max_total_exposure=1.0)
+    state = BotState()
+    acked_ids = []
+    executor = BatchOrderExecutor(api, risk, state, on_ack=lambda t: acked_ids.append(t.trade_id))
+
+    tickets = await executor.submit(_orders(2, 5.0), 100)
+    await executor.wait_settled(tickets)
+    buy, sell = tickets
+    assert buy.status == SETTLED and acked_ids == [buy.trade_id]
+    assert sell.status == FAILED and "socket" in sell.reason
+    with pytest.raises(ConnectionError):
+        await sell.acked
+    assert risk.open_exposure == 0 and risk.get_status()['pending_orders'] == 0
+    assert (await state.snapshot()).daily_trades == 1
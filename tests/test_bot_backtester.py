@@ -0,0 +1,94 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from batch_orders import DECIDED_RESULTS
+from bot_backtester import BotBacktester, TrendFollowingAdapter, bar_events
+from bot_state import BotState
+from candle_store import write_candles
+from replay_pocketoption import WARMUP_BARS, ReplayPocketOptionAsync
+
+START = 1_699_999_200  # múltiplo de 900: M5 y M15 alineadas
+PAIRS = ["EURUSD_otc", "GBPUSD_otc"]
+
+
+def _history(directory, n=400, seed=3):
+    """Tendencia con retrocesos (cruces de EMA) y ruido con semilla."""
+    rng = np.random.default_rng(seed)
+    for k, pair in enumerate(PAIRS):
+        i = np.arange(n)
+        close = 1.1 + 0.004 * np.sin(i / (12 + 3 * k)) + 0.00002 * i + rng.normal(0, 0.0003, n)
+        open_ = np.r_[close[0], close[:-1]]
+        df = pd.DataFrame({'time': START + 300 * i, 'open': open_, 'close': close,
+                           'high': np.maximum(open_, close) + 0.0002,
+                           'low': np.minimum(open_, close) - 0.0002, 'volume': 1.0})
+        write_candles(str(directory / f"{pair}_M5.candles"), df, pair, 300)
+
+
+def test_bar_events_merge_pairs_and_timeframes(tmp_path):
+    _history(tmp_path, n=200)
+    api = ReplayPocketOptionAsync(history_dir=str(tmp_path), speed=None)
+    times, flags = bar_events(api, PAIRS, (300, 900), api.start, api.end)
+    assert np.all(np.diff(times) == 300) and flags[300].all()
+    assert np.array_equal(flags[900], times % 900 == 0)  # M15 agregada desde M5
+    assert api.start + 300 <= times[0] and times[-1] < api.end
+
+
+def test_ema_backtest_runs_real_signal_code(tmp_path):
+    _history(tmp_path)
+    first = BotBacktester("ema", history_dir=str(tmp_path), pairs=PAIRS).run()
+    again = BotBacktester("ema", history_dir=str(tmp_path), pairs=PAIRS).run()
+
+    assert first['events'] == 400 - WARMUP_BARS - 2  # una por vela M5 cerrada en el rango
+    assert first['trades'] > 0 and first['open_trades'] <= 1  # la última puede vencer después del final
+    assert {k: v for k, v in first.items() if k not in ('wall_seconds', 'events_per_sec')} == \
+           {k: v for k, v in again.items() if k not in ('wall_seconds', 'events_per_sec')}
+
+
+def test_round_backtest_restores_module_api(tmp_path):
+    _history(tmp_path)
+    from bots import bot_round_levels
+    live_api = bot_round_levels.api
+
+    bt = BotBacktester("round", history_dir=str(tmp_path), pairs=PAIRS)
+    report = bt.run()
+    assert report['events'] > 0 and report['trades'] == len(bt.trades)
+    assert bot_round_levels.api is live_api
+    assert report['balance'] == pytest.approx(bt.equity_curve()[-1]) == pytest.approx(bt.api._balance)
+
+
+def test_trend_backtest_goes_through_run_cycle(tmp_path, monkeypatch):
+    from bots import base_bot
+    from logger_config import setup_logger
+    # El log del bot (líneas con fechas del reloj virtual) va a tmp_path, no a logs/ versionado
+    monkeypatch.setattr(base_bot, "setup_logger", lambda name, log_file, level: setup_logger(
+        f"{name}_test", str(tmp_path / os.path.basename(log_file)), level))
+    _history(tmp_path, n=260)
+    bt = BotBacktester("trend", history_dir=str(tmp_path), pairs=PAIRS[:1])
+    report = bt.run()
+    state = bt.adapter.bot.bot_state
+    snapshot = state._total, state._daily_trades
+    # Órdenes de execute_trade() al replay; cada liquidación vuelve a bot_state
+    assert report['trades'] == len(bt.trades)
+    assert snapshot[0] == sum(t['result'] in DECIDED_RESULTS for t in bt.trades)
+    assert report['events'] == 260 - WARMUP_BARS - 2
+
+    with pytest.raises(ValueError):
+        BotBacktester("martingala")
+
+
+@pytest.mark.asyncio
+async def test_trend_adapter_skips_draws():
+    adapter = TrendFollowingAdapter(api=None)
+    adapter.bot = SimpleNamespace(bot_state=BotState())
+    closed = {'profit': 0.0, 'closeTimestamp': START}
+    await adapter.on_settled(dict(closed, result="draw"))
+    await adapter.on_settled(dict(closed, result="loss", profit=-1.0))
+    # El draw no cuenta: solo la pérdida llega a bot_state, igual que en vivo
+    stats = await adapter.bot.bot_state.snapshot()
+    assert stats.total == 1 and stats.daily_losses == 1
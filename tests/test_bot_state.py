@@ -0,0 +1,70 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import date
+
+import pytest
+from bot_state import BotState
+from risk_manager import RiskManager
+
+
+@pytest.mark.asyncio
+async def test_rolling_window_matches_naive_after_wraparound():
+    state = BotState(history_size=50)
+    results = [(i % 3 != 0, 0.9 if i % 3 else -1.0) for i in range(137)]
+    for win, pnl in results:
+        await state.add_trade(win, pnl=pnl)
+
+    for window in (1, 10, 20, 50, 500):
+        recent = results[-min(window, 50):]
+        assert await state.get_rolling_winrate(window) == sum(w for w, _ in recent) / len(recent)
+        assert await state.get_rolling_pnl(window) == pytest.approx(sum(p for _, p in recent))
+
+    history = await state.get_trade_history()
+    assert len(history) == 50 and [h['win'] for h in history] == [w for w, _ in results[-50:]]
+    assert len(await state.get_trade_history(limit=5)) == 5
+
+
+@pytest.mark.asyncio
+async def test_winrate_needs_minimum_trades():
+    state = BotState()
+    for _ in range(9):
+        await state.add_trade(True)
+    assert await state.get_rolling_winrate() is None
+    await state.add_trade(False)
+    assert await state.get_rolling_winrate() == 0.9
+
+
+@pytest.mark.asyncio
+async def test_record_result_and_snapshot():
+    state = BotState()
+    await state.set_initial_balance(1000.0)
+    await state.increment_daily_trades()
+    await state.record_result(False, pnl=-10.0)
+    await state.record_result(False, pnl=-10.0)
+
+    snap = await state.snapshot()
+    assert (snap.daily_trades, snap.daily_losses, snap.streak_losses) == (1, 2, 2)
+    assert (snap.total, snap.wins, snap.losses, snap.history_len) == (2, 0, 2, 2)
+    assert snap.rolling_pnl == -20.0 and snap.rolling_winrate is None
+    assert snap.initial_balance == 1000.0
+
+    await state.record_result(True, pnl=9.2)
+    assert (await state.snapshot()).streak_losses == 0
+
+    # Nuevo día: los contadores diarios vuelven a cero
+    state._last_reset = date(2000, 1, 1)
+    daily = await state.get_daily_stats()
+    assert daily['trades'] == 0 and daily['losses'] == 0
+
+
+@pytest.mark.asyncio
+async def test_risk_manager_reads_snapshot():
+    rm = RiskManager(max_daily_losses=2, risk_per_trade=0.02, max_drawdown=0.10, demo_mode=False)
+    state = BotState()
+    await state.set_initial_balance(1000.0)
+    assert await rm.can_trade(1000.0, state) == (True, "$20.00")
+
+    can, reason = await rm.can_trade(850.0, state)
+    assert can is False and "Drawdown" in reason
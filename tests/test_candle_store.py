@@ -0,0 +1,63 @@
+import json
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from candle_store import CandleFile, candles_path, convert_history, load_candle_frames, split_key, write_candles
+from payout_cache import PayoutSeries
+
+
+def _frame(n=500, start=1_700_000_000, step=300):
+    close = np.linspace(1.0, 1.1, n)
+    return pd.DataFrame({
+        'time': start + step * np.arange(n),
+        'open': close, 'high': close + 0.001, 'low': close - 0.001, 'close': close,
+        'volume': np.arange(n, dtype=float),
+    })
+
+
+def test_roundtrip_and_range_slicing(tmp_path):
+    path = str(tmp_path / "EURUSD_otc_M5.candles")
+    df = _frame()
+    write_candles(path, df.sample(frac=1, random_state=0), "EURUSD_otc", 300)
+
+    candles = CandleFile(path)
+    assert len(candles) == 500
+    assert candles.pair == "EURUSD_otc" and candles.interval == 300
+    assert isinstance(candles.records, np.memmap)
+    np.testing.assert_array_equal(candles.times, df['time'].values)
+
+    start, end = df['time'][100], df['time'][200]
+    part = candles.range(start, end)
+    assert len(part) == 100
+    assert part['time'][0] == start and part['time'][-1] == df['time'][199]
+    assert len(candles.range(end=df['time'][0])) == 0
+    assert len(candles.last(10)) == 10
+
+
+def test_convert_merges_csv_and_json_duplicates(tmp_path):
+    df = _frame(300)
+    df.to_csv(tmp_path / "EURUSD_otc_M5.csv", index=False)
+    os.makedirs(tmp_path / "EURUSD")
+    overlap = df.iloc[250:].to_dict('records') + _frame(10, start=int(df['time'].iloc[-1]) + 300).to_dict('records')
+    with open(tmp_path / "EURUSD" / "M5.json", "w") as f:
+        json.dump({'pair': 'EURUSD', 'tf': 'M5', 'candles': overlap}, f)
+
+    converted = convert_history(str(tmp_path))
+    assert converted == [candles_path("EURUSD_otc", "M5", str(tmp_path))]
+
+    candles = CandleFile(converted[0])
+    assert len(candles) == 310
+    assert np.all(np.diff(candles.times) == 300)
+
+
+def test_frame_keys_split_to_recorded_payout_assets(tmp_path):
+    write_candles(str(tmp_path / "EURUSD_otc_M5.candles"), _frame(10), "EURUSD_otc", 300)
+    payouts = PayoutSeries({'EURUSD_otc': (np.array([0.0]), np.array([0.81]))}, default=0.92)
+
+    (key, df), = load_candle_frames(str(tmp_path)).items()
+    pair, tf = split_key(key)
+    assert (pair, tf) == ("EURUSD_otc", "M5")
+    assert payouts.at(pair, 1_700_000_000) == 0.81  # no el default
@@ -0,0 +1,94 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from candle_store import write_candles
+from candles import Candles, decode_candles, fetch_candles
+from mock_pocketoption import PocketOptionAsync
+from replay_pocketoption import ReplayPocketOptionAsync
+
+ROWS = [
+    {"time": 1_700_000_000 + 300 * i, "open": 1.0 + i, "high": 2.0 + i, "low": 0.5 + i,
+     "close": 1.5 + i, "volume": 10 + i}
+    for i in range(5)
+]
+
+
+def test_rows_match_dataframe_pipeline():
+    expected = pd.DataFrame(ROWS)[['time', 'open', 'close', 'high', 'low']]
+    expected['time'] = pd.to_datetime(expected['time'], unit='s')
+    expected = expected.set_index('time').astype(float)
+
+    candles = Candles.from_rows(ROWS)
+    assert candles.time.dtype == np.int64 and candles.close.dtype == np.float64
+    pd.testing.assert_frame_equal(candles.to_frame(), expected, check_index_type=False)
+    assert candles.volume.tolist() == [10, 11, 12, 13, 14]
+
+
+def test_json_and_aliases():
+    payload = json.dumps([{"t": r["time"], "o": r["open"], "h": r["high"], "l": r["low"], "c": r["close"]}
+                          for r in ROWS])
+    candles = decode_candles(payload)
+    assert candles.time.tolist() == [r["time"] for r in ROWS]
+    assert candles.high.tolist() == [r["high"] for r in ROWS]
+    assert not candles.volume.any()
+
+    iso = decode_candles([{"timestamp": "2023-11-14T22:13:20Z", "open": 1, "close": 2, "high": 3, "low": 0}])
+    assert iso.time.tolist() == [1_700_000_000]
+
+
+def test_rows_with_missing_values_are_dropped():
+    rows = ROWS[:2] + [{"time": None, "open": 1, "close": 1, "high": 1, "low": 1}, {"time": 5, "open": 1}]
+    candles = Candles.from_rows(rows)
+    assert len(candles) == 2
+    assert not decode_candles([]) and not decode_candles(None)
+
+
+def test_views_and_records():
+    candles = Candles.from_rows(ROWS)
+    records = candles.to_records()
+    back = Candles.from_records(records)
+    assert np.shares_memory(back.close, records)  # vistas, sin copia
+    assert back.tail(2).time.tolist() == candles.time[-2:].tolist()
+    assert candles['close'] is candles.close
+
+    shuffled = Candles.from_rows(ROWS[::-1] + ROWS[:1])
+    assert shuffled.sorted().time.tolist() == candles.time.tolist()
+
+
+@pytest.mark.asyncio
+async def test_fetch_candles_sources(tmp_path):
+    mock = PocketOptionAsync()
+    mock.delays = dict.fromkeys(mock.delays, 0)
+    raw = await mock.get_candles("EURUSD_otc", 60, 6000)
+    candles = await fetch_candles(mock, "EURUSD_otc", 60, 6000)
+    assert candles.close.tolist() == [c["close"] for c in raw]
+
+    start = 1_700_000_000
+    write_candles(str(tmp_path / "EURUSD_otc_M5.candles"), pd.DataFrame(ROWS), "EURUSD_otc", 300)
+    replay = ReplayPocketOptionAsync(history_dir=str(tmp_path), start=start + 300 * 5, speed=None, latency=0)
+    arrays = await fetch_candles(replay, "EURUSD_otc", 300, 300 * 3)
+    rows = await replay.get_candles("EURUSD_otc", 300, 300 * 3)
+    assert arrays.time.tolist() == [r["time"] for r in rows] and len(arrays) == 3
+    assert arrays.close.tolist() == [r["close"] for r in rows]
+
+
+@pytest.mark.asyncio
+async def test_fetch_candles_decodes_raw_rust_json():
+    class RawPocketOption:
+        async def get_candles(self, asset, period, offset):
+            return json.dumps(ROWS)
+
+    class RealClient:
+        client = RawPocketOption()
+
+        async def get_candles(self, *args):
+            raise AssertionError("debería usar el JSON crudo")
+
+    candles = await fetch_candles(RealClient(), "EURUSD_otc", 300, 1500)
+    assert candles.close.tolist() == [r["close"] for r in ROWS]
@@ -0,0 +1,96 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+
+import pytest
+from client_pool import ClientPool, LoopThread, SyncPocketOption, account_key
+from mock_pocketoption import PocketOptionAsync
+from session_manager import CLOSED, CONNECTED, SessionManager
+
+SSID_DEMO = '42["auth",{"session":"abc","isDemo":1,"uid":123,"platform":2}]'
+SSID_DEMO_NEW = '42["auth",{"session":"xyz","isDemo":1,"uid":123,"platform":2}]'
+SSID_REAL = '42["auth",{"session":"abc","isDemo":0,"uid":123,"platform":2}]'
+
+
+class Factory:
+    def __init__(self):
+        self.created = []
+
+    def __call__(self, ssid):
+        api = PocketOptionAsync(ssid)
+        api.delays = dict.fromkeys(api.delays, 0)
+        self.created.append(api)
+        return api
+
+
+def _pool(factory):
+    return ClientPool(factory, env_file=None, connect_grace=0, heartbeat_interval=None)
+
+
+def test_account_key():
+    assert account_key(SSID_DEMO) == account_key(SSID_DEMO_NEW) == "123:demo"
+    assert account_key(SSID_REAL) == "123:real"
+    assert account_key("plain-ssid") == "plain-ssid"
+
+
+def test_pool_shares_sessions_per_account():
+    pool = _pool(Factory())
+    a = pool.get(SSID_DEMO, name="ema")
+    assert pool.get(SSID_DEMO, name="round") is a
+    assert pool.get(SSID_REAL) is not a and len(pool) == 2
+
+    # SSID renovado de la misma cuenta: misma sesión, SSID nuevo
+    assert pool.get(SSID_DEMO_NEW) is a and a.ssid == SSID_DEMO_NEW
+
+
+def test_sync_facade_reuses_warm_connection():
+    factory = Factory()
+    pool, thread = _pool(factory), LoopThread("test-loop")
+    try:
+        api = SyncPocketOption(SSID_DEMO, pool=pool, thread=thread, timeout=10)
+        assert api.connect(timeout=10)
+        assert api.balance() == 1000.0
+        assert len(api.get_candles_array("EURUSD_otc", 60, 600)) == 10
+
+        # Otro "script"/ventana en el mismo proceso: sin reconectar
+        with SyncPocketOption(SSID_DEMO, pool=pool, thread=thread) as again:
+            pass
+        assert again.session is api.session
+        assert len(factory.created) == 1 and api.status()['state'] == CONNECTED
+
+        api.close()
+        assert len(pool) == 0 and api.session.state == CLOSED
+    finally:
+        thread.stop()
+    assert not thread.running
+
+
+@pytest.mark.asyncio
+async def test_async_context_and_close_all():
+    factory = Factory()
+    async with SessionManager("s", factory=factory, env_file=None, connect_grace=0,
+                              heartbeat_interval=None) as api:
+        assert api.connected and await api.balance() == 1000.0
+    assert api.state == CLOSED and api.client is None
+
+    pool = _pool(factory)
+    async with pool.session(SSID_DEMO) as pooled:
+        assert pooled.connected
+    assert pooled.connected  # queda caliente en el pool
+    await pool.close_all()
+    assert not pooled.connected and len(pool) == 0
+
+
+def test_session_survives_a_new_event_loop():
+    factory = Factory()
+    session = SessionManager("s", factory=factory, env_file=None, connect_grace=0, heartbeat_interval=None)
+
+    async def balance():
+        return await session.balance()
+
+    # Como la GUI al arrancar/detener: cada asyncio.run es un loop nuevo
+    assert asyncio.run(balance()) == 1000.0
+    assert asyncio.run(balance()) == 1000.0
+    assert len(factory.created) == 2
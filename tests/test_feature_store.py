@@ -0,0 +1,81 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from feature_store import EMA7_FEATURES, FeatureStore, features_from_trades, pair_index
+
+
+def _candles(n=120):
+    rng = np.random.default_rng(3)
+    close = 1.10 + np.cumsum(rng.normal(0, 0.0005, n))
+    return pd.DataFrame({
+        'time': 1_700_000_000 + 60 * np.arange(n),
+        'open': close,
+        'close': close,
+        'high': close + 0.0002,
+        'low': close - 0.0002,
+    })
+
+
+def test_pair_index_is_stable():
+    assert pair_index("EURUSD_otc") == 0
+    assert pair_index("GBPUSD") == pair_index("GBPUSD_otc") == 1
+    assert pair_index("XAUUSD_otc") == 0
+
+
+def test_last_bar_features_match_warm_history():
+    df = _candles()
+    store = FeatureStore()
+    full = store.warm(df, "GBPUSD_otc", 300)
+
+    fresh = FeatureStore()
+    for i in (60, 90, len(df) - 1):
+        row = fresh.bar_features(df.iloc[:i + 1], "GBPUSD_otc", 300)
+        np.testing.assert_allclose(row, full[i])
+
+    assert full[0, EMA7_FEATURES.index('duration_minutes')] == 5
+    assert full[0, EMA7_FEATURES.index('pair_idx')] == 1
+
+
+def test_cached_bars_are_not_recomputed():
+    df = _candles()
+    store = FeatureStore()
+    store.warm(df, "EURUSD_otc", 60)
+    store.bar_features(df.iloc[:80], "EURUSD_otc", 60)
+    assert store.stats()['hits'] == 1
+    assert store.bar_features(df.iloc[:10], "EURUSD_otc", 60) is None
+
+
+def test_forming_bar_is_recomputed_when_its_close_moves():
+    df = _candles()
+    store = FeatureStore()
+    first = store.bar_features(df, "EURUSD_otc", 60)
+
+    moved = df.copy()
+    moved.loc[moved.index[-1], 'close'] += 0.002  # misma vela (epoch), otro tick
+    row = store.bar_features(moved, "EURUSD_otc", 60)
+    np.testing.assert_allclose(row, FeatureStore().warm(moved, "EURUSD_otc", 60)[-1])
+    assert row[EMA7_FEATURES.index('price')] != first[EMA7_FEATURES.index('price')]
+    assert store.stats()['hits'] == 0
+
+    store.bar_features(moved, "EURUSD_otc", 60)  # mismo tick: cache
+    assert store.stats()['hits'] == 1
+
+
+def test_features_from_trades():
+    trades = pd.DataFrame({
+        'timestamp': ['2025-01-01 13:30:00', '2025-01-01 06:00:00'],
+        'pair': ['USDCAD_otc', 'UNKNOWN'],
+        'price': [1.35, 1.1],
+        'ema': [1.34, 1.09],
+        'expiry_time': [300, 60],
+        'result': ['WIN', 'LOSS'],
+    })
+    X, y = features_from_trades(trades)
+    assert X.shape == (2, 7)
+    assert list(y) == [1, 0]
+    assert list(X[:, 2]) == [3, 0]
+    assert list(X[:, 1]) == [5, 1]
+    assert X[0, 6] == 13 / 24
@@ -0,0 +1,71 @@
+import json
+import os
+import sys
+import urllib.request
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from instrumentation import ALL_PAIRS, Instrumentation, LatencyHistogram
+
+
+def test_histogram_percentiles_within_bucket_error():
+    rng = np.random.default_rng(0)
+    samples = rng.lognormal(mean=np.log(5e6), sigma=0.8, size=20000).astype(np.int64)
+    hist = LatencyHistogram()
+    for v in samples:
+        hist.record(int(v))
+
+    for q, value in zip((0.5, 0.95, 0.99), hist.percentiles((0.5, 0.95, 0.99))):
+        expected = np.percentile(samples, q * 100)
+        assert abs(value - expected) / expected < 0.07
+    assert hist.count == len(samples)
+    assert hist.max_ns == samples.max() and hist.min_ns == samples.min()
+
+
+def test_timer_records_per_bot_stage_and_pair():
+    metrics = Instrumentation(enabled=True)
+    metrics.bind_bot("trend_following")
+    with metrics.timer('fetch_candles', 'EURUSD_otc'):
+        pass
+    metrics.record('fetch_candles', 2_000_000, 'GBPUSD_otc')
+    metrics.record('risk_check', 500_000, bot='ema_pullback')
+
+    rows = {(r['bot'], r['stage'], r['pair']): r for r in metrics.snapshot()}
+    assert rows[('trend_following', 'fetch_candles', ALL_PAIRS)]['count'] == 2
+    assert rows[('trend_following', 'fetch_candles', 'GBPUSD_otc')]['max_ms'] == 2.0
+    assert ('ema_pullback', 'risk_check', ALL_PAIRS) in rows
+    assert len(metrics.snapshot('ema_pullback')) == 1
+
+
+def test_disabled_is_a_no_op():
+    metrics = Instrumentation(enabled=False)
+    with metrics.timer('cycle'):
+        pass
+    metrics.record('cycle', 1000)
+    assert metrics.snapshot() == []
+    assert metrics.serve(port=0) is None
+
+
+def test_http_endpoint_serves_prometheus_and_json():
+    metrics = Instrumentation(enabled=True)
+    metrics.record('ml_predict', 3_000_000, 'EURUSD_otc', bot='ema_pullback')
+    server = metrics.serve(port=0, host="127.0.0.1")
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        text = urllib.request.urlopen(f"{base}/metrics", timeout=5).read().decode()
+        assert 'bot_stage_latency_seconds{bot="ema_pullback",stage="ml_predict",pair="EURUSD_otc",quantile="0.99"}' in text
+        assert 'bot_stage_latency_seconds_count{bot="ema_pullback",stage="ml_predict",pair="*"} 1' in text
+
+        payload = json.loads(urllib.request.urlopen(f"{base}/metrics.json", timeout=5).read())
+        assert payload['enabled'] and len(payload['stages']) == 2
+    finally:
+        metrics.stop_server()
+
+
+def test_format_report_lists_stages_and_slow_pairs():
+    metrics = Instrumentation(enabled=True)
+    metrics.record('fetch_candles', 40_000_000, 'USDCOP_otc', bot='ema_pullback')
+    metrics.record('fetch_candles', 10_000_000, 'EURUSD_otc', bot='ema_pullback')
+    report = metrics.format_report()
+    assert "fetch_candles" in report and "ema_pullback" in report
+    assert report.index("USDCOP_otc") < report.index("EURUSD_otc")
@@ -0,0 +1,61 @@
+import os
+import sys
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lazy_loader import LazyObject, init_seconds, is_initialized, lazy_import, resolve
+from startup_report import parse_importtime
+
+
+class Counter:
+    created = 0
+
+    def __init__(self):
+        Counter.created += 1
+        self.value = 0
+
+
+def test_lazy_object_builds_once_on_first_use():
+    Counter.created = 0
+    proxy = LazyObject(Counter, "counter")
+    assert not is_initialized(proxy) and Counter.created == 0
+    assert "pending" in repr(proxy)
+
+    threads = [threading.Thread(target=lambda: proxy.value) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    proxy.value = 5
+    assert Counter.created == 1
+    assert resolve(proxy).value == 5 and isinstance(resolve(proxy), Counter)
+    assert is_initialized(proxy) and init_seconds(proxy) >= 0
+
+
+def test_lazy_import_defers_module_load():
+    module = lazy_import("json")
+    assert not is_initialized(module)
+    assert module.loads("[1]") == [1]
+
+
+def test_importing_singleton_modules_has_no_side_effects():
+    threads_before = threading.active_count()
+    import ml_model_manager
+    import telegram_formatter
+    import trade_logger
+
+    assert threading.active_count() == threads_before
+    assert not is_initialized(ml_model_manager.ml_manager)
+    assert not is_initialized(telegram_formatter.telegram)
+
+
+def test_parse_importtime_only_after_marker():
+    stderr = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        100 | encodings",
+        "__startup_report__",
+        "import time:       200 |        200 |   numpy.core",
+        "import time:       300 |        500 | numpy",
+    ])
+    assert parse_importtime(stderr) == [("numpy.core", 200, 200, 1), ("numpy", 300, 500, 0)]
@@ -0,0 +1,55 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from ml_calibration import (
+    WILDCARD, ThresholdTable, build_threshold_table, calibration_path_for, optimal_threshold
+)
+
+
+def _synthetic_trades(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    proba = rng.uniform(0.4, 0.95, n)
+    pair = rng.choice(["EURUSD_otc", "GBPUSD_otc"], n)
+    # GBP is overconfident: its probabilities win far less often
+    true_p = np.where(pair == "GBPUSD_otc", proba - 0.2, proba)
+    win = (rng.uniform(size=n) < true_p).astype(int)
+    return pd.DataFrame({
+        'proba': proba,
+        'win': win,
+        'pair': pair,
+        'hour': rng.integers(0, 24, n),
+        'timeframe': "M5",
+    })
+
+
+def test_calibration_path_next_to_model():
+    assert calibration_path_for("models/ml_model.pkl") == os.path.join("models", "ml_model_calibration.npz")
+
+
+def test_optimal_threshold_needs_trades():
+    proba = np.array([0.55, 0.6])
+    wins = np.array([1, 0])
+    assert optimal_threshold(proba, wins, min_accepted=5) is None
+
+
+def test_table_roundtrip_and_wildcards(tmp_path):
+    table = build_threshold_table(_synthetic_trades(), min_trades=50)
+
+    path = str(tmp_path / "ml_model_calibration.npz")
+    table.save(path)
+    loaded = ThresholdTable.load(path)
+
+    assert loaded.pairs == table.pairs
+    assert loaded.meta['n_trades'] == 2000
+    np.testing.assert_array_equal(loaded.table, table.table)
+
+    # Calibration is monotone and inside [0, 1]
+    assert np.all(np.diff(loaded.calibration) >= -1e-6)
+    assert 0.0 <= loaded.calibrate(0.7) <= 1.0
+
+    # Unknown pair/timeframe fall back to the wildcard entries
+    assert loaded.threshold_for("XAUUSD_otc", 10, "M15") == loaded.threshold_for(WILDCARD, 10, WILDCARD)
+    assert loaded.accepts(1.0, "EURUSD_otc", 3, "M5")
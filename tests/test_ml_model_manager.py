@@ -0,0 +1,59 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+
+import joblib
+from ml_model_manager import MLModelManager
+
+
+def _manager(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)  # backups, metadata y shadow log quedan en tmp_path
+    monkeypatch.setattr(MLModelManager, "start_monitor", lambda self: None)
+    monkeypatch.setattr(MLModelManager, "start_shadow_worker", lambda self: None)
+    joblib.dump({'model': 'prod'}, "ml_model.pkl")
+    json.dump({'training_date': 'prod'}, open("ml_model_metadata.json", "w"))
+    return MLModelManager(auto_train_enabled=False, promote_min_trades=5)
+
+
+def _candidate(name, mtime):
+    joblib.dump({'model': name}, "ml_model_candidate.pkl")
+    json.dump({'training_date': name}, open("ml_model_candidate_metadata.json", "w"))
+    os.utime("ml_model_candidate.pkl", (mtime, mtime))
+
+
+def _shadow_trades(manager, n, start=0):
+    for i in range(start, start + n):
+        manager.shadow_book.add(str(i), prod_proba=0.7, cand_proba=0.9)
+        manager.record_shadow_result(str(i), "WIN", 0.92)
+
+
+def test_promotion_moves_metadata_and_resets_shadow_book(monkeypatch, tmp_path):
+    manager = _manager(monkeypatch, tmp_path)
+    _candidate("cand1", 1_700_000_000)
+    assert manager.load_candidate()
+    _shadow_trades(manager, 5)
+
+    assert manager.check_promotion()
+    assert manager.model == {'model': 'cand1'} and manager.candidate_model is None
+    assert json.load(open("ml_model_metadata.json"))['training_date'] == 'cand1'
+    assert not os.path.exists("ml_model_candidate_metadata.json")
+    assert manager.get_shadow_metrics()['n'] == 0
+
+    # El segundo candidato necesita sus propios promote_min_trades trades liquidados
+    _shadow_trades(manager, 3, start=100)  # puntuados antes de que exista el candidato
+    _candidate("cand2", 1_700_000_100)
+    assert manager.load_candidate()
+    assert manager.get_shadow_metrics()['n'] == 0
+    _shadow_trades(manager, 4, start=200)
+    assert not manager.check_promotion()
+    _shadow_trades(manager, 1, start=300)
+    assert manager.check_promotion() and manager.model == {'model': 'cand2'}
+
+
+def test_threshold_falls_back_to_caller_default(monkeypatch, tmp_path):
+    manager = _manager(monkeypatch, tmp_path)
+    assert manager.threshold_table is None
+    assert manager.get_threshold("EURUSD_otc", 10, "M5", default=0.60) == 0.60
+    assert manager.get_threshold("EURUSD_otc", 10, "M5") == manager.ml_threshold
@@ -0,0 +1,68 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+
+import pandas as pd
+import pytest
+from mock_pocketoption import PocketOptionAsync
+from payout_cache import PayoutCache, PayoutSeries, breakeven_probability, expected_value
+
+
+def _api():
+    api = PocketOptionAsync()
+    api.delays = dict.fromkeys(api.delays, 0)
+    return api
+
+
+def test_breakeven_and_ev():
+    assert breakeven_probability(0.92) == pytest.approx(0.5208, abs=1e-4)
+    assert expected_value(breakeven_probability(0.80), 0.80) == pytest.approx(0.0)
+    assert expected_value(0.6, 0.92) > 0 > expected_value(0.5, 0.92)
+
+
+@pytest.mark.asyncio
+async def test_refresh_and_gate(tmp_path):
+    api = _api()
+    cache = PayoutCache(api, record_dir=str(tmp_path))
+    assert await cache.refresh()
+    assert cache.get('EURUSD_otc') == 0.92 and not cache.is_stale()
+
+    # Umbral ML nunca por debajo del breakeven al payout actual
+    assert cache.min_probability('USDCOP_otc', 0.50) == pytest.approx(1 / 1.70)
+    assert cache.min_probability('EURUSD_otc', 0.62) == 0.62
+    assert cache.min_probability('UNKNOWN', 0.50) == 0.50
+
+    assert cache.allows('EURUSD_otc', 0.60)[0]
+    assert not cache.allows('EURUSD_otc', 0.51)[0]
+    assert not cache.allows('USDARS_otc')[0]          # 65% < MIN_PAYOUT
+    assert cache.allows('UNKNOWN', 0.10)[0]           # sin datos no bloquea
+
+    api.payouts['EURUSD_otc'] = 0                     # activo cerrado
+    await cache.refresh()
+    allowed, reason = cache.allows('EURUSD_otc', 0.99)
+    assert not allowed and "cerrado" in reason
+
+
+@pytest.mark.asyncio
+async def test_background_refresh_records_changes_and_replays(tmp_path):
+    api = _api()
+    cache = PayoutCache(api, refresh_interval=0.01, record_dir=str(tmp_path))
+    cache.start()
+    await asyncio.sleep(0.03)
+    api.payouts['EURUSD_otc'] = 80
+    await asyncio.sleep(0.05)
+    cache.stop()
+    assert cache.refreshes >= 3 and cache.get('EURUSD_otc') == 0.80
+
+    # Solo se registran cambios: una fila por activo + el cambio de EURUSD
+    recorded = pd.concat(pd.read_csv(os.path.join(tmp_path, f)) for f in os.listdir(tmp_path))
+    assert len(recorded) == len(api.payouts) + 1
+
+    series = PayoutSeries.load(str(tmp_path), default=0.85)
+    times = series.series['EURUSD_otc'][0]
+    assert series.at('EURUSD_otc', times[0]) == 0.92
+    assert series.at('EURUSD_otc', times[-1] + 60) == 0.80
+    assert series.at('EURUSD_otc', times[0] - 60) == 0.85
+    assert series.at('UNKNOWN', times[0]) == 0.85
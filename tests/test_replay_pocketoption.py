@@ -0,0 +1,82 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import pytest
+from candle_store import candles_path, write_candles
+from replay_pocketoption import ReplayClock, ReplayFinished, ReplayPocketOptionAsync, resample
+
+START = 1_700_000_100 // 300 * 300
+
+
+def _history(tmp_path, n=400):
+    close = 1.10 + 0.0001 * np.arange(n)  # steady uptrend: calls win
+    df = pd.DataFrame({
+        'time': START + 300 * np.arange(n),
+        'open': close - 0.00005, 'high': close + 0.0002, 'low': close - 0.0002, 'close': close,
+        'volume': 1.0,
+    })
+    write_candles(candles_path("EURUSD_otc", "M5", str(tmp_path)), df, "EURUSD_otc", 300)
+    return df
+
+
+@pytest.mark.asyncio
+async def test_candles_never_leak_the_future(tmp_path):
+    _history(tmp_path)
+    api = ReplayPocketOptionAsync(history_dir=str(tmp_path), speed=None)
+    now = api.clock.now()
+
+    candles = await api.get_candles("EURUSD_otc", 300, 300 * 50)
+    assert len(candles) == 50
+    assert all(c['time'] + 300 <= now for c in candles)
+
+    # Timeframe not stored: aggregated from M5
+    m15 = await api.get_candles("EURUSD_otc", 900, 900 * 10)
+    assert len(m15) == 10 and all(c['time'] % 900 == 0 for c in m15)
+
+
+@pytest.mark.asyncio
+async def test_trades_settle_from_future_close(tmp_path):
+    _history(tmp_path)
+    api = ReplayPocketOptionAsync(history_dir=str(tmp_path), speed=None, balance=100)
+
+    call_id, _ = await api.buy("EURUSD_otc", 10, 300)
+    put_id, _ = await api.sell("EURUSD_otc", 10, 300)
+    assert await api.balance() == 80
+
+    win = await api.check_win(call_id)
+    loss = await api.check_win(put_id)
+    assert win['result'] == "win" and win['profit'] == pytest.approx(9.2)
+    assert loss['result'] == "loss" and loss['profit'] == -10
+    assert await api.balance() == pytest.approx(100 + 9.2 - 10)
+    assert api.summary()['trades'] == 2
+
+
+@pytest.mark.asyncio
+async def test_replay_ends_with_history(tmp_path):
+    _history(tmp_path, n=150)
+    api = ReplayPocketOptionAsync(history_dir=str(tmp_path), speed=None)
+    with pytest.raises(ReplayFinished):
+        for _ in range(1000):
+            await api.clock.sleep(300)
+            await api.get_candles("EURUSD_otc", 300, 3000)
+
+
+@pytest.mark.asyncio
+async def test_scaled_clock_runs_faster_than_real_time():
+    clock = ReplayClock(START, speed=10000)
+    await clock.sleep(60)
+    assert clock.now() - START >= 60
+
+
+def test_resample_ohlc():
+    records = np.zeros(6, dtype=[('time', '<i8'), ('open', '<f8'), ('high', '<f8'),
+                                 ('low', '<f8'), ('close', '<f8'), ('volume', '<f8')])
+    records['time'] = 900 * 10 + 300 * np.arange(6)
+    records['open'] = records['close'] = records['high'] = records['low'] = np.arange(6)
+    records['volume'] = 1
+    out = resample(records, 900)
+    assert list(out['open']) == [0, 3] and list(out['close']) == [2, 5]
+    assert list(out['volume']) == [3, 3]
@@ -0,0 +1,117 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+import bot_state
+from bot_state import BotState
+from risk_manager import RiskManager
+from risk_simulator import apply_policy, build_blocks, load_outcomes, policy, sample_days, simulate
+
+CONFIG = policy(max_daily_losses=3, max_daily_trades=6, risk_per_trade=0.05, max_drawdown=0.15,
+                streak_limit=4, max_risk_per_trade=0.05, demo_mode=False)
+
+
+def _paths(n=60, days=5, width=6, seed=7):
+    rng = np.random.default_rng(seed)
+    wins = rng.choice(np.array([-1, 0, 1], dtype=np.int8), size=(n, days, width), p=[0.4, 0.15, 0.45])
+    payouts = rng.choice(np.array([0.8, 0.92], dtype=np.float32), size=wins.shape)
+    return wins, payouts
+
+
+async def _reference(wins, payouts, monkeypatch, balance=100.0):
+    """Un camino con el RiskManager y BotState reales, día por día."""
+    day0 = datetime(2025, 11, 20, tzinfo=timezone.utc)
+    now = {'t': day0}
+    monkeypatch.setattr(bot_state, "_utcnow", lambda: now['t'])
+    risk = RiskManager(**CONFIG)
+    state = BotState()
+    await state.set_initial_balance(balance)
+    for d in range(wins.shape[0]):
+        now['t'] = day0 + timedelta(days=d)
+        for t in range(wins.shape[1]):
+            if wins[d, t] == 0:
+                continue
+            allowed, _ = await risk.can_trade(balance, state)
+            if not allowed:
+                continue
+            amount = risk.calculate_position_size(balance)
+            await state.increment_daily_trades()
+            win = bool(wins[d, t] > 0)
+            balance += amount * float(payouts[d, t]) if win else -amount
+            await state.record_result(win)
+    return balance, risk.is_circuit_breaker_active()
+
+
+@pytest.mark.asyncio
+async def test_vectorized_policy_matches_risk_manager(monkeypatch):
+    wins, payouts = _paths()
+    result = apply_policy(wins, payouts, CONFIG)
+    for i in range(len(wins)):
+        final, breaker = await _reference(wins[i], payouts[i], monkeypatch)
+        assert result['final'][i] == pytest.approx(final, abs=1e-6)
+        assert result['breaker'][i] == breaker
+    assert result['breaker'].any() and result['streak_halt'].any()  # los dos frenos se ejercitan
+
+
+def test_limits_and_restart():
+    wins = np.full((1, 3, 6), -1, dtype=np.int8)  # solo pérdidas
+    payouts = np.full(wins.shape, 0.92, dtype=np.float32)
+    kept = apply_policy(wins, payouts, CONFIG)
+    # Día 1: 3 pérdidas (límite diario); día 2: la 4ª completa la racha, que ya no se corta
+    assert kept['trades'][0] == 4 and kept['streak_halt'][0]
+    restarted = apply_policy(wins, payouts, CONFIG, restart_daily=True)
+    assert restarted['trades'][0] == 9
+
+    demo = apply_policy(wins, payouts, {**CONFIG, 'demo_mode': True})
+    assert demo['trades'][0] == 18 and not demo['streak_halt'][0]
+
+
+def _outcomes(days=10, seed=1):
+    rng = np.random.default_rng(seed)
+    times = pd.Timestamp("2025-11-20", tz="UTC") + pd.to_timedelta(
+        np.sort(rng.uniform(0, days * 86400, days * 40)), unit='s')
+    return pd.DataFrame({'time': times, 'win': rng.random(len(times)) < 0.55, 'payout': 0.92})
+
+
+def test_day_and_hour_bootstrap_keep_history_blocks():
+    outcomes = _outcomes()
+    blocks = build_blocks(outcomes, cap=8)
+    assert blocks[0].shape[:2] == (10, 24) and (blocks[0] != 0).sum() <= len(outcomes)
+    rng = np.random.default_rng(0)
+
+    days = outcomes.groupby(outcomes['time'].dt.floor('D'))['win']
+    firsts = {tuple(np.where(g.to_numpy()[:8], 1, -1)) for _, g in days}
+    wins, payouts = sample_days(blocks, 200, 4, 8, 'day', rng)
+    assert all(tuple(row) in firsts for row in wins.reshape(-1, 8))  # días históricos enteros
+
+    wins, _ = sample_days(blocks, 200, 4, 8, 'hour', rng)
+    assert wins.shape == (200, 4, 8) and np.all(np.diff((wins != 0).astype(int), axis=-1) <= 0)
+    assert any(tuple(row) not in firsts for row in wins.reshape(-1, 8))  # horas de días distintos
+    with pytest.raises(ValueError):
+        sample_days(blocks, 1, 1, 8, 'week', rng)
+
+
+def test_simulate_reports_per_config_with_common_paths(tmp_path):
+    outcomes = _outcomes()
+    configs = [dict(risk_per_trade=0.01, max_drawdown=0.5, streak_limit=50, max_daily_losses=50),
+               dict(risk_per_trade=0.05, max_drawdown=0.5, streak_limit=50, max_daily_losses=50)]
+    table = simulate(outcomes, configs, paths=3000, days=10, seed=3, chunk_size=1000)
+    again = simulate(outcomes, configs, paths=3000, days=10, seed=3, chunk_size=1000)
+    pd.testing.assert_frame_equal(table, again)
+
+    low, high = table.iloc[0], table.iloc[1]
+    assert low['trades_per_day'] == pytest.approx(high['trades_per_day'])  # mismos caminos
+    assert high['dd_p95'] > low['dd_p95'] and 0 <= low['ruin_prob'] <= high['ruin_prob'] <= 1
+    assert table['dd_p50'].le(table['dd_p99']).all()
+
+    # Trades del logger: solo WIN/LOSS, payout en stakes
+    pd.DataFrame({'timestamp': ['2025-11-20 00:03:11', '2025-11-20 00:09:00', '2025-11-20 01:00:00'],
+                  'result': ['WIN', 'PENDING', 'LOSS'], 'profit_loss': [22.1, 0, -1]}) \
+        .to_csv(tmp_path / "trades_20251120.csv", index=False)
+    loaded = load_outcomes(str(tmp_path))
+    assert loaded['win'].tolist() == [True, False] and loaded['payout'].iloc[0] == pytest.approx(0.92)
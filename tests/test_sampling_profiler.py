@@ -0,0 +1,64 @@
+import asyncio
+import os
+import sys
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sampling_profiler import MAX_DURATION, SamplingProfiler, top_functions
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+def test_capture_writes_collapsed_stacks_for_named_threads(tmp_path):
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name="ml-shadow", daemon=True)
+    worker.start()
+    done = {}
+    try:
+        profiler = SamplingProfiler(output_dir=str(tmp_path), interval=0.001, name="test")
+        assert profiler.start(0.3, on_done=lambda path, stacks: done.update(path=path, stacks=stacks))
+        assert not profiler.start(1)  # una captura a la vez
+        profiler.join(5)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert os.path.exists(done['path']) and done['path'].endswith(".collapsed")
+    with open(done['path']) as f:
+        lines = f.read().splitlines()
+    assert lines and all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+    assert any(line.startswith("ml-shadow;") and "busy_loop" in line for line in lines)
+    assert not any(line.startswith("sampling-profiler;") for line in lines)
+    assert top_functions(done['stacks'])[0][1] > 0
+
+
+@pytest.mark.asyncio
+async def test_suspended_tasks_are_sampled(tmp_path):
+    async def wait_for_broker():
+        await asyncio.sleep(10)
+
+    task = asyncio.create_task(wait_for_broker(), name="fetch-EURUSD_otc")
+    await asyncio.sleep(0)
+    profiler = SamplingProfiler(output_dir=str(tmp_path))
+    profiler.attach_loop()
+
+    from collections import Counter
+    stacks = Counter()
+    profiler.sample_once(stacks)
+    task.cancel()
+
+    assert any(s.startswith("task:fetch-EURUSD_otc;") and "wait_for_broker" in s for s in stacks)
+
+
+def test_duration_must_be_positive_and_is_capped(tmp_path):
+    profiler = SamplingProfiler(output_dir=str(tmp_path))
+    for bad in (0, -5, float('nan')):
+        with pytest.raises(ValueError):
+            profiler.start(bad)
+    assert not profiler.running and os.listdir(tmp_path) == []
+    assert SamplingProfiler.capture_duration(MAX_DURATION + 1) == MAX_DURATION
+    assert SamplingProfiler.capture_duration(30) == 30
@@ -0,0 +1,53 @@
+import asyncio
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from mock_pocketoption import LatencyInjectingPocketOptionAsync, LatencyProfile, PocketOptionAsync
+from replay_pocketoption import ReplayClock
+from scan_harness import run_scenario
+
+
+@pytest.mark.asyncio
+async def test_injected_errors_and_timeouts():
+    clock = ReplayClock(1_700_000_000, speed=None)
+    with clock.patch():
+        failing = LatencyInjectingPocketOptionAsync(PocketOptionAsync(), LatencyProfile(error_rate=1.0))
+        with pytest.raises(ConnectionError):
+            await failing.get_candles("EURUSD_otc", 60, 6000)
+
+        hanging = LatencyInjectingPocketOptionAsync(PocketOptionAsync(), LatencyProfile(timeout_rate=1.0, timeout=30))
+        start = clock.now()
+        with pytest.raises(asyncio.TimeoutError):
+            await hanging.balance()
+        assert clock.now() - start == pytest.approx(30)
+        assert hanging.stats()['balance']['timeouts'] == 1
+
+
+@pytest.mark.asyncio
+async def test_session_expiry_returns_minus_one():
+    clock = ReplayClock(1_700_000_000, speed=None)
+    with clock.patch():
+        api = LatencyInjectingPocketOptionAsync(PocketOptionAsync(), LatencyProfile(median=1.0, session_expiry_after=5))
+        assert await api.balance() == 1000.0
+        await asyncio.sleep(10)
+        assert await api.balance() == -1.0
+        with pytest.raises(ConnectionError):
+            await api.get_candles("EURUSD_otc", 60, 6000)
+        api.renew_session()
+        assert await api.balance() == 1000.0
+
+
+@pytest.mark.asyncio
+async def test_sequential_scan_misses_bars_when_cycle_exceeds_interval():
+    fast = await run_scenario(10, "fixed", "sequential", cycles=3, median=0.5)
+    slow = await run_scenario(200, "fixed", "sequential", cycles=3, median=0.5)
+
+    assert fast['cycle_p50'] == pytest.approx(10 * 0.5 + 0.5, rel=0.2)
+    assert fast['missed_bars'] == 0
+    assert slow['cycle_p50'] > 100
+    assert slow['missed_bars'] > 0
+
+    concurrent = await run_scenario(200, "fixed", "concurrent", cycles=3, concurrency=20, median=0.5)
+    assert concurrent['cycle_p50'] < slow['cycle_p50'] / 5
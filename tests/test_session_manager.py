@@ -0,0 +1,202 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+
+import pytest
+from mock_pocketoption import LatencyInjectingPocketOptionAsync, LatencyProfile
+from replay_pocketoption import ReplayClock
+from session_manager import CLOSED, CONNECTED, EXPIRED, SessionManager, is_connection_error
+
+START = 1_760_000_000
+
+
+class Broker:
+    """Factory de clientes: cada SSID vale `lifetime` segundos; los de `rejected` nunca conectan."""
+
+    def __init__(self, lifetime=None, rejected=()):
+        self.lifetime = lifetime
+        self.rejected = set(rejected)
+        self.clients = []
+
+    def __call__(self, ssid):
+        expiry = 0 if ssid in self.rejected else self.lifetime
+        client = LatencyInjectingPocketOptionAsync(profile=LatencyProfile(median=0.05, session_expiry_after=expiry))
+        client.ssid = ssid
+        self.clients.append(client)
+        return client
+
+
+def _session(broker, **kwargs):
+    kwargs.setdefault('heartbeat_interval', None)
+    return SessionManager(ssid="ssid-1", factory=broker, env_file=None, connect_grace=0.1, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_reads_survive_session_expiry():
+    broker = Broker(lifetime=120)
+    with ReplayClock(START, speed=None).patch():
+        session = _session(broker)
+        assert await session.connect()
+        assert session.state == CONNECTED and len(broker.clients) == 1
+
+        await asyncio.sleep(300)  # el SSID expira
+        candles = await session.get_candles('EURUSD_otc', 60, 600)
+        balance = await session.balance()
+        await session.stop()
+
+    assert candles and balance > 0
+    assert len(broker.clients) == 2 and session.reconnects == 1
+    assert session.status()['last_downtime'] < 5
+
+
+@pytest.mark.asyncio
+async def test_orders_are_not_retried():
+    broker = Broker(lifetime=120)
+    with ReplayClock(START, speed=None).patch():
+        session = _session(broker)
+        await session.connect()
+        await asyncio.sleep(300)
+        with pytest.raises(ConnectionError):
+            await session.buy('EURUSD_otc', 1.0, 60)
+        # la orden fallida dispara la reconexión; la siguiente sale por la sesión nueva
+        await session.wait_connected(timeout=60)
+        ok, trade = await session.buy('EURUSD_otc', 1.0, 60)
+        await session.stop()
+
+    assert ok
+    assert broker.clients[0].calls['buy'] == 1
+    assert broker.clients[1].calls['buy'] == 1
+
+
+@pytest.mark.asyncio
+async def test_rejected_ssid_expires_then_hot_swaps():
+    broker = Broker(rejected={"ssid-1"})
+    states = []
+    with ReplayClock(START, speed=None).patch():
+        session = _session(broker, on_state_change=lambda state, msg: states.append(state))
+        assert not await session.connect(timeout=30)
+        assert session.state == EXPIRED
+
+        # Backoff exponencial: pocos intentos en 30s, no un loop caliente
+        attempts = len(broker.clients)
+        assert 3 <= attempts <= 6
+
+        session.set_ssid("ssid-2", persist=False)
+        assert await session.connect(timeout=10)
+        balance = await session.balance()
+        state = session.state
+        await session.stop()
+
+    assert state == CONNECTED and session.ssid == "ssid-2"
+    assert broker.clients[-1].ssid == "ssid-2" and balance > 0
+    assert states[-2:] == [CONNECTED, CLOSED] and EXPIRED in states
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_reconnects_proactively():
+    broker = Broker(lifetime=100)
+    with ReplayClock(START, speed=None).patch():
+        session = _session(broker, heartbeat_interval=30)
+        await session.connect()
+        await asyncio.sleep(200)
+        status = session.status()
+        await session.stop()
+
+    # El heartbeat detecta la expiración sin que el bot haga ninguna llamada
+    assert session.reconnects >= 1 and status['state'] == CONNECTED
+    assert status['last_ok_ago'] <= 30
+
+
+@pytest.mark.asyncio
+async def test_env_file_ssid_picked_up(tmp_path):
+    env = tmp_path / ".env"
+    env.write_text("POCKETOPTION_SSID=ssid-env\n")
+    broker = Broker(rejected={"ssid-1"})
+    with ReplayClock(START, speed=None).patch():
+        session = SessionManager(ssid="ssid-1", factory=broker, env_file=str(env), connect_grace=0.1,
+                                 heartbeat_interval=None)
+        assert await session.connect(timeout=10)
+        await session.stop()
+
+    # El .env se relee en cada intento: el SSID nuevo conecta sin reiniciar
+    assert session.ssid == "ssid-env" and broker.clients[-1].ssid == "ssid-env"
+
+
+def test_set_ssid_persists_to_env(tmp_path):
+    env = tmp_path / ".env"
+    env.write_text("POCKETOPTION_SSID=old\nTELEGRAM_TOKEN=abc\n")
+    session = SessionManager(ssid="old", factory=Broker(), env_file=str(env))
+    session.set_ssid("new")
+    assert session.ssid == "new"
+    content = env.read_text()
+    assert "POCKETOPTION_SSID=new" in content and "TELEGRAM_TOKEN=abc" in content
+
+
+def test_mock_requires_opt_in(monkeypatch):
+    import session_manager
+    monkeypatch.delenv("ALLOW_MOCK_API", raising=False)
+    assert not session_manager.mock_allowed()
+    monkeypatch.setenv("ALLOW_MOCK_API", "1")
+    assert session_manager.mock_allowed()
+
+
+@pytest.mark.asyncio
+async def test_broker_rejection_is_raised_without_reconnect():
+    broker = Broker()
+    with ReplayClock(START, speed=None).patch():
+        session = _session(broker)
+        await session.connect()
+        calls = []
+
+        async def closed_asset(*args, **kwargs):
+            calls.append(args)
+            raise ValueError("asset closed")
+
+        broker.clients[0].get_candles = closed_asset
+        with pytest.raises(ValueError, match="asset closed"):
+            await session.get_candles('EURUSD_otc', 60, 600)
+        state = session.state
+        await session.stop()
+
+    # Ni reconexión ni reintento: el error del broker llega tal cual
+    assert state == CONNECTED and session.reconnects == 0
+    assert len(broker.clients) == 1 and len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_reads_do_not_kill_the_session():
+    # Tiempo real: check_win espera al vencimiento del trade, más que call_timeout
+    broker = Broker()
+    session = _session(broker, call_timeout=0.2)
+    assert await session.connect()
+
+    async def slow_check_win(trade_id):
+        await asyncio.sleep(0.5)
+        return {"result": "win", "profit": 0.92}
+
+    async def hung_balance():
+        await asyncio.sleep(5)
+
+    broker.clients[0].check_win = slow_check_win
+    broker.clients[0].balance = hung_balance
+    result = await session.check_win("T1")
+    with pytest.raises(asyncio.TimeoutError):
+        await session.balance()
+    state = session.state
+    await session.stop()
+
+    # Ni check_win ni el timeout propio de una lectura tiran la sesión
+    assert result["result"] == "win"
+    assert state == CONNECTED and session.reconnects == 0 and len(broker.clients) == 1
+
+
+def test_connection_error_classification():
+    assert is_connection_error(ConnectionError("Session expired (balance)"))
+    assert is_connection_error(asyncio.TimeoutError())
+    assert is_connection_error(RuntimeError("WebSocket connection closed"))
+    assert is_connection_error(Exception("Failed: not connected to the server"))
+    assert not is_connection_error(ValueError("asset closed"))
+    assert not is_connection_error(RuntimeError("Order rejected: trading session closed for EURUSD"))
+    assert not is_connection_error(RuntimeError("auth token in payload is optional"))
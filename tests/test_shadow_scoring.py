@@ -0,0 +1,62 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from shadow_scoring import ShadowScoreBook
+
+
+def test_settle_writes_record_and_metrics(tmp_path):
+    log_path = tmp_path / "shadow.csv"
+    book = ShadowScoreBook(log_path=str(log_path), threshold=0.6)
+
+    book.add("a1", prod_proba=0.70, cand_proba=0.40, pair="EURUSD_otc", timeframe="M5")
+    book.add("a2", prod_proba=0.65, cand_proba=0.80, pair="EURUSD_otc", timeframe="M5")
+    assert book.pending_count() == 2
+
+    assert book.settle("a1", "LOSS", -1.0)
+    assert book.settle("a2", "WIN", 0.92)
+    assert not book.settle("unknown", "WIN", 1.0)
+
+    m = book.metrics()
+    assert m['n'] == 2
+    assert m['prod_accepted'] == 2
+    assert m['cand_accepted'] == 1
+    assert m['cand_pnl'] > m['prod_pnl']
+    assert m['cand_brier'] < m['prod_brier']
+
+    df = pd.read_csv(log_path)
+    assert list(df['signal_id'].astype(str)) == ["a1", "a2"]
+    assert list(df['result']) == ["LOSS", "WIN"]
+
+
+def test_candidate_requires_min_trades(tmp_path):
+    book = ShadowScoreBook(log_path=str(tmp_path / "shadow.csv"), threshold=0.6)
+    for i in range(5):
+        book.add(str(i), prod_proba=0.7, cand_proba=0.9)
+        book.settle(str(i), "WIN", 0.92)
+
+    assert not book.candidate_is_better(min_trades=10)
+    assert book.candidate_is_better(min_trades=5)
+
+
+def test_signals_without_candidate_are_ignored(tmp_path):
+    book = ShadowScoreBook(log_path=str(tmp_path / "shadow.csv"))
+    book.add("x", prod_proba=0.7, cand_proba=None)
+    book.settle("x", "WIN", 0.92)
+    assert book.metrics()['n'] == 0
+
+
+def test_acceptance_uses_each_signal_threshold(tmp_path):
+    log_path = tmp_path / "shadow.csv"
+    book = ShadowScoreBook(log_path=str(log_path), threshold=0.6)
+    # Threshold del gate en vivo (contexto + breakeven al payout), no el global
+    book.add("b1", prod_proba=0.70, cand_proba=0.75, threshold=0.72)
+    book.add("b2", prod_proba=0.66, cand_proba=0.58, threshold=0.55)
+    book.settle("b1", "LOSS", -1.0)
+    book.settle("b2", "WIN", 0.92)
+
+    m = book.metrics()
+    assert m['prod_accepted'] == 1 and m['prod_pnl'] == 0.92
+    assert m['cand_accepted'] == 2 and m['cand_pnl'] == -1.0 + 0.92
+    assert list(pd.read_csv(log_path)['threshold']) == [0.72, 0.55]
@@ -0,0 +1,72 @@
+import csv
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from signal_latency import SignalTimeline, latency_report, load_trade_latencies
+from trade_logger import TradeLogger
+
+
+def test_timeline_from_bar_and_log_fields():
+    bar_open = pd.Timestamp("2025-01-01 12:00:00")  # naive = UTC, como df.index de los bots
+    timeline = SignalTimeline.from_bar(bar_open, 300)
+    close = bar_open.tz_localize('UTC').timestamp() + 300
+    assert timeline.get('bar_close') == close
+
+    timeline.stamp('detected', close + 3.0)
+    timeline.stamp('risk_checked', close + 3.0)
+    timeline.stamp('order_sent', close + 4.5)
+    assert timeline.entry_delay_ms() == 4500
+    timeline.stamp('ack', close + 5.0)
+
+    fields = timeline.to_log_fields()
+    assert fields['entry_delay_ms'] == 5000.0
+    assert fields['ack_ts'] == round(close + 5.0, 3)
+    assert timeline.stage_delays_ms() == {'detected': 3000.0, 'risk_checked': 0.0,
+                                          'order_sent': 1500.0, 'ack': 500.0}
+
+
+def _logged(logger, i, pair, delay, result):
+    timeline = SignalTimeline(1_700_000_000 + 300 * i)
+    timeline.stamp('detected', timeline.get('bar_close') + delay * 0.8)
+    timeline.stamp('order_sent', timeline.get('bar_close') + delay * 0.9)
+    timeline.stamp('ack', timeline.get('bar_close') + delay)
+    logger.log_trade({'trade_id': f"T{i}", 'pair': pair, 'result': result, **timeline.to_log_fields()})
+
+
+def test_logger_persists_stamps_and_report_buckets(tmp_path):
+    logger = TradeLogger(logs_dir=str(tmp_path))
+    for i in range(10):
+        _logged(logger, i, 'EURUSD_otc', 1.0, 'WIN' if i < 8 else 'LOSS')
+    for i in range(10, 20):
+        _logged(logger, i, 'USDCOP_otc', 20.0, 'WIN' if i < 13 else 'LOSS')
+    logger.log_trade({'trade_id': 'P1', 'pair': 'EURUSD_otc', 'result': 'PENDING'})
+
+    df = load_trade_latencies(str(tmp_path))
+    assert len(df) == 20
+    report = latency_report(df)
+
+    by_pair = report['by_pair']
+    assert list(by_pair.index) == ['USDCOP_otc', 'EURUSD_otc']
+    assert by_pair.loc['EURUSD_otc', 'winrate'] == 80.0
+    assert abs(by_pair.loc['USDCOP_otc', 'delay_p50_s'] - 20.0) < 1e-6
+    # Sin etapa risk_checked: order_sent se mide desde detected
+    assert pd.isna(by_pair.loc['EURUSD_otc', 'risk_checked_ms'])
+    assert abs(by_pair.loc['EURUSD_otc', 'order_sent_ms'] - 100.0) < 1e-3
+
+    by_bucket = report['by_bucket']
+    assert by_bucket.loc['<2s', 'trades'] == 10 and by_bucket.loc['15-60s', 'winrate'] == 30.0
+
+
+def test_logger_keeps_header_of_existing_file(tmp_path):
+    logger = TradeLogger(logs_dir=str(tmp_path))
+    old_headers = [h for h in logger.headers if not h.endswith('_ts') and h != 'entry_delay_ms']
+    with open(logger.current_file, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerow(old_headers)
+
+    reopened = TradeLogger(logs_dir=str(tmp_path))
+    assert reopened.headers == old_headers
+    reopened.log_trade({'trade_id': 'X1', 'pair': 'EURUSD_otc', 'result': 'WIN', 'ack_ts': 1.0})
+    df = pd.read_csv(reopened.current_file)
+    assert list(df.columns) == old_headers and df.loc[0, 'result'] == 'WIN'
@@ -0,0 +1,77 @@
+import csv
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from signal_latency import SignalTimeline
+from signal_types import (Direction, PatternType, Signal, SignalSource, TRADE_COLUMNS,
+                          TradeRecord)
+from trade_logger import TradeLogger
+
+
+def _signal():
+    return Signal(pair='EURUSD_otc', direction='BUY', timeframe='M5', score=9,
+                  pattern=PatternType.FLAG, price=1.0853, source=SignalSource.PATTERN,
+                  duration=300, features={'rsi': 41.5, 'atr': 0.0012, 'macd_hist': 0.3},
+                  signal_id='T1')
+
+
+def test_signal_is_slotted_and_reads_like_old_dict():
+    signal = _signal()
+    assert not hasattr(signal, '__dict__')
+    with pytest.raises(AttributeError):
+        signal.extra = 1
+
+    assert signal.direction is Direction.BUY and signal['direction'] == 'BUY'
+    assert signal['tf'] == 'M5' and signal.get('signal') == 'BUY'
+    assert signal.get('macd_hist') == 0.3 and signal.get('features')['rsi'] == 41.5
+    assert signal.get('missing', 'N/A') == 'N/A' and 'rsi' in signal and 'missing' not in signal
+    with pytest.raises(KeyError):
+        signal['missing']
+    with pytest.raises(ValueError):
+        Signal(pair='EURUSD_otc', direction='HOLD')
+
+
+def test_trade_record_from_signal_rows():
+    timeline = SignalTimeline(1_700_000_000)
+    timeline.stamp('ack', 1_700_000_002.5)
+    record = TradeRecord.from_signal(_signal(), timestamp=datetime(2025, 1, 1, 12, 0, 0),
+                                     timeline=timeline, notes='x')
+    assert record.trade_id == 'T1' and record.result == 'PENDING'
+    assert record.get('pattern') == 'flag' and record['signal'] == 'BUY'
+    assert record.get('entry_delay_ms') == 2500.0
+
+    row = record.to_csv_row()
+    assert len(row) == len(TRADE_COLUMNS)
+    values = dict(zip(TRADE_COLUMNS, row))
+    assert values['timestamp'] == '2025-01-01 12:00:00'
+    assert values['rsi'] == 41.5 and values['ema'] == '' and values['expiry_time'] == 300
+
+    db = dict(zip(TRADE_COLUMNS, record.to_db_row()))
+    assert db['decision'] == 'BUY' and type(db['decision']) is str
+    assert db['ema'] is None and db['detected_ts'] is None and db['ack_ts'] == 1_700_000_002.5
+
+    with pytest.raises(TypeError):
+        TradeRecord('T2', 'EURUSD_otc', 'SELL', bogus=1)
+
+
+def test_logger_writes_records_and_dicts_identically(tmp_path):
+    logger = TradeLogger(logs_dir=str(tmp_path))
+    record = TradeRecord('T1', 'EURUSD_otc', Direction.SELL, timeframe='M5', price=1.1, rsi=70)
+    logger.log_trade(record)
+    logger.log_trade({'timestamp': record.timestamp, 'trade_id': 'T1', 'pair': 'EURUSD_otc',
+                      'decision': 'SELL', 'timeframe': 'M5', 'price': 1.1, 'rsi': 70,
+                      'result': 'PENDING'})
+
+    with open(logger.current_file, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == list(TRADE_COLUMNS)
+    assert rows[1] == rows[2]
+
+    logger.update_trade_result('T1', 'WIN', profit_loss=0.92)
+    df = pd.read_csv(logger.current_file)
+    assert (df['result'] == 'WIN').all()
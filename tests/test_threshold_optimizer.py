@@ -0,0 +1,44 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from threshold_optimizer import bootstrap_threshold_bands, compute_threshold_curve, threshold_stats
+
+
+def _trades(n=300, seed=1):
+    rng = np.random.default_rng(seed)
+    probs = np.round(rng.uniform(0.4, 0.9, n), 2)
+    wins = (rng.uniform(size=n) < probs).astype(int)
+    return probs, wins
+
+
+def test_curve_matches_brute_force():
+    probs, wins = _trades()
+    curve = compute_threshold_curve(probs, wins, payout=0.92)
+
+    assert len(curve) == len(np.unique(probs))
+    for _, row in curve.sample(20, random_state=0).iterrows():
+        accepted = probs >= row['Threshold']
+        n = accepted.sum()
+        w = wins[accepted].sum()
+        assert row['Trades'] == n
+        assert row['Wins'] == w
+        assert np.isclose(row['Expected_ROI'], (w * 0.92 - (n - w)) / n * 100)
+
+
+def test_thresholds_above_all_probs_have_no_trades():
+    stats = threshold_stats([0.6, 0.7], [1, 0], [0.5, 0.7, 0.95])
+    assert list(stats['trades']) == [2, 1, 0]
+    assert np.isnan(stats['roi'][2])
+
+
+def test_bootstrap_bands_contain_point_estimate():
+    probs, wins = _trades()
+    thresholds = np.array([0.5, 0.6, 0.7])
+    bands = bootstrap_threshold_bands(probs, wins, thresholds, n_boot=200, n_jobs=2)
+    point = threshold_stats(probs, wins, thresholds)
+
+    assert len(bands) == 3
+    assert np.all(bands['Winrate_low'] <= point['winrate'])
+    assert np.all(point['winrate'] <= bands['Winrate_high'])
@@ -0,0 +1,74 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from signal_types import TradeRecord
+from trade_logger import TradeLogger
+from trades_dashboard import JournalFollower, TradesDashboard
+
+
+def _log(logger, i, pair='EURUSD_otc', pattern='EMA Pullback'):
+    logger.log_trade(TradeRecord(f"T{i}", pair, 'BUY', timeframe='M5', price=1.08,
+                                 pattern_detected=pattern, signal_score=0.7))
+
+
+def test_follower_reads_only_complete_appended_lines(tmp_path):
+    path = tmp_path / "trades.journal"
+    follower = JournalFollower(path)
+    assert follower.read_new() == ([], False)
+
+    with open(path, 'w') as f:
+        f.write('{"event": "open", "trade_id": "A"}\n{"event": "op')
+    events, _ = follower.read_new()
+    assert [e['trade_id'] for e in events] == ['A']
+
+    with open(path, 'a') as f:
+        f.write('en", "trade_id": "B"}\n')
+    events, _ = follower.read_new()
+    assert [e['trade_id'] for e in events] == ['B']
+
+    with open(path, 'w') as f:  # recreado
+        f.write('{"event": "open", "trade_id": "C"}\n')
+    events, truncated = follower.read_new()
+    assert truncated and [e['trade_id'] for e in events] == ['C']
+
+
+def test_dashboard_follows_journal_incrementally(tmp_path, monkeypatch):
+    bot_a, bot_b = tmp_path / "a", tmp_path / "b"
+    logger_a, logger_b = TradeLogger(logs_dir=str(bot_a)), TradeLogger(logs_dir=str(bot_b))
+    _log(logger_a, 1)
+    logger_a.update_trade_result("T1", "WIN", profit_loss=0.92)
+
+    dashboard = TradesDashboard(logs_dirs=[bot_a, bot_b])
+    assert dashboard.poll()  # arranque: estado del CSV
+    stats = dashboard.stats
+    assert stats.total == 1 and stats.by_result['WIN'] == 1
+
+    monkeypatch.setattr(dashboard, 'clear_screen', lambda: None)
+    dashboard.print_dashboard()
+    assert not dashboard.poll()  # sin eventos nuevos: no se redibuja
+
+    # Después del arranque no se vuelve a leer el CSV
+    monkeypatch.setattr(dashboard, '_bootstrap', None)
+    for i in range(2, 6):
+        _log(logger_a, i, pattern='Flag')
+    _log(logger_b, 1, pair='GBPUSD_otc')
+    logger_a.update_trade_result("T2", "LOSS", profit_loss=-1.0)
+    logger_a.update_trade_result("T3", "WIN", profit_loss=0.92)
+    logger_b.update_trade_result("T1", "LOSS", profit_loss=-1.0)
+    assert dashboard.poll()
+
+    assert stats.total == 6
+    assert (stats.by_result['WIN'], stats.by_result['LOSS'], stats.by_result['PENDING']) == (2, 2, 2)
+    assert abs(stats.win_profit - stats.loss_sum - (2 * 0.92 - 2.0)) < 1e-9
+    eur = stats.by_pair['EURUSD_otc']
+    assert (eur['total'], eur['wins'], eur['losses']) == (5, 2, 1) and abs(eur['net'] - 0.84) < 1e-9
+    assert stats.by_pattern['Flag'] == {'total': 2, 'wins': 1}
+    assert stats.by_source[str(bot_b)]['losses'] == 1
+    assert [k[1] for k in stats.recent][-2:] == ['T5', 'T1']
+
+    # Resultado corregido: se ajustan los agregados, no se duplica
+    logger_a.update_trade_result("T3", "LOSS", profit_loss=-1.0)
+    dashboard.poll()
+    assert (stats.by_result['WIN'], stats.by_result['LOSS']) == (1, 3)
+    assert stats.by_pattern['Flag'] == {'total': 2, 'wins': 0}
@@ -0,0 +1,104 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import pytest
+from candle_store import to_records
+from feature_store import add_emas
+from payout_cache import PayoutSeries
+from walk_forward import (PreparedPair, ema, make_windows, outcomes, param_grid, payout_per_bar,
+                          pullback_signals, walk_forward)
+
+START = 1_700_000_000
+DAY = 86400
+
+
+def _records(n, seed=0, period=14):
+    rng = np.random.default_rng(seed)
+    i = np.arange(n)
+    close = 1.1 + 0.004 * np.sin(i / period) + rng.normal(0, 0.0003, n)
+    open_ = np.r_[close[0], close[:-1]]
+    return to_records(pd.DataFrame({'time': START + 300 * i, 'open': open_, 'close': close,
+                                    'high': np.maximum(open_, close), 'low': np.minimum(open_, close),
+                                    'volume': 1.0}))
+
+
+def test_signals_match_bar_by_bar_ema_rule():
+    close = _records(300)['close'].astype(float)
+    signals = pullback_signals(close, ema(close, 8), ema(close, 21), ema(close, 55))
+
+    df = pd.DataFrame({'close': close})
+    expected = np.zeros(len(close), dtype=np.int8)
+    for i in range(59, len(close)):  # get_signal necesita 60 velas
+        last = add_emas(df.iloc[:i + 1])
+        e8, e21, e55 = last['ema8'].iloc[-1], last['ema21'].iloc[-1], last['ema55'].iloc[-1]
+        c, p = close[i], close[i - 1]
+        if e8 > e21 > e55 and p <= e8 and c > e8:
+            expected[i] = 1
+        elif e8 < e21 < e55 and p >= e8 and c < e8:
+            expected[i] = -1
+    assert np.array_equal(signals, expected) and np.abs(signals).sum() > 0
+
+
+def test_outcomes_and_non_overlapping_trades():
+    close = np.array([1.0, 1.1, 1.0, 1.0, 1.2, 1.3])
+    signals = np.array([1, -1, 1, 1, -1, 1], dtype=np.int8)
+    # win, win, draw, win, loss, sin vela de vencimiento
+    assert outcomes(close, signals, 1).tolist() == [1, 1, 0, 1, -1, 0]
+
+    prep = PreparedPair("EURUSD_otc", _records(400), [{'fast': 8, 'mid': 21, 'slow': 55, 'expiry': 3}])
+    idx = prep.trades(0, START, START + 300 * 400)
+    assert len(idx) > 0 and np.all(np.diff(idx) > 3)  # una operación a la vez
+    assert idx[-1] + 3 < 400 and np.all(prep.signals[0, idx] != 0)
+    assert np.allclose(prep.pnl(0, idx)[prep.results[0, idx] < 0], -1.0)
+
+
+def test_payout_per_bar_matches_series_lookup():
+    times = np.arange(START, START + 3000, 300, dtype=np.int64)
+    series = PayoutSeries({'EURUSD_otc': (np.array([START + 600.0, START + 1500.0]), np.array([0.8, 0.9]))},
+                          default=0.85)
+    expected = [series.at('EURUSD_otc', t) for t in times]
+    assert payout_per_bar(series, 'EURUSD_otc', times).tolist() == pytest.approx(expected)
+    assert payout_per_bar(series, 'GBPUSD_otc', times).tolist() == [0.85] * len(times)
+
+
+def test_windows_roll_and_anchor():
+    rolling = make_windows(0, 10 * DAY, 4 * DAY, 2 * DAY)
+    anchored = make_windows(0, 10 * DAY, 4 * DAY, 2 * DAY, anchored=True)
+    assert [w[2] for w in rolling] == [4 * DAY, 6 * DAY, 8 * DAY]
+    assert all(w[1] == w[2] and w[1] - w[0] == 4 * DAY for w in rolling)
+    assert [w[0] for w in anchored] == [0, 0, 0] and [w[3] for w in anchored] == [6 * DAY, 8 * DAY, 10 * DAY]
+
+
+def test_walk_forward_parallel_matches_serial_and_stays_out_of_sample():
+    series = {'EURUSD_otc': _records(288 * 6, seed=1), 'GBPUSD_otc': _records(288 * 6, seed=2, period=9)}
+    serial = walk_forward(series, train_days=2, test_days=1, min_trades=5)
+    parallel = walk_forward(series, train_days=2, test_days=1, min_trades=5, workers=2)
+
+    assert len(serial.windows) == 3 and serial.windows['params'].notna().all()
+    pd.testing.assert_frame_equal(serial.windows, parallel.windows)
+    pd.testing.assert_frame_equal(serial.trades, parallel.trades)
+
+    # Trades solo dentro de ventanas de test; la curva cosida suma el P&L OOS
+    tests = serial.windows[['test_start', 'test_end']].to_numpy()
+    assert all(((t >= tests[:, 0]) & (t < tests[:, 1])).any() for t in serial.trades['time'])
+    summary = serial.summary()
+    assert summary['oos_pnl'] == pytest.approx(serial.windows['test_pnl'].sum())
+    assert serial.equity().iloc[-1] == pytest.approx(summary['oos_pnl'])
+    assert summary['current_params'] == serial.windows['params'].iloc[-1]
+
+
+def test_window_choice_ignores_future_data():
+    series = {'EURUSD_otc': _records(288 * 5, seed=4)}
+    base = walk_forward(series, train_days=2, test_days=1, min_trades=5)
+
+    # Reescribir todo lo posterior al primer train no cambia los params elegidos en él
+    changed = series['EURUSD_otc'].copy()
+    after = changed['time'] >= base.windows['train_end'].iloc[0]
+    changed['close'][after] = changed['close'][after][::-1]
+    other = walk_forward({'EURUSD_otc': changed}, train_days=2, test_days=1, min_trades=5)
+    assert other.windows['params'].iloc[0] == base.windows['params'].iloc[0]
+    assert other.windows['train_pnl'].iloc[0] == pytest.approx(base.windows['train_pnl'].iloc[0])
+    assert len(param_grid()) == 36
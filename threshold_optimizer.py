@@ -2,18 +2,29 @@
 # -*- coding: utf-8 -*-
 """
 Threshold Optimizer for EMA Pullback Strategy
-Analyzes historical trades to find optimal ML confidence threshold
+Analyzes historical trades to find optimal ML confidence threshold.
+
+All trades are scored in one batch: probabilities are sorted once and trade
+count, winrate and expected ROI for every possible threshold come from
+cumulative sums (O(n log n)), with bootstrap confidence bands computed in
+parallel.
 """
 
 import pandas as pd
 import numpy as np
 import glob
 import os
-import matplotlib.pyplot as plt
-import seaborn as sns
+import warnings
+
+from payout_cache import DEFAULT_PAYOUT
 
 # Configuration
-sns.set_style("darkgrid")
+PAYOUT = DEFAULT_PAYOUT
+REPORT_THRESHOLDS = [0.50, 0.55, 0.60, 0.62, 0.65, 0.70, 0.75, 0.80]
+MIN_TRADES = 5          # Minimum accepted trades for a threshold to be "optimal"
+N_BOOTSTRAP = 500
+CONFIDENCE = 0.90
+CURVE_PATH = "threshold_curve.csv"
 
 def load_ema_pullback_trades():
     """Load only EMA Pullback trades"""
@@ -51,55 +62,180 @@ def load_ema_pullback_trades():
     print(f"✅ Cargados {len(ema_trades)} trades de EMA Pullback")
     return ema_trades
 
-def analyze_threshold_impact(df):
-    """Analyze impact of different thresholds"""
-    print("\n🎯 Analizando impacto de diferentes thresholds...")
-    
-    # Test different thresholds
-    thresholds = [0.50, 0.55, 0.60, 0.62, 0.65, 0.70, 0.75, 0.80]
-    results = []
-    
-    for threshold in thresholds:
-        # Filter trades by signal_score (ML confidence)
-        if 'signal_score' in df.columns:
-            filtered = df[df['signal_score'] >= threshold]
-        else:
-            # If no signal_score, assume all trades pass
-            filtered = df
-        
-        if len(filtered) > 0:
-            winrate = filtered['win'].mean() * 100
-            total_trades = len(filtered)
-            
-            # Calculate expected profit (assuming 92% payout, 1% risk)
-            wins = filtered['win'].sum()
-            losses = total_trades - wins
-            expected_profit = (wins * 0.92) - losses
-            roi = (expected_profit / total_trades) * 100 if total_trades > 0 else 0
-            
-            results.append({
-                'Threshold': f"{threshold:.0%}",
-                'Trades': total_trades,
-                'Winrate': winrate,
-                'Expected_ROI': roi
-            })
-    
-    results_df = pd.DataFrame(results)
-    
-    print("\n📊 RESULTADOS POR THRESHOLD:")
-    print(results_df.to_string(index=False))
+def threshold_stats(probs, wins, thresholds, payout=PAYOUT):
+    """
+    Trades, wins, winrate and expected ROI for arbitrary thresholds.
+
+    A trade is accepted when prob >= threshold. Probabilities are sorted once
+    and each threshold is a binary search into suffix sums of wins.
+
+    Args:
+        probs: ML probabilities (n,)
+        wins: 1 for WIN, 0 for LOSS (n,)
+        thresholds: Thresholds to evaluate (k,)
+        payout: Payout ratio (0.92 = 92%)
+
+    Returns:
+        Dict of arrays (k,): trades, wins, winrate (%), roi (%)
+        (winrate/roi are NaN where no trade is accepted)
+    """
+    probs = np.asarray(probs, dtype=float)
+    wins = np.asarray(wins, dtype=float)
+    thresholds = np.asarray(thresholds, dtype=float)
+
+    order = np.argsort(probs, kind='mergesort')
+    sorted_probs = probs[order]
+    # suffix[i] = wins among trades i..n-1 (in ascending prob order)
+    suffix = np.concatenate([np.cumsum(wins[order][::-1])[::-1], [0.0]])
+
+    idx = np.searchsorted(sorted_probs, thresholds, side='left')
+    trades = len(probs) - idx
+    won = suffix[idx]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        winrate = np.where(trades > 0, won / trades * 100, np.nan)
+        roi = np.where(trades > 0, (won * payout - (trades - won)) / trades * 100, np.nan)
+
+    return {'trades': trades, 'wins': won, 'winrate': winrate, 'roi': roi}
+
+
+def compute_threshold_curve(probs, wins, payout=PAYOUT):
+    """
+    Metrics for every distinct probability used as threshold.
+
+    Returns:
+        DataFrame with Threshold, Trades, Wins, Winrate, Expected_ROI, Score
+        sorted by Threshold
+    """
+    probs = np.asarray(probs, dtype=float)
+    thresholds = np.unique(probs)
+    stats = threshold_stats(probs, wins, thresholds, payout)
+
+    curve = pd.DataFrame({
+        'Threshold': thresholds,
+        'Trades': stats['trades'].astype(int),
+        'Wins': stats['wins'].astype(int),
+        'Winrate': stats['winrate'],
+        'Expected_ROI': stats['roi'],
+    })
+    curve['Score'] = curve['Expected_ROI'] * np.log(curve['Trades'] + 1)
+    return curve
+
+
+def _bootstrap_chunk(probs, wins, thresholds, payout, n_samples, seed):
+    """Winrate/ROI curves for n_samples bootstrap resamples."""
+    rng = np.random.default_rng(seed)
+    n = len(probs)
+    winrates = np.empty((n_samples, len(thresholds)))
+    rois = np.empty((n_samples, len(thresholds)))
+    for i in range(n_samples):
+        sample = rng.integers(0, n, n)
+        stats = threshold_stats(probs[sample], wins[sample], thresholds, payout)
+        winrates[i] = stats['winrate']
+        rois[i] = stats['roi']
+    return winrates, rois
+
+
+def bootstrap_threshold_bands(probs, wins, thresholds, payout=PAYOUT, n_boot=N_BOOTSTRAP,
+                              confidence=CONFIDENCE, n_jobs=-1, seed=42):
+    """
+    Bootstrap confidence bands for winrate and ROI at each threshold.
+
+    Resamples are split in chunks and evaluated in parallel with joblib.
+
+    Returns:
+        DataFrame with Winrate_low/high and Expected_ROI_low/high per threshold
+    """
+    # joblib only here: ml_calibration (and the bots) import this module for threshold_stats
+    from joblib import Parallel, delayed, cpu_count
+
+    probs = np.asarray(probs, dtype=float)
+    wins = np.asarray(wins, dtype=float)
+    thresholds = np.asarray(thresholds, dtype=float)
+
+    workers = cpu_count() if n_jobs == -1 else max(1, n_jobs)
+    workers = max(1, min(workers, n_boot))
+    chunks = [n_boot // workers + (1 if i < n_boot % workers else 0) for i in range(workers)]
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+
+    results = Parallel(n_jobs=workers)(
+        delayed(_bootstrap_chunk)(probs, wins, thresholds, payout, size, s)
+        for size, s in zip(chunks, seeds) if size > 0
+    )
+    winrates = np.vstack([r[0] for r in results])
+    rois = np.vstack([r[1] for r in results])
+
+    lo, hi = (1 - confidence) / 2 * 100, (1 + confidence) / 2 * 100
+    # High thresholds can have no trades in some resamples (all-NaN columns)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        bands = pd.DataFrame({
+            'Winrate_low': np.nanpercentile(winrates, lo, axis=0),
+            'Winrate_high': np.nanpercentile(winrates, hi, axis=0),
+            'Expected_ROI_low': np.nanpercentile(rois, lo, axis=0),
+            'Expected_ROI_high': np.nanpercentile(rois, hi, axis=0),
+        })
+    return bands
+
+
+def export_threshold_curve(curve, path=CURVE_PATH):
+    """Save the threshold curve (with bands) as CSV"""
+    curve.to_csv(path, index=False)
+    print(f"💾 Curva guardada: {path}")
+    return path
+
+
+def analyze_threshold_impact(df, payout=PAYOUT, n_boot=N_BOOTSTRAP, min_trades=MIN_TRADES, n_jobs=-1):
+    """Analyze impact of every possible threshold"""
+    print("\n🎯 Analizando impacto de todos los thresholds...")
+    
+    # Score all trades in one batch (signal_score = ML confidence)
+    if 'signal_score' in df.columns:
+        df = df[pd.to_numeric(df['signal_score'], errors='coerce').notna()]
+        probs = pd.to_numeric(df['signal_score']).values.astype(float)
+    else:
+        # If no signal_score, assume all trades pass
+        probs = np.ones(len(df))
+    wins = df['win'].values.astype(float)
+    
+    if len(probs) == 0:
+        print("❌ No hay trades con probabilidad ML")
+        return pd.DataFrame()
+    
+    curve = compute_threshold_curve(probs, wins, payout)
+    if n_boot > 0:
+        bands = bootstrap_threshold_bands(probs, wins, curve['Threshold'].values, payout,
+                                          n_boot=n_boot, n_jobs=n_jobs)
+        curve = pd.concat([curve, bands], axis=1)
+    
+    # Summary at the usual thresholds
+    stats = threshold_stats(probs, wins, REPORT_THRESHOLDS, payout)
+    summary = pd.DataFrame({
+        'Threshold': [f"{t:.0%}" for t in REPORT_THRESHOLDS],
+        'Trades': stats['trades'],
+        'Winrate': stats['winrate'],
+        'Expected_ROI': stats['roi'],
+    })
+    summary = summary[summary['Trades'] > 0]
+    
+    print(f"\n📊 RESULTADOS POR THRESHOLD ({len(curve)} thresholds evaluados):")
+    print(summary.to_string(index=False))
     
     # Find optimal threshold (best ROI with reasonable volume)
-    results_df['Score'] = results_df['Expected_ROI'] * np.log(results_df['Trades'] + 1)
-    best_idx = results_df['Score'].idxmax()
-    best_threshold = results_df.iloc[best_idx]
+    candidates = curve[curve['Trades'] >= min_trades]
+    if candidates.empty:
+        candidates = curve
+    best_threshold = candidates.loc[candidates['Score'].idxmax()]
     
-    print(f"\n🏆 THRESHOLD ÓPTIMO: {best_threshold['Threshold']}")
+    print(f"\n🏆 THRESHOLD ÓPTIMO: {best_threshold['Threshold']:.1%}")
     print(f"   Trades: {int(best_threshold['Trades'])}")
     print(f"   Winrate: {best_threshold['Winrate']:.1f}%")
     print(f"   Expected ROI: {best_threshold['Expected_ROI']:.1f}%")
+    if 'Expected_ROI_low' in curve.columns:
+        print(f"   ROI IC {CONFIDENCE:.0%}: [{best_threshold['Expected_ROI_low']:.1f}%, "
+              f"{best_threshold['Expected_ROI_high']:.1f}%]")
     
-    return results_df
+    return curve
 
 def analyze_best_pairs(df):
     """Analyze best pairs for EMA Pullback"""
@@ -140,29 +276,47 @@ def analyze_best_hours(df):
     return hours
 
 def plot_threshold_analysis(results_df):
-    """Plot threshold analysis"""
+    """Plot threshold curve (DataFrame or exported CSV path)"""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    sns.set_style("darkgrid")
+    
     print("\n📈 Generando gráficos...")
+    if isinstance(results_df, str):
+        results_df = pd.read_csv(results_df)
+    thresholds = results_df['Threshold'] * 100
     
-    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+    fig, axes = plt.subplots(1, 3, figsize=(18, 5))
     
     # Plot 1: Winrate vs Threshold
-    axes[0].plot(results_df['Threshold'], results_df['Winrate'], 
-                marker='o', linewidth=2, markersize=8, color='steelblue')
+    axes[0].plot(thresholds, results_df['Winrate'], linewidth=2, color='steelblue')
+    if 'Winrate_low' in results_df.columns:
+        axes[0].fill_between(thresholds, results_df['Winrate_low'], results_df['Winrate_high'],
+                             color='steelblue', alpha=0.2, label=f'IC {CONFIDENCE:.0%}')
     axes[0].axhline(y=52, color='r', linestyle='--', label='Breakeven (52%)')
-    axes[0].set_xlabel('Threshold')
+    axes[0].set_xlabel('Threshold (%)')
     axes[0].set_ylabel('Winrate (%)')
     axes[0].set_title('Winrate por Threshold')
     axes[0].legend()
     axes[0].grid(True, alpha=0.3)
-    axes[0].tick_params(axis='x', rotation=45)
     
-    # Plot 2: Volume vs Threshold
-    axes[1].bar(results_df['Threshold'], results_df['Trades'], color='coral', alpha=0.7)
-    axes[1].set_xlabel('Threshold')
-    axes[1].set_ylabel('Número de Trades')
-    axes[1].set_title('Volumen de Trades por Threshold')
+    # Plot 2: Expected ROI vs Threshold
+    axes[1].plot(thresholds, results_df['Expected_ROI'], linewidth=2, color='seagreen')
+    if 'Expected_ROI_low' in results_df.columns:
+        axes[1].fill_between(thresholds, results_df['Expected_ROI_low'], results_df['Expected_ROI_high'],
+                             color='seagreen', alpha=0.2, label=f'IC {CONFIDENCE:.0%}')
+    axes[1].axhline(y=0, color='r', linestyle='--')
+    axes[1].set_xlabel('Threshold (%)')
+    axes[1].set_ylabel('Expected ROI (%)')
+    axes[1].set_title('ROI Esperado por Threshold')
     axes[1].grid(True, alpha=0.3)
-    axes[1].tick_params(axis='x', rotation=45)
+    
+    # Plot 3: Volume vs Threshold
+    axes[2].step(thresholds, results_df['Trades'], where='post', color='coral')
+    axes[2].set_xlabel('Threshold (%)')
+    axes[2].set_ylabel('Número de Trades')
+    axes[2].set_title('Volumen de Trades por Threshold')
+    axes[2].grid(True, alpha=0.3)
     
     plt.tight_layout()
     plt.savefig('threshold_analysis.png', dpi=150, bbox_inches='tight')
@@ -189,9 +343,13 @@ def main():
     # Analyze best hours
     best_hours = analyze_best_hours(df)
     
-    # Plot results
+    if results_df.empty:
+        return
+    
+    # Export + plot curve
+    curve_path = export_threshold_curve(results_df)
     try:
-        plot_threshold_analysis(results_df)
+        plot_threshold_analysis(curve_path)
     except Exception as e:
         print(f"⚠️ Error generando gráficos: {e}")
     
@@ -6,11 +6,15 @@ Guarda cada operación en CSV con indicadores técnicos.
 """
 
 import csv
+import json
 import os
 from datetime import datetime, timezone
 from pathlib import Path
 import pandas as pd
 
+from lazy_loader import LazyObject
+from signal_types import TRADE_COLUMNS
+
 
 class TradeLogger:
     """Logger para guardar trades en CSV con estructura detallada."""
@@ -37,6 +41,14 @@ class TradeLogger:
             self.current_file = filename
             self.headers = self._get_headers()
             
+            # Archivo existente: respetar sus columnas (p.ej. logs de antes
+            # de las columnas de latencia) para no desalinear filas
+            if filename.exists():
+                with open(filename, 'r', newline='', encoding='utf-8') as f:
+                    existing = next(csv.reader(f), None)
+                if existing:
+                    self.headers = existing
+            
             # Si es archivo nuevo, crear con headers
             if not filename.exists():
                 with open(filename, 'w', newline='', encoding='utf-8') as f:
@@ -44,53 +56,16 @@ class TradeLogger:
                     writer.writeheader()
     
     def _get_headers(self):
-        """Definir estructura de headers."""
-        return [
-            # Identificación
-            'timestamp',
-            'trade_id',
-            'pair',
-            'timeframe',
-            
-            # Decisión
-            'decision',
-            'signal_score',
-            'pattern_detected',
-            
-            # Indicadores técnicos
-            'price',
-            'ema',
-            'rsi',
-            'ema_conf',
-            'tf_signal',
-            'atr',
-            'triangle_active',
-            'reversal_candle',
-            
-            # Niveles
-            'near_support',
-            'near_resistance',
-            'support_level',
-            'resistance_level',
-            
-            # Higher Timeframe
-            'htf_signal',
-            
-            # Resultado
-            'result',
-            'profit_loss',
-            'expiry_time',
-            
-            # Meta
-            'notes'
-        ]
+        """Definir estructura de headers (ver signal_types.TRADE_COLUMNS)."""
+        return list(TRADE_COLUMNS)
     
     def log_trade(self, trade_data):
         """
         Registrar un trade en el CSV.
         
         Args:
-            trade_data (dict): Diccionario con datos del trade
+            trade_data (TradeRecord | dict): TradeRecord (signal_types) o
+                diccionario con datos del trade
                 - timestamp: datetime del trade
                 - trade_id: ID de la operación
                 - pair: Par (EURUSD_otc, etc)
@@ -115,9 +90,22 @@ class TradeLogger:
                 - profit_loss: Cantidad
                 - expiry_time: segundos
                 - notes: Campo libre
+                - bar_close_ts ... ack_ts, entry_delay_ms: SignalTimeline.to_log_fields()
         """
         self._ensure_file()
         
+        # TradeRecord: fila directa en el orden del archivo, sin dict intermedio
+        if hasattr(trade_data, 'to_csv_row'):
+            try:
+                values = trade_data.to_csv_row(self.headers)
+                with open(self.current_file, 'a', newline='', encoding='utf-8') as f:
+                    csv.writer(f).writerow(values)
+                self._append_journal('open', dict(zip(self.headers, values)))
+                return True
+            except Exception as e:
+                print(f"❌ Error escribiendo trade log: {e}")
+                return False
+        
         # Normalizar datos
         row = {}
         for header in self.headers:
@@ -134,6 +122,7 @@ class TradeLogger:
             with open(self.current_file, 'a', newline='', encoding='utf-8') as f:
                 writer = csv.DictWriter(f, fieldnames=self.headers)
                 writer.writerow(row)
+            self._append_journal('open', row)
             return True
         except Exception as e:
             print(f"❌ Error escribiendo trade log: {e}")
@@ -145,7 +134,7 @@ class TradeLogger:
         
         Args:
             trade_id: ID del trade a actualizar
-            result: 'WIN' o 'LOSS'
+            result: 'WIN', 'LOSS' o 'DRAW'
             profit_loss: Monto ganado/perdido
             notes: Notas adicionales
         """
@@ -166,12 +155,33 @@ class TradeLogger:
                 
                 # Guardar
                 df.to_csv(self.current_file, index=False, encoding='utf-8')
+                self._append_journal('result', {
+                    'trade_id': str(trade_id), 'result': result,
+                    'profit_loss': profit_loss, 'notes': notes
+                })
                 return True
         except Exception as e:
             print(f"❌ Error actualizando trade result: {e}")
         
         return False
     
+    def journal_path(self):
+        """Journal append-only del día (trades_<fecha>.journal, una línea JSON por evento)."""
+        return self.current_file.with_suffix('.journal')
+    
+    def _append_journal(self, event, fields):
+        """
+        Agregar un evento al journal. El CSV se reescribe al actualizar
+        resultados; el journal solo crece, así trades_dashboard.py lo sigue
+        leyendo únicamente los bytes nuevos.
+        """
+        try:
+            line = json.dumps({'event': event, **fields}, default=str, ensure_ascii=False)
+            with open(self.journal_path(), 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+        except Exception as e:
+            print(f"⚠️ Error escribiendo trade journal: {e}")
+    
     def get_todays_trades(self):
         """Obtener trades de hoy."""
         self._ensure_file()
@@ -213,5 +223,5 @@ class TradeLogger:
         return stats
 
 
-# Instancia global
-trade_logger = TradeLogger()
+# Instancia global (crea logs/trades recién en el primer uso)
+trade_logger = LazyObject(TradeLogger, "trade_logger")
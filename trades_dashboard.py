@@ -2,41 +2,270 @@
 trades_dashboard.py
 ===================
 Dashboard simple para monitorear trades en tiempo real desde terminal.
+
+Sigue el journal append-only de TradeLogger (logs/trades/trades_<fecha>.journal)
+leyendo solo los bytes nuevos y mantiene los agregados en memoria, así que
+cada actualización cuesta un os.stat aunque el día tenga miles de trades.
+La pantalla se redibuja solo cuando llega un evento. Puede seguir los logs
+de varios bots a la vez (--logs dir1 dir2 ...).
 """
 
-import pandas as pd
+import csv
+import json
+import os
 import time
+from collections import defaultdict, deque
 from datetime import datetime, timezone
 from pathlib import Path
-from collections import defaultdict
-import os
+
+import pandas as pd
+
+LOGS_DIR = "logs/trades"
+RECENT_TRADES = 10
+
+
+def _float(value, default=0.0):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return default
+    return default if value != value else value  # NaN
+
+
+class JournalFollower:
+    """Lee de un archivo solo lo que se agregó desde la última vez (líneas completas)."""
+
+    def __init__(self, path, offset=0):
+        self.path = Path(path)
+        self.offset = offset
+        self._partial = b''
+
+    def size(self):
+        try:
+            return self.path.stat().st_size
+        except OSError:
+            return 0
+
+    def read_new(self):
+        """
+        Eventos nuevos del journal.
+
+        Returns:
+            (eventos, truncado): truncado=True si el archivo se achicó
+            (rotado o recreado) y se volvió a leer desde el principio
+        """
+        size = self.size()
+        truncated = size < self.offset
+        if truncated:
+            self.offset = 0
+            self._partial = b''
+        if size == self.offset:
+            return [], truncated
+
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            chunk = f.read(size - self.offset)
+        self.offset += len(chunk)
+
+        data = self._partial + chunk
+        lines = data.split(b'\n')
+        self._partial = lines.pop()  # línea a medio escribir: esperar al resto
+        events = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                continue
+        return events, truncated
+
+
+class LiveTradeStats:
+    """Agregados del día actualizados evento por evento (idempotente por trade_id)."""
+
+    def __init__(self):
+        self.trades = {}
+        self.recent = deque(maxlen=RECENT_TRADES)
+        self.by_result = defaultdict(int)
+        self.win_profit = 0.0
+        self.loss_sum = 0.0
+        self.by_pair = defaultdict(lambda: {'total': 0, 'wins': 0, 'losses': 0, 'net': 0.0})
+        self.by_pattern = defaultdict(lambda: {'total': 0, 'wins': 0})
+        self.by_source = defaultdict(lambda: {'total': 0, 'wins': 0, 'losses': 0})
+        self.version = 0
+        self._seq = 0
+
+    def _apply(self, trade, sign):
+        """Sumar (sign=1) o restar (sign=-1) la contribución de un trade."""
+        result = trade['result']
+        pnl = trade['profit_loss']
+        pair = self.by_pair[trade['pair']]
+        source = self.by_source[trade['source']]
+        self.by_result[result] += sign
+        pair['total'] += sign
+        source['total'] += sign
+        if result == 'WIN':
+            self.win_profit += sign * pnl
+            pair['wins'] += sign
+            pair['net'] += sign * pnl
+            source['wins'] += sign
+        elif result == 'LOSS':
+            self.loss_sum += sign * abs(pnl)
+            pair['losses'] += sign
+            pair['net'] -= sign * abs(pnl)
+            source['losses'] += sign
+        if result in ('WIN', 'LOSS'):
+            pattern = self.by_pattern[trade['pattern_detected']]
+            pattern['total'] += sign
+            if result == 'WIN':
+                pattern['wins'] += sign
+
+    def open(self, row, source=''):
+        """Trade nuevo (fila del CSV o evento 'open'); ya conocido = se ignora."""
+        trade_id = str(row.get('trade_id') or '')
+        if not trade_id:
+            self._seq += 1
+            trade_id = f"#{self._seq}"
+        key = (source, trade_id)
+        if key in self.trades:
+            return False
+        trade = {
+            'trade_id': trade_id,
+            'source': source,
+            'timestamp': str(row.get('timestamp') or '')[:19],
+            'pair': str(row.get('pair') or ''),
+            'timeframe': str(row.get('timeframe') or ''),
+            'decision': str(row.get('decision') or ''),
+            'signal_score': _float(row.get('signal_score')),
+            'price': _float(row.get('price')),
+            'pattern_detected': str(row.get('pattern_detected') or ''),
+            'result': str(row.get('result') or 'PENDING'),
+            'profit_loss': _float(row.get('profit_loss')),
+        }
+        self.trades[key] = trade
+        self.recent.append(key)
+        self._apply(trade, 1)
+        self.version += 1
+        return True
+
+    def update(self, event, source=''):
+        """Resultado de un trade (evento 'result')."""
+        trade = self.trades.get((source, str(event.get('trade_id'))))
+        if trade is None:
+            return False
+        self._apply(trade, -1)
+        trade['result'] = str(event.get('result') or trade['result'])
+        if event.get('profit_loss') is not None:
+            trade['profit_loss'] = _float(event['profit_loss'])
+        self._apply(trade, 1)
+        self.version += 1
+        return True
+
+    def apply_event(self, event, source=''):
+        if event.get('event') == 'result':
+            return self.update(event, source)
+        return self.open(event, source)
+
+    def remove_source(self, source):
+        """Olvidar los trades de una fuente (su journal se recreó)."""
+        for key in [k for k in self.trades if k[0] == source]:
+            self._apply(self.trades.pop(key), -1)
+        self.recent = deque((k for k in self.recent if k[0] != source), maxlen=RECENT_TRADES)
+        self.version += 1
+
+    @property
+    def total(self):
+        return len(self.trades)
 
 
 class TradesDashboard:
     """Dashboard de trades en tiempo real."""
-    
-    def __init__(self, update_interval=5):
+
+    def __init__(self, update_interval=1, logs_dirs=None):
+        """
+        Args:
+            update_interval: Segundos entre chequeos del journal (solo un os.stat)
+            logs_dirs: Directorios de logs a seguir (uno por bot); default logs/trades
+        """
         self.update_interval = update_interval
-        self.last_count = 0
-    
+        self.logs_dirs = [Path(d) for d in (logs_dirs or [LOGS_DIR])]
+        self.stats = LiveTradeStats()
+        self.followers = {}
+        self.date = None
+        self._drawn_version = None
+
+    def _today(self):
+        return datetime.now(timezone.utc).strftime("%Y%m%d")
+
+    def _source(self, logs_dir):
+        return str(logs_dir) if len(self.logs_dirs) > 1 else ''
+
     def get_current_trades(self):
-        """Obtener trades del día actual."""
-        date = datetime.now(timezone.utc).strftime("%Y%m%d")
-        filepath = Path("logs") / "trades" / f"trades_{date}.csv"
-        
+        """Obtener trades del día actual (lectura completa del CSV, para análisis puntuales)."""
+        filepath = self.logs_dirs[0] / f"trades_{self._today()}.csv"
+
         if not filepath.exists():
             return pd.DataFrame()
-        
+
         try:
             df = pd.read_csv(filepath)
             return df
         except:
             return pd.DataFrame()
-    
+
+    def _bootstrap(self, logs_dir, source):
+        """
+        Empezar a seguir un directorio: estado actual del CSV (una sola lectura)
+        y después solo el journal desde su tamaño actual.
+        """
+        journal = JournalFollower(logs_dir / f"trades_{self.date}.journal")
+        journal.offset = journal.size()  # antes de leer el CSV: re-aplicar eventos es idempotente
+        csv_path = logs_dir / f"trades_{self.date}.csv"
+        if csv_path.exists():
+            try:
+                with open(csv_path, newline='', encoding='utf-8') as f:
+                    for row in csv.DictReader(f):
+                        self.stats.open(row, source)
+            except Exception as e:
+                print(f"⚠️ Error leyendo {csv_path}: {e}")
+        self.followers[logs_dir] = journal
+
+    def poll(self):
+        """
+        Aplicar los eventos nuevos de todos los journals.
+
+        Returns:
+            True si cambió algo desde el último dibujo
+        """
+        today = self._today()
+        if today != self.date:
+            # Nuevo día: agregados desde cero
+            self.date = today
+            self.stats = LiveTradeStats()
+            self.followers = {}
+
+        for logs_dir in self.logs_dirs:
+            source = self._source(logs_dir)
+            follower = self.followers.get(logs_dir)
+            if follower is None:
+                self._bootstrap(logs_dir, source)
+                continue
+            events, truncated = follower.read_new()
+            if truncated:
+                # Journal recreado: volver a partir del CSV
+                self.stats.remove_source(source)
+                self._bootstrap(logs_dir, source)
+                continue
+            for event in events:
+                self.stats.apply_event(event, source)
+
+        return self.stats.version != self._drawn_version
+
     def clear_screen(self):
         """Limpiar pantalla."""
         os.system('cls' if os.name == 'nt' else 'clear')
-    
+
     def format_number(self, val, decimals=2):
         """Formatear número con decimales."""
         if pd.isna(val):
@@ -44,114 +273,98 @@ class TradesDashboard:
         if isinstance(val, (int, float)):
             return f"{val:.{decimals}f}"
         return str(val)
-    
-    def print_dashboard(self, df):
-        """Imprimir dashboard formateado."""
+
+    def print_dashboard(self):
+        """Imprimir dashboard formateado desde los agregados en memoria."""
         self.clear_screen()
-        
+        self._drawn_version = self.stats.version
+        stats = self.stats
+
         now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
         print(f"🤖 TRADES DASHBOARD - {now}")
         print("=" * 120)
-        
-        if df.empty:
+
+        if not stats.total:
             print("⏳ Sin trades aún...")
             return
-        
+
         # Estadísticas generales
-        total = len(df)
-        completed = df[df['result'].isin(['WIN', 'LOSS'])]
-        pending = len(df[df['result'] == 'PENDING'])
-        wins = len(df[df['result'] == 'WIN'])
-        losses = len(df[df['result'] == 'LOSS'])
-        
-        if len(completed) > 0:
-            wr = wins / len(completed) * 100
-        else:
-            wr = 0
-        
-        total_profit = df[df['result'] == 'WIN']['profit_loss'].sum()
-        total_loss = abs(df[df['result'] == 'LOSS']['profit_loss'].sum())
-        net = total_profit - total_loss
-        
+        wins = stats.by_result['WIN']
+        losses = stats.by_result['LOSS']
+        pending = stats.by_result['PENDING']
+        wr = wins / (wins + losses) * 100 if wins + losses else 0
+        net = stats.win_profit - stats.loss_sum
+
         # Fila de stats
-        print(f"📊 Total: {total} | ✅ {wins}W | ❌ {losses}L | ⏳ {pending}P | 📈 WR: {wr:.1f}%")
-        print(f"💰 Ganancia: ${total_profit:.2f} | 💸 Pérdida: ${total_loss:.2f} | 📊 Neto: ${net:.2f}")
+        print(f"📊 Total: {stats.total} | ✅ {wins}W | ❌ {losses}L | ⏳ {pending}P | 📈 WR: {wr:.1f}%")
+        print(f"💰 Ganancia: ${stats.win_profit:.2f} | 💸 Pérdida: ${stats.loss_sum:.2f} | 📊 Neto: ${net:.2f}")
         print("=" * 120)
-        
+
         # Últimos 10 trades (más recientes primero)
-        recent = df.tail(10).iloc[::-1]
-        
-        print("\n📌 ÚLTIMOS 10 TRADES:")
+        print(f"\n📌 ÚLTIMOS {RECENT_TRADES} TRADES:")
         print("-" * 120)
         print(f"{'ID':<12} {'Timestamp':<19} {'Par':<12} {'TF':<5} {'Dir':<5} {'Score':<6} {'Precio':<10} {'Result':<8} {'P/L':<10}")
         print("-" * 120)
-        
-        for _, row in recent.iterrows():
-            timestamp = row['timestamp'][:19] if isinstance(row['timestamp'], str) else str(row['timestamp'])[:19]
-            pair = str(row['pair'])[:12]
-            tf = str(row['timeframe'])
-            direction = row['decision']
-            score = f"{row['signal_score']:.0f}"
-            price = f"{row['price']:.5f}"
+
+        for key in reversed(stats.recent):
+            row = stats.trades[key]
             result = row['result']
-            profit = row['profit_loss'] if pd.notna(row['profit_loss']) else 0
-            
+
             # Color según resultado
             result_icon = "✅" if result == "WIN" else "❌" if result == "LOSS" else "⏳"
-            
-            print(f"{str(row['trade_id']):<12} {timestamp:<19} {pair:<12} {tf:<5} {direction:<5} {score:<6} {price:<10} {result_icon} {result:<7} ${profit:>8.2f}")
-        
+
+            print(f"{row['trade_id']:<12} {row['timestamp']:<19} {row['pair'][:12]:<12} {row['timeframe']:<5} "
+                  f"{row['decision']:<5} {row['signal_score']:<6.0f} {row['price']:<10.5f} "
+                  f"{result_icon} {result:<7} ${row['profit_loss']:>8.2f}")
+
         # Estadísticas por par
         print("\n" + "=" * 120)
         print("📊 ESTADÍSTICAS POR PAR:")
         print("-" * 120)
         print(f"{'Par':<15} {'Total':<8} {'Ganadas':<10} {'Perdidas':<10} {'Winrate':<10} {'Neto P/L':<12}")
         print("-" * 120)
-        
-        for pair in sorted(df['pair'].unique()):
-            pair_df = df[df['pair'] == pair]
-            pair_total = len(pair_df)
-            pair_wins = len(pair_df[pair_df['result'] == 'WIN'])
-            pair_losses = len(pair_df[pair_df['result'] == 'LOSS'])
-            pair_wr = (pair_wins / (pair_wins + pair_losses) * 100) if (pair_wins + pair_losses) > 0 else 0
-            pair_net = (pair_df[pair_df['result'] == 'WIN']['profit_loss'].sum() - 
-                       abs(pair_df[pair_df['result'] == 'LOSS']['profit_loss'].sum()))
-            
-            print(f"{pair:<15} {pair_total:<8} {pair_wins:<10} {pair_losses:<10} {pair_wr:>8.1f}% ${pair_net:>10.2f}")
-        
+
+        for pair, p in sorted(stats.by_pair.items()):
+            if not p['total']:
+                continue
+            done = p['wins'] + p['losses']
+            pair_wr = p['wins'] / done * 100 if done else 0
+            print(f"{pair:<15} {p['total']:<8} {p['wins']:<10} {p['losses']:<10} {pair_wr:>8.1f}% ${p['net']:>10.2f}")
+
+        # Por bot (cuando se siguen varios directorios)
+        if len(self.logs_dirs) > 1:
+            print("\n" + "=" * 120)
+            print("🤖 POR BOT:")
+            print("-" * 120)
+            for source, s in sorted(stats.by_source.items()):
+                done = s['wins'] + s['losses']
+                print(f"  {source:<40} | Trades: {s['total']:<5} | WR: "
+                      f"{(s['wins'] / done * 100 if done else 0):>5.1f}%")
+
         # Patrones más efectivos
         print("\n" + "=" * 120)
         print("🔍 PATRONES MÁS EFECTIVOS:")
         print("-" * 120)
-        
-        patterns = defaultdict(lambda: {'total': 0, 'wins': 0})
-        for _, row in completed.iterrows():
-            pattern = row['pattern_detected']
-            patterns[pattern]['total'] += 1
-            if row['result'] == 'WIN':
-                patterns[pattern]['wins'] += 1
-        
+
         sorted_patterns = sorted(
-            patterns.items(),
-            key=lambda x: (x[1]['wins'] / x[1]['total'] if x[1]['total'] > 0 else 0),
+            ((pattern, s) for pattern, s in stats.by_pattern.items() if s['total'] > 0),
+            key=lambda x: x[1]['wins'] / x[1]['total'],
             reverse=True
         )
-        
-        for pattern, stats in sorted_patterns[:5]:
-            if stats['total'] == 0:
-                continue
-            wr = stats['wins'] / stats['total'] * 100
-            print(f"  {pattern:<30} | Trades: {stats['total']:<4} | Ganadas: {stats['wins']:<4} | WR: {wr:>5.1f}%")
-        
+
+        for pattern, s in sorted_patterns[:5]:
+            wr = s['wins'] / s['total'] * 100
+            print(f"  {pattern:<30} | Trades: {s['total']:<4} | Ganadas: {s['wins']:<4} | WR: {wr:>5.1f}%")
+
         print("\n" + "=" * 120)
-        print(f"⏰ Actualización cada {self.update_interval}s | Presiona Ctrl+C para salir")
-    
+        print(f"⏰ Se actualiza al llegar trades (chequeo cada {self.update_interval}s) | Presiona Ctrl+C para salir")
+
     def run(self):
-        """Ejecutar dashboard con actualizaciones periódicas."""
+        """Ejecutar dashboard; redibuja solo cuando el journal trae eventos nuevos."""
         try:
             while True:
-                df = self.get_current_trades()
-                self.print_dashboard(df)
+                if self.poll():
+                    self.print_dashboard()
                 time.sleep(self.update_interval)
         except KeyboardInterrupt:
             self.clear_screen()
@@ -160,12 +373,14 @@ class TradesDashboard:
 
 def main():
     import argparse
-    
+
     parser = argparse.ArgumentParser(description='Dashboard de trades en tiempo real')
-    parser.add_argument('--interval', type=int, default=5, help='Intervalo de actualización en segundos')
+    parser.add_argument('--interval', type=float, default=1, help='Segundos entre chequeos del journal')
+    parser.add_argument('--logs', nargs='*', default=[LOGS_DIR],
+                        help='Directorios de logs a seguir (uno por bot)')
     args = parser.parse_args()
-    
-    dashboard = TradesDashboard(update_interval=args.interval)
+
+    dashboard = TradesDashboard(update_interval=args.interval, logs_dirs=args.logs)
     dashboard.run()
 
 
@@ -14,6 +14,8 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, confusion_matrix
 import joblib
 
+from feature_store import pair_index
+
 print("=" * 60)
 print("🤖 ENTRENAMIENTO DE MODELO ML (7 FEATURES + HORA)")
 print("=" * 60)
@@ -88,9 +90,7 @@ if not all(col in df_all.columns for col in required_base_cols):
         feature_cols.append('duration_minutes')
     
     if 'pair' in df_all.columns:
-        pairs = df_all['pair'].unique()
-        pair_map = {pair: idx for idx, pair in enumerate(pairs)}
-        df_all['pair_idx'] = df_all['pair'].map(pair_map)
+        df_all['pair_idx'] = df_all['pair'].map(pair_index)
         feature_cols.append('pair_idx')
     
     # Crear EMAs sintéticas (valores aleatorios para demostración)
@@ -114,9 +114,7 @@ else:
     
     # Procesar pair
     if 'pair' in df_all.columns:
-        pairs = df_all['pair'].unique()
-        pair_map = {pair: idx for idx, pair in enumerate(pairs)}
-        df_all['pair_idx'] = df_all['pair'].map(pair_map)
+        df_all['pair_idx'] = df_all['pair'].map(pair_index)
 
 print(f"  Features finales ({len(feature_cols)}): {feature_cols}")
 
@@ -0,0 +1,374 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Walk-Forward Optimization
+Optimiza la estrategia EMA pullback (la de main.py y bot_ema_pullback) en
+ventanas móviles train/test y la evalúa fuera de muestra en la ventana
+siguiente, en vez de ajustar sobre toda la historia (backtest.optimize).
+
+- Indicadores vectorizados una sola vez: cada EMA (una por span distinto de
+  la grilla) se calcula sobre toda la serie del par, igual que add_emas.
+  Como la EMA es causal, recortar después no mira el futuro.
+- Señales y resultados (+1 gana / -1 pierde / 0 empate) por combinación de
+  parámetros quedan en arrays int8; evaluar una ventana es recortar esos
+  arrays y elegir trades sin solapamiento (como el bot: una operación por
+  vez hasta el vencimiento), así cada ventana cuesta milisegundos.
+- Las ventanas se optimizan en paralelo en un pool de procesos.
+- Curva de equity fuera de muestra: los trades de cada ventana de test
+  cosidos en orden (P&L en unidades de stake).
+
+Uso:
+    python walk_forward.py --train-days 30 --test-days 7 --workers 4
+    python walk_forward.py --pairs EURUSD_otc GBPUSD_otc --anchored --payouts
+"""
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from candle_store import EXTENSION, HISTORY_DIR, TIMEFRAME_SECONDS, open_candles, to_records
+from feature_store import MIN_BARS
+from payout_cache import DEFAULT_PAYOUT, PayoutSeries
+
+# Grilla por defecto: spans de EMA y vencimiento en velas
+PARAM_GRID = {
+    'fast': (5, 8, 13),
+    'mid': (21, 34),
+    'slow': (55, 89),
+    'expiry': (1, 2, 3),
+}
+TRAIN_DAYS = 30
+TEST_DAYS = 7
+MIN_TRADES = 20  # Trades mínimos en train para que una combinación cuente
+OUTPUT_PATH = "walk_forward_windows.csv"
+
+
+def param_grid(grid: Dict[str, Sequence[int]] = PARAM_GRID) -> List[Dict[str, int]]:
+    """Combinaciones válidas (fast < mid < slow)."""
+    keys = list(grid)
+    combos = [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+    return [p for p in combos if p['fast'] < p['mid'] < p['slow']]
+
+
+def load_series(history_dir: str = HISTORY_DIR, tf: str = "M5",
+                pairs: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+    """Velas de cada par (.candles primero, si no CSV) como records."""
+    if pairs is None:
+        suffix = f"_{tf}"
+        names = os.listdir(history_dir) if os.path.isdir(history_dir) else []
+        pairs = sorted({os.path.splitext(n)[0][:-len(suffix)] for n in names
+                        if os.path.splitext(n)[1] in (EXTENSION, '.csv')
+                        and os.path.splitext(n)[0].endswith(suffix)})
+    series = {}
+    for pair in pairs:
+        candles = open_candles(pair, tf, history_dir)
+        if candles is not None:
+            records = np.asarray(candles.records)
+        else:
+            path = os.path.join(history_dir, f"{pair}_{tf}.csv")
+            if not os.path.exists(path):
+                print(f"⚠️ Sin historia {tf} para {pair}")
+                continue
+            records = to_records(pd.read_csv(path))
+        if len(records) > MIN_BARS:
+            series[pair] = records
+    return series
+
+
+def ema(close: np.ndarray, span: int) -> np.ndarray:
+    """EMA como la de los bots (ewm adjust=False) sobre toda la serie."""
+    return pd.Series(close).ewm(span=span, adjust=False).mean().to_numpy()
+
+
+def pullback_signals(close: np.ndarray, fast: np.ndarray, mid: np.ndarray, slow: np.ndarray) -> np.ndarray:
+    """
+    Señal de get_signal() en cada vela, vectorizada.
+
+    BUY:  fast > mid > slow, cierre previo <= fast y cierre actual > fast
+    SELL: fast < mid < slow, cierre previo >= fast y cierre actual < fast
+
+    Returns:
+        int8 array: +1 BUY, -1 SELL, 0 nada (también antes de MIN_BARS velas)
+    """
+    prev = np.r_[np.nan, close[:-1]]
+    buy = (fast > mid) & (mid > slow) & (prev <= fast) & (close > fast)
+    sell = (fast < mid) & (mid < slow) & (prev >= fast) & (close < fast)
+    signals = buy.astype(np.int8) - sell.astype(np.int8)
+    signals[:MIN_BARS - 1] = 0
+    return signals
+
+
+def outcomes(close: np.ndarray, signals: np.ndarray, expiry: int) -> np.ndarray:
+    """+1 gana / -1 pierde / 0 empate o sin señal, con el cierre `expiry` velas después."""
+    move = np.zeros(len(close))
+    move[:-expiry] = close[expiry:] - close[:-expiry]
+    return (np.sign(move) * signals).astype(np.int8)
+
+
+def payout_per_bar(payouts: Optional[PayoutSeries], pair: str, times: np.ndarray) -> np.ndarray:
+    """PayoutSeries.at() de cada vela, vectorizado (searchsorted sobre todas a la vez)."""
+    if payouts is None:
+        return np.full(len(times), DEFAULT_PAYOUT)
+    entry = payouts.series.get(pair)
+    if entry is None:
+        return np.full(len(times), payouts.default)
+    record_times, values = entry
+    idx = np.searchsorted(record_times, times.astype(np.float64), side='right') - 1
+    return np.where(idx >= 0, values[np.clip(idx, 0, None)], payouts.default)
+
+
+class PreparedPair:
+    """Señales y resultados de un par para todas las combinaciones (filas = params)."""
+    __slots__ = ('pair', 'times', 'payout', 'signals', 'results', 'expiry')
+
+    def __init__(self, pair: str, records: np.ndarray, params: List[Dict[str, int]],
+                 payouts: Optional[PayoutSeries] = None):
+        close = np.ascontiguousarray(records['close'], dtype=np.float64)
+        self.pair = pair
+        self.times = np.ascontiguousarray(records['time'], dtype=np.int64)
+        self.payout = payout_per_bar(payouts, pair, self.times)
+
+        # Cada span una sola vez; las combinaciones reusan los arrays
+        spans = {p[k] for p in params for k in ('fast', 'mid', 'slow')}
+        emas = {span: ema(close, span) for span in spans}
+        self.signals = np.empty((len(params), len(close)), dtype=np.int8)
+        self.results = np.empty_like(self.signals)
+        self.expiry = np.array([p['expiry'] for p in params], dtype=np.int64)
+        for g, p in enumerate(params):
+            self.signals[g] = pullback_signals(close, emas[p['fast']], emas[p['mid']], emas[p['slow']])
+            self.results[g] = outcomes(close, self.signals[g], p['expiry'])
+
+    def trades(self, g: int, lo_t: float, hi_t: float) -> np.ndarray:
+        """
+        Índices de las entradas de la combinación g en [lo_t, hi_t).
+
+        Solo entradas que vencen dentro de la ventana y sin solapamiento:
+        la siguiente entra después del vencimiento de la anterior.
+        """
+        lo = int(np.searchsorted(self.times, lo_t, side='left'))
+        hi = int(np.searchsorted(self.times, hi_t, side='left'))
+        expiry = int(self.expiry[g])
+        candidates = np.flatnonzero(self.signals[g, lo:max(lo, hi - expiry)]) + lo
+        taken, free_at = [], -1
+        for i in candidates.tolist():
+            if i > free_at:
+                taken.append(i)
+                free_at = i + expiry
+        return np.asarray(taken, dtype=np.int64)
+
+    def pnl(self, g: int, idx: np.ndarray) -> np.ndarray:
+        """P&L por trade en unidades de stake (win = payout, loss = -1, empate = 0)."""
+        result = self.results[g, idx]
+        return np.where(result > 0, self.payout[idx], np.where(result < 0, -1.0, 0.0))
+
+
+def prepare(series: Dict[str, np.ndarray], params: List[Dict[str, int]],
+            payouts: Optional[PayoutSeries] = None) -> Dict[str, PreparedPair]:
+    """Indicadores, señales y resultados de cada par (una vez, antes de las ventanas)."""
+    return {pair: PreparedPair(pair, records, params, payouts) for pair, records in series.items()}
+
+
+def make_windows(start: float, end: float, train_seconds: float, test_seconds: float,
+                 anchored: bool = False) -> List[Tuple[float, float, float, float]]:
+    """
+    Ventanas (train_lo, train_hi, test_lo, test_hi); cada test sigue a su train
+    y los tests se suceden sin solaparse. anchored=True: train desde el inicio.
+    """
+    windows = []
+    train_lo, train_hi = float(start), float(start) + train_seconds
+    while train_hi + test_seconds <= end:
+        windows.append((train_lo, train_hi, train_hi, train_hi + test_seconds))
+        train_hi += test_seconds
+        if not anchored:
+            train_lo += test_seconds
+    return windows
+
+
+# ------------------------------------------------------------------ workers
+
+_PREPARED: Dict[str, PreparedPair] = {}
+_PARAMS: List[Dict[str, int]] = []
+_MIN_TRADES = MIN_TRADES
+
+
+def _init_worker(prepared, params, min_trades):
+    global _PREPARED, _PARAMS, _MIN_TRADES
+    _PREPARED, _PARAMS, _MIN_TRADES = prepared, params, min_trades
+
+
+def _stats(g: int, lo_t: float, hi_t: float):
+    """(pnl, trades, wins) de la combinación g sumando todos los pares."""
+    pnl = trades = wins = 0
+    for prep in _PREPARED.values():
+        idx = prep.trades(g, lo_t, hi_t)
+        pnl += float(prep.pnl(g, idx).sum())
+        trades += len(idx)
+        wins += int((prep.results[g, idx] > 0).sum())
+    return pnl, trades, wins
+
+
+def _optimize_window(window: Tuple[float, float, float, float]) -> Dict:
+    """Mejor combinación en train (P&L, desempate por trades) y sus trades en test."""
+    train_lo, train_hi, test_lo, test_hi = window
+    best, best_key = None, None
+    for g in range(len(_PARAMS)):
+        pnl, trades, wins = _stats(g, train_lo, train_hi)
+        if trades < _MIN_TRADES:
+            continue
+        if best_key is None or (pnl, trades) > best_key:
+            best, best_key = (g, pnl, trades, wins), (pnl, trades)
+
+    row = {'train_start': train_lo, 'train_end': train_hi, 'test_start': test_lo, 'test_end': test_hi,
+           'params': None, 'train_trades': 0, 'train_pnl': 0.0, 'train_winrate': 0.0,
+           'test_trades': 0, 'test_pnl': 0.0, 'test_winrate': 0.0}
+    trades = []
+    if best is None:
+        return {'window': row, 'trades': trades}
+
+    g, pnl, n, wins = best
+    row.update(params=dict(_PARAMS[g]), train_trades=n, train_pnl=pnl, train_winrate=wins / n)
+    for prep in _PREPARED.values():
+        idx = prep.trades(g, test_lo, test_hi)
+        for i, value in zip(idx.tolist(), prep.pnl(g, idx).tolist()):
+            trades.append((int(prep.times[i]), prep.pair, int(prep.signals[g, i]), value))
+    test_wins = sum(1 for t in trades if t[3] > 0)
+    row.update(test_trades=len(trades), test_pnl=sum(t[3] for t in trades),
+               test_winrate=test_wins / len(trades) if trades else 0.0)
+    return {'window': row, 'trades': trades}
+
+
+# ------------------------------------------------------------------ pipeline
+
+class WalkForwardResult:
+    """Ventanas (params elegidos, métricas in/out of sample) y trades fuera de muestra cosidos."""
+
+    def __init__(self, windows: pd.DataFrame, trades: pd.DataFrame):
+        self.windows = windows
+        self.trades = trades
+
+    def equity(self) -> pd.Series:
+        """Curva de equity fuera de muestra (P&L acumulado en stakes), indexada por tiempo."""
+        if self.trades.empty:
+            return pd.Series(dtype=float)
+        return pd.Series(self.trades['pnl'].cumsum().to_numpy(),
+                         index=pd.to_datetime(self.trades['time'], unit='s', utc=True))
+
+    def summary(self) -> Dict:
+        trades, windows = self.trades, self.windows
+        equity = np.r_[0.0, trades['pnl'].cumsum().to_numpy()] if len(trades) else np.zeros(1)
+        drawdown = float(np.max(np.maximum.accumulate(equity) - equity))
+        train_secs = (windows['train_end'] - windows['train_start']).sum() if len(windows) else 0
+        test_secs = (windows['test_end'] - windows['test_start']).sum() if len(windows) else 0
+        is_rate = windows['train_pnl'].sum() / train_secs if train_secs else 0.0
+        oos_rate = windows['test_pnl'].sum() / test_secs if test_secs else 0.0
+        return {
+            'windows': len(windows),
+            'traded_windows': int(windows['params'].notna().sum()) if len(windows) else 0,
+            'oos_trades': len(trades),
+            'oos_winrate': float((trades['pnl'] > 0).mean()) if len(trades) else 0.0,
+            'oos_pnl': float(equity[-1]),
+            'oos_max_drawdown': drawdown,
+            # Walk-forward efficiency: P&L por unidad de tiempo fuera vs dentro de muestra
+            'wfe': oos_rate / is_rate if is_rate > 0 else 0.0,
+            'current_params': windows['params'].dropna().iloc[-1] if len(windows) and windows['params'].notna().any() else None,
+        }
+
+
+def walk_forward(series: Dict[str, np.ndarray], train_days: float = TRAIN_DAYS, test_days: float = TEST_DAYS,
+                 grid: Dict[str, Sequence[int]] = PARAM_GRID, anchored: bool = False, workers: int = 1,
+                 min_trades: int = MIN_TRADES, payouts: Optional[PayoutSeries] = None) -> WalkForwardResult:
+    """
+    Walk-forward completo sobre las series de velas.
+
+    Args:
+        series: {pair: records} (load_series)
+        train_days/test_days: Largo de las ventanas
+        grid: Valores por parámetro (fast, mid, slow, expiry)
+        anchored: Train expandible desde el inicio en vez de móvil
+        workers: Procesos para optimizar ventanas en paralelo
+        min_trades: Trades mínimos en train para aceptar una combinación
+        payouts: PayoutSeries registrada (None = DEFAULT_PAYOUT)
+    """
+    params = param_grid(grid)
+    prepared = prepare(series, params, payouts)
+    if not prepared:
+        return WalkForwardResult(pd.DataFrame(), pd.DataFrame(columns=['time', 'pair', 'direction', 'pnl']))
+
+    start = min(int(p.times[0]) for p in prepared.values())
+    end = max(int(p.times[-1]) for p in prepared.values()) + 1
+    windows = make_windows(start, end, train_days * 86400, test_days * 86400, anchored)
+
+    if workers > 1 and len(windows) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(windows)), initializer=_init_worker,
+                                 initargs=(prepared, params, min_trades)) as pool:
+            results = list(pool.map(_optimize_window, windows,
+                                    chunksize=max(1, len(windows) // (4 * workers))))
+    else:
+        _init_worker(prepared, params, min_trades)
+        results = [_optimize_window(w) for w in windows]
+
+    rows = pd.DataFrame([r['window'] for r in results])
+    trades = pd.DataFrame([t for r in results for t in r['trades']],
+                          columns=['time', 'pair', 'direction', 'pnl'])
+    trades = trades.sort_values('time', kind='stable').reset_index(drop=True)
+    return WalkForwardResult(rows, trades)
+
+
+def main():
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Walk-forward de la estrategia EMA pullback')
+    parser.add_argument('--history', default=HISTORY_DIR)
+    parser.add_argument('--tf', default='M5', choices=sorted(TIMEFRAME_SECONDS))
+    parser.add_argument('--pairs', nargs='*', help='Pares (default: todos los de la historia)')
+    parser.add_argument('--train-days', type=float, default=TRAIN_DAYS)
+    parser.add_argument('--test-days', type=float, default=TEST_DAYS)
+    parser.add_argument('--anchored', action='store_true', help='Train expandible desde el inicio')
+    parser.add_argument('--min-trades', type=int, default=MIN_TRADES)
+    parser.add_argument('--payouts', action='store_true', help='Payouts registrados en logs/payouts')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--out', default=OUTPUT_PATH, help='CSV con las ventanas')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"🚶 WALK-FORWARD EMA PULLBACK | {args.tf} | train {args.train_days:g}d / test {args.test_days:g}d"
+          f"{' (anclado)' if args.anchored else ''}")
+    print("=" * 60)
+
+    series = load_series(args.history, args.tf, args.pairs)
+    print(f"📁 {len(series)} pares | {sum(len(r) for r in series.values())} velas | "
+          f"{len(param_grid())} combinaciones")
+
+    t0 = time.perf_counter()
+    result = walk_forward(series, args.train_days, args.test_days, anchored=args.anchored,
+                          workers=args.workers, min_trades=args.min_trades,
+                          payouts=PayoutSeries.load() if args.payouts else None)
+    elapsed = time.perf_counter() - t0
+
+    for _, w in result.windows.iterrows():
+        day = pd.to_datetime(w['test_start'], unit='s').strftime('%Y-%m-%d %H:%M')
+        params = w['params']
+        label = (f"EMA {params['fast']}/{params['mid']}/{params['slow']} exp {params['expiry']}"
+                 if params else "sin combinación válida")
+        print(f"{day} {label:<26} IS {w['train_pnl']:>+7.1f} ({w['train_trades']:>4}) | "
+              f"OOS {w['test_pnl']:>+7.1f} ({w['test_trades']:>3}, {w['test_winrate']:.0%})")
+
+    s = result.summary()
+    print("-" * 60)
+    print(f"Ventanas: {s['windows']} ({s['traded_windows']} con params) en {elapsed:.2f}s")
+    print(f"OOS: {s['oos_trades']} trades | winrate {s['oos_winrate']:.1%} | P&L {s['oos_pnl']:+.1f} stakes | "
+          f"max DD {s['oos_max_drawdown']:.1f} | WFE {s['wfe']:.2f}")
+    print(f"Params vigentes (última ventana): {s['current_params']}")
+
+    if len(result.windows):
+        result.windows.to_csv(args.out, index=False)
+        print(f"💾 Ventanas guardadas en {args.out}")
+
+
+if __name__ == "__main__":
+    main()